@@ -0,0 +1,116 @@
+"""
+Benchmarks of the hot paths of the plotting, image processing and machine learning scripts on synthetic recordings.
+See conftest.py for the recordings and the --events and --waveform options.
+"""
+
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from plotting_utils import frame_accumulator, synthetic
+from plotting_utils.get_plotting_data import DataStorage, SpatialCsvData, read_aedat_csv
+from plotting_utils.plotting_helper import plot_hist
+
+
+def count_rows(csv_file: str) -> int:
+    with open(csv_file) as f:
+        return sum(1 for _ in f) - 1
+
+
+def test_spatial_csv_data_from_csv(measure, event_csv, num_events):
+    data = measure(SpatialCsvData.from_csv, event_csv, DataStorage.BOOL, num_items=num_events)
+    assert len(data.timestamps) == num_events
+
+
+def test_read_aedat_csv(measure, event_count_csv, count_window_us):
+    num_rows = count_rows(event_count_csv)
+    data = measure(read_aedat_csv, event_count_csv, count_window_us, num_items=num_rows, unit="rows")
+    assert len(data.y_all) == num_rows
+
+
+def test_get_activity_area(measure, event_csv, num_events):
+    from spike_graph import get_activity_area
+
+    # The synthetic spot moves across the middle rows of the sensor, so this area sees events
+    points = measure(get_activity_area, event_csv, 64, 64, 10, num_items=num_events)
+    assert len(points) > 0
+
+
+def test_get_activity_area_parquet(measure, event_csv, num_events, tmp_path_factory):
+    pytest.importorskip("pyarrow")
+    from plotting_utils import parquet_store
+    from spike_graph import get_activity_area
+
+    store = str(tmp_path_factory.mktemp("stores") / "events.parquet")
+    parquet_store.write_event_store(event_csv, store)
+
+    # Only the row groups of the area are read
+    points = measure(get_activity_area, store, 64, 64, 10, num_items=num_events)
+    assert points == get_activity_area(event_csv, 64, 64, 10)
+
+
+def test_plot_hist(measure, event_count_csv, count_window_us):
+    counts = read_aedat_csv(event_count_csv, count_window_us).y_all
+    fig, axes = plt.subplots(1, 1, squeeze=False)
+
+    def plot():
+        axes[0][0].clear()
+        return plot_hist(counts, axes, 0, 0, "blue", False)
+
+    measure(plot, num_items=len(counts), unit="windows")
+    plt.close(fig)
+
+
+@pytest.fixture(scope="module")
+def event_image(num_events, recording_args) -> np.ndarray:
+    """An RGB image of the events of a DAVIS346 sized recording, like the frames of extract_pgm.py"""
+    width, height = 346, 260
+    events = synthetic.synthetic_events(num_events, width=width, height=height, **recording_args)
+    frames, _ = frame_accumulator.frames_by_time(events, 10_000, width=width, height=height)
+    gray = frame_accumulator.to_gray_image(frames.sum(axis=0))
+
+    return np.repeat(gray[..., np.newaxis], 3, axis=2)
+
+
+def test_get_entropy_image(measure, event_image):
+    from local_entropy import get_entropy_image
+
+    height, width = event_image.shape[:2]
+    entropy = measure(get_entropy_image, event_image, num_items=height * width, unit="pixels")
+    assert entropy.shape == event_image.shape[:2]
+
+
+@pytest.fixture(scope="module")
+def wave_and_freq_folder(tmp_path_factory, num_events, count_window_us) -> str:
+    """Event count CSVs of every waveform at two voltages, named like the recordings WaveAndFreqData expects"""
+    folder = tmp_path_factory.mktemp("wave_and_freq")
+    files_per_waveform = 2
+    events_per_file = max(num_events // (len(synthetic.WAVEFORMS) * files_per_waveform), 1)
+
+    for waveform in synthetic.WAVEFORMS:
+        os.makedirs(folder / waveform)
+        for seed, voltage in enumerate(["500mv", "400mv"]):
+            synthetic.write_event_count_csv(
+                str(folder / waveform / f"{waveform}_{voltage}.csv"),
+                events_per_file,
+                count_window_us,
+                waveform=waveform,
+                seed=seed,
+            )
+
+    return str(folder)
+
+
+def test_wave_and_freq_data(measure, wave_and_freq_folder):
+    from get_data import WaveAndFreqData
+
+    num_rows = sum(
+        count_rows(os.path.join(directory, name))
+        for directory, _, names in os.walk(wave_and_freq_folder)
+        for name in names
+    )
+    # Windows of 10 rows, so even the smallest recordings have enough samples to split into train and test sets
+    wf_data = measure(WaveAndFreqData, 10, wave_and_freq_folder, num_items=num_rows, unit="rows")
+    assert len(wf_data.train_input) > 0
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import matplotlib
+import pytest
+
+from plotting_utils import synthetic
+
+# Figures are only drawn, never shown
+matplotlib.use("Agg")
+
+# The scripts import their sibling modules directly, so their directories are added like running them would
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+for directory in ("plotting", "image_processing", "MachineLearning"):
+    sys.path.insert(0, os.path.join(SRC_DIRECTORY, directory))
+
+EVENT_RATE = 1e6
+"""Events per second of the synthetic recordings"""
+COUNT_WINDOW_US = 100
+"""Reconstruction window of the event count CSVs. At EVENT_RATE there are 100 events per window"""
+
+TARGET_SECONDS = 1.0
+"""Time each benchmark is run for, within MIN_ROUNDS and MAX_ROUNDS rounds"""
+MIN_ROUNDS = 3
+MAX_ROUNDS = 100
+
+_throughputs: Dict[str, Dict[str, float]] = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--events",
+        type=lambda value: int(float(value)),
+        default=100_000,
+        help="Number of events in the synthetic recordings, from 1e4 to 1e8",
+    )
+    parser.addoption("--waveform", choices=synthetic.WAVEFORMS, default="sine", help="Motion pattern of the recordings")
+
+
+@pytest.fixture(scope="session")
+def num_events(request) -> int:
+    return request.config.getoption("--events")
+
+
+@pytest.fixture(scope="session")
+def recording_args(request) -> Dict:
+    return {"event_rate": EVENT_RATE, "waveform": request.config.getoption("--waveform")}
+
+
+@pytest.fixture(scope="session")
+def count_window_us() -> int:
+    return COUNT_WINDOW_US
+
+
+@pytest.fixture(scope="session")
+def event_csv(tmp_path_factory, num_events, recording_args) -> str:
+    path = tmp_path_factory.mktemp("recordings") / f"{recording_args['waveform']}_events.csv"
+    return synthetic.write_event_csv(str(path), num_events, start_timestamp=478504058, **recording_args)
+
+
+@pytest.fixture(scope="session")
+def event_count_csv(tmp_path_factory, num_events, count_window_us, recording_args) -> str:
+    path = tmp_path_factory.mktemp("recordings") / f"{recording_args['waveform']}_counts.csv"
+    return synthetic.write_event_count_csv(str(path), num_events, count_window_us, **recording_args)
+
+
+@pytest.fixture
+def measure(benchmark, request) -> Callable:
+    """Benchmarks function(*args) and records how many items (events unless given) it processes per second and its
+    peak memory use, which are printed after the benchmark table and saved with the benchmark"""
+
+    def run(function: Callable, *args, num_items: int, unit: str = "events"):
+        # A warm up run decides the number of rounds, so that fast functions are timed often enough to be stable
+        start = time.perf_counter()
+        function(*args)
+        rounds = min(max(int(TARGET_SECONDS / (time.perf_counter() - start)), MIN_ROUNDS), MAX_ROUNDS)
+
+        # Peak memory is measured on a separate run because tracing allocations slows the code down
+        tracemalloc.start()
+        try:
+            function(*args)
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = benchmark.pedantic(function, args, rounds=rounds, iterations=1)
+
+        benchmark.extra_info["peak_memory_mb"] = peak_bytes / 2**20
+        if benchmark.stats is not None:
+            benchmark.extra_info[f"{unit}_per_second"] = num_items / benchmark.stats.stats.mean
+        _throughputs[request.node.name] = dict(benchmark.extra_info)
+
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _throughputs:
+        return
+
+    terminalreporter.section("throughput and peak memory")
+    for name, info in sorted(_throughputs.items()):
+        throughput = ", ".join(f"{value:,.0f} {key.replace('_', ' ')}" for key, value in info.items() if "per" in key)
+        terminalreporter.write_line(f"{name:<45} {throughput:<35} {info['peak_memory_mb']:9.1f} MB peak")
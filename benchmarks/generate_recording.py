@@ -0,0 +1,63 @@
+"""
+Writes a deterministic synthetic recording as an event CSV (On/Off,X,Y,Timestamp) or an event count CSV
+(On Count,Off Count,Combined Count), for example to benchmark a script on a recording of a given size:
+    python benchmarks/generate_recording.py sine_1e7.csv --events 1e7 --waveform sine
+"""
+
+import argparse
+import time
+
+from plotting_utils import synthetic
+from plotting_utils.plotting_helper import float_arg_positive_nonzero, int_arg_not_negative, int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("output_csv", help="CSV file to write")
+    parser.add_argument(
+        "--events", "-n", help="Number of events", type=lambda value: int(float(value)), default=1_000_000
+    )
+    parser.add_argument("--waveform", "-w", help="Motion pattern", choices=synthetic.WAVEFORMS, default="sine")
+    parser.add_argument(
+        "--frequency",
+        "-f",
+        help="Periods of the motion pattern per second",
+        type=float_arg_positive_nonzero,
+        default=10,
+    )
+    parser.add_argument("--event_rate", "-r", help="Events per second", type=float_arg_positive_nonzero, default=1e6)
+    parser.add_argument("--seed", "-s", help="Seed of the recording", type=int_arg_not_negative, default=0)
+    parser.add_argument(
+        "--counts",
+        "-c",
+        help="Write event counts per reconstruction window of this many microseconds instead of events",
+        type=int_arg_positive_nonzero,
+    )
+
+    args = parser.parse_args()
+    if args.events < 1:
+        parser.error("--events must be at least 1")
+
+    return args
+
+
+def main(args: argparse.Namespace):
+    start = time.perf_counter()
+    recording_args = {
+        "event_rate": args.event_rate,
+        "waveform": args.waveform,
+        "frequency": args.frequency,
+        "seed": args.seed,
+    }
+
+    if args.counts is None:
+        synthetic.write_event_csv(args.output_csv, args.events, **recording_args)
+    else:
+        synthetic.write_event_count_csv(args.output_csv, args.events, args.counts, **recording_args)
+
+    print(f"Wrote {args.events} events to '{args.output_csv}' in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,161 @@
+"""
+Benchmarks data-parallel training of the waveform and frequency model over 1, 2 and 4 local workers.
+
+A synthetic event count dataset is generated once and every worker count trains on it for the same number of
+epochs. The first epoch is excluded from the timings since it includes graph tracing and worker setup.
+Results are printed as a table and saved to a JSON file.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+
+import distributed_training
+import training_metrics
+import waveformsAndFrequencyML
+from plotting_utils.plotting_helper import int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", help="Worker counts to benchmark", type=int_arg_positive_nonzero, nargs="+", default=[1, 2, 4]
+    )
+    parser.add_argument(
+        "--num_samples", "-n", help="Number of synthetic windows", type=int_arg_positive_nonzero, default=4096
+    )
+    parser.add_argument(
+        "--frame_count", "-fc", help="Frames in each window", type=int_arg_positive_nonzero, default=1000
+    )
+    parser.add_argument(
+        "--num_epochs",
+        "-e",
+        help="Epochs to train, including the warm up epoch",
+        type=int_arg_positive_nonzero,
+        default=4,
+    )
+    parser.add_argument(
+        "--batch_size", "-b", help="Batch size of each worker", type=int_arg_positive_nonzero, default=32
+    )
+    parser.add_argument("--pin_workers", help="Pin each worker to its own block of CPUs", action="store_true")
+    parser.add_argument(
+        "--output", "-o", help="JSON file the results are saved to", type=str, default="distributed_benchmark.json"
+    )
+
+    # Set by the launching process
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--result_dir", help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+
+def make_synthetic_data(num_samples: int, frame_count: int, seed: int = 0):
+    """Generates event count windows shaped like the real data: (samples, frames, [on, off, total])"""
+    rng = np.random.default_rng(seed)
+    rates = rng.uniform(5, 50, size=(num_samples, 1, 2))
+
+    counts = rng.poisson(rates, size=(num_samples, frame_count, 2)).astype(np.float32)
+    inputs = np.concatenate([counts, counts.sum(axis=2, keepdims=True)], axis=2)
+
+    return inputs, rng.integers(0, 5, num_samples), rng.integers(0, 4, num_samples)
+
+
+def run_worker(args: argparse.Namespace):
+    # The strategy has to exist before TensorFlow runs anything else
+    strategy = distributed_training.create_strategy()
+
+    data = np.load(args.data)
+
+    with strategy.scope():
+        model = waveformsAndFrequencyML.build_model(args.frame_count)
+        model.compile(
+            optimizer=tf.optimizers.Adamax(learning_rate=0.001),
+            loss="sparse_categorical_crossentropy",
+            metrics=["accuracy"],
+        )
+
+    dataset, steps_per_epoch = distributed_training.sharded_dataset(
+        strategy, data["inputs"], [data["waveforms"], data["frequencies"]], args.batch_size
+    )
+
+    result_path = distributed_training.worker_result_path(args.result_dir)
+    throughput = training_metrics.ThroughputCallback(
+        result_path, steps_per_epoch * args.batch_size * strategy.num_replicas_in_sync
+    )
+
+    model.fit(dataset, epochs=args.num_epochs, steps_per_epoch=steps_per_epoch, callbacks=[throughput], verbose=0)
+
+    if not distributed_training.is_chief():
+        shutil.rmtree(result_path, ignore_errors=True)
+
+
+def summarize(result_dir: str, num_workers: int, batch_size: int) -> dict:
+    with open(os.path.join(result_dir, training_metrics.METRICS_FILE_NAME)) as f:
+        epochs = json.load(f)["epochs"]
+
+    timed = epochs[1:] or epochs
+    epoch_time = sum(epoch["train_time_s"] for epoch in timed) / len(timed)
+
+    return {
+        "workers": num_workers,
+        "global_batch_size": batch_size * num_workers,
+        "mean_epoch_time_s": epoch_time,
+        "samples_per_second": sum(epoch["samples_per_second"] for epoch in timed) / len(timed),
+    }
+
+
+def main(args: argparse.Namespace):
+    if distributed_training.is_worker():
+        run_worker(args)
+        return
+
+    temp_dir = tempfile.mkdtemp(prefix="distributed-benchmark-")
+    try:
+        data_path = os.path.join(temp_dir, "data.npz")
+        inputs, waveforms, frequencies = make_synthetic_data(args.num_samples, args.frame_count)
+        np.savez(data_path, inputs=inputs, waveforms=waveforms, frequencies=frequencies)
+
+        results = []
+        for num_workers in args.workers:
+            result_dir = os.path.join(temp_dir, f"workers{num_workers}")
+            os.makedirs(result_dir)
+
+            print(f"Training with {num_workers} worker(s)...")
+            return_code = distributed_training.launch_workers(
+                num_workers,
+                [*sys.argv, "--data", data_path, "--result_dir", result_dir],
+                args.pin_workers,
+            )
+            if return_code != 0:
+                sys.exit(f"Training with {num_workers} worker(s) failed with return code {return_code}")
+
+            results.append(summarize(result_dir, num_workers, args.batch_size))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    baseline = results[0]["samples_per_second"]
+    for result in results:
+        result["speedup"] = result["samples_per_second"] / baseline
+
+    machine = {"cpus": os.cpu_count(), "samples": args.num_samples, "frame_count": args.frame_count}
+    with open(args.output, "w") as f:
+        json.dump({"machine": machine, "results": results}, f, indent=4)
+
+    print(f"| Workers | Global batch | Epoch time (s) | Samples/s | Speedup vs {results[0]['workers']} worker(s) |")
+    print("|---|---|---|---|---|")
+    for result in results:
+        print(
+            f"| {result['workers']} | {result['global_batch_size']} | {result['mean_epoch_time_s']:.2f} "
+            f"| {result['samples_per_second']:.1f} | {result['speedup']:.2f}x |"
+        )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,116 @@
+"""
+Compares trained waveform and frequency models, such as a teacher and its distilled students, on the test split.
+For every model the test accuracy of both heads, the latency of classifying one window at a time,
+the batched throughput, and the model's size on disk are reported.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import classify
+import get_data
+from plotting_utils.plotting_helper import file_arg, int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", help="Models to compare (.keras or .tflite)", type=file_arg, nargs="+")
+    parser.add_argument("--data_folder", "-d", help="Folder of event count CSVs", type=str, default="data")
+    parser.add_argument(
+        "--latency_windows",
+        "-l",
+        help="Number of single-window predictions timed for the latency",
+        type=int_arg_positive_nonzero,
+        default=200,
+    )
+    parser.add_argument(
+        "--batch_size",
+        "-b",
+        help="Batch size used for accuracy and throughput",
+        type=int_arg_positive_nonzero,
+        default=256,
+    )
+    parser.add_argument(
+        "--num_threads", "-n", help="Number of threads used by the TFLite interpreter", type=int_arg_positive_nonzero
+    )
+    parser.add_argument("--output", "-o", help="Also save the results to this JSON file", type=str)
+
+    return parser.parse_args()
+
+
+def benchmark_model(
+    model_path: str, predictor, wf_data: get_data.WaveAndFreqData, latency_windows: int, batch_size: int
+) -> Dict:
+    # Accuracy and throughput over the whole test split
+    waveform_ids = []
+    frequency_ids = []
+    start = time.perf_counter()
+    for batch_start in range(0, len(wf_data.test_input), batch_size):
+        waveform_probs, frequency_probs = predictor.predict(wf_data.test_input[batch_start: batch_start + batch_size])
+        waveform_ids.append(waveform_probs.argmax(axis=1))
+        frequency_ids.append(frequency_probs.argmax(axis=1))
+    batch_time = time.perf_counter() - start
+
+    # Latency of classifying windows one at a time, as a live classifier does. The first few calls are warm up
+    windows = wf_data.test_input[: latency_windows + 10]
+    latencies = []
+    for i in range(len(windows)):
+        start = time.perf_counter()
+        predictor.predict(windows[i: i + 1])
+        latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies[10:] or latencies) * 1000
+
+    num_params = predictor.model.count_params() if isinstance(predictor, classify.KerasPredictor) else None
+
+    return {
+        "model": model_path,
+        "waveform_accuracy": float(np.mean(np.concatenate(waveform_ids) == wf_data.waveform_test_output)),
+        "frequency_accuracy": float(np.mean(np.concatenate(frequency_ids) == wf_data.frequency_test_output)),
+        "latency_median_ms": float(np.median(latencies_ms)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "windows_per_second": len(wf_data.test_input) / batch_time,
+        "size_mb": os.path.getsize(model_path) / (1024 * 1024),
+        "parameters": num_params,
+    }
+
+
+def main(args: argparse.Namespace):
+    # Models trained on the same frame count share the same test split
+    datasets: Dict[int, get_data.WaveAndFreqData] = {}
+    results: List[Dict] = []
+
+    for model_path in args.models:
+        predictor = classify.load_predictor(model_path, args.num_threads)
+        if predictor.frame_count not in datasets:
+            datasets[predictor.frame_count] = get_data.WaveAndFreqData(predictor.frame_count, args.data_folder)
+
+        results.append(
+            benchmark_model(
+                model_path, predictor, datasets[predictor.frame_count], args.latency_windows, args.batch_size
+            )
+        )
+
+    print(
+        "| Model | Waveform acc. | Frequency acc. | Latency median (ms) | Latency p95 (ms) | Windows/s | Size (MiB) |"
+    )
+    print("|---|---|---|---|---|---|---|")
+    for result in results:
+        print(
+            f"| {result['model']} | {result['waveform_accuracy']:.3f} | {result['frequency_accuracy']:.3f} "
+            f"| {result['latency_median_ms']:.2f} | {result['latency_p95_ms']:.2f} "
+            f"| {result['windows_per_second']:.1f} | {result['size_mb']:.2f} |"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from tensorflow import keras
+
+CHECKPOINT_DIRECTORY = "checkpoints"
+CHECKPOINT_MODEL_NAME = "latest.keras"
+CHECKPOINT_STATE_NAME = "checkpoint.json"
+BEST_WEIGHTS_NAME = "best_weights.npz"
+HISTORY_FILE_NAME = "history.csv"
+
+
+class ResumableEarlyStopping(keras.callbacks.EarlyStopping):
+    """EarlyStopping that can continue counting patience from a previous run instead of starting over.
+    With restore_best_weights, the best weights of the previous run are restored too, so the epoch restored at the end
+    may be one from before the run was resumed"""
+
+    def __init__(self, initial_state: Optional[Dict] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_state = initial_state or {}
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+
+        if self.initial_state:
+            self.wait = self.initial_state["wait"]
+            self.best = self.initial_state["best"]
+            self.best_epoch = self.initial_state["best_epoch"]
+            if self.restore_best_weights:
+                self.best_weights = self.initial_state.get("best_weights")
+
+    def get_state(self) -> Dict:
+        return {"wait": self.wait, "best": float(self.best), "best_epoch": self.best_epoch}
+
+
+class PeriodicCheckpoint(keras.callbacks.Callback):
+    """Saves the full model, including optimizer state, to result_path/checkpoints every interval epochs.
+    The last completed epoch is always saved when training ends so that an early stop can be resumed too"""
+
+    def __init__(self, result_path: str, interval: int, early_stopping: Optional[ResumableEarlyStopping] = None):
+        super().__init__()
+        self.checkpoint_path = os.path.join(result_path, CHECKPOINT_DIRECTORY)
+        self.interval = interval
+        self.early_stopping = early_stopping
+        self._last_epoch: Optional[int] = None
+        self._last_saved: Optional[int] = None
+
+        os.makedirs(self.checkpoint_path, exist_ok=True)
+
+    def _save(self, epoch: int):
+        # Write to temporary files first so a crash mid-save never corrupts the previous checkpoint
+        model_path = os.path.join(self.checkpoint_path, CHECKPOINT_MODEL_NAME)
+        temp_model_path = os.path.join(self.checkpoint_path, "latest.tmp.keras")
+        self.model.save(temp_model_path)
+        os.replace(temp_model_path, model_path)
+
+        state = {"epoch": epoch + 1}
+        if self.early_stopping is not None:
+            state["early_stopping"] = self.early_stopping.get_state()
+
+            if self.early_stopping.best_weights is not None:
+                weights_path = os.path.join(self.checkpoint_path, BEST_WEIGHTS_NAME)
+                with open(weights_path + ".tmp", "wb") as f:
+                    np.savez(f, *self.early_stopping.best_weights)
+                os.replace(weights_path + ".tmp", weights_path)
+
+        state_path = os.path.join(self.checkpoint_path, CHECKPOINT_STATE_NAME)
+        with open(state_path + ".tmp", "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(state_path + ".tmp", state_path)
+
+        self._last_saved = epoch
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._last_epoch = epoch
+
+        if (epoch + 1) % self.interval == 0:
+            self._save(epoch)
+
+    def on_train_end(self, logs=None):
+        if self._last_epoch is not None and self._last_saved != self._last_epoch:
+            self._save(self._last_epoch)
+
+
+def find_run(run: str) -> str:
+    """Returns the results directory of a run given either its path or its timestamped directory name"""
+    if os.path.isdir(run):
+        return run
+
+    run_path = os.path.join("results", "MachineLearning", "WaveformAndFreq", run)
+    if os.path.isdir(run_path):
+        return run_path
+
+    raise FileNotFoundError(f"Could not find a training run at '{run}' or '{run_path}'")
+
+
+def load_checkpoint(result_path: str) -> Tuple[keras.Model, int, Optional[Dict]]:
+    """Loads the latest checkpoint of a run
+
+    Returns
+    -------
+    Tuple[keras.Model, int, Optional[Dict]]
+        The compiled model with its optimizer state, the number of completed epochs, and the early stopping state,
+        including the best weights if they were saved
+    """
+    checkpoint_path = os.path.join(result_path, CHECKPOINT_DIRECTORY)
+    state_path = os.path.join(checkpoint_path, CHECKPOINT_STATE_NAME)
+
+    if not os.path.isfile(state_path):
+        raise FileNotFoundError(f"Run '{result_path}' does not contain a checkpoint")
+
+    with open(state_path) as f:
+        state = json.load(f)
+
+    model = keras.models.load_model(os.path.join(checkpoint_path, CHECKPOINT_MODEL_NAME))
+
+    early_stopping_state = state.get("early_stopping")
+    weights_path = os.path.join(checkpoint_path, BEST_WEIGHTS_NAME)
+    if early_stopping_state is not None and os.path.isfile(weights_path):
+        with np.load(weights_path) as weights:
+            early_stopping_state["best_weights"] = [weights[f"arr_{i}"] for i in range(len(weights.files))]
+
+    return model, state["epoch"], early_stopping_state
+
+
+def load_history(result_path: str) -> Dict[str, List[float]]:
+    """Reads the per-epoch metrics logged to history.csv by keras.callbacks.CSVLogger"""
+    history: Dict[str, List[float]] = {}
+
+    with open(os.path.join(result_path, HISTORY_FILE_NAME), newline="") as csv_file:
+        for row in csv.DictReader(csv_file):
+            for key, value in row.items():
+                if key != "epoch":
+                    history.setdefault(key, []).append(float(value))
+
+    return history
+
+
+def truncate_history(result_path: str, num_epochs: int):
+    """Drops epochs logged after the checkpoint being resumed from, since they will be trained again"""
+    history_path = os.path.join(result_path, HISTORY_FILE_NAME)
+    if not os.path.isfile(history_path):
+        return
+
+    with open(history_path, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+
+    with open(history_path, "w", newline="") as csv_file:
+        csv.writer(csv_file).writerows(rows[: num_epochs + 1])  # +1 for the header
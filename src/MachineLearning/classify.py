@@ -0,0 +1,206 @@
+"""
+Classifies event count CSVs with a trained waveform and frequency model.
+Each CSV is split into windows of frame_count rows and the windows of all files are run through the model in batches.
+Predictions are reported per window and aggregated per file.
+
+CSV Format: On Count,Off Count,Combined Count
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from natsort import natsorted, ns
+
+import get_data
+from get_data import WaveAndFreqData
+from plotting_utils.plotting_helper import file_arg, path_arg, int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_path", help="Trained model to use (.keras or .tflite)", type=file_arg)
+    parser.add_argument(
+        "inputs", help="Event count CSVs or directories containing event count CSVs", type=path_arg, nargs="+"
+    )
+    parser.add_argument(
+        "--batch_size", "-b", help="Number of windows per inference batch", type=int_arg_positive_nonzero, default=256
+    )
+    parser.add_argument(
+        "--num_threads", "-n", help="Number of threads used by the TFLite interpreter", type=int_arg_positive_nonzero
+    )
+    parser.add_argument("--save_csv", "-s", help="Write per-window predictions to this CSV", type=str)
+    parser.add_argument("--quiet", "-q", help="Only print per-file results", action="store_true")
+
+    return parser.parse_args()
+
+
+class KerasPredictor:
+    def __init__(self, model_path: str):
+        from tensorflow import keras
+
+        self.model = keras.models.load_model(model_path)
+        self.frame_count: int = self.model.input_shape[1]
+
+    def predict(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        waveform, frequency = self.model.predict_on_batch(batch)
+        return np.asarray(waveform), np.asarray(frequency)
+
+
+class TFLitePredictor:
+    def __init__(self, model_path: str, num_threads=None):
+        import tensorflow as tf
+
+        interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.runner = interpreter.get_signature_runner()
+
+        input_details = self.runner.get_input_details()
+        self.input_name = next(iter(input_details))
+        self.frame_count: int = int(input_details[self.input_name]["shape"][1])
+
+    def predict(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Outputs are keyed by the names of the model's output layers
+        outputs = self.runner(**{self.input_name: batch.astype(np.float32)})
+        return outputs["Waveform"], outputs["Frequency"]
+
+
+def load_predictor(model_path: str, num_threads=None):
+    if model_path.endswith(".tflite"):
+        return TFLitePredictor(model_path, num_threads)
+
+    return KerasPredictor(model_path)
+
+
+def find_csv_files(inputs: List[str]) -> List[str]:
+    csv_files = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            csv_files.extend(glob.glob(os.path.join(input_path, "**", "*.csv"), recursive=True))
+        else:
+            csv_files.append(input_path)
+
+    return natsorted(csv_files, alg=ns.IGNORECASE)
+
+
+def iter_windows(csv_files: List[str], frame_count: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yields (file index, windows) for every readable CSV, one file at a time"""
+    for file_index, csv_file in enumerate(csv_files):
+        try:
+            windows = get_data.read_event_count_windows(csv_file, frame_count)
+        except ValueError as e:
+            print(f"{e}. Skipping...")
+            continue
+
+        if len(windows) == 0:
+            print(f"CSV file '{csv_file}' has fewer than {frame_count} rows. Skipping...")
+            continue
+
+        yield file_index, windows
+
+
+def iter_batches(
+    csv_files: List[str], frame_count: int, batch_size: int
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yields (batch, file indices, window indices) batches that may span several files"""
+    # Windows left over from the previous files, always fewer than batch_size
+    pending_windows = np.empty((0, frame_count, 3), dtype=np.int64)
+    pending_files = np.empty(0, dtype=int)
+    pending_indices = np.empty(0, dtype=int)
+
+    for file_index, windows in iter_windows(csv_files, frame_count):
+        # Every file is copied once, and batches are slices of it
+        all_windows = np.concatenate([pending_windows, windows])
+        all_files = np.concatenate([pending_files, np.full(len(windows), file_index)])
+        all_indices = np.concatenate([pending_indices, np.arange(len(windows))])
+
+        offset = 0
+        while len(all_windows) - offset >= batch_size:
+            batch = slice(offset, offset + batch_size)
+            yield all_windows[batch], all_files[batch], all_indices[batch]
+            offset += batch_size
+
+        pending_windows, pending_files, pending_indices = all_windows[offset:], all_files[offset:], all_indices[offset:]
+
+    if len(pending_windows) > 0:
+        yield pending_windows, pending_files, pending_indices
+
+
+def main(args: argparse.Namespace):
+    predictor = load_predictor(args.model_path, args.num_threads)
+    csv_files = find_csv_files(args.inputs)
+
+    waveform_names = WaveAndFreqData.waveform_names()
+    frequency_names = WaveAndFreqData.frequency_names()
+
+    # Per-file sums of the predicted probabilities, used to aggregate predictions over all windows of a file
+    waveform_prob_sums: Dict[int, np.ndarray] = {}
+    frequency_prob_sums: Dict[int, np.ndarray] = {}
+    window_counts: Dict[int, int] = {}
+
+    num_windows = 0
+    inference_time = 0.0
+    start_time = time.perf_counter()
+
+    with contextlib.ExitStack() as stack:
+        # Per-window predictions are written as they are made, so memory does not grow with the number of windows
+        window_writer = None
+        if args.save_csv:
+            window_writer = csv.writer(stack.enter_context(open(args.save_csv, "w", newline="")))
+            window_writer.writerow(["File", "Window", "Waveform", "Frequency"])
+
+        for batch, file_indices, window_indices in iter_batches(csv_files, predictor.frame_count, args.batch_size):
+            inference_start = time.perf_counter()
+            waveform_probs, frequency_probs = predictor.predict(batch)
+            inference_time += time.perf_counter() - inference_start
+
+            num_windows += len(batch)
+            waveform_ids = waveform_probs.argmax(axis=1)
+            frequency_ids = frequency_probs.argmax(axis=1)
+
+            for i, file_index in enumerate(file_indices):
+                if file_index not in window_counts:
+                    waveform_prob_sums[file_index] = np.zeros(waveform_probs.shape[1])
+                    frequency_prob_sums[file_index] = np.zeros(frequency_probs.shape[1])
+                    window_counts[file_index] = 0
+
+                waveform_prob_sums[file_index] += waveform_probs[i]
+                frequency_prob_sums[file_index] += frequency_probs[i]
+                window_counts[file_index] += 1
+
+                waveform = waveform_names.get(waveform_ids[i], str(waveform_ids[i]))
+                frequency = frequency_names.get(frequency_ids[i], str(frequency_ids[i]))
+                if window_writer is not None:
+                    window_writer.writerow([csv_files[file_index], window_indices[i], waveform, frequency])
+
+                if not args.quiet:
+                    print(f"{csv_files[file_index]} [window {window_indices[i]}]: {waveform} {frequency}")
+
+    total_time = time.perf_counter() - start_time
+
+    print("\nPer-file results:")
+    for file_index in sorted(window_counts):
+        waveform_id = int(waveform_prob_sums[file_index].argmax())
+        frequency_id = int(frequency_prob_sums[file_index].argmax())
+        confidence = waveform_prob_sums[file_index][waveform_id] / window_counts[file_index]
+        print(
+            f"{csv_files[file_index]}: {waveform_names.get(waveform_id, waveform_id)} "
+            f"{frequency_names.get(frequency_id, frequency_id)} "
+            f"({window_counts[file_index]} windows, mean waveform confidence {confidence:.3f})"
+        )
+
+    if total_time > 0:
+        print(
+            f"\nClassified {num_windows} windows from {len(window_counts)} files in {total_time:.2f}s "
+            f"({num_windows / total_time:.1f} windows/s overall, "
+            f"{num_windows / max(inference_time, 1e-9):.1f} windows/s inference only)"
+        )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,266 @@
+"""
+Distills a trained waveform and frequency model into a much smaller student model for low-latency inference.
+
+The teacher's predictions on the training set are computed once and softened with a temperature. The student is
+then trained on a mix of the true labels and the teacher's softened predictions (Hinton et al., 2015).
+The student keeps the teacher's input and output names so it can be used anywhere the teacher can,
+including classify.py and the TFLite export.
+"""
+
+import argparse
+import os
+
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import Input
+
+import checkpointing
+import get_data
+import model_export
+import saveWaveformsAndFreqResult
+import training_metrics
+from plotting_utils.plotting_helper import file_arg, float_arg_positive_nonzero, int_arg_positive_nonzero
+
+STUDENT_ARCHITECTURES = ["cnn", "gru"]
+
+# Keeps log() finite for the zero probabilities that sigmoid and softmax outputs can round to
+EPSILON = 1e-7
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("teacher", help="Trained teacher model (.keras)", type=file_arg)
+    parser.add_argument(
+        "--architecture", "-a", help="Student architecture", choices=STUDENT_ARCHITECTURES, default="cnn"
+    )
+    parser.add_argument(
+        "--pool_size",
+        "-ps",
+        help="Frames averaged together before the student sees them. The teacher uses 3",
+        type=int_arg_positive_nonzero,
+        default=10,
+    )
+    parser.add_argument(
+        "--temperature",
+        "-t",
+        help="Softens the teacher's predictions. Higher values expose more of how the teacher ranks wrong classes",
+        type=float_arg_positive_nonzero,
+        default=4.0,
+    )
+    parser.add_argument(
+        "--alpha",
+        help="Weight of the true labels in the loss. The teacher's predictions get 1 - alpha",
+        type=float,
+        default=0.1,
+    )
+    parser.add_argument("--num_epochs", "-e", help="Epochs to train for", type=int_arg_positive_nonzero, default=100)
+    parser.add_argument("--learning_rate", "-lr", help="Learning rate", type=float_arg_positive_nonzero, default=0.001)
+    parser.add_argument(
+        "--batch_size", "-b", help="Training batch size", type=int_arg_positive_nonzero, default=32
+    )
+    parser.add_argument(
+        "--tflite_quantization",
+        "-q",
+        help="Also export the student to TFLite with the given quantization",
+        choices=model_export.TFLITE_QUANTIZATIONS,
+        default=None,
+    )
+    parser.add_argument("--data_folder", "-d", help="Folder of event count CSVs", type=str, default="data")
+
+    args = parser.parse_args()
+    if not 0 <= args.alpha <= 1:
+        parser.error("--alpha must be between 0 and 1")
+
+    return args
+
+
+def build_student(
+    frame_count: int, num_waveforms: int, num_frequencies: int, architecture: str = "cnn", pool_size: int = 10
+) -> Model:
+    """Builds a small student model. Both architectures pool the input more aggressively than the teacher
+    so that the layers after the pooling see far fewer timesteps"""
+    input_1 = Input(shape=(frame_count, 3), name="Input")
+    common = keras.layers.AveragePooling1D(pool_size=pool_size, name="Common_Pooling")(input_1)
+
+    if architecture == "cnn":
+        common = keras.layers.Conv1D(32, 5, activation=tf.nn.relu, padding="same", name="Common_Conv1")(common)
+        common = keras.layers.MaxPooling1D(2, name="Common_MaxPool")(common)
+        common = keras.layers.Conv1D(32, 5, activation=tf.nn.relu, padding="same", name="Common_Conv2")(common)
+        common = keras.layers.GlobalAveragePooling1D(name="Common_GlobalPool")(common)
+    elif architecture == "gru":
+        common = keras.layers.GRU(32, reset_after=False, name="Common_GRU")(common)
+    else:
+        raise ValueError(f"Unknown student architecture '{architecture}'. Expected one of {STUDENT_ARCHITECTURES}")
+
+    waveform = keras.layers.Dense(32, activation=tf.nn.relu, name="Waveform_Dense1")(common)
+    output_wave = keras.layers.Dense(num_waveforms, activation=tf.nn.softmax, name="Waveform")(waveform)
+
+    frequency = keras.layers.Dense(32, activation=tf.nn.relu, name="Frequency_Dense1")(common)
+    output_freq = keras.layers.Dense(num_frequencies, activation=tf.nn.softmax, name="Frequency")(frequency)
+
+    return Model(inputs=input_1, outputs=[output_wave, output_freq])
+
+
+def soften(probabilities, temperature: float):
+    """Rescales class probabilities as if the logits that produced them had been divided by temperature.
+    Works with both numpy arrays and tensors"""
+    logits = tf.math.log(tf.clip_by_value(tf.cast(probabilities, tf.float32), EPSILON, 1.0)) / temperature
+    return tf.nn.softmax(logits, axis=-1)
+
+
+class Distiller(keras.Model):
+    """Trains a student on (input, (waveform, frequency, teacher waveform, teacher frequency)) batches.
+    The teacher's predictions must already be softened with the same temperature.
+    Validation only uses the true labels, so the validation metrics are directly comparable to the teacher's"""
+
+    def __init__(self, student: Model, temperature: float, alpha: float):
+        super().__init__()
+        self.student = student
+        self.temperature = temperature
+        self.alpha = alpha
+
+        self.hard_loss = keras.losses.SparseCategoricalCrossentropy()
+        self.soft_loss = keras.losses.KLDivergence()
+
+        self.loss_tracker = keras.metrics.Mean(name="loss")
+        self.waveform_accuracy = keras.metrics.SparseCategoricalAccuracy(name="Waveform_accuracy")
+        self.frequency_accuracy = keras.metrics.SparseCategoricalAccuracy(name="Frequency_accuracy")
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.waveform_accuracy, self.frequency_accuracy]
+
+    def call(self, inputs, training=False):
+        return self.student(inputs, training=training)
+
+    def _update_metrics(self, loss, waveform, frequency, waveform_probs, frequency_probs):
+        self.loss_tracker.update_state(loss)
+        self.waveform_accuracy.update_state(waveform, waveform_probs)
+        self.frequency_accuracy.update_state(frequency, frequency_probs)
+
+        return {metric.name: metric.result() for metric in self.metrics}
+
+    def train_step(self, data):
+        inputs, (waveform, frequency, teacher_waveform, teacher_frequency) = data
+
+        with tf.GradientTape() as tape:
+            waveform_probs, frequency_probs = self.student(inputs, training=True)
+
+            hard_loss = self.hard_loss(waveform, waveform_probs) + self.hard_loss(frequency, frequency_probs)
+            soft_loss = self.soft_loss(teacher_waveform, soften(waveform_probs, self.temperature)) + self.soft_loss(
+                teacher_frequency, soften(frequency_probs, self.temperature)
+            )
+
+            # Scaling by temperature^2 keeps the soft loss gradients the same size as the hard loss gradients
+            loss = self.alpha * hard_loss + (1 - self.alpha) * self.temperature**2 * soft_loss
+
+        gradients = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(gradients, self.student.trainable_variables))
+
+        return self._update_metrics(loss, waveform, frequency, waveform_probs, frequency_probs)
+
+    def test_step(self, data):
+        inputs, (waveform, frequency) = data
+
+        waveform_probs, frequency_probs = self.student(inputs, training=False)
+        loss = self.hard_loss(waveform, waveform_probs) + self.hard_loss(frequency, frequency_probs)
+
+        return self._update_metrics(loss, waveform, frequency, waveform_probs, frequency_probs)
+
+
+def distill(
+    teacher_path: str,
+    architecture: str = "cnn",
+    pool_size: int = 10,
+    temperature: float = 4.0,
+    alpha: float = 0.1,
+    num_epochs: int = 100,
+    learning_rate: float = 0.001,
+    batch_size: int = 32,
+    tflite_quantization=None,
+    data_folder: str = "data",
+) -> str:
+    """Trains a student of the teacher and saves it like a regular training run. Returns the results directory"""
+    teacher = keras.models.load_model(teacher_path)
+    frame_count = teacher.input_shape[1]
+    num_waveforms = teacher.outputs[0].shape[-1]
+    num_frequencies = teacher.outputs[1].shape[-1]
+
+    print("Preparing data...")
+    wf_data = get_data.WaveAndFreqData(frame_count, data_folder)
+    print("Data preparation complete")
+
+    # The teacher is frozen, so its predictions only need to be computed once rather than every step
+    teacher_waveform, teacher_frequency = teacher.predict(wf_data.train_input, batch_size=256)
+    teacher_waveform = soften(teacher_waveform, temperature).numpy()
+    teacher_frequency = soften(teacher_frequency, temperature).numpy()
+
+    student = build_student(frame_count, num_waveforms, num_frequencies, architecture, pool_size)
+    distiller = Distiller(student, temperature, alpha)
+    distiller.compile(optimizer=tf.optimizers.Adamax(learning_rate=learning_rate))
+
+    result_path = saveWaveformsAndFreqResult.create_result_directory("Distilled")
+
+    train_loader = training_metrics.TimedSequence(
+        wf_data.train_input,
+        [wf_data.waveform_train_output, wf_data.frequency_train_output, teacher_waveform, teacher_frequency],
+        batch_size,
+    )
+    callbacks = [
+        training_metrics.ThroughputCallback(result_path, len(wf_data.train_input), train_loader),
+        keras.callbacks.CSVLogger(os.path.join(result_path, checkpointing.HISTORY_FILE_NAME)),
+    ]
+
+    history = distiller.fit(
+        train_loader,
+        validation_data=(wf_data.test_input, (wf_data.waveform_test_output, wf_data.frequency_test_output)),
+        epochs=num_epochs,
+        callbacks=callbacks,
+    )
+
+    saveWaveformsAndFreqResult.save(
+        history,
+        student,
+        wf_data.test_input,
+        wf_data.waveform_test_output,
+        wf_data.frequency_test_output,
+        frame_count,
+        len(history.history["loss"]),
+        learning_rate,
+        False,
+        tflite_quantization,
+        result_path,
+    )
+
+    with open(os.path.join(result_path, "results.txt"), "a") as f:
+        f.write(f"Teacher: {teacher_path}\n")
+        f.write(f"Teacher Parameters: {teacher.count_params()}\n")
+        f.write(f"Student Parameters: {student.count_params()}\n")
+        f.write(f"Architecture: {architecture}\n")
+        f.write(f"Pool Size: {pool_size}\n")
+        f.write(f"Temperature: {temperature}\n")
+        f.write(f"Alpha: {alpha}\n")
+
+    print(f"Student saved to '{result_path}' ({student.count_params()} vs {teacher.count_params()} parameters)")
+    return result_path
+
+
+def main(args: argparse.Namespace):
+    distill(
+        args.teacher,
+        args.architecture,
+        args.pool_size,
+        args.temperature,
+        args.alpha,
+        args.num_epochs,
+        args.learning_rate,
+        args.batch_size,
+        args.tflite_quantization,
+        args.data_folder,
+    )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,173 @@
+"""
+Data-parallel training over several local worker processes with tf.distribute.MultiWorkerMirroredStrategy.
+
+The launching process starts one copy of the training script per worker, each with its own TF_CONFIG pointing at
+localhost. Every worker reads only its shard of the training set and gradients are all-reduced between workers
+after each step. Worker 0 is the chief and is the only one that writes results.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+import tensorflow as tf
+
+TF_CONFIG_ENV = "TF_CONFIG"
+
+
+def free_ports(count: int) -> List[int]:
+    """Returns ports on localhost that are free at the time of the call"""
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            sockets.append(sock)
+
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def make_tf_config(ports: Sequence[int], index: int) -> str:
+    return json.dumps(
+        {"cluster": {"worker": [f"localhost:{port}" for port in ports]}, "task": {"type": "worker", "index": index}}
+    )
+
+
+def worker_cpus(index: int, num_workers: int) -> List[int]:
+    """Splits the CPUs available to this process into contiguous blocks, one per worker.
+    Contiguous CPU ids usually share a socket, which keeps each worker on a single NUMA node"""
+    cpus = sorted(os.sched_getaffinity(0))
+    block = max(len(cpus) // num_workers, 1)
+
+    return cpus[index * block: (index + 1) * block] or cpus
+
+
+def launch_workers(num_workers: int, script_args: Sequence[str], pin_workers: bool = False) -> int:
+    """Runs the script once per worker and waits for all of them. If any worker fails the others are stopped,
+    since the remaining workers would otherwise block forever waiting on the collective ops of the failed one
+
+    Returns
+    -------
+    int
+        0 if every worker succeeded, otherwise the return code of the first worker that failed
+    """
+    ports = free_ports(num_workers)
+    processes = []
+
+    for index in range(num_workers):
+        env = dict(os.environ, **{TF_CONFIG_ENV: make_tf_config(ports, index)})
+
+        # Non-chief workers only add noise to the console
+        output = None if index == 0 else subprocess.DEVNULL
+        process = subprocess.Popen([sys.executable, *script_args], env=env, stdout=output)
+
+        if pin_workers and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(process.pid, worker_cpus(index, num_workers))
+
+        processes.append(process)
+
+    return_code = 0
+    while processes:
+        for process in list(processes):
+            code = process.poll()
+            if code is None:
+                continue
+
+            processes.remove(process)
+            if code != 0 and return_code == 0:
+                return_code = code
+                for other in processes:
+                    other.terminate()
+
+        time.sleep(0.1)
+
+    return return_code
+
+
+def is_worker() -> bool:
+    """Returns True if this process was started by launch_workers"""
+    return TF_CONFIG_ENV in os.environ
+
+
+def worker_index() -> int:
+    return json.loads(os.environ[TF_CONFIG_ENV])["task"]["index"] if is_worker() else 0
+
+
+def is_chief() -> bool:
+    return worker_index() == 0
+
+
+def num_workers() -> int:
+    return len(json.loads(os.environ[TF_CONFIG_ENV])["cluster"]["worker"]) if is_worker() else 1
+
+
+def create_strategy() -> tf.distribute.MultiWorkerMirroredStrategy:
+    """Creates the strategy for this worker. Must be called before any other TensorFlow op runs"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+    # Each worker would otherwise start a thread per core and the workers would fight over the same cores.
+    # Pinned workers already only see their own block of CPUs
+    if cpus == (os.cpu_count() or 1):
+        cpus = max(cpus // num_workers(), 1)
+    tf.config.threading.set_intra_op_parallelism_threads(cpus)
+
+    return tf.distribute.MultiWorkerMirroredStrategy()
+
+
+def worker_result_path(result_path: Optional[str]) -> str:
+    """Non-chief workers still have to run every save so that the collective ops line up,
+    so they write into a temporary directory instead of the run's results directory"""
+    if is_chief() and result_path is not None:
+        return result_path
+
+    return tempfile.mkdtemp(prefix=f"worker{worker_index()}-")
+
+
+def local_copy(model: tf.keras.Model) -> tf.keras.Model:
+    """Copies the weights of a model trained under a distribution strategy into an ordinary model on this worker"""
+    copy = tf.keras.models.clone_model(model)
+    copy.set_weights(model.get_weights())
+
+    return copy
+
+
+def sharded_dataset(
+    strategy: tf.distribute.Strategy, inputs: np.ndarray, outputs: Sequence[np.ndarray], batch_size: int
+):
+    """Builds a distributed training dataset in which each worker reads only its own shard of the samples.
+    The dataset repeats so that every worker runs the same number of steps per epoch
+
+    Parameters
+    ----------
+    batch_size : int
+        Batch size of each worker. The global batch size is batch_size * number of workers
+
+    Returns
+    -------
+    Tuple[tf.distribute.DistributedDataset, int]
+        The dataset and the number of steps in one epoch
+    """
+    global_batch_size = batch_size * strategy.num_replicas_in_sync
+    steps_per_epoch = max(len(inputs) // global_batch_size, 1)
+
+    def dataset_fn(input_context: tf.distribute.InputContext) -> tf.data.Dataset:
+        indices = np.arange(input_context.input_pipeline_id, len(inputs), input_context.num_input_pipelines)
+        dataset = tf.data.Dataset.from_tensor_slices((inputs[indices], tuple(output[indices] for output in outputs)))
+
+        return (
+            dataset.shuffle(len(indices))
+            .repeat()
+            .batch(input_context.get_per_replica_batch_size(global_batch_size), drop_remainder=True)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+
+    return strategy.distribute_datasets_from_function(dataset_fn), steps_per_epoch
@@ -0,0 +1,142 @@
+"""
+Encodes raw event CSVs into sparse voxel grids for spatio-temporal models.
+
+Each CSV is read in chunks, split into reconstruction windows and every window is encoded as a
+(polarity, time bin, y, x) grid of event counts. The grids of each CSV are saved sparsely to <output_dir>/<name>.npz,
+in the same sub-directories as the CSV has in the input directory, and an index.json lists every encoded file with
+its window count and the waveform and frequency labels parsed from its name. The saved files can be served for
+training with plotting_utils.event_voxels.VoxelWindowLoader.
+
+CSV Format: On/Off,X,Y,Timestamp
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List, Tuple
+
+from get_data import WaveAndFreqData
+from plotting_utils import event_voxels, filename_regex
+from plotting_utils.plotting_helper import int_arg_not_negative, int_arg_positive_nonzero, path_arg
+from classify import find_csv_files
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", help="Event CSVs or directories containing event CSVs", type=path_arg, nargs="+")
+    parser.add_argument(
+        "--output_dir", "-o", help="Directory the encoded files are saved to", type=str, default="voxels"
+    )
+    parser.add_argument(
+        "--reconstruction_window",
+        "-r",
+        help="Length of each window in microseconds",
+        type=int_arg_positive_nonzero,
+        default=10000,
+    )
+    parser.add_argument(
+        "--time_bins", "-t", help="Number of time bins in each window", type=int_arg_positive_nonzero, default=5
+    )
+    parser.add_argument(
+        "--chunk_size",
+        "-c",
+        help="Maximum number of events held in memory at once",
+        type=int_arg_positive_nonzero,
+        default=1_000_000,
+    )
+    parser.add_argument(
+        "--skip_rows",
+        "-s",
+        help="Number of events to skip at the start of each file",
+        type=int_arg_not_negative,
+        default=0,
+    )
+
+    return parser.parse_args()
+
+
+def file_labels(csv_file: str):
+    """Returns the (waveform id, frequency id) of a recording parsed from its name, or None for unknown labels"""
+    basename = os.path.basename(csv_file).lower()
+
+    waveform_id = WaveAndFreqData.waveform_id_dict.get(filename_regex.parse_waveform(basename))
+    frequency_ids = WaveAndFreqData.frequency_id_dict
+    frequency_id = next((frequency_ids[frequency] for frequency in frequency_ids if frequency in basename), None)
+
+    return waveform_id, frequency_id
+
+
+def output_names(inputs: List[str]) -> List[Tuple[str, str]]:
+    """Returns (CSV, output file name) of every CSV in inputs. The CSVs of a directory keep their path relative to it,
+    so CSVs with the same name in different sub-directories, such as sine/10hz.csv and square/10hz.csv, are kept apart
+
+    Raises
+    ------
+    ValueError
+        Raised when two CSVs would be saved to the same file, such as CSVs with the same name given as separate inputs
+    """
+    names = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            names.extend((csv_file, os.path.relpath(csv_file, input_path)) for csv_file in find_csv_files([input_path]))
+        else:
+            names.append((input_path, os.path.basename(input_path)))
+
+    names = [(csv_file, os.path.splitext(name)[0] + ".npz") for csv_file, name in names]
+
+    sources = {}
+    for csv_file, name in names:
+        if name in sources:
+            raise ValueError(f"'{csv_file}' and '{sources[name]}' would both be saved to '{name}'")
+        sources[name] = csv_file
+
+    return names
+
+
+def main(args: argparse.Namespace):
+    os.makedirs(args.output_dir, exist_ok=True)
+    index = []
+
+    for csv_file, output_name in output_names(args.inputs):
+        start = time.perf_counter()
+        try:
+            windows = event_voxels.encode_csv(
+                csv_file,
+                args.reconstruction_window,
+                args.time_bins,
+                chunk_size=args.chunk_size,
+                skip_rows=args.skip_rows,
+            )
+        except ValueError as e:
+            print(f"{e}. Skipping '{csv_file}'...")
+            continue
+
+        output_path = os.path.join(args.output_dir, output_name)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        windows.save(output_path)
+
+        waveform_id, frequency_id = file_labels(csv_file)
+        index.append(
+            {
+                "path": output_path,
+                "source": csv_file,
+                "windows": len(windows),
+                "waveform": waveform_id,
+                "frequency": frequency_id,
+            }
+        )
+
+        density = len(windows.indices) / max(len(windows) * windows.num_voxels, 1)
+        print(
+            f"{csv_file}: {len(windows)} windows, {int(windows.counts.sum())} events, "
+            f"{density * 100:.2f}% of voxels occupied ({time.perf_counter() - start:.1f}s)"
+        )
+
+    with open(os.path.join(args.output_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=4)
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
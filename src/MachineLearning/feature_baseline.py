@@ -0,0 +1,137 @@
+"""
+Trains a fast non-deep waveform and frequency classifier on statistical and spectral window features.
+Features are computed in bulk with plotting_utils.window_features and a scikit-learn ensemble is trained for each of
+the waveform and frequency heads using all available cores.
+"""
+
+import argparse
+import datetime
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score
+
+import get_data
+from plotting_utils import window_features
+from plotting_utils.plotting_helper import path_arg, int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data_folder", help="Folder containing event count CSVs", type=path_arg, default="data"
+    )
+    parser.add_argument(
+        "--frame_count", "-f", help="Number of rows in each window", type=int_arg_positive_nonzero, default=1000
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        help="rf = random forest, hgb = histogram gradient boosting",
+        choices=["rf", "hgb"],
+        default="rf",
+    )
+    parser.add_argument(
+        "--num_estimators",
+        "-n",
+        help="Number of trees (rf) or boosting iterations (hgb)",
+        type=int_arg_positive_nonzero,
+        default=300,
+    )
+    parser.add_argument(
+        "--num_bands", help="Number of FFT bands used as features", type=int_arg_positive_nonzero, default=8
+    )
+
+    return parser.parse_args()
+
+
+def make_classifier(model_type: str, num_estimators: int):
+    if model_type == "rf":
+        return RandomForestClassifier(n_estimators=num_estimators, n_jobs=-1, random_state=42)
+
+    # HistGradientBoosting is multithreaded through OpenMP and uses all cores by default
+    return HistGradientBoostingClassifier(max_iter=num_estimators, random_state=42)
+
+
+def main(args: argparse.Namespace):
+    print("Preparing data...")
+    wf_data = get_data.WaveAndFreqData(args.frame_count, args.data_folder)
+
+    feature_start = time.perf_counter()
+    train_features = window_features.extract_features(wf_data.train_input, args.num_bands)
+    test_features = window_features.extract_features(wf_data.test_input, args.num_bands)
+    feature_time = time.perf_counter() - feature_start
+    print(f"Extracted {train_features.shape[1]} features from {len(train_features) + len(test_features)} windows")
+
+    waveform_model = make_classifier(args.model, args.num_estimators)
+    frequency_model = make_classifier(args.model, args.num_estimators)
+
+    train_start = time.perf_counter()
+    waveform_model.fit(train_features, wf_data.waveform_train_output)
+    frequency_model.fit(train_features, wf_data.frequency_train_output)
+    train_time = time.perf_counter() - train_start
+
+    inference_start = time.perf_counter()
+    waveform_prediction = waveform_model.predict(test_features)
+    frequency_prediction = frequency_model.predict(test_features)
+    inference_time = time.perf_counter() - inference_start
+
+    waveform_accuracy = accuracy_score(wf_data.waveform_test_output, waveform_prediction)
+    frequency_accuracy = accuracy_score(wf_data.frequency_test_output, frequency_prediction)
+
+    # Time the full per-window path (feature extraction + both models) on a single window
+    single_window = wf_data.test_input[:1]
+    single_start = time.perf_counter()
+    single_features = window_features.extract_features(single_window, args.num_bands)
+    waveform_model.predict(single_features)
+    frequency_model.predict(single_features)
+    single_window_latency = time.perf_counter() - single_start
+
+    result_path = os.path.join(
+        "results", "MachineLearning", "FeatureBaseline", datetime.datetime.now().strftime("%b-%d-%Y-%H-%M-%S")
+    )
+    os.makedirs(result_path, exist_ok=True)
+
+    joblib.dump(
+        {
+            "waveform_model": waveform_model,
+            "frequency_model": frequency_model,
+            "frame_count": args.frame_count,
+            "num_bands": args.num_bands,
+            "feature_names": window_features.feature_names(args.num_bands),
+        },
+        os.path.join(result_path, "model.joblib"),
+    )
+
+    with open(os.path.join(result_path, "results.txt"), "w") as f:
+        f.write(f"Model: {args.model}\n")
+        f.write(f"Num Estimators: {args.num_estimators}\n")
+        f.write(f"Frame Count: {args.frame_count}\n")
+        f.write(f"Num Bands: {args.num_bands}\n")
+        f.write(f"Waveform Validation Accuracy: {waveform_accuracy}\n")
+        f.write(f"Frequency Validaion Accuracy: {frequency_accuracy}\n")
+        f.write(f"Feature Extraction Time: {feature_time}s\n")
+        f.write(f"Training Time: {train_time}s\n")
+        f.write(f"Inference Time Per Window (batched): {inference_time / max(len(test_features), 1)}s\n")
+        f.write(f"Inference Time Per Window (single): {single_window_latency}s\n")
+
+    print(f"Waveform Validation Accuracy: {waveform_accuracy}")
+    print(f"Frequency Validation Accuracy: {frequency_accuracy}")
+    print(f"Training Time: {train_time:.2f}s")
+    print(f"Single window latency: {single_window_latency * 1000:.2f}ms")
+    print(f"Results saved to '{result_path}'")
+
+    if args.model == "rf":
+        # Show which features carry the most signal
+        importances = waveform_model.feature_importances_
+        names = window_features.feature_names(args.num_bands)
+        top = np.argsort(importances)[::-1][:10]
+        print("Most important waveform features: " + ", ".join(names[i] for i in top))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -3,6 +3,7 @@ import os
 from os import listdir
 from os.path import isfile, join
 import glob
+from typing import Dict
 import numpy as np
 import sklearn.model_selection as sk
 from natsort import natsorted, ns
@@ -70,10 +71,50 @@ def getMachineLearningData(num_frames: int, base_folder: str):
     return np.array(all_input_data), np.array(all_output_data)
 
 
+def read_event_count_windows(csv_path: str, num_frames: int) -> np.ndarray:
+    """Reads an event count CSV and splits it into consecutive, non-overlapping windows
+
+    Parameters
+    ----------
+    csv_path : str
+        CSV containing On Count, Off Count, and Combined Count columns
+    num_frames : int
+        Number of rows (reconstruction windows) in each window. Trailing rows that do not fill a window are dropped
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (num_windows, num_frames, 3)
+
+    Raises
+    ------
+    ValueError
+        Raised when the CSV file is of an incorrect format, as defined by the header
+    """
+    with open(csv_path) as csv_file:
+        header = next(csv.reader(csv_file, delimiter=","), None)
+
+        if header is None or not check_aedat_csv_format(header, ["On Count", "Off Count", "Combined Count"]):
+            raise ValueError(f"CSV file '{csv_path}' appears to be of an incorrect format. Header is '{header}'")
+
+        counts = np.loadtxt(csv_file, delimiter=",", usecols=(0, 1, 2), dtype=np.int64, ndmin=2)
+
+    num_windows = len(counts) // num_frames
+    return counts[: num_windows * num_frames].reshape(num_windows, num_frames, 3)
+
+
 class WaveAndFreqData:
     waveform_id_dict = {"burst": 0, "sine": 1, "square": 2, "triangle": 3, "dc": 4, "noise": 5}
     frequency_id_dict = {"500mv": 0, "400mv": 1, "300mv": 2, "200mv": 3}
 
+    @classmethod
+    def waveform_names(cls) -> Dict[int, str]:
+        return {waveform_id: waveform for waveform, waveform_id in cls.waveform_id_dict.items()}
+
+    @classmethod
+    def frequency_names(cls) -> Dict[int, str]:
+        return {frequency_id: frequency for frequency, frequency_id in cls.frequency_id_dict.items()}
+
     def __init__(self, num_frames: int, base_folder: str):
         all_input_data = []
         all_output_data = []
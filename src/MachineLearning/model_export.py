@@ -0,0 +1,97 @@
+import os
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+KERAS_MODEL_NAME = "model.keras"
+TFLITE_MODEL_NAME = "model.tflite"
+TFLITE_QUANTIZATIONS = ["none", "float16", "int8"]
+
+
+def export_tflite(
+    model: tf.keras.Model,
+    output_path: str,
+    quantization: str = "none",
+    representative_input: Optional[np.ndarray] = None,
+) -> str:
+    """Converts a Keras model into a TFLite flatbuffer for fast inference
+
+    Parameters
+    ----------
+    model : tf.keras.Model
+        Trained model to convert
+    output_path : str
+        Path the .tflite file will be written to
+    quantization : str, optional
+        One of "none", "float16", or "int8", by default "none"
+    representative_input : Optional[np.ndarray], optional
+        Sample model inputs used to calibrate activation ranges. Required for int8 quantization
+
+    Returns
+    -------
+    str
+        output_path
+
+    Raises
+    ------
+    ValueError
+        Raised when quantization is unknown or int8 is requested without representative_input
+    """
+    if quantization not in TFLITE_QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}'. Expected one of {TFLITE_QUANTIZATIONS}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    # GRU layers may lower to ops that are not TFLite builtins. Fall back to TF ops instead of failing
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if representative_input is None:
+            raise ValueError("int8 quantization requires representative_input")
+
+        def representative_dataset():
+            for sample in representative_input[:200]:
+                yield [np.expand_dims(sample, 0).astype(np.float32)]
+
+        # Weights and activations are quantized. Inputs and outputs stay float32 so callers don't need to rescale
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+    return output_path
+
+
+def save_model(
+    model: tf.keras.Model,
+    result_path: str,
+    tflite_quantization: Optional[str] = None,
+    representative_input: Optional[np.ndarray] = None,
+):
+    """Saves a trained model in Keras format and optionally as a TFLite inference artifact
+
+    Parameters
+    ----------
+    model : tf.keras.Model
+        Trained model to save
+    result_path : str
+        Directory the model files will be written to
+    tflite_quantization : Optional[str], optional
+        Quantization used for the TFLite export. If None, no TFLite model is written and one left in result_path by
+        an earlier save, such as before a resumed run, is removed so it cannot be mistaken for the new model. By
+        default None
+    representative_input : Optional[np.ndarray], optional
+        Sample model inputs used for int8 calibration
+    """
+    model.save(os.path.join(result_path, KERAS_MODEL_NAME))
+
+    tflite_path = os.path.join(result_path, TFLITE_MODEL_NAME)
+    if tflite_quantization is not None:
+        export_tflite(model, tflite_path, tflite_quantization, representative_input)
+    elif os.path.isfile(tflite_path):
+        os.remove(tflite_path)
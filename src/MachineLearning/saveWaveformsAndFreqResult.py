@@ -1,16 +1,94 @@
 import numpy as np
 import os
 import datetime
+import json
 import matplotlib.pyplot as plt
+from sklearn.metrics import confusion_matrix
+from typing import Any, Dict, Optional
 
+import model_export
 
-def save(
-    history, model, testInput, waveformTestOutput, frequencyTestOutput, frameCount, numEpochs, learning_rate, show_plots
-):
-    test_loss, waveform_loss, frequency_loss, waveform_accuracy, frequency_accuracy = model.evaluate(
-        testInput, [waveformTestOutput, frequencyTestOutput]
-    )
 
+def create_result_directory(model_type: str = "WaveformAndFreq") -> str:
+    """Creates a timestamped directory for the results of a training run and returns its path"""
+    nn_desc = datetime.datetime.now().strftime("%b-%d-%Y-%H-%M-%S")
+    resultPath = os.path.join("results", "MachineLearning", model_type, nn_desc)
+
+    # Make directories for results if they don't already exist
+    os.makedirs(resultPath, exist_ok=True)
+
+    return resultPath
+
+
+def evaluate_per_class(
+    model, testInput, waveformTestOutput, frequencyTestOutput, batch_size: int = 256
+) -> Dict[str, Any]:
+    """Runs a single batched prediction pass over the test set and computes accuracy and a confusion matrix
+    for both the waveform and the frequency heads"""
+    waveform_probs, frequency_probs = model.predict(testInput, batch_size=batch_size)
+
+    evaluation: Dict[str, Any] = {}
+    for head, probs, expected in (
+        ("Waveform", waveform_probs, waveformTestOutput),
+        ("Frequency", frequency_probs, frequencyTestOutput),
+    ):
+        predicted = probs.argmax(axis=1)
+        evaluation[f"{head}_accuracy"] = float(np.mean(predicted == expected))
+        evaluation[f"{head}_confusion_matrix"] = confusion_matrix(
+            expected, predicted, labels=range(probs.shape[1])
+        ).tolist()
+
+    return evaluation
+
+
+def get_final_metrics(history_dict, final_epoch: int = -1, evaluation: Optional[Dict[str, Any]] = None):
+    """Returns the metrics of the final model, taken from the training history at final_epoch.
+    Accuracies from evaluation, when given, take precedence since they come from the model as saved"""
+    final_metrics = {metric: values[final_epoch] for metric, values in history_dict.items()}
+
+    if evaluation is not None:
+        final_metrics["val_Waveform_accuracy"] = evaluation["Waveform_accuracy"]
+        final_metrics["val_Frequency_accuracy"] = evaluation["Frequency_accuracy"]
+
+    return final_metrics
+
+
+def save_confusion_matrices(evaluation: Dict[str, Any], result_path: str):
+    with open(os.path.join(result_path, "evaluation.json"), "w") as f:
+        json.dump(evaluation, f, indent=4)
+
+    fig, axes = plt.subplots(nrows=1, ncols=2, figsize=(12, 5))
+    for ax, head in zip(axes, ("Waveform", "Frequency")):
+        matrix = np.array(evaluation[f"{head}_confusion_matrix"])
+        image = ax.imshow(matrix, cmap="Blues")
+        for (row, col), count in np.ndenumerate(matrix):
+            ax.text(col, row, count, ha="center", va="center")
+
+        ax.set_title(f"{head} Confusion Matrix")
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Actual")
+        fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+
+    fig.tight_layout()
+    fig.savefig(os.path.join(result_path, "ConfusionMatrices.png"))
+    plt.close(fig)
+
+
+def save(
+    history,
+    model,
+    testInput,
+    waveformTestOutput,
+    frequencyTestOutput,
+    frameCount,
+    numEpochs,
+    learning_rate,
+    show_plots,
+    tflite_quantization: Optional[str] = None,
+    result_path: Optional[str] = None,
+    final_epoch: int = -1,
+    evaluation: Optional[Dict[str, Any]] = None,
+) -> str:
     history_dict = history.history
 
     # Get values from history_dict
@@ -21,52 +99,52 @@ def save(
     waveform_val_accuracy_v = history_dict["val_Waveform_accuracy"]
     frequency_val_accuracy_v = history_dict["val_Frequency_accuracy"]
 
-    # Make directories for results if they don't already exist
-    if not os.path.exists(os.path.join("results")):
-        os.makedirs(os.path.join("results"))
-    if not os.path.exists(os.path.join("results", "MachineLearning")):
-        os.makedirs(os.path.join("results", "MachineLearning"))
-    if not os.path.exists(os.path.join("results", "MachineLearning", "WaveformAndFreq")):
-        os.makedirs(os.path.join("results", "MachineLearning", "WaveformAndFreq"))
+    # fit() already evaluated the test set at the end of every epoch, so there is no need to evaluate it again
+    final_metrics = get_final_metrics(history_dict, final_epoch, evaluation)
 
     nn_label = "_waveforms_and_freq"
-    nn_desc = datetime.datetime.now().strftime("%b-%d-%Y-%H-%M-%S")
-    resultPath = os.path.join("results", "MachineLearning", "WaveformAndFreq", nn_desc)
-
-    if not os.path.exists(os.path.join("results", "MachineLearning", "WaveformAndFreq", nn_desc)):
-        os.makedirs(os.path.join("results", "MachineLearning", "WaveformAndFreq", nn_desc))
+    if result_path is None:
+        result_path = create_result_directory()
 
     # Write NN result data to file
-    with open(os.path.join(resultPath, "results.txt"), "w") as f:
+    with open(os.path.join(result_path, "results.txt"), "w") as f:
         model.summary(print_fn=lambda x: f.write(x + "\n"))
         f.write("\n")
         f.write(f"Frame Count: {frameCount}\n")
         f.write(f"Num Epochs: {numEpochs}\n")
         f.write(f"Learning Rate: {learning_rate}\n")
-        f.write(f"Total Loss: {total_loss_v[-1]}\n")
-        f.write(f"Total Validation Loss: {test_loss}\n")
-        f.write(f"Waveform Accuracy: {waveform_accuracy_v[-1]}\n")
-        f.write(f"Waveform Validation Accuracy: {waveform_accuracy}\n")
-        f.write(f"Frequency Accuracy: {frequency_accuracy_v[-1]}\n")
-        f.write(f"Frequency Validaion Accuracy: {frequency_accuracy}\n")
+        f.write(f"Total Loss: {final_metrics['loss']}\n")
+        f.write(f"Total Validation Loss: {final_metrics['val_loss']}\n")
+        f.write(f"Waveform Accuracy: {final_metrics['Waveform_accuracy']}\n")
+        f.write(f"Waveform Validation Accuracy: {final_metrics['val_Waveform_accuracy']}\n")
+        f.write(f"Frequency Accuracy: {final_metrics['Frequency_accuracy']}\n")
+        f.write(f"Frequency Validaion Accuracy: {final_metrics['val_Frequency_accuracy']}\n")
+
+    if evaluation is not None:
+        save_confusion_matrices(evaluation, result_path)
+
+    # Save the trained model so new recordings can be classified without retraining
+    model_export.save_model(model, result_path, tflite_quantization, testInput)
 
     # Save NN results to .npy files
-    np.save(os.path.join(resultPath, f"epochs{nn_label}.npy"), numEpochs)
-    np.save(os.path.join(resultPath, f"loss{nn_label}.npy"), total_loss_v)
-    np.save(os.path.join(resultPath, f"val_loss{nn_label}.npy"), total_val_loss_v)
-    np.save(os.path.join(resultPath, f"waveform_accuracy{nn_label}.npy"), waveform_accuracy_v)
-    np.save(os.path.join(resultPath, f"frequency_accuracy{nn_label}.npy"), frequency_accuracy_v)
-    np.save(os.path.join(resultPath, f"waveform_val_accuracy{nn_label}.npy"), waveform_val_accuracy_v)
-    np.save(os.path.join(resultPath, f"frequency_val_accuracy{nn_label}.npy"), frequency_val_accuracy_v)
+    np.save(os.path.join(result_path, f"epochs{nn_label}.npy"), numEpochs)
+    np.save(os.path.join(result_path, f"loss{nn_label}.npy"), total_loss_v)
+    np.save(os.path.join(result_path, f"val_loss{nn_label}.npy"), total_val_loss_v)
+    np.save(os.path.join(result_path, f"waveform_accuracy{nn_label}.npy"), waveform_accuracy_v)
+    np.save(os.path.join(result_path, f"frequency_accuracy{nn_label}.npy"), frequency_accuracy_v)
+    np.save(os.path.join(result_path, f"waveform_val_accuracy{nn_label}.npy"), waveform_val_accuracy_v)
+    np.save(os.path.join(result_path, f"frequency_val_accuracy{nn_label}.npy"), frequency_val_accuracy_v)
+
+    epochs = range(1, len(total_loss_v) + 1)
 
     # Plot the NN's loss
     plt.title("Training and validation loss")
-    plt.plot(numEpochs, total_loss_v, "r", label="Training loss")
-    plt.plot(numEpochs, total_val_loss_v, "b", label="Validation loss")
+    plt.plot(epochs, total_loss_v, "r", label="Training loss")
+    plt.plot(epochs, total_val_loss_v, "b", label="Validation loss")
     plt.xlabel("Epochs")
     plt.ylabel("Loss")
     plt.legend()
-    plt.savefig(os.path.join(resultPath, "Loss.png"))
+    plt.savefig(os.path.join(result_path, "Loss.png"))
 
     if show_plots:
         plt.show()
@@ -74,16 +152,18 @@ def save(
         plt.clf()
 
     # Plot the NN's accuracy
-    plt.plot(numEpochs, frequency_accuracy_v, "r", label="Frequency Accuracy")
-    plt.plot(numEpochs, frequency_val_accuracy_v, "g", label="Frequency Validation Accuracy")
-    plt.plot(numEpochs, waveform_val_accuracy_v, "b", label="Waveform Validation Accuracy")
-    plt.plot(numEpochs, waveform_accuracy_v, "y", label="Waveform Accuracy")
+    plt.plot(epochs, frequency_accuracy_v, "r", label="Frequency Accuracy")
+    plt.plot(epochs, frequency_val_accuracy_v, "g", label="Frequency Validation Accuracy")
+    plt.plot(epochs, waveform_val_accuracy_v, "b", label="Waveform Validation Accuracy")
+    plt.plot(epochs, waveform_accuracy_v, "y", label="Waveform Accuracy")
     plt.xlabel("Epochs")
     plt.ylabel("Accuracy")
     plt.legend()
-    plt.savefig(os.path.join(resultPath, "Accuracy.png"))
+    plt.savefig(os.path.join(result_path, "Accuracy.png"))
 
     if show_plots:
         plt.show()
     else:
         plt.clf()
+
+    return result_path
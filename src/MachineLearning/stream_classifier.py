@@ -0,0 +1,111 @@
+"""
+Runs the waveform and frequency classifier continuously on a live event stream.
+Polarity events are read from a file that is still being written, a local TCP/UDP socket, or a recording replay.
+Events are counted per reconstruction window and a prediction is emitted from the most recent frame_count windows
+every hop windows.
+
+Event Format: On/Off,X,Y,Timestamp
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+import classify
+from get_data import WaveAndFreqData
+from plotting_utils import event_stream
+from plotting_utils.plotting_helper import file_arg, int_arg_positive_nonzero
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_path", help="Trained model to use (.keras or .tflite)", type=file_arg)
+    parser.add_argument(
+        "--reconstruction_window",
+        "-rw",
+        help="Reconstruction window the model was trained on (µs)",
+        type=int_arg_positive_nonzero,
+        required=True,
+    )
+    parser.add_argument(
+        "--hop", help="Number of new reconstruction windows between predictions", type=int_arg_positive_nonzero,
+        default=1
+    )
+    parser.add_argument(
+        "--num_threads", "-n", help="Number of threads used by the TFLite interpreter", type=int_arg_positive_nonzero
+    )
+    parser.add_argument(
+        "--metrics_interval",
+        "-m",
+        help="Print latency metrics every N predictions",
+        type=int_arg_positive_nonzero,
+        default=100,
+    )
+
+    source_args = parser.add_mutually_exclusive_group(required=True)
+    source_args.add_argument("--tail", help="CSV file that is still being written to", type=str)
+    source_args.add_argument("--tcp", help="host:port of a local TCP server sending events", type=str)
+    source_args.add_argument("--udp", help="host:port to receive UDP event datagrams on", type=str)
+    source_args.add_argument("--replay", help="Recorded CSV to replay as a stand-in for the sensor", type=file_arg)
+
+    parser.add_argument(
+        "--replay_speed",
+        help="Replay speed relative to the recording. 0 replays as fast as possible",
+        type=float,
+        default=1.0,
+    )
+
+    args = parser.parse_args()
+
+    if args.replay_speed < 0:
+        parser.error("--replay_speed cannot be negative")
+
+    return args
+
+
+def open_source(args: argparse.Namespace):
+    if args.tail:
+        return event_stream.tail_file(args.tail)
+    if args.replay:
+        return event_stream.replay_file(args.replay, args.replay_speed)
+
+    host, port = (args.tcp or args.udp).rsplit(":", 1)
+    if args.tcp:
+        return event_stream.tcp_lines(host, int(port))
+
+    return event_stream.udp_lines(host, int(port))
+
+
+def main(args: argparse.Namespace):
+    predictor = classify.load_predictor(args.model_path, args.num_threads)
+    waveform_names = WaveAndFreqData.waveform_names()
+    frequency_names = WaveAndFreqData.frequency_names()
+
+    def predict(model_input: np.ndarray):
+        waveform_probs, frequency_probs = predictor.predict(model_input)
+        return int(waveform_probs[0].argmax()), int(frequency_probs[0].argmax())
+
+    classifier = event_stream.StreamingClassifier(
+        predict, predictor.frame_count, args.reconstruction_window, args.hop
+    )
+
+    try:
+        for i, prediction in enumerate(classifier.run(open_source(args)), start=1):
+            waveform_id, frequency_id = prediction.result
+            print(
+                f"[{prediction.timestamp}] {waveform_names.get(waveform_id, waveform_id)} "
+                f"{frequency_names.get(frequency_id, frequency_id)} (latency {prediction.latency * 1000:.1f}ms)"
+            )
+
+            if i % args.metrics_interval == 0:
+                print(json.dumps({"dropped": classifier.dropped_predictions, **classifier.latency.summary()}))
+    except KeyboardInterrupt:
+        pass
+
+    print(json.dumps({"dropped": classifier.dropped_predictions, **classifier.latency.summary()}, indent=2))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
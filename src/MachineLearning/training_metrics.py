@@ -0,0 +1,167 @@
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from tensorflow import keras
+
+from plotting_utils.profiling import peak_rss_mb
+
+METRICS_FILE_NAME = "training_metrics.json"
+
+
+class TimedSequence(keras.utils.Sequence):
+    """Serves shuffled training batches from in-memory arrays and records how long each batch takes to prepare"""
+
+    def __init__(self, inputs: np.ndarray, outputs: List[np.ndarray], batch_size: int = 32, shuffle: bool = True):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.indices = np.arange(len(inputs))
+        self.fetch_time = 0.0
+        self.fetch_count = 0
+
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.inputs) / self.batch_size)
+
+    def __getitem__(self, index: int):
+        start = time.perf_counter()
+
+        batch_indices = self.indices[index * self.batch_size: (index + 1) * self.batch_size]
+        batch = (self.inputs[batch_indices], tuple(output[batch_indices] for output in self.outputs))
+
+        self.fetch_time += time.perf_counter() - start
+        self.fetch_count += 1
+
+        return batch
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+    def reset_counters(self):
+        self.fetch_time = 0.0
+        self.fetch_count = 0
+
+
+class ThroughputCallback(keras.callbacks.Callback):
+    """Records per-epoch timing and memory use and writes them to training_metrics.json in result_path after every epoch
+
+    Time between the end of one training batch and the start of the next is counted as data wait time.
+    Time inside a batch is counted as step time. If a TimedSequence is given, the time it spent preparing
+    batches is also recorded.
+    """
+
+    def __init__(
+        self, result_path: str, num_samples: int, loader: Optional[TimedSequence] = None, initial_epoch: int = 0
+    ):
+        super().__init__()
+        self.result_path = result_path
+        self.num_samples = num_samples
+        self.loader = loader
+        self.epochs: List[Dict[str, Optional[float]]] = []
+        self._train_start = 0.0
+
+        # Keep the records of the epochs completed before a resumed run
+        metrics_path = os.path.join(result_path, METRICS_FILE_NAME)
+        if initial_epoch > 0 and os.path.isfile(metrics_path):
+            with open(metrics_path) as f:
+                self.epochs = [epoch for epoch in json.load(f)["epochs"] if epoch["epoch"] <= initial_epoch]
+
+    def on_train_begin(self, logs=None):
+        self._train_start = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._last_batch_end = self._epoch_start
+        self._data_wait = 0.0
+        self._step_time = 0.0
+        self._validation_time = 0.0
+        self._steps = 0
+
+        if self.loader is not None:
+            self.loader.reset_counters()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._batch_start = time.perf_counter()
+        self._data_wait += self._batch_start - self._last_batch_end
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_batch_end = time.perf_counter()
+        self._step_time += self._last_batch_end - self._batch_start
+        self._steps += 1
+
+    def on_test_begin(self, logs=None):
+        self._validation_start = time.perf_counter()
+
+    def on_test_end(self, logs=None):
+        self._validation_time += time.perf_counter() - self._validation_start
+
+    def on_epoch_end(self, epoch, logs=None):
+        wall_time = time.perf_counter() - self._epoch_start
+        train_time = wall_time - self._validation_time
+
+        record: Dict[str, Optional[float]] = {
+            "epoch": epoch + 1,
+            "wall_time_s": wall_time,
+            "train_time_s": train_time,
+            "samples_per_second": self.num_samples / train_time if train_time > 0 else None,
+            "steps": self._steps,
+            "data_wait_s": self._data_wait,
+            "step_time_s": self._step_time,
+            "validation_latency_s": self._validation_time,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+        if self.loader is not None:
+            record["loader_fetch_s"] = self.loader.fetch_time
+
+        self.epochs.append(record)
+        # Saved after every epoch, so an interrupted run keeps the records of its epochs for --resume
+        self.save(self.summary())
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.epochs:
+            return {}
+
+        def total(key: str) -> float:
+            return sum(epoch[key] or 0.0 for epoch in self.epochs)
+
+        busy_time = total("data_wait_s") + total("step_time_s")
+
+        return {
+            "epochs": len(self.epochs),
+            "total_time_s": time.perf_counter() - self._train_start,
+            "mean_epoch_time_s": total("wall_time_s") / len(self.epochs),
+            "mean_samples_per_second": total("samples_per_second") / len(self.epochs),
+            "data_wait_fraction": total("data_wait_s") / busy_time if busy_time > 0 else None,
+            "mean_validation_latency_s": total("validation_latency_s") / len(self.epochs),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def save(self, summary: Dict[str, Optional[float]]):
+        """Writes to a temporary file first, so the metrics are never left half written"""
+        metrics_path = os.path.join(self.result_path, METRICS_FILE_NAME)
+        with open(metrics_path + ".tmp", "w") as f:
+            json.dump({"summary": summary, "epochs": self.epochs}, f, indent=4)
+        os.replace(metrics_path + ".tmp", metrics_path)
+
+    def on_train_end(self, logs=None):
+        summary = self.summary()
+        self.save(summary)
+
+        if summary:
+            data_wait = summary["data_wait_fraction"]
+            bound = "input-bound" if data_wait is not None and data_wait > 0.5 else "compute-bound"
+            print(
+                f"Trained {summary['epochs']} epochs in {summary['total_time_s']:.1f}s "
+                f"({summary['mean_samples_per_second']:.1f} samples/s, "
+                f"{(data_wait or 0) * 100:.1f}% of batch time waiting on data: {bound}, "
+                f"peak RSS {summary['peak_rss_mb'] or 0:.0f} MiB)"
+            )
@@ -1,12 +1,133 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+from typing import Optional
+
 import tensorflow as tf
 from tensorflow import keras
 import get_data
+import model_export
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input
 import saveWaveformsAndFreqResult
+import training_metrics
+import checkpointing
+import distributed_training
+from plotting_utils.plotting_helper import int_arg_positive_nonzero, int_arg_not_negative
+from plotting_utils import results_store
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--tflite_quantization",
+        "-q",
+        help="Also export the trained model to TFLite with the given quantization",
+        choices=model_export.TFLITE_QUANTIZATIONS,
+        default=None,
+    )
+    parser.add_argument(
+        "--num_epochs", "-e", help="Maximum number of epochs to train for", type=int_arg_positive_nonzero, default=500
+    )
+    parser.add_argument(
+        "--checkpoint_interval",
+        "-ci",
+        help="Save a checkpoint every N epochs",
+        type=int_arg_positive_nonzero,
+        default=5,
+    )
+    parser.add_argument(
+        "--resume",
+        "-r",
+        help="Resume a run from its latest checkpoint. Accepts the run's results directory or its timestamp name",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--confusion_matrices",
+        "-cm",
+        help="Evaluate the final model per class and save confusion matrices for both heads",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--num_workers",
+        "-w",
+        help="Train data-parallel over N local worker processes. Each worker trains on batches of 32",
+        type=int_arg_positive_nonzero,
+        default=1,
+    )
+    parser.add_argument(
+        "--pin_workers",
+        help="Pin each worker to its own contiguous block of CPUs so it stays on one NUMA node",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--results_store",
+        help="SQLite results store that every run is recorded in",
+        type=str,
+        default=results_store.DEFAULT_STORE_PATH,
+    )
+    parser.add_argument(
+        "--force", "-f", help="Train even if a run with an identical config is already stored", action="store_true"
+    )
+
+    early_stopping_args = parser.add_argument_group("Early stopping arguments")
+    early_stopping_args.add_argument(
+        "--patience",
+        "-p",
+        help="Stop once the monitored metric hasn't improved for N epochs. Early stopping is disabled if not set",
+        type=int_arg_not_negative,
+    )
+    early_stopping_args.add_argument(
+        "--monitor",
+        help="Validation metric watched by early stopping",
+        choices=[
+            "val_loss",
+            "val_Waveform_loss",
+            "val_Frequency_loss",
+            "val_Waveform_accuracy",
+            "val_Frequency_accuracy",
+        ],
+        default="val_loss",
+    )
+    early_stopping_args.add_argument(
+        "--min_delta",
+        help="Smallest change in the monitored metric that counts as an improvement",
+        type=float,
+        default=0.0,
+    )
+    early_stopping_args.add_argument(
+        "--restore_best_weights",
+        help="Restore the weights from the best epoch when stopping early",
+        action="store_true",
+    )
+
+    return parser.parse_args()
 
 
-def trainAndSave(model, frame_count, num_epochs, learning_rate):
+def trainAndSave(
+    model,
+    frame_count,
+    num_epochs,
+    learning_rate,
+    tflite_quantization: Optional[str] = None,
+    batch_size: int = 32,
+    checkpoint_interval: int = 5,
+    resume: Optional[str] = None,
+    early_stopping_patience: Optional[int] = None,
+    early_stopping_monitor: str = "val_loss",
+    early_stopping_min_delta: float = 0.0,
+    restore_best_weights: bool = False,
+    store_path: str = results_store.DEFAULT_STORE_PATH,
+    force: bool = False,
+    confusion_matrices: bool = False,
+    strategy: Optional[tf.distribute.Strategy] = None,
+):
     # (
     #     waveformTrainOutput,
     #     frequencyTrainOutput,
@@ -16,27 +137,137 @@ def trainAndSave(model, frame_count, num_epochs, learning_rate):
     #     testInput,
     # ) = getData.getMachineLearningDataWaveformsAndFrequency(frameCount)
 
+    # Everything that affects the trained model. Runs with identical configs are only trained once
+    config = {
+        "script": "waveformsAndFrequencyML",
+        "model": json.loads(model.to_json()),
+        "data_folder": "data",
+        "data_files": results_store.files_fingerprint("data"),
+        "frame_count": frame_count,
+        "num_epochs": num_epochs,
+        "learning_rate": learning_rate,
+        "batch_size": batch_size,
+        "num_workers": distributed_training.num_workers(),
+        "early_stopping_patience": early_stopping_patience,
+        "early_stopping_monitor": early_stopping_monitor,
+        "early_stopping_min_delta": early_stopping_min_delta,
+        "restore_best_weights": restore_best_weights,
+    }
+
+    store = results_store.ResultsStore(store_path)
+    existing_run = store.find_by_config_hash(results_store.config_hash(config))
+    if existing_run is not None and not (force or resume):
+        print(f"Skipping training. Run '{existing_run.run_id}' already has results for an identical config")
+        print(json.dumps(existing_run.final_metrics, indent=4))
+        store.close()
+        return
+
     # Object test
     # wf_data = getData.WaveAndFreqData(frame_count, "waveformsAndFrequency")
     print("Preparing data...")
     wf_data = get_data.WaveAndFreqData(frame_count, "data")
     print("Data preparation complete")
 
-    model.compile(
-        optimizer=tf.optimizers.Adamax(learning_rate=learning_rate),
-        loss="sparse_categorical_crossentropy",  # outputs multiple values, use binary_crossentropy for 1 or 0 output
-        metrics=["accuracy"],
-    )
+    initial_epoch = 0
+    early_stopping_state = None
+
+    with strategy.scope() if strategy is not None else contextlib.nullcontext():
+        if resume:
+            # The checkpoint holds the compiled model along with its optimizer state
+            result_path = checkpointing.find_run(resume)
+            model, initial_epoch, early_stopping_state = checkpointing.load_checkpoint(result_path)
+            if distributed_training.is_chief():
+                checkpointing.truncate_history(result_path, initial_epoch)
+            print(f"Resuming '{result_path}' from epoch {initial_epoch}")
+        else:
+            if strategy is not None:
+                # Variables must be created inside the strategy scope to be mirrored across workers
+                model = keras.models.clone_model(model)
+
+            model.compile(
+                optimizer=tf.optimizers.Adamax(learning_rate=learning_rate),
+                loss="sparse_categorical_crossentropy",  # outputs multiple values, use binary_crossentropy for 1 or 0
+                metrics=["accuracy"],
+            )
+            result_path = None
+            if distributed_training.is_chief():
+                result_path = saveWaveformsAndFreqResult.create_result_directory()
+
+    if strategy is not None:
+        result_path = distributed_training.worker_result_path(result_path)
+        train_loader, steps_per_epoch = distributed_training.sharded_dataset(
+            strategy, wf_data.train_input, [wf_data.waveform_train_output, wf_data.frequency_train_output], batch_size
+        )
+        num_samples = steps_per_epoch * batch_size * strategy.num_replicas_in_sync
+        throughput = training_metrics.ThroughputCallback(result_path, num_samples, None, initial_epoch)
+    else:
+        train_loader = training_metrics.TimedSequence(
+            wf_data.train_input, [wf_data.waveform_train_output, wf_data.frequency_train_output], batch_size
+        )
+        steps_per_epoch = None
+        throughput = training_metrics.ThroughputCallback(
+            result_path, len(wf_data.train_input), train_loader, initial_epoch
+        )
+
+    history_logger = keras.callbacks.CSVLogger(os.path.join(result_path, checkpointing.HISTORY_FILE_NAME), append=True)
+    callbacks = [throughput, history_logger]
+
+    early_stopping = None
+    if early_stopping_patience is not None:
+        early_stopping = checkpointing.ResumableEarlyStopping(
+            early_stopping_state,
+            monitor=early_stopping_monitor,
+            patience=early_stopping_patience,
+            min_delta=early_stopping_min_delta,
+            mode="max" if "accuracy" in early_stopping_monitor else "min",
+            restore_best_weights=restore_best_weights,
+            verbose=1,
+        )
+        callbacks.append(early_stopping)
+
+    # Must come after early stopping so the saved early stopping state includes the current epoch
+    callbacks.append(checkpointing.PeriodicCheckpoint(result_path, checkpoint_interval, early_stopping))
 
     # Fit is same as train; epochs- how long to train, if you train too much you overfit the data
     # If acc is a lot better than test accuracy then the data is overfit
     history = model.fit(
-        wf_data.train_input,
-        [wf_data.waveform_train_output, wf_data.frequency_train_output],
+        train_loader,
         validation_data=(wf_data.test_input, [wf_data.waveform_test_output, wf_data.frequency_test_output]),
         epochs=num_epochs,
+        initial_epoch=initial_epoch,
+        steps_per_epoch=steps_per_epoch,
+        callbacks=callbacks,
     )
 
+    if strategy is not None:
+        # Only the chief worker saves and records the run
+        if not distributed_training.is_chief():
+            store.close()
+            shutil.rmtree(result_path, ignore_errors=True)
+            return
+
+        # Evaluating or saving the distributed model would wait on the other workers, which have already finished
+        model = distributed_training.local_copy(model)
+
+    # Include the epochs trained before resuming in the saved results
+    history.history = checkpointing.load_history(result_path)
+
+    # When early stopping restored the best weights the saved model matches the best epoch, not the last one
+    final_epoch = -1
+    if (
+        early_stopping is not None
+        and restore_best_weights
+        and early_stopping.stopped_epoch > 0
+        and early_stopping.best_weights is not None
+    ):
+        final_epoch = early_stopping.best_epoch
+
+    evaluation = None
+    if confusion_matrices:
+        evaluation = saveWaveformsAndFreqResult.evaluate_per_class(
+            model, wf_data.test_input, wf_data.waveform_test_output, wf_data.frequency_test_output
+        )
+
     # i added validation_data to get val_acc and val_loss in the history for the graphs
     saveWaveformsAndFreqResult.save(
         history,
@@ -45,17 +276,35 @@ def trainAndSave(model, frame_count, num_epochs, learning_rate):
         wf_data.waveform_test_output,
         wf_data.frequency_test_output,
         frame_count,
-        num_epochs,
+        len(history.history["loss"]),
         learning_rate,
         False,
+        tflite_quantization,
+        result_path,
+        final_epoch,
+        evaluation,
     )
 
+    # A resumed run that was already stored is recorded again under a new id since the store is append-only
+    run_id = os.path.basename(os.path.normpath(result_path))
+    if store.query_runs(run_ids=[run_id]):
+        run_id += f"-epoch{len(history.history['loss'])}"
 
-if __name__ == "__main__":
-    frameCount = 1000
+    store.add_run(
+        run_id,
+        config,
+        history.history,
+        saveWaveformsAndFreqResult.get_final_metrics(history.history, final_epoch, evaluation),
+        throughput.summary(),
+        result_path,
+    )
+    store.close()
+
+
+def build_model(frame_count: int) -> Model:
     input_1 = Input(
         shape=(
-            frameCount,
+            frame_count,
             3,
         ),
         name="Input",
@@ -104,6 +353,36 @@ if __name__ == "__main__":
     frequencyModel = keras.layers.GaussianDropout(0.01, name="Frequency_Dropout2")(frequencyModel)
     frequencyModel = keras.layers.Dense(75, activation=tf.nn.sigmoid, name="Frequency_Dense3")(frequencyModel)
     output_freq = keras.layers.Dense(4, activation=tf.nn.sigmoid, name="Frequency")(frequencyModel)
-    model2 = Model(inputs=input_1, outputs=[output_wave, output_freq])
+    return Model(inputs=input_1, outputs=[output_wave, output_freq])
+
+
+if __name__ == "__main__":
+    args = get_args()
+
+    if args.num_workers > 1 and not distributed_training.is_worker():
+        # Start the workers, each of which runs this script again with its own TF_CONFIG
+        sys.exit(distributed_training.launch_workers(args.num_workers, sys.argv, args.pin_workers))
+
+    # Workers train data-parallel. The strategy has to exist before TensorFlow runs anything else
+    strategy = distributed_training.create_strategy() if distributed_training.is_worker() else None
 
-    trainAndSave(model2, frameCount, 500, 0.001)
+    frameCount = 1000
+    model2 = build_model(frameCount)
+
+    trainAndSave(
+        model2,
+        frameCount,
+        args.num_epochs,
+        0.001,
+        args.tflite_quantization,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume,
+        early_stopping_patience=args.patience,
+        early_stopping_monitor=args.monitor,
+        early_stopping_min_delta=args.min_delta,
+        restore_best_weights=args.restore_best_weights,
+        store_path=args.results_store,
+        force=args.force,
+        confusion_matrices=args.confusion_matrices,
+        strategy=strategy,
+    )
@@ -0,0 +1,196 @@
+"""
+Computes local entropy images and sums for a whole recording in one run.
+
+The input is either a directory of images (such as the .pgm frames written by extract_pgm.py) or a frame stack written
+by extract_pgm.py --frame_stack. Frames are spread over a pool of processes, and every sum is collected into a single
+LocalEntropy_batch.csv that only appears once it is complete, instead of each process appending its own line. It has a
+Time column, so it is kept apart from the LocalEntropy_data.csv that local_entropy.py appends to. Optionally the
+entropy sums are also plotted over time.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import os
+import pathlib
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+from natsort import natsorted
+from PIL import Image
+
+from local_entropy import get_entropy_image
+from plotting_utils import image_entropy, pgm_frames, profiling
+from plotting_utils.plotting_helper import int_arg_positive_nonzero, path_arg
+
+IMAGE_EXTENSIONS = (".png", ".jpeg", ".jpg", ".pgm")
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Batch Entropy Calculation", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "input", type=path_arg, help="Directory of images, or a .npy frame stack written by extract_pgm.py"
+    )
+    parser.add_argument(
+        "--save_directory",
+        "-d",
+        type=path_arg,
+        default=".",
+        help="Path where the results are to be saved to",
+    )
+    parser.add_argument(
+        "--num_workers", "-w", type=int_arg_positive_nonzero, default=os.cpu_count(), help="Number of processes"
+    )
+    parser.add_argument(
+        "--batch_size",
+        "-b",
+        type=int_arg_positive_nonzero,
+        default=16,
+        help="Number of frames each process handles at a time",
+    )
+    parser.add_argument("--save_img", action="store_true", help="Save the entropy image of every frame")
+    parser.add_argument(
+        "--time_series", "-t", action="store_true", help="Plot the entropy sum of every frame over time"
+    )
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def find_images(directory: str) -> List[str]:
+    images = [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+    ]
+    return natsorted(images)
+
+
+def save_entropy_image(entropy: np.ndarray, save_directory: str, name: str):
+    plt.imsave(os.path.join(save_directory, f"LocalEntropy_img_{name}.png"), entropy, cmap="viridis")
+
+
+def image_entropy_sums(image_files: Sequence[str], save_directory: Optional[str]) -> List[float]:
+    """Entropy sums of image files, computed the same way as local_entropy.py"""
+    sums = []
+    for image_file in image_files:
+        image = np.array(Image.open(image_file).convert("RGB"))
+        entropy = get_entropy_image(image)
+
+        if save_directory is not None:
+            save_entropy_image(entropy, save_directory, pathlib.Path(image_file).stem)
+
+        sums.append(float(entropy.sum()))
+
+    return sums
+
+
+def frame_stack_entropy_sums(stack_path: str, start: int, stop: int, save_directory: Optional[str]) -> List[float]:
+    """Entropy sums of frames start to stop of a frame stack. The frames are already gray, so they are used as is"""
+    frames = pgm_frames.FrameStack(stack_path)
+    stem = pathlib.Path(stack_path).stem
+
+    sums = []
+    for index in range(start, stop):
+        entropy = image_entropy.local_entropy(frames[index])
+
+        if save_directory is not None:
+            save_entropy_image(entropy, save_directory, f"{stem}_{index}")
+
+        sums.append(float(entropy.sum()))
+
+    return sums
+
+
+def compute_entropy_sums(
+    input_path: str, num_workers: int, batch_size: int, save_directory: Optional[str]
+) -> Tuple[List[str], np.ndarray, List[float]]:
+    """Returns (frame names, frame times, entropy sums) in frame order.
+    Frame times are the timestamps of a frame stack, or the frame numbers of a directory of images"""
+    if os.path.isdir(input_path):
+        image_files = find_images(input_path)
+        names = [os.path.normpath(image_file) for image_file in image_files]
+        times = np.arange(len(image_files))
+        jobs = [
+            (image_entropy_sums, image_files[start: start + batch_size], save_directory)
+            for start in range(0, len(image_files), batch_size)
+        ]
+    else:
+        stack = pgm_frames.FrameStack(input_path)
+        names = [f"{os.path.normpath(input_path)}[{index}]" for index in range(len(stack))]
+        times = stack.timestamps
+        jobs = [
+            (frame_stack_entropy_sums, input_path, start, min(start + batch_size, len(stack)), save_directory)
+            for start in range(0, len(stack), batch_size)
+        ]
+
+    sums: List[float] = []
+    if num_workers == 1:
+        for function, *job_args in jobs:
+            sums.extend(function(*job_args))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(num_workers) as executor:
+            futures = [executor.submit(function, *job_args) for function, *job_args in jobs]
+            for future in futures:
+                sums.extend(future.result())
+
+    return names, times, sums
+
+
+def write_results(csv_path: str, names: Sequence[str], times: np.ndarray, sums: Sequence[float]):
+    """Writes every result at once. The table is written to a temporary file first, so it is never seen half written"""
+    temp_path = csv_path + ".tmp"
+    with open(temp_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["File Name", "Time", "Local Entropy"])
+        writer.writerows(zip(names, times.tolist(), sums))
+
+    os.replace(temp_path, csv_path)
+
+
+def plot_time_series(times: np.ndarray, sums: Sequence[float], is_frame_stack: bool, save_path: str):
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.plot(times, sums)
+    ax.set_xlabel("Timestamp (us)" if is_frame_stack else "Frame")
+    ax.set_ylabel("Local Entropy")
+    ax.set_title("Local Entropy over Time")
+    fig.savefig(save_path, bbox_inches="tight")
+    plt.close(fig)
+
+
+def main(args: argparse.Namespace):
+    start = time.perf_counter()
+    # The frames are loaded by the worker processes, so loading is part of the compute stage
+    with profiling.stage("compute") as compute:
+        names, times, sums = compute_entropy_sums(
+            args.input, args.num_workers, args.batch_size, args.save_directory if args.save_img else None
+        )
+        compute.add_items(len(sums), "frames")
+
+    if not sums:
+        print(f"No frames found in '{args.input}'")
+        return
+
+    with profiling.stage("save"):
+        write_results(os.path.join(args.save_directory, "LocalEntropy_batch.csv"), names, times, sums)
+
+    if args.time_series:
+        is_frame_stack = not os.path.isdir(args.input)
+        with profiling.stage("render"):
+            plot_time_series(
+                times, sums, is_frame_stack, os.path.join(args.save_directory, "LocalEntropy_time_series.png")
+            )
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(sums)} frames in {elapsed:.1f}s ({len(sums) / elapsed:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
@@ -0,0 +1,302 @@
+"""
+Applies several image processing operations to many images in one run.
+
+Every image is decoded once and passed to each requested operation, and images are spread over a pool of processes
+that import cv2, pywt and sklearn only once each. Outputs use the same file names as the single image scripts.
+
+Operations are given as name[:parameter=value,...], for example:
+    python batch_runner.py frames/ -o canny -o otsu:blur_amount=5,otsu_threshold=125 -o wavelet:type=haar -o mean_shift
+    python batch_runner.py frames/ -o mean_shift:fast=true,bandwidth_cache=bandwidth.json
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import matplotlib
+import numpy as np
+import pywt
+from natsort import natsorted
+from PIL import Image
+
+from batch_local_entropy import save_entropy_image
+from canny import save_canny
+from local_entropy import get_entropy_image
+from mean_shift_image import mean_shift_image
+from otsu import otsu_and_blur, otsu_filename
+from wavelet_decomposition import save_wavelet_decomposition
+from plotting_utils import mean_shift, profiling
+from plotting_utils.plotting_helper import int_arg_positive_nonzero, path_arg
+
+IMAGE_EXTENSIONS = (".png", ".jpeg", ".jpg", ".pgm")
+
+Operation = Tuple[str, Dict]
+
+
+class DecodedImage:
+    """An image decoded once, with the gray and RGB versions the operations need converted on first use"""
+
+    def __init__(self, bgr: np.ndarray, name: str):
+        self.bgr = bgr
+        self.name = name
+        self._gray: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_file(cls, image_file: str) -> "DecodedImage":
+        bgr = cv2.imread(image_file)
+        if bgr is None:
+            raise ValueError(f"Could not read image '{image_file}'")
+
+        return cls(bgr, os.path.splitext(os.path.basename(os.path.normpath(image_file)))[0])
+
+    @classmethod
+    def from_gray(cls, gray: np.ndarray, name: str) -> "DecodedImage":
+        """Wraps a uint8 grayscale image that is already in memory, such as a frame accumulated from events"""
+        image = cls(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), name)
+        image._gray = gray
+        return image
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return np.ascontiguousarray(self.bgr[..., ::-1])
+
+
+def run_canny(image: DecodedImage, save_directory: str):
+    save_canny(image.gray, image.name, save_directory)
+
+
+def run_otsu(image: DecodedImage, save_directory: str, blur_amount: int, otsu_threshold: int = 125):
+    otsu_image = otsu_and_blur(image.bgr, blur_amount, otsu_threshold)
+    cv2.imwrite(os.path.join(save_directory, otsu_filename(image.name, blur_amount, otsu_threshold)), otsu_image)
+
+
+def run_wavelet(image: DecodedImage, save_directory: str, type: str):
+    # wavelet_decomposition.py converts with COLOR_RGB2GRAY, so the same conversion is used to give the same output
+    save_wavelet_decomposition(cv2.cvtColor(image.bgr, cv2.COLOR_RGB2GRAY), type, image.name, save_directory)
+
+
+def run_mean_shift(
+    image: DecodedImage,
+    save_directory: str,
+    fast: bool = False,
+    quantization_step: int = 1,
+    bandwidth: Optional[float] = None,
+    bandwidth_cache: Optional[str] = None,
+):
+    # bandwidth_cache is resolved to a bandwidth once for the whole batch in resolve_bandwidth_caches
+    segmented = mean_shift_image(image.rgb, fast or bandwidth is not None, bandwidth, quantization_step)
+    Image.fromarray(segmented).save(os.path.join(save_directory, f"{image.name}-mean_shift.png"))
+
+
+def run_entropy(image: DecodedImage, save_directory: str):
+    save_entropy_image(get_entropy_image(image.rgb), save_directory, image.name)
+
+
+def bool_value(value: str) -> bool:
+    if value.lower() not in ("true", "false", "1", "0"):
+        raise ValueError(f"'{value}' is not true or false")
+
+    return value.lower() in ("true", "1")
+
+
+# Operation name: (function, {parameter: type}, required parameters)
+OPERATIONS: Dict[str, Tuple[Callable, Dict[str, type], Tuple[str, ...]]] = {
+    "canny": (run_canny, {}, ()),
+    "otsu": (run_otsu, {"blur_amount": int, "otsu_threshold": int}, ("blur_amount",)),
+    "wavelet": (run_wavelet, {"type": str}, ("type",)),
+    "mean_shift": (
+        run_mean_shift,
+        {"fast": bool_value, "quantization_step": int, "bandwidth": float, "bandwidth_cache": str},
+        (),
+    ),
+    "entropy": (run_entropy, {}, ()),
+}
+
+
+def parse_operation(operation_str: str) -> Operation:
+    """Parses 'name[:parameter=value,...]' into (name, parameters)
+
+    Raises
+    ------
+    ValueError
+        Raised when the operation or one of its parameters is unknown, or a parameter is missing or invalid
+    """
+    name, _, parameters_str = operation_str.partition(":")
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{name}'. Choose from {list(OPERATIONS)}")
+
+    _, parameter_types, required = OPERATIONS[name]
+    parameters = {}
+    for parameter_str in filter(None, parameters_str.split(",")):
+        key, _, value = parameter_str.partition("=")
+        if key not in parameter_types:
+            raise ValueError(f"Unknown parameter '{key}' for operation '{name}'. Choose from {list(parameter_types)}")
+        parameters[key] = parameter_types[key](value)
+
+    missing = [key for key in required if key not in parameters]
+    if missing:
+        raise ValueError(f"Operation '{name}' requires {missing}")
+
+    if name == "otsu":
+        if parameters["blur_amount"] < 0 or parameters["blur_amount"] % 2 == 0:
+            raise ValueError("otsu blur_amount must be a positive odd number")
+        if not 0 < parameters.get("otsu_threshold", 125) <= 255:
+            raise ValueError("otsu otsu_threshold must be between 1 and 255")
+    elif name == "wavelet" and parameters["type"] not in pywt.wavelist():
+        raise ValueError(f"Invalid wavelet type '{parameters['type']}'")
+    elif name == "mean_shift" and parameters.get("quantization_step", 1) < 1:
+        raise ValueError("mean_shift quantization_step must be at least 1")
+
+    return name, parameters
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Batch Image Processing", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "inputs", help="Directories of images, images or glob patterns such as 'frames/*.png'", nargs="+"
+    )
+    parser.add_argument(
+        "--operation",
+        "-o",
+        help=f"Operation to apply, as name[:parameter=value,...]. One of {list(OPERATIONS)}. Can be repeated",
+        type=parse_operation,
+        action="append",
+        required=True,
+    )
+    parser.add_argument("--save_directory", "-d", help="Save files to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--num_workers", "-w", help="Number of processes", type=int_arg_positive_nonzero, default=os.cpu_count()
+    )
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def find_images(inputs: Sequence[str]) -> List[str]:
+    """Expands directories and glob patterns into image files, in natural order and without duplicates"""
+    images = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            paths = [os.path.join(input_path, name) for name in os.listdir(input_path)]
+        else:
+            paths = glob.glob(input_path)
+
+        images.extend(
+            path for path in natsorted(paths) if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    return list(dict.fromkeys(images))
+
+
+def resolve_bandwidth_caches(operations: Sequence[Operation], first_image: DecodedImage) -> List[Operation]:
+    """Replaces the bandwidth_cache of fast mean shift operations with the cached bandwidth, estimating it from the
+    first image if the cache does not exist yet, so every image of the batch uses the same bandwidth"""
+    resolved = []
+    for name, parameters in operations:
+        if name == "mean_shift" and "bandwidth_cache" in parameters and "bandwidth" not in parameters:
+            pixels = first_image.rgb.reshape(-1, 3)
+            bandwidth = mean_shift.cached_bandwidth(parameters["bandwidth_cache"], pixels)
+            parameters = {**parameters, "bandwidth": bandwidth}
+        resolved.append((name, parameters))
+
+    return resolved
+
+
+def init_worker():
+    # Plots are only saved, and each process handles its own images, so OpenCV's own threads would only compete
+    matplotlib.use("Agg")
+    cv2.setNumThreads(1)
+
+
+def apply_operations(image: DecodedImage, operations: Sequence[Operation], save_directory: str) -> Optional[str]:
+    """Applies every operation to one image. Returns an error message instead of raising, so one bad image does not
+    stop the batch"""
+    try:
+        for name, parameters in operations:
+            OPERATIONS[name][0](image, save_directory, **parameters)
+    except Exception as e:
+        return f"{image.name}: {e}"
+
+    return None
+
+
+def process_image(image_file: str, operations: Sequence[Operation], save_directory: str) -> Optional[str]:
+    try:
+        image = DecodedImage.from_file(image_file)
+    except ValueError as e:
+        return str(e)
+
+    return apply_operations(image, operations, save_directory)
+
+
+def process_frame(frame: np.ndarray, name: str, operations: Sequence[Operation], save_directory: str) -> Optional[str]:
+    return apply_operations(DecodedImage.from_gray(frame, name), operations, save_directory)
+
+
+def run_batch(
+    function: Callable,
+    argument_lists: Sequence[Sequence],
+    num_workers: int,
+    executor: Optional[concurrent.futures.ProcessPoolExecutor] = None,
+):
+    """Calls function with the i-th item of every argument list for every i, spread over num_workers processes,
+    and prints the errors it returns. An executor started with init_worker, such as one shared by several batches,
+    is used instead of starting new processes"""
+    matplotlib.use("Agg")
+    num_items = len(argument_lists[0])
+    chunksize = max(num_items // (4 * num_workers), 1)
+
+    if executor is not None:
+        errors = list(executor.map(function, *argument_lists, chunksize=chunksize))
+    elif num_workers == 1:
+        errors = [function(*arguments) for arguments in zip(*argument_lists)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(num_workers, initializer=init_worker) as executor:
+            errors = list(executor.map(function, *argument_lists, chunksize=chunksize))
+
+    for error in filter(None, errors):
+        print(f"Failed: {error}")
+
+
+def main(args: argparse.Namespace):
+    image_files = find_images(args.inputs)
+    if not image_files:
+        print("No images found")
+        return
+
+    start = time.perf_counter()
+    with profiling.stage("load"):
+        operations = resolve_bandwidth_caches(args.operation, DecodedImage.from_file(image_files[0]))
+
+    num_images = len(image_files)
+    # Every process loads, processes and saves its own images, so they are timed together
+    with profiling.stage("process", items=num_images, unit="images"):
+        run_batch(
+            process_image,
+            [image_files, [operations] * num_images, [args.save_directory] * num_images],
+            args.num_workers,
+        )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Processed {len(image_files)} images with {len(args.operation)} operations in {elapsed:.1f}s "
+        f"({len(image_files) / elapsed:.2f} images/s)"
+    )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
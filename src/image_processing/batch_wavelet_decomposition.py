@@ -0,0 +1,158 @@
+"""
+Multi-level wavelet decomposition of every frame of a frame stack in one pass.
+
+Frames of a stack written by extract_pgm.py --frame_stack are decomposed in batches with a single pywt.wavedec2 call
+along the batch axis. The energy (sum of squared coefficients) of the approximation and of every detail subband at
+every level is saved per frame as a time series. Optionally all coefficients are saved to a float32 .npy file in
+pywt.coeffs_to_array layout, with a JSON file describing the decomposition (see frame_coefficients).
+"""
+
+import argparse
+import csv
+import json
+import os
+import pathlib
+import time
+from typing import Dict, List, Optional
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pywt
+
+from plotting_utils import pgm_frames, profiling
+from plotting_utils.plotting_helper import file_arg, int_arg_positive_nonzero, path_arg
+
+SUBBANDS = ["horizontal", "vertical", "diagonal"]
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Batch wavelet decomposition", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("frame_stack", help=".npy frame stack written by extract_pgm.py --frame_stack", type=file_arg)
+    parser.add_argument("--type", "-t", help="Type of wavelet decomposition to perform", type=str, required=True)
+    parser.add_argument(
+        "--levels",
+        "-l",
+        help="Number of levels, by default the maximum for the frame size",
+        type=int_arg_positive_nonzero,
+    )
+    parser.add_argument(
+        "--batch_size", "-b", help="Number of frames decomposed at once", type=int_arg_positive_nonzero, default=256
+    )
+    parser.add_argument(
+        "--save_coefficients", "-c", help="Also save every coefficient to a .npy file", action="store_true"
+    )
+    parser.add_argument("--save_directory", "-d", help="Save files to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
+    args = parser.parse_args()
+
+    if args.type not in pywt.wavelist(kind="discrete"):
+        parser.error("Error: Invalid wavelet type")
+
+    return args
+
+
+def energy_columns(levels: int) -> List[str]:
+    """Names of the energies, from the coarsest level to the finest, in the order of pywt.wavedec2"""
+    columns = [f"approximation_L{levels}"]
+    for level in range(levels, 0, -1):
+        columns += [f"{subband}_L{level}" for subband in SUBBANDS]
+
+    return columns
+
+
+def subband_energies(coeffs: List) -> np.ndarray:
+    """Sum of squared coefficients of every subband of batched pywt.wavedec2 output, shaped (frames, subbands)"""
+    subbands = [coeffs[0]] + [detail for details in coeffs[1:] for detail in details]
+    return np.stack([np.square(subband, dtype=np.float64).sum(axis=(-2, -1)) for subband in subbands], axis=1)
+
+
+def decomposition_metadata(wavelet: str, levels: int, frame_shape) -> Dict:
+    return {"wavelet": wavelet, "levels": levels, "mode": "symmetric", "frame_shape": list(frame_shape)}
+
+
+def frame_coefficients(coefficient_array: np.ndarray, metadata: Dict) -> List:
+    """Converts one frame of a saved coefficient file back into pywt.wavedec2 output, for example to pass to
+    pywt.waverec2"""
+    empty = pywt.wavedec2(np.zeros(metadata["frame_shape"]), metadata["wavelet"], metadata["mode"], metadata["levels"])
+    _, coeff_slices = pywt.coeffs_to_array(empty)
+
+    return pywt.array_to_coeffs(coefficient_array, coeff_slices, output_format="wavedec2")
+
+
+def write_energies(csv_path: str, timestamps: np.ndarray, energies: np.ndarray, columns: List[str]):
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["Timestamp"] + columns)
+        for timestamp, frame_energies in zip(timestamps.tolist(), energies.tolist()):
+            writer.writerow([timestamp] + frame_energies)
+
+
+def plot_energies(save_path: str, timestamps: np.ndarray, energies: np.ndarray, columns: List[str]):
+    fig, ax = plt.subplots(figsize=(12, 5))
+    for column, column_energies in zip(columns, energies.T):
+        ax.plot(timestamps, column_energies, label=column)
+
+    ax.set_yscale("log")
+    ax.set_xlabel("Timestamp (us)")
+    ax.set_ylabel("Energy")
+    ax.legend(fontsize=8, ncol=2)
+    fig.savefig(save_path, bbox_inches="tight")
+    plt.close(fig)
+
+
+def main(args: argparse.Namespace):
+    start = time.perf_counter()
+    stack = pgm_frames.FrameStack(args.frame_stack)
+    height, width = stack.frame_shape
+
+    wavelet = pywt.Wavelet(args.type)
+    levels = args.levels or pywt.dwt_max_level(min(height, width), wavelet.dec_len)
+    columns = energy_columns(levels)
+
+    output_stem = os.path.join(args.save_directory, f"{pathlib.Path(args.frame_stack).stem}-WaveletDecomp-{args.type}")
+    energies = np.empty((len(stack), len(columns)), dtype=np.float64)
+    coefficients: Optional[np.ndarray] = None
+
+    for batch_start in range(0, len(stack), args.batch_size):
+        batch_stop = min(batch_start + args.batch_size, len(stack))
+        with profiling.stage("load", items=batch_stop - batch_start, unit="frames"):
+            frames = np.asarray(stack.frames[batch_start:batch_stop], dtype=np.float32)
+
+        with profiling.stage("compute", items=batch_stop - batch_start, unit="frames"):
+            coeffs = pywt.wavedec2(frames, wavelet, level=levels, axes=(-2, -1))
+            energies[batch_start:batch_stop] = subband_energies(coeffs)
+
+        if args.save_coefficients:
+            with profiling.stage("save", items=batch_stop - batch_start, unit="frames"):
+                coefficient_array, _ = pywt.coeffs_to_array(coeffs, axes=(-2, -1))
+                if coefficients is None:
+                    coefficients = np.lib.format.open_memmap(
+                        output_stem + "-coefficients.npy",
+                        mode="w+",
+                        dtype=np.float32,
+                        shape=(len(stack), *coefficient_array.shape[1:]),
+                    )
+                coefficients[batch_start:batch_stop] = coefficient_array
+
+    with profiling.stage("save"):
+        write_energies(output_stem + "-energies.csv", stack.timestamps, energies, columns)
+    with profiling.stage("render"):
+        plot_energies(output_stem + "-energies.png", stack.timestamps, energies, columns)
+
+    if coefficients is not None:
+        coefficients.flush()
+        with open(output_stem + "-coefficients.json", "w") as f:
+            json.dump(decomposition_metadata(args.type, levels, (height, width)), f, indent=4)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Decomposed {len(stack)} frames into {levels} levels in {elapsed:.1f}s ({len(stack) / elapsed:.1f} frames/s)"
+    )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
@@ -1,9 +1,11 @@
 import cv2
+import numpy as np
 from matplotlib import pyplot as plt
 import argparse
 import ntpath
 import os
 
+from plotting_utils import profiling
 from plotting_utils.plotting_helper import path_arg, file_arg
 
 
@@ -17,25 +19,36 @@ def get_args() -> argparse.Namespace:
         action="store_true",
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
 
-def main(args: argparse.Namespace):
-    img = cv2.imread(args.image_path, 0)
-    edges = cv2.Canny(img, 100, 200)
+def save_canny(img: np.ndarray, image_name: str, save_directory: str):
+    """Saves the edges of a grayscale image as Canny-<image name>.png in save_directory"""
+    with profiling.stage("compute", items=img.size, unit="pixels"):
+        edges = cv2.Canny(img, 100, 200)
+
+    with profiling.stage("render"):
+        plt.subplot(121), plt.imshow(img, cmap="gray")
+        plt.title("Original Image"), plt.xticks([]), plt.yticks([])
+        plt.subplot(122), plt.imshow(edges, cmap="gray")
+        plt.title("Edge Image"), plt.xticks([]), plt.yticks([])
+
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(save_directory, f"Canny-{image_name}.png"))
+    plt.clf()
 
-    plt.subplot(121), plt.imshow(img, cmap="gray")
-    plt.title("Original Image"), plt.xticks([]), plt.yticks([])
-    plt.subplot(122), plt.imshow(edges, cmap="gray")
-    plt.title("Edge Image"), plt.xticks([]), plt.yticks([])
 
+def main(args: argparse.Namespace):
+    with profiling.stage("load"):
+        img = cv2.imread(args.image_path, 0)
     image_name = os.path.splitext(ntpath.basename(args.image_path))[0]
 
-    plt.savefig(os.path.join(args.save_directory, f"Canny-{image_name}.png"))
-    plt.clf()
+    save_canny(img, image_name, args.save_directory)
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -1,10 +1,19 @@
-import csv
-import sys
 import argparse
+import collections
+import concurrent.futures
 import os
 import pathlib
+import sys
+import time
+from typing import Deque, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+from plotting_utils import pgm_frames, profiling
+from plotting_utils.plotting_helper import file_arg, int_arg_not_negative, int_arg_positive_nonzero, path_arg
 
-from plotting_utils.plotting_helper import file_arg, path_arg, int_arg_positive_nonzero, check_aedat_csv_format
+FORMATS = ["p2", "p5", "png"]
 
 
 def get_args() -> argparse.Namespace:
@@ -16,58 +25,143 @@ def get_args() -> argparse.Namespace:
     parser.add_argument(
         "--max_images",
         "-i",
-        help="Max number of pgm images to extract",
+        help="Max number of pgm images to extract, by default all of them",
         type=int_arg_positive_nonzero,
-        default=sys.maxint
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--format",
+        "-f",
+        help="Format of the extracted images: p2 is the ASCII PGM stored in the CSV, p5 is binary PGM. "
+        "p5 and png frames are decoded in bulk",
+        choices=FORMATS,
+        default="p2",
+    )
+    parser.add_argument("--start", help="Index of the first frame to extract", type=int_arg_not_negative, default=0)
+    parser.add_argument("--stop", help="Index after the last frame to extract", type=int_arg_positive_nonzero)
+    parser.add_argument("--step", help="Extract every step-th frame", type=int_arg_positive_nonzero, default=1)
+    parser.add_argument(
+        "--frame_stack",
+        "-s",
+        help="Decode all frames into a single memory-mapped <csv name>.npy frame stack with a timestamp index "
+        "instead of writing one image file per frame",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--num_workers",
+        "-w",
+        help="Number of processes decoding frames in parallel for p5, png and frame stacks",
+        type=int_arg_positive_nonzero,
+        default=1
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        help="Number of threads writing image files",
+        type=int_arg_positive_nonzero,
+        default=4
+    )
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
 
-def main(args: argparse.Namespace):
-    csv_file = args.aedat_csv_file
-    max_images = args.max_images
+def write_p2(path: str, pgm_string: str):
+    with open(path, "w") as pgm_file:
+        pgm_file.write(pgm_frames.pgm_string_to_pgm(pgm_string))
 
-    with open(csv_file, "r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, delimiter=",")
 
-        header = next(reader, None)  # Grab the header
-        if header is None:
-            raise ValueError(f"Error: File '{csv_file}' seems to be empty")
+def write_p5(path: str, frame: np.ndarray):
+    with open(path, "wb") as pgm_file:
+        pgm_file.write(pgm_frames.pgm_bytes(frame))
 
-        # Strip whitespace from header if there is any
-        header = [x.strip(" ") for x in header]
 
-        if not check_aedat_csv_format(header, ["PGM_String"]):
-            sys.exit(
-                f"File {csv_file} does not contain a PGM_String column"
-            )
+def write_png(path: str, frame: np.ndarray):
+    if not cv2.imwrite(path, frame):
+        raise ValueError(f"Could not write '{path}'")
+
+
+def write_images(paths: Sequence[str], images: Sequence[Union[str, np.ndarray]], image_format: str):
+    write = {"p2": write_p2, "p5": write_p5, "png": write_png}[image_format]
+    for path, image in zip(paths, images):
+        write(path, image)
+
+
+def extract_images(
+    csv_file: str,
+    save_directory: str,
+    image_format: str,
+    start: int = 0,
+    stop: Optional[int] = None,
+    step: int = 1,
+    num_workers: int = 1,
+    num_threads: int = 4,
+) -> int:
+    """Writes the frames of every step-th row from start to stop to <csv name>_<row>.<pgm or png> files.
+    Files are written by a pool of threads while the next chunk of rows is read and decoded.
+    Returns the number of images written"""
+    csv_stem = pathlib.Path(csv_file).stem
+    extension = "png" if image_format == "png" else "pgm"
 
-        pgm_index = header.index("PGM_String")
+    if image_format == "p2":
+        # The CSV already holds P2 images, so they only need their newlines restored
+        rows_and_strings = pgm_frames.iter_pgm_strings(csv_file, start=start, stop=stop, step=step)
+        chunks = ((rows, pgm_strings) for rows, _, pgm_strings in rows_and_strings)
+    else:
+        rows_and_frames = pgm_frames.iter_decoded_frames(csv_file, start, stop, step, num_workers)
+        chunks = ((rows, frames) for rows, _, frames in rows_and_frames)
 
-        first_row = next(reader, None)
-        if first_row is None:
-            raise ValueError(f"Error: File '{csv_file}' has a header but contains no data")
+    # Images are written in the background, so the save stage is only the time spent waiting for the writers
+    chunks = profiling.iter_stage("load", chunks, lambda chunk: len(chunk[0]), "frames")
 
-        image_count = 0
-        csv_stem = pathlib.Path(csv_file).stem
-        for row in reader:
-            if image_count >= max_images:
-                break
+    num_images = 0
+    pending: Deque[concurrent.futures.Future] = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(num_threads) as executor:
+        for rows, images in chunks:
+            paths = [os.path.join(save_directory, f"{csv_stem}_{row}.{extension}") for row in rows.tolist()]
+            pending.append(executor.submit(write_images, paths, images, image_format))
+            num_images += len(paths)
 
-            pgm_string = row[pgm_index]
-            pgm_string = pgm_string.replace('-', '\n')
+            # Limit the chunks held in memory while waiting to be written
+            with profiling.stage("save"):
+                while len(pending) > 2 * num_threads:
+                    pending.popleft().result()
 
-            filename = f"{csv_stem}_{image_count}.pgm"
-            output_path = os.path.join(args.save_directory, filename)
+        with profiling.stage("save"):
+            for future in pending:
+                future.result()
 
-            with open(output_path, 'w') as pgm_file:
-                pgm_file.write(pgm_string)
+    return num_images
+
+
+def main(args: argparse.Namespace):
+    csv_file = args.aedat_csv_file
+    stop = args.stop
+    if args.max_images is not None:
+        max_images_stop = args.start + args.max_images * args.step
+        stop = max_images_stop if stop is None else min(stop, max_images_stop)
+
+    start_time = time.perf_counter()
+    try:
+        if args.frame_stack:
+            output = os.path.join(args.save_directory, f"{pathlib.Path(csv_file).stem}.npy")
+            num_frames = pgm_frames.write_frame_stack(
+                csv_file, output, args.start, stop, num_workers=args.num_workers, step=args.step
+            )
+        else:
+            output = args.save_directory
+            num_frames = extract_images(
+                csv_file, args.save_directory, args.format, args.start, stop, args.step, args.num_workers,
+                args.num_threads
+            )
+    except ValueError as e:
+        sys.exit(str(e))
 
-            image_count += 1
+    elapsed = time.perf_counter() - start_time
+    print(f"Wrote {num_frames} frames to '{output}' in {elapsed:.1f}s ({num_frames / max(elapsed, 1e-9):.0f} frames/s)")
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
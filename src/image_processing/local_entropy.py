@@ -6,6 +6,7 @@ import os
 import argparse
 from PIL import Image
 
+from plotting_utils import image_entropy, profiling
 from plotting_utils.plotting_helper import path_arg, file_arg_image
 
 
@@ -27,6 +28,7 @@ def get_args() -> argparse.Namespace:
         "--exclude_plot", dest="save_plot", action="store_false", help="Save image with plot information"
     )
     parser.add_argument("--save_entropy_data", action="store_true", help="Save entropy data for each image in a CSV")
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
 
     if not args.save_plot and not (args.save_entropy_data or args.save_img):
@@ -40,33 +42,13 @@ def rgb2gray(rgb: np.ndarray) -> np.ndarray:
     return np.dot(rgb[..., :3], [255 * 0.2989, 255 * 0.5870, 255 * 0.1140])
 
 
-# Calculate entropy. Returns the entropy of a signal - signal must be a 1-D numpy array
-def entropy(signal: np.ndarray) -> np.float64:
-    lensig = signal.size
-    symset = list(set(signal))
-    propab = [np.size(signal[signal == i]) / (1.0 * lensig) for i in symset]
-    ent = np.sum([p * np.log2(1.0 / p) for p in propab])
-    return ent
-
-
 def get_entropy_image(img: np.ndarray, convert_to_gray=True) -> np.ndarray:
     if convert_to_gray:
         img = rgb2gray(img)
 
+    # Entropy of the 10x10 window starting 5 pixels above and to the left of each pixel, clipped at the edges
     N = 5
-    S = img.shape
-    E = np.array(img)
-
-    for row in range(S[0]):
-        for col in range(S[1]):
-            Lx = np.max([0, col - N])
-            Ux = np.min([S[1], col + N])
-            Ly = np.max([0, row - N])
-            Uy = np.min([S[0], row + N])
-            region = img[Ly:Uy, Lx:Ux].flatten()
-            E[row, col] = entropy(region)
-
-    return E
+    return image_entropy.local_entropy(img, N).astype(img.dtype)
 
 
 def main(args: argparse.Namespace):
@@ -75,24 +57,29 @@ def main(args: argparse.Namespace):
     file_name = os.path.splitext(file_name)[0]
 
     # Image must read in as RGB and manually converted to grayscale with rgb2gray
-    image = np.array(Image.open(args.image_file).convert("RGB"))
+    with profiling.stage("load"):
+        image = np.array(Image.open(args.image_file).convert("RGB"))
 
-    entropy = get_entropy_image(image)
-    entropy_sum = entropy.sum()
+    with profiling.stage("compute", items=image.shape[0] * image.shape[1], unit="pixels"):
+        entropy = get_entropy_image(image)
+        entropy_sum = entropy.sum()
 
     if args.save_img:
         # Save the entropy images
         image_save_path = os.path.join(args.save_directory, f"LocalEntropy_img_{file_name}")
-        plt.imsave(image_save_path, entropy, cmap="viridis")
+        with profiling.stage("save"):
+            plt.imsave(image_save_path, entropy, cmap="viridis")
 
     if args.save_plot:
         # Save the entropy figures
-        fig, (ax0) = plt.subplots(nrows=1, ncols=1, figsize=(12, 5))
-        ax0.imshow(entropy, cmap="viridis")
-        ax0.set_title("Local entropy Image, Entropy=" + str(round(entropy_sum, 3)), fontsize=10)
-        plt.colorbar(ax0.imshow(entropy, cmap="viridis"), ax=ax0, fraction=0.046, pad=0.04)
+        with profiling.stage("render"):
+            fig, (ax0) = plt.subplots(nrows=1, ncols=1, figsize=(12, 5))
+            ax0.imshow(entropy, cmap="viridis")
+            ax0.set_title("Local entropy Image, Entropy=" + str(round(entropy_sum, 3)), fontsize=10)
+            plt.colorbar(ax0.imshow(entropy, cmap="viridis"), ax=ax0, fraction=0.046, pad=0.04)
         full_path_fig = os.path.join(args.save_directory, f"LocalEntropy_fig_{file_name}")
-        fig.savefig(full_path_fig, bbox_inches="tight")
+        with profiling.stage("save"):
+            fig.savefig(full_path_fig, bbox_inches="tight")
         plt.close(fig)
 
     if args.save_entropy_data:
@@ -111,4 +98,5 @@ def main(args: argparse.Namespace):
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
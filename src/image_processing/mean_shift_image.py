@@ -1,12 +1,20 @@
 import argparse
 import os
+from typing import Optional
+
 import numpy as np
 from PIL import Image
 
 from sklearn.cluster import MeanShift, estimate_bandwidth
 from skimage.color.colorlabel import label2rgb
 
-from plotting_utils.plotting_helper import path_arg, file_arg_image
+from plotting_utils import mean_shift, profiling
+from plotting_utils.plotting_helper import (
+    float_arg_positive_nonzero,
+    int_arg_positive_nonzero,
+    path_arg,
+    file_arg_image,
+)
 
 
 def get_args() -> argparse.Namespace:
@@ -18,6 +26,37 @@ def get_args() -> argparse.Namespace:
     )
     parser.add_argument("--subtract_image", "-s", help="Subtract mean shifted image from the original image", type=bool)
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--fast",
+        "-f",
+        help="Cluster each distinct color once, weighted by its pixel count, using a seeded bandwidth estimate",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--quantization_step",
+        "-q",
+        help="With --fast, merge colors into steps of this size before clustering",
+        type=int_arg_positive_nonzero,
+        default=1,
+    )
+    parser.add_argument(
+        "--bandwidth",
+        "-b",
+        help="With --fast, bandwidth to use instead of estimating it",
+        type=float_arg_positive_nonzero,
+    )
+    parser.add_argument(
+        "--bandwidth_cache",
+        help="With --fast, JSON file the estimated bandwidth is stored in and reused from for similar frames",
+        type=str,
+    )
+    parser.add_argument(
+        "--num_jobs",
+        "-j",
+        help="With --fast, number of parallel jobs for neighbor searches (-1 for all cores)",
+        type=int,
+    )
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
 
     # TODO: Implement subtract_arg.
@@ -26,33 +65,66 @@ def get_args() -> argparse.Namespace:
     return args
 
 
-def main(args: argparse.Namespace):
-    original_image = np.array(Image.open(args.image_file).convert("RGB"))
-
+def mean_shift_image(
+    original_image: np.ndarray,
+    fast: bool = False,
+    bandwidth: Optional[float] = None,
+    quantization_step: int = 1,
+    n_jobs: Optional[int] = None,
+) -> np.ndarray:
+    """Segments an RGB image with mean shift clustering and colors every segment with its average color
+
+    Parameters
+    ----------
+    fast : bool, optional
+        Cluster the distinct colors weighted by their pixel counts (see plotting_utils.mean_shift) instead of every
+        pixel, by default False. Without quantization the segments are the same as clustering every pixel
+    bandwidth : Optional[float], optional
+        With fast, the bandwidth to use. By default it is estimated from a seeded sample, so runs agree
+    """
     original_shape = original_image.shape
     flat_image = np.reshape(original_image, [-1, 3])
 
-    bandwidth = estimate_bandwidth(flat_image, quantile=0.1, n_samples=100)
-    mean_shift = MeanShift(bandwidth=bandwidth, bin_seeding=True)
+    if fast:
+        if bandwidth is None:
+            bandwidth = mean_shift.estimate_pixel_bandwidth(flat_image)
+        labels = mean_shift.mean_shift_labels(flat_image, bandwidth, quantization_step, n_jobs)
+    else:
+        bandwidth = estimate_bandwidth(flat_image, quantile=0.1, n_samples=100)
+        mean_shift_model = MeanShift(bandwidth=bandwidth, bin_seeding=True)
 
-    mean_shift.fit(flat_image)
+        mean_shift_model.fit(flat_image)
 
-    # (r,g,b) vectors corresponding to the different clusters after meanshift
-    labels = mean_shift.labels_
+        # (r,g,b) vectors corresponding to the different clusters after meanshift
+        labels = mean_shift_model.labels_
 
     # Displaying segmented image
     segmented_image = np.reshape(labels, original_shape[:2])
 
-    superpixels = label2rgb(segmented_image, original_image, kind="avg")
+    return label2rgb(segmented_image, original_image, kind="avg")
+
+
+def main(args: argparse.Namespace):
+    with profiling.stage("load"):
+        original_image = np.array(Image.open(args.image_file).convert("RGB"))
+
+    with profiling.stage("compute", items=original_image.shape[0] * original_image.shape[1], unit="pixels"):
+        bandwidth = args.bandwidth
+        if args.fast and bandwidth is None and args.bandwidth_cache:
+            bandwidth = mean_shift.cached_bandwidth(args.bandwidth_cache, original_image.reshape(-1, 3))
 
-    result_image = Image.fromarray(superpixels)
+        result_image = Image.fromarray(
+            mean_shift_image(original_image, args.fast, bandwidth, args.quantization_step, args.num_jobs)
+        )
 
     file_name = os.path.basename(os.path.normpath(args.image_file))  # Get file at end of path
     file_name = os.path.splitext(file_name)[0]  # Strip off file extension
 
-    result_image.save(os.path.join(args.save_directory, f"{file_name}-mean_shift.png"))
+    with profiling.stage("save"):
+        result_image.save(os.path.join(args.save_directory, f"{file_name}-mean_shift.png"))
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
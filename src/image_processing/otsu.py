@@ -5,6 +5,7 @@ import cv2
 import numpy as np
 import os
 import argparse
+from plotting_utils import profiling
 from plotting_utils.plotting_helper import int_arg_positive_nonzero, path_arg, file_arg_image, int_arg_not_negative
 
 
@@ -26,6 +27,7 @@ def get_args() -> argparse.Namespace:
         type=int_arg_positive_nonzero,
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
 
     args = parser.parse_args()
 
@@ -51,24 +53,29 @@ def otsu_and_blur(img: np.ndarray, blur_amount: int, otsu_min_threshold: int) ->
     return threshold_image
 
 
+def otsu_filename(file_name: str, blur_amount: int, otsu_min_threshold: int) -> str:
+    return f"{file_name}-otsu_threshold-{blur_amount}blur-{otsu_min_threshold}threshold.png"
+
+
 def main(args: argparse.Namespace):
-    normal_image = cv2.imread(args.image_file)
+    with profiling.stage("load"):
+        normal_image = cv2.imread(args.image_file)
 
-    otsu_image = otsu_and_blur(normal_image, args.blur_amount, args.otsu_threshold)
+    with profiling.stage("compute", items=normal_image.shape[0] * normal_image.shape[1], unit="pixels"):
+        otsu_image = otsu_and_blur(normal_image, args.blur_amount, args.otsu_threshold)
 
     # Grab filename from path
     file_name = os.path.basename(os.path.normpath(args.image_file))
     file_name = os.path.splitext(file_name)[0]
 
-    cv2.imwrite(
-        os.path.join(
-            args.save_directory,
-            f"{file_name}-otsu_threshold-{args.blur_amount}blur-{args.otsu_threshold}threshold.png",
-        ),
-        otsu_image,
-    )
+    with profiling.stage("save"):
+        cv2.imwrite(
+            os.path.join(args.save_directory, otsu_filename(file_name, args.blur_amount, args.otsu_threshold)),
+            otsu_image,
+        )
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -0,0 +1,176 @@
+"""
+Runs the image processing operations directly on frames accumulated from an event CSV, without exporting images.
+
+Events are accumulated in memory into count, polarity or time surface frames (see plotting_utils.frame_accumulator),
+per fixed time window or per fixed number of events. Every frame is then passed to the operations of batch_runner.py
+and the outputs are named after <csv name>_<frame index>, like the frames written by extract_pgm.py. Frames are
+accumulated and processed FRAME_BATCH_SIZE at a time, so memory use does not grow with the length of the recording.
+
+CSV Format: On/Off,X,Y,Timestamp
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import os
+import pathlib
+import time
+
+import numpy as np
+
+from batch_runner import (
+    OPERATIONS,
+    DecodedImage,
+    init_worker,
+    parse_operation,
+    process_frame,
+    resolve_bandwidth_caches,
+    run_batch,
+)
+from plotting_utils import event_arrays, frame_accumulator, profiling
+from plotting_utils.frame_accumulator import FrameType
+from plotting_utils.plotting_helper import (
+    file_arg,
+    float_arg_positive_nonzero,
+    int_arg_not_negative,
+    int_arg_positive_nonzero,
+    path_arg,
+)
+
+FRAME_BATCH_SIZE = 256
+"""Frames accumulated and held in memory at once"""
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Event frame image processing", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("event_csv", help="Event CSV to accumulate into frames", type=file_arg)
+
+    window = parser.add_mutually_exclusive_group(required=True)
+    window.add_argument(
+        "--reconstruction_window", "-r", help="Length of each frame in microseconds", type=int_arg_positive_nonzero
+    )
+    window.add_argument(
+        "--events_per_frame", "-n", help="Number of events in each frame", type=int_arg_positive_nonzero
+    )
+
+    parser.add_argument(
+        "--frame_type",
+        "-f",
+        help="What each pixel of a frame holds",
+        choices=[frame_type.value for frame_type in FrameType],
+        default=FrameType.COUNT.value,
+    )
+    parser.add_argument(
+        "--decay",
+        help="Decay constant of time surfaces in microseconds, by default the mean length of a frame",
+        type=float_arg_positive_nonzero,
+    )
+    parser.add_argument(
+        "--operation",
+        "-o",
+        help=f"Operation to apply, as name[:parameter=value,...]. One of {list(OPERATIONS)}. Can be repeated",
+        type=parse_operation,
+        action="append",
+        required=True,
+    )
+    parser.add_argument(
+        "--skip_rows",
+        "-s",
+        help="Number of events to skip at the start of the file",
+        type=int_arg_not_negative,
+        default=0,
+    )
+    parser.add_argument("--max_frames", "-m", help="Process at most this many frames", type=int_arg_positive_nonzero)
+    parser.add_argument("--save_directory", "-d", help="Save files to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--num_workers", "-w", help="Number of processes", type=int_arg_positive_nonzero, default=os.cpu_count()
+    )
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace):
+    start = time.perf_counter()
+    with profiling.stage("load") as load:
+        events = event_arrays.read_event_arrays(args.event_csv, args.skip_rows)
+        load.add_items(len(events))
+    frame_type = FrameType(args.frame_type)
+
+    frame_ends = None
+    if args.reconstruction_window is not None:
+        bounds = frame_accumulator.time_window_bounds(events.timestamps, args.reconstruction_window)
+        if len(events) > 0:
+            frame_ends = events.timestamps[0] + np.arange(1, len(bounds), dtype=np.int64) * args.reconstruction_window
+    else:
+        bounds = frame_accumulator.count_window_bounds(len(events), args.events_per_frame)
+
+    # Frames after max_frames are never accumulated
+    if args.max_frames is not None:
+        bounds = bounds[: args.max_frames + 1]
+    num_frames = len(bounds) - 1
+
+    if num_frames <= 0:
+        print(f"No frames in '{args.event_csv}'")
+        return
+
+    decay_us = args.decay
+    if frame_type == FrameType.TIME_SURFACE and decay_us is None:
+        # The mean length of a frame, as accumulate_frames would choose for all the frames at once
+        frame_events = events.timestamps[bounds[0]:max(bounds[-1], bounds[0] + 1)]
+        decay_us = max(float(frame_events[-1] - frame_events[0]) / num_frames, 1.0)
+
+    stem = pathlib.Path(args.event_csv).stem
+    # Loading the events counts towards the accumulation time
+    accumulate_time = time.perf_counter() - start
+    operations = None
+
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if args.num_workers > 1:
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(args.num_workers, initializer=init_worker)
+            )
+
+        for first in range(0, num_frames, FRAME_BATCH_SIZE):
+            last = min(first + FRAME_BATCH_SIZE, num_frames)
+            batch_start = time.perf_counter()
+
+            batch_bounds = bounds[first:last + 1]
+            with profiling.stage("compute", items=int(batch_bounds[-1] - batch_bounds[0])):
+                frames = frame_accumulator.accumulate_frames(
+                    events,
+                    batch_bounds,
+                    frame_type,
+                    decay_us=decay_us,
+                    frame_ends=None if frame_ends is None else frame_ends[first:last],
+                )
+                images = [frame_accumulator.to_gray_image(frame, frame_type) for frame in frames]
+            del frames
+            names = [f"{stem}_{index}" for index in range(first, last)]
+            accumulate_time += time.perf_counter() - batch_start
+
+            # Every process processes and saves its own frames, so they are timed together
+            with profiling.stage("process", items=len(images), unit="frames"):
+                if operations is None:
+                    operations = resolve_bandwidth_caches(args.operation, DecodedImage.from_gray(images[0], names[0]))
+                run_batch(
+                    process_frame,
+                    [images, names, [operations] * len(images), [args.save_directory] * len(images)],
+                    args.num_workers,
+                    executor,
+                )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Accumulated {int(bounds[-1] - bounds[0])} events into {num_frames} frames in {accumulate_time:.1f}s, "
+        f"processed them in {elapsed - accumulate_time:.1f}s ({num_frames / elapsed:.2f} frames/s overall)"
+    )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
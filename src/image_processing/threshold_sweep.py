@@ -0,0 +1,211 @@
+"""
+Sweeps Canny and binary thresholds over a grid of blur sizes to find good settings for an image.
+
+The image is read and converted to grayscale once, and each blur size is computed once and shared by every threshold.
+For each setting a contact sheet shows the result and a metrics table records the edge pixel fraction (Canny) or the
+foreground ratio (thresholding). Otsu's method picks its own threshold, so cv2.THRESH_OTSU ignores the threshold
+passed to it: the sweep therefore shows Otsu's automatic result next to plain binary thresholds at each value.
+"""
+
+import argparse
+import csv
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from plotting_utils import profiling
+from plotting_utils.plotting_helper import file_arg_image, int_arg_not_negative, path_arg
+
+LABEL_HEIGHT = 16
+
+
+def odd_int_arg(arg: str) -> int:
+    arg_int = int(arg)
+
+    if arg_int <= 0 or arg_int % 2 == 0:
+        raise ValueError(f"Arg {arg} must be a positive odd number")
+
+    return arg_int
+
+
+def threshold_arg(arg: str) -> int:
+    arg_int = int_arg_not_negative(arg)
+
+    if arg_int > 255:
+        raise ValueError(f"Arg {arg} must be between 0 and 255")
+
+    return arg_int
+
+
+def canny_thresholds_arg(arg: str) -> Tuple[int, int]:
+    low, high = (int_arg_not_negative(value) for value in arg.split(","))
+
+    if low > high:
+        raise ValueError(f"Arg {arg} must be low,high with low <= high")
+
+    return low, high
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Canny and Otsu threshold sweep", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("image_file", help="Image to be processed", type=file_arg_image)
+    parser.add_argument(
+        "--blur_amounts",
+        "-b",
+        help="Gaussian blur sizes (odd numbers, 1 for no blur)",
+        type=odd_int_arg,
+        nargs="+",
+        default=[1, 3, 5, 7],
+    )
+    parser.add_argument(
+        "--canny_thresholds",
+        "-c",
+        help="Canny low,high threshold pairs",
+        type=canny_thresholds_arg,
+        nargs="+",
+        default=[(50, 100), (100, 200), (150, 300)],
+    )
+    parser.add_argument(
+        "--thresholds",
+        "-t",
+        help="Binary thresholds to compare with Otsu's automatic threshold",
+        type=threshold_arg,
+        nargs="+",
+        default=[64, 125, 192],
+    )
+    parser.add_argument("--save_directory", "-d", help="Save files to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def blurred_images(img_bw: np.ndarray, blur_amounts: Sequence[int]) -> Dict[int, np.ndarray]:
+    """Blurs the grayscale image once per blur size, the same way as otsu.otsu_and_blur"""
+    return {
+        blur_amount: cv2.GaussianBlur(img_bw, (blur_amount, blur_amount), cv2.BORDER_DEFAULT)
+        for blur_amount in blur_amounts
+    }
+
+
+def canny_sweep(
+    blurred: Dict[int, np.ndarray], canny_thresholds: Sequence[Tuple[int, int]]
+) -> Tuple[List[List[np.ndarray]], List[Dict]]:
+    """Returns the edge images as rows per blur size, and a metrics row per setting"""
+    rows, metrics = [], []
+
+    for blur_amount, img_blur in blurred.items():
+        row = []
+        for low, high in canny_thresholds:
+            edges = cv2.Canny(img_blur, low, high)
+            row.append(edges)
+            metrics.append(
+                {
+                    "operation": "canny",
+                    "blur_amount": blur_amount,
+                    "threshold": f"{low}-{high}",
+                    "edge_fraction": np.count_nonzero(edges) / edges.size,
+                }
+            )
+        rows.append(row)
+
+    return rows, metrics
+
+
+def threshold_sweep(
+    blurred: Dict[int, np.ndarray], thresholds: Sequence[int]
+) -> Tuple[List[List[np.ndarray]], List[Dict]]:
+    """Returns Otsu's result followed by a binary threshold at each value, as rows per blur size,
+    and a metrics row per setting. The threshold of Otsu's rows is the one it chose"""
+    rows, metrics = [], []
+
+    for blur_amount, img_blur in blurred.items():
+        otsu_threshold, otsu_image = cv2.threshold(img_blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        settings = [("otsu", int(otsu_threshold), otsu_image)]
+        settings += [
+            ("binary", threshold, cv2.threshold(img_blur, threshold, 255, cv2.THRESH_BINARY)[1])
+            for threshold in thresholds
+        ]
+
+        row = []
+        for operation, threshold, threshold_image in settings:
+            row.append(threshold_image)
+            metrics.append(
+                {
+                    "operation": operation,
+                    "blur_amount": blur_amount,
+                    "threshold": threshold,
+                    "foreground_ratio": np.count_nonzero(threshold_image) / threshold_image.size,
+                }
+            )
+        rows.append(row)
+
+    return rows, metrics
+
+
+def contact_sheet(rows: Sequence[Sequence[np.ndarray]], labels: Sequence[str]) -> np.ndarray:
+    """Tiles equally sized grayscale images into a grid, with a label above each one"""
+    width = rows[0][0].shape[1]
+    label_iter = iter(labels)
+    tile_rows = []
+
+    for row in rows:
+        tiles = []
+        for image in row:
+            label = np.zeros((LABEL_HEIGHT, width), dtype=np.uint8)
+            cv2.putText(
+                label, next(label_iter), (2, LABEL_HEIGHT - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.35, 255, 1, cv2.LINE_AA
+            )
+            tile = np.vstack([label, image])
+            tiles.append(cv2.copyMakeBorder(tile, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=128))
+        tile_rows.append(np.hstack(tiles))
+
+    return np.vstack(tile_rows)
+
+
+def setting_label(metric: Dict) -> str:
+    return f"{metric['operation']} b{metric['blur_amount']} t{metric['threshold']}"
+
+
+def write_metrics(csv_path: str, metrics: Sequence[Dict]):
+    fieldnames = ["operation", "blur_amount", "threshold", "edge_fraction", "foreground_ratio"]
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames)
+        writer.writeheader()
+        writer.writerows(metrics)
+
+
+def main(args: argparse.Namespace):
+    # Use all of OpenCV's threads for blurring and thresholding
+    cv2.setNumThreads(-1)
+
+    with profiling.stage("load"):
+        img_bw = cv2.cvtColor(cv2.imread(args.image_file), cv2.COLOR_BGR2GRAY)
+
+    with profiling.stage("compute"):
+        blurred = blurred_images(img_bw, dict.fromkeys(args.blur_amounts))
+
+        canny_rows, canny_metrics = canny_sweep(blurred, args.canny_thresholds)
+        threshold_rows, threshold_metrics = threshold_sweep(blurred, args.thresholds)
+
+    file_name = os.path.splitext(os.path.basename(os.path.normpath(args.image_file)))[0]
+
+    with profiling.stage("render"):
+        canny_sheet = contact_sheet(canny_rows, [setting_label(metric) for metric in canny_metrics])
+        threshold_sheet = contact_sheet(threshold_rows, [setting_label(metric) for metric in threshold_metrics])
+
+    with profiling.stage("save"):
+        cv2.imwrite(os.path.join(args.save_directory, f"{file_name}-canny_sweep.png"), canny_sheet)
+        cv2.imwrite(os.path.join(args.save_directory, f"{file_name}-threshold_sweep.png"), threshold_sheet)
+        write_metrics(
+            os.path.join(args.save_directory, f"{file_name}-sweep_metrics.csv"), canny_metrics + threshold_metrics
+        )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
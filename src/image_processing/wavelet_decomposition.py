@@ -10,6 +10,7 @@ import os
 import pywt
 import pywt.data
 
+from plotting_utils import profiling
 from plotting_utils.plotting_helper import path_arg, file_arg_image
 
 
@@ -21,6 +22,7 @@ def get_args() -> argparse.Namespace:
         "--type", "-t", help="sets the type of wavelet decomposition to perform", action="store", type=str
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
     if args.type not in pywt.wavelist():
         parser.error("Error: Invalid wavelet type")
@@ -35,32 +37,43 @@ def wavelet_decomposition(img: np.ndarray, wavelet_type: str):
     return LL, LH, HL, HH
 
 
-def main(args: argparse.Namespace):
-    matplotlib.use("TkAgg")
-
-    image = cv2.imread(args.image_path)
-    image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-
-    LL, LH, HL, HH = wavelet_decomposition(image, args.type)
+def save_wavelet_decomposition(image: np.ndarray, wavelet_type: str, image_name: str, save_directory: str):
+    """Plots the approximation and details of a grayscale image as WaveletDecomp-<type>-<image name>.png"""
+    with profiling.stage("compute", items=image.size, unit="pixels"):
+        LL, LH, HL, HH = wavelet_decomposition(image, wavelet_type)
 
     # Wavelet transform of image, and plot approximation and details
     titles = ["Approximation", " Horizontal detail", "Vertical detail", "Diagonal detail"]
 
-    fig = plt.figure(figsize=(12, 3))
-    for i, a in enumerate([LL, LH, HL, HH]):
-        print(a.shape)
-        ax = fig.add_subplot(1, 4, i + 1)
-        ax.imshow(a, interpolation="nearest", cmap=plt.cm.gray)
-        ax.set_title(titles[i], fontsize=10)
-        ax.set_xticks([])
-        ax.set_yticks([])
+    with profiling.stage("render"):
+        fig = plt.figure(figsize=(12, 3))
+        for i, a in enumerate([LL, LH, HL, HH]):
+            ax = fig.add_subplot(1, 4, i + 1)
+            ax.imshow(a, interpolation="nearest", cmap=plt.cm.gray)
+            ax.set_title(titles[i], fontsize=10)
+            ax.set_xticks([])
+            ax.set_yticks([])
+
+        fig.tight_layout()
+
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(save_directory, f"WaveletDecomp-{wavelet_type}-{image_name}.png"))
+    plt.close(fig)
+
+
+def main(args: argparse.Namespace):
+    matplotlib.use("TkAgg")
+
+    with profiling.stage("load"):
+        image = cv2.imread(args.image_path)
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
 
     image_name = os.path.splitext(ntpath.basename(args.image_path))[0]
 
-    fig.tight_layout()
-    plt.savefig(os.path.join(args.save_directory, f"WaveletDecomp-{args.type}-{image_name}.png"))
+    save_wavelet_decomposition(image, args.type, image_name, args.save_directory)
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -4,6 +4,7 @@ X/Y Axis: Event Position
 Z Axis: time
 
 CSV Format: On/Off,X,Y,Timestamp
+Parquet event stores written by csv_to_parquet.py are read too
 """
 
 import argparse
@@ -14,14 +15,17 @@ import matplotlib
 import matplotlib.pyplot as plt
 
 import plotting_utils.get_plotting_data as get_plotting_data
+from plotting_utils import profiling
 from plotting_utils.get_plotting_data import DataStorage
-from plotting_utils.plotting_helper import float_arg_positive_nonzero, path_arg, file_arg
+from plotting_utils.plotting_helper import float_arg_positive_nonzero, path_arg
 
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("aedat_csv_file", help="CSV containing AEDAT data to be plotted", type=file_arg)
+    parser.add_argument(
+        "aedat_csv_file", help="CSV containing AEDAT data to be plotted, or a Parquet event store", type=path_arg
+    )
     parser.add_argument(
         "--view",
         "-v",
@@ -39,6 +43,7 @@ def get_args() -> argparse.Namespace:
         default=sys.maxsize,
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
@@ -46,7 +51,9 @@ def get_args() -> argparse.Namespace:
 def main(args: argparse.Namespace):
     matplotlib.use("Qt5Agg")
 
-    events = get_plotting_data.SpatialCsvData.from_csv(args.aedat_csv_file, DataStorage.COLOR, args.time_limit)
+    with profiling.stage("load") as load:
+        events = get_plotting_data.SpatialCsvData.from_path(args.aedat_csv_file, DataStorage.COLOR, args.time_limit)
+        load.add_items(len(events.timestamps))
 
     fig = plt.figure()
     fig.set_size_inches(12, 10)
@@ -59,56 +66,65 @@ def main(args: argparse.Namespace):
     file_name = os.path.splitext(file_name)[0]  # Strip off file extension
 
     if args.view in ["default", "all"]:
-        ax.scatter(
-            events.x_positions,
-            events.y_positions,
-            events.timestamps,
-            c=events.polarities_color,
-            marker=".",
-            s=4,
-            depthshade=False,
-        )
-
-        fig.savefig(
-            os.path.join(args.save_directory, f"3D_Plot-{file_name}-default.png"), bbox_inches="tight", pad_inches=0
-        )
+        with profiling.stage("render"):
+            ax.scatter(
+                events.x_positions,
+                events.y_positions,
+                events.timestamps,
+                c=events.polarities_color,
+                marker=".",
+                s=4,
+                depthshade=False,
+            )
+
+        with profiling.stage("save"):
+            fig.savefig(
+                os.path.join(args.save_directory, f"3D_Plot-{file_name}-default.png"),
+                bbox_inches="tight",
+                pad_inches=0,
+            )
 
     if args.view in ["side", "all"]:
-        ax.scatter(
-            events.x_positions,
-            events.y_positions,
-            events.timestamps,
-            c=events.polarities_color,
-            marker="H",
-            s=4,
-            depthshade=False,
-        )
-        ax.view_init(azim=0, elev=8)
-
-        fig.savefig(
-            os.path.join(args.save_directory, f"3D_Plot-{file_name}-side.png"), bbox_inches="tight", pad_inches=0
-        )
+        with profiling.stage("render"):
+            ax.scatter(
+                events.x_positions,
+                events.y_positions,
+                events.timestamps,
+                c=events.polarities_color,
+                marker="H",
+                s=4,
+                depthshade=False,
+            )
+            ax.view_init(azim=0, elev=8)
+
+        with profiling.stage("save"):
+            fig.savefig(
+                os.path.join(args.save_directory, f"3D_Plot-{file_name}-side.png"), bbox_inches="tight", pad_inches=0
+            )
 
     if args.view in ["top", "all"]:
-        ax.scatter(
-            events.x_positions,
-            events.y_positions,
-            events.timestamps,
-            c=events.polarities_color,
-            marker="H",
-            s=4,
-            depthshade=False,
-        )
-        ax.set_zticklabels([])
-        ax.view_init(azim=-90, elev=87)
-
-        fig.savefig(
-            os.path.join(args.save_directory, f"3D_Plot-{file_name}-top.png"), bbox_inches="tight", pad_inches=0
-        )
+        with profiling.stage("render"):
+            ax.scatter(
+                events.x_positions,
+                events.y_positions,
+                events.timestamps,
+                c=events.polarities_color,
+                marker="H",
+                s=4,
+                depthshade=False,
+            )
+            ax.set_zticklabels([])
+            ax.view_init(azim=-90, elev=87)
+
+        with profiling.stage("save"):
+            fig.savefig(
+                os.path.join(args.save_directory, f"3D_Plot-{file_name}-top.png"), bbox_inches="tight", pad_inches=0
+            )
 
     plt.clf()
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -0,0 +1,106 @@
+"""
+Compares machine learning runs recorded in the results store.
+Runs are selected by config filters or run ids and their per-epoch metrics are overlaid on one plot per metric.
+Only the selected runs and metrics are read from the store.
+"""
+
+import argparse
+import json
+import os
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from plotting_utils import profiling, results_store
+from plotting_utils.plotting_helper import file_arg, path_arg
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument(
+        "--store", "-s", help="Results store to read", type=file_arg, default=results_store.DEFAULT_STORE_PATH
+    )
+    parser.add_argument(
+        "--filter",
+        "-f",
+        help="Config filter such as frame_count=1000 or learning_rate<0.01. May be given multiple times",
+        action="append",
+        default=[],
+    )
+    parser.add_argument("--runs", "-r", help="Run ids to compare", nargs="+", default=[])
+    parser.add_argument(
+        "--metrics",
+        "-m",
+        help="Metrics to plot",
+        nargs="+",
+        default=["loss", "val_loss", "val_Waveform_accuracy", "val_Frequency_accuracy"],
+    )
+    parser.add_argument(
+        "--label_keys",
+        "-l",
+        help="Config keys used to label each run. The run id is used if not set",
+        nargs="+",
+        default=[],
+    )
+    parser.add_argument("--list", help="List the matching runs without plotting", action="store_true")
+    parser.add_argument("--show_plots", help="Show the plots instead of only saving them", action="store_true")
+    parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def run_label(run: results_store.RunRecord, label_keys) -> str:
+    if not label_keys:
+        return run.run_id
+
+    return " ".join(f"{key}={run.config.get(key)}" for key in label_keys)
+
+
+def main(args: argparse.Namespace):
+    with results_store.ResultsStore(args.store) as store:
+        runs = store.query_runs(args.filter, args.runs)
+
+        if not runs:
+            print("No runs match the given filters")
+            return
+
+        if args.list:
+            for run in runs:
+                print(f"{run.run_id} ({run.created}) {json.dumps(run.final_metrics)}")
+            return
+
+        with profiling.stage("load", unit="runs") as load:
+            epoch_metrics = store.epoch_metrics([run.run_id for run in runs], args.metrics)
+            load.add_items(len(runs))
+
+    if not args.show_plots:
+        matplotlib.use("Agg")
+
+    for metric in args.metrics:
+        with profiling.stage("render"):
+            plt.figure(figsize=(10, 6))
+
+            for run in runs:
+                values = epoch_metrics.get(run.run_id, {}).get(metric)
+                if values is not None:
+                    plt.plot(range(1, len(values) + 1), values, label=run_label(run, args.label_keys))
+
+            plt.title(metric)
+            plt.xlabel("Epochs")
+            plt.ylabel(metric)
+            plt.legend()
+
+        with profiling.stage("save"):
+            plt.savefig(os.path.join(args.save_directory, f"CompareRuns-{metric}.png"))
+
+        if args.show_plots:
+            plt.show()
+        else:
+            plt.close()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
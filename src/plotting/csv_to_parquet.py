@@ -0,0 +1,83 @@
+"""
+Converts an event CSV (On/Off,X,Y,Timestamp) to a Parquet event store: a directory of Parquet files partitioned by
+time and sorted by pixel within every partition, which spike_graph.py, 3dplot.py and fingerprint_graph.py read in place
+of the CSV. Queries of a time range, an area of the sensor or one polarity only read the matching parts of the store.
+
+Requires pyarrow.
+"""
+
+import argparse
+import os
+import pathlib
+
+from plotting_utils import parquet_store, profiling
+from plotting_utils.plotting_helper import (
+    file_arg,
+    float_arg_positive_nonzero,
+    int_arg_not_negative,
+    int_arg_positive_nonzero,
+    path_arg,
+)
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert an event CSV to a Parquet event store",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("aedat_csv_file", help="CSV containing AEDAT data (On/Off,X,Y,Timestamp)", type=file_arg)
+    parser.add_argument(
+        "--save_directory",
+        "-d",
+        help="Save the store to <file name>.parquet in this directory",
+        type=path_arg,
+        default=".",
+    )
+    parser.add_argument(
+        "--partition_seconds",
+        "-p",
+        help="Length of every time partition. Every partition is sorted in memory",
+        type=float_arg_positive_nonzero,
+        default=parquet_store.DEFAULT_PARTITION_US / 1000000,
+    )
+    parser.add_argument(
+        "--row_group_size",
+        "-r",
+        help="Events per row group. Smaller row groups make area queries read less but compress less",
+        type=int_arg_positive_nonzero,
+        default=parquet_store.DEFAULT_ROW_GROUP_SIZE,
+    )
+    parser.add_argument(
+        "--skip_rows", help="Number of events to skip from the start of the CSV", type=int_arg_not_negative, default=0
+    )
+    profiling.add_profile_args(parser)
+
+    return parser.parse_args()
+
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def main(args: argparse.Namespace):
+    store_directory = os.path.join(args.save_directory, pathlib.Path(args.aedat_csv_file).stem + ".parquet")
+
+    with profiling.stage("save") as save:
+        info = parquet_store.write_event_store(
+            args.aedat_csv_file,
+            store_directory,
+            int(args.partition_seconds * 1000000),
+            args.row_group_size,
+            skip_rows=args.skip_rows,
+        )
+        save.add_items(info.num_events)
+
+    csv_size, store_size = os.path.getsize(args.aedat_csv_file), directory_size(store_directory)
+    print(f"Saved {info.num_events} events to '{store_directory}'")
+    print(f"{csv_size / 2**20:.1f} MiB CSV -> {store_size / 2**20:.1f} MiB Parquet ({store_size / csv_size:.1%})")
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
@@ -15,6 +15,7 @@ import plotting_utils.get_plotting_data as get_plotting_data
 from plotting_utils.get_plotting_data import CsvData
 
 import plotting_utils.plotting_helper as plotting_helper
+from plotting_utils import profiling
 
 
 def get_args() -> get_plotting_data.EventChunkConfig:
@@ -92,6 +93,8 @@ def get_args() -> get_plotting_data.EventChunkConfig:
         help="Maximum value on the gaussian y axis",
     )
 
+    profiling.add_profile_args(parser)
+
     args = parser.parse_args()
 
     # Make sure the data folder exists
@@ -114,6 +117,9 @@ def get_args() -> get_plotting_data.EventChunkConfig:
             "--data_set_type/-d, --plot_constant/-pc, and --reconstruction_window/-rw"
         )
 
+    # This script runs at module level, so the breakdown is printed when it exits
+    profiling.profile_script(args)
+
     if args.config:
         # Make sure the config file exists
         if not os.path.isfile(args.config):
@@ -327,29 +333,33 @@ csv_paths = glob.glob(os.path.join("data", config.dataFolder, "**/*.csv"), recur
 csv_paths = natsorted(csv_paths, alg=ns.IGNORECASE)
 
 for csv_path in csv_paths:
-    d: CsvData = get_plotting_data.read_aedat_csv(csv_path, config.reconstructionWindow, config.maxEventCount)
-
-    if config.logValues:
-        onAvg = np.array(d.y_on).mean()
-        offAvg = np.array(d.y_off).mean()
-        allAvg = np.array(d.y_all).mean()
-
-        y_zip = zip(d.y_on, d.y_off, d.y_all)
-        for i, (on_count, off_count, all_count) in enumerate(y_zip):
-            if on_count == 0:
-                d.y_on[i] = math.log10(onAvg)
-            else:
-                d.y_on[i] = math.log10(on_count)
+    with profiling.stage("load") as load:
+        d: CsvData = get_plotting_data.read_aedat_csv(csv_path, config.reconstructionWindow, config.maxEventCount)
+        load.add_items(len(d.time_windows), "windows")
+
+    with profiling.stage("compute") as compute:
+        if config.logValues:
+            onAvg = np.array(d.y_on).mean()
+            offAvg = np.array(d.y_off).mean()
+            allAvg = np.array(d.y_all).mean()
+
+            y_zip = zip(d.y_on, d.y_off, d.y_all)
+            for i, (on_count, off_count, all_count) in enumerate(y_zip):
+                if on_count == 0:
+                    d.y_on[i] = math.log10(onAvg)
+                else:
+                    d.y_on[i] = math.log10(on_count)
 
-            if off_count == 0:
-                d.y_off[i] = math.log10(offAvg)
-            else:
-                d.y_off[i] = math.log10(off_count)
+                if off_count == 0:
+                    d.y_off[i] = math.log10(offAvg)
+                else:
+                    d.y_off[i] = math.log10(off_count)
 
-            if all_count == 0:
-                d.y_all[i] = math.log10(allAvg)
-            else:
-                d.y_all[i] = math.log10(all_count)
+                if all_count == 0:
+                    d.y_all[i] = math.log10(allAvg)
+                else:
+                    d.y_all[i] = math.log10(all_count)
+        compute.add_items(len(d.time_windows), "windows")
 
     # Strip path and extension from the csv file. Will be used to name/save figures
     csv_filename = os.path.basename(csv_path)
@@ -358,359 +368,378 @@ for csv_path in csv_paths:
     csv_filename = clean_file_name(csv_filename, config.dataSetType)
     print(csv_filename)
 
-    f, axes = plt.subplots(nrows=2, ncols=3, sharex=False, sharey=False)
-    f.set_size_inches(15, 9.5)
-    f.tight_layout()
-
-    lines = OnOffBothLines()
-
-    # Off events
-    current_line = plotting_helper.plot_hist(d.y_off, axes, 1, 0, "red", config.logValues)
-    current_line.remove()
-    offGuas.append(current_line)
-    lines.off = current_line
-
-    # On Events
-    current_line = plotting_helper.plot_hist(d.y_on, axes, 1, 1, "green", config.logValues)
-    current_line.remove()
-    onGuas.append(current_line)
-    lines.on = current_line
-
-    # On & Off Events
-    current_line = plotting_helper.plot_hist(d.y_all, axes, 1, 2, "blue", config.logValues)
-    current_line.remove()
-    bothGuas.append(current_line)
-    lines.both = current_line
-
-    if config.dataSetType == "waveformsAndFrequency":
-        if "NoPolarizer" in csv_filename:
-            if "sine" in csv_filename:
-                waveformsNoPolLines.sine.append(lines)
-            elif "square" in csv_filename:
-                waveformsNoPolLines.square.append(lines)
-            elif "triangle" in csv_filename:
-                waveformsNoPolLines.triangle.append(lines)
-            elif "burst" in csv_filename:
-                waveformsNoPolLines.burst.append(lines)
-        else:
-            if "sine" in csv_filename:
-                waveforms.sine.append(lines)
-            elif "square" in csv_filename:
-                waveforms.square.append(lines)
-            elif "triangle" in csv_filename:
-                waveforms.triangle.append(lines)
-            elif "burst" in csv_filename:
-                waveforms.burst.append(lines)
-
-    offLabel.append(csv_filename + " Off Events")
-    onLabel.append(csv_filename + " On Events")
-    bothLabel.append(csv_filename + " All Events")
-
-    # Format & add data to scatter sub-plots
-    axes[0][0].scatter(d.time_windows, d.y_off, c="red", picker=True, s=1)
-    axes[1][0].title.set_text(csv_filename + " Off Events")
-    axes[0][1].scatter(d.time_windows, d.y_on, c="green", picker=True, s=1)
-    axes[1][1].title.set_text(csv_filename + " On Events")
-    axes[0][2].scatter(d.time_windows, d.y_all, c="blue", picker=True, s=1)
-
-    plt.title(csv_filename + " All Events")
-
-    if "NoPolarizer" in csv_filename:
-        noPolLabels.append(csv_filename.replace("NoPolarizer", ""))
-    else:
-        polLabels.append(csv_filename)
-
-    if config.plotVariance:
-        onOffBoth = OnOffBothFloat()
-        onOffBoth.off = np.var(d.y_off)
-        onOffBoth.on = np.var(d.y_on)
-        onOffBoth.both = np.var(d.y_all)
-
-        if "NoPolarizer" in csv_filename:
-            if config.dataSetType == "waveformsAndFrequency":
+    with profiling.stage("render"):
+        f, axes = plt.subplots(nrows=2, ncols=3, sharex=False, sharey=False)
+        f.set_size_inches(15, 9.5)
+        f.tight_layout()
+
+        lines = OnOffBothLines()
+
+        # Off events
+        current_line = plotting_helper.plot_hist(d.y_off, axes, 1, 0, "red", config.logValues)
+        current_line.remove()
+        offGuas.append(current_line)
+        lines.off = current_line
+
+        # On Events
+        current_line = plotting_helper.plot_hist(d.y_on, axes, 1, 1, "green", config.logValues)
+        current_line.remove()
+        onGuas.append(current_line)
+        lines.on = current_line
+
+        # On & Off Events
+        current_line = plotting_helper.plot_hist(d.y_all, axes, 1, 2, "blue", config.logValues)
+        current_line.remove()
+        bothGuas.append(current_line)
+        lines.both = current_line
+
+        if config.dataSetType == "waveformsAndFrequency":
+            if "NoPolarizer" in csv_filename:
                 if "sine" in csv_filename:
-                    waveformsNoPolVariance.sine.append(onOffBoth)
+                    waveformsNoPolLines.sine.append(lines)
                 elif "square" in csv_filename:
-                    waveformsNoPolVariance.square.append(onOffBoth)
+                    waveformsNoPolLines.square.append(lines)
                 elif "triangle" in csv_filename:
-                    waveformsNoPolVariance.triangle.append(onOffBoth)
+                    waveformsNoPolLines.triangle.append(lines)
                 elif "burst" in csv_filename:
-                    waveformsNoPolVariance.burst.append(onOffBoth)
+                    waveformsNoPolLines.burst.append(lines)
             else:
-                allOffVarNoPol.append(np.var(d.y_off))
-                allOnVarNoPol.append(np.var(d.y_on))
-                allBothVarNoPol.append(np.var(d.y_all))
-        else:
-            if config.dataSetType == "waveformsAndFrequency":
                 if "sine" in csv_filename:
-                    waveformsPolVariance.sine.append(onOffBoth)
+                    waveforms.sine.append(lines)
                 elif "square" in csv_filename:
-                    waveformsPolVariance.square.append(onOffBoth)
+                    waveforms.square.append(lines)
                 elif "triangle" in csv_filename:
-                    waveformsPolVariance.triangle.append(onOffBoth)
+                    waveforms.triangle.append(lines)
                 elif "burst" in csv_filename:
-                    waveformsPolVariance.burst.append(onOffBoth)
-            else:
-                allOffVarPol.append(np.var(d.y_off))
-                allOnVarPol.append(np.var(d.y_on))
-                allBothVarPol.append(np.var(d.y_all))
+                    waveforms.burst.append(lines)
 
-    if config.plotFWHM:
-        # if FWHMmultiplier is 2.355 it will polt the FWHM
-        # if is 1 it will plot the standard deviation
-        onOffBoth = OnOffBothFloat()
-        onOffBoth.off = config.FWHMMultiplier * np.std(d.y_off)
-        onOffBoth.on = config.FWHMMultiplier * np.std(d.y_on)
-        onOffBoth.both = config.FWHMMultiplier * np.std(d.y_all)
-
-        if "NoPolarizer" in csv_filename:
-            if config.dataSetType == "waveformsAndFrequency":
-                if "sine" in csv_filename:
-                    waveformsNoPolFWHM.sine.append(onOffBoth)
-                elif "square" in csv_filename:
-                    waveformsNoPolFWHM.square.append(onOffBoth)
-                elif "triangle" in csv_filename:
-                    waveformsNoPolFWHM.triangle.append(onOffBoth)
-                elif "burst" in csv_filename:
-                    waveformsNoPolFWHM.burst.append(onOffBoth)
+        offLabel.append(csv_filename + " Off Events")
+        onLabel.append(csv_filename + " On Events")
+        bothLabel.append(csv_filename + " All Events")
+
+        # Format & add data to scatter sub-plots
+        axes[0][0].scatter(d.time_windows, d.y_off, c="red", picker=True, s=1)
+        axes[1][0].title.set_text(csv_filename + " Off Events")
+        axes[0][1].scatter(d.time_windows, d.y_on, c="green", picker=True, s=1)
+        axes[1][1].title.set_text(csv_filename + " On Events")
+        axes[0][2].scatter(d.time_windows, d.y_all, c="blue", picker=True, s=1)
+
+        plt.title(csv_filename + " All Events")
+
+    if "NoPolarizer" in csv_filename:
+        noPolLabels.append(csv_filename.replace("NoPolarizer", ""))
+    else:
+        polLabels.append(csv_filename)
+
+    with profiling.stage("compute"):
+        if config.plotVariance:
+            onOffBoth = OnOffBothFloat()
+            onOffBoth.off = np.var(d.y_off)
+            onOffBoth.on = np.var(d.y_on)
+            onOffBoth.both = np.var(d.y_all)
+
+            if "NoPolarizer" in csv_filename:
+                if config.dataSetType == "waveformsAndFrequency":
+                    if "sine" in csv_filename:
+                        waveformsNoPolVariance.sine.append(onOffBoth)
+                    elif "square" in csv_filename:
+                        waveformsNoPolVariance.square.append(onOffBoth)
+                    elif "triangle" in csv_filename:
+                        waveformsNoPolVariance.triangle.append(onOffBoth)
+                    elif "burst" in csv_filename:
+                        waveformsNoPolVariance.burst.append(onOffBoth)
+                else:
+                    allOffVarNoPol.append(np.var(d.y_off))
+                    allOnVarNoPol.append(np.var(d.y_on))
+                    allBothVarNoPol.append(np.var(d.y_all))
             else:
-                allOffFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_off))
-                allOnFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_on))
-                allBothFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_all))
-        else:
-            if config.dataSetType == "waveformsAndFrequency":
-                if "sine" in csv_filename:
-                    waveformsFWHM.sine.append(onOffBoth)
-                elif "square" in csv_filename:
-                    waveformsFWHM.square.append(onOffBoth)
-                elif "triangle" in csv_filename:
-                    waveformsFWHM.triangle.append(onOffBoth)
-                elif "burst" in csv_filename:
-                    waveformsFWHM.burst.append(onOffBoth)
+                if config.dataSetType == "waveformsAndFrequency":
+                    if "sine" in csv_filename:
+                        waveformsPolVariance.sine.append(onOffBoth)
+                    elif "square" in csv_filename:
+                        waveformsPolVariance.square.append(onOffBoth)
+                    elif "triangle" in csv_filename:
+                        waveformsPolVariance.triangle.append(onOffBoth)
+                    elif "burst" in csv_filename:
+                        waveformsPolVariance.burst.append(onOffBoth)
+                else:
+                    allOffVarPol.append(np.var(d.y_off))
+                    allOnVarPol.append(np.var(d.y_on))
+                    allBothVarPol.append(np.var(d.y_all))
+
+        if config.plotFWHM:
+            # if FWHMmultiplier is 2.355 it will polt the FWHM
+            # if is 1 it will plot the standard deviation
+            onOffBoth = OnOffBothFloat()
+            onOffBoth.off = config.FWHMMultiplier * np.std(d.y_off)
+            onOffBoth.on = config.FWHMMultiplier * np.std(d.y_on)
+            onOffBoth.both = config.FWHMMultiplier * np.std(d.y_all)
+
+            if "NoPolarizer" in csv_filename:
+                if config.dataSetType == "waveformsAndFrequency":
+                    if "sine" in csv_filename:
+                        waveformsNoPolFWHM.sine.append(onOffBoth)
+                    elif "square" in csv_filename:
+                        waveformsNoPolFWHM.square.append(onOffBoth)
+                    elif "triangle" in csv_filename:
+                        waveformsNoPolFWHM.triangle.append(onOffBoth)
+                    elif "burst" in csv_filename:
+                        waveformsNoPolFWHM.burst.append(onOffBoth)
+                else:
+                    allOffFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_off))
+                    allOnFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_on))
+                    allBothFWHMNoPol.append(config.FWHMMultiplier * np.std(d.y_all))
             else:
-                allOffFWHMPol.append(config.FWHMMultiplier * np.std(d.y_off))
-                allOnFWHMPol.append(config.FWHMMultiplier * np.std(d.y_on))
-                allBothFWHMPol.append(config.FWHMMultiplier * np.std(d.y_all))
+                if config.dataSetType == "waveformsAndFrequency":
+                    if "sine" in csv_filename:
+                        waveformsFWHM.sine.append(onOffBoth)
+                    elif "square" in csv_filename:
+                        waveformsFWHM.square.append(onOffBoth)
+                    elif "triangle" in csv_filename:
+                        waveformsFWHM.triangle.append(onOffBoth)
+                    elif "burst" in csv_filename:
+                        waveformsFWHM.burst.append(onOffBoth)
+                else:
+                    allOffFWHMPol.append(config.FWHMMultiplier * np.std(d.y_off))
+                    allOnFWHMPol.append(config.FWHMMultiplier * np.std(d.y_on))
+                    allBothFWHMPol.append(config.FWHMMultiplier * np.std(d.y_all))
 
     if saveFigures:
-        plt.savefig(os.path.join("results", "EventChunkGraphs", "Dots", f"{csv_filename}Dots.png"))
+        with profiling.stage("save"):
+            plt.savefig(os.path.join("results", "EventChunkGraphs", "Dots", f"{csv_filename}Dots.png"))
         plt.close()
 
 
 if not saveFigures:
     plt.show()
 
-if config.dataSetType == "waveformsAndFrequency":
-    if config.plotConstant == "waveforms":
-        labels = ["Sine", "Square", "Burst", "Triangle"]
-        labelsNoPol = ["Sine NoPolarizer", "Square NoPolarizer", "Burst NoPolarizer", "Triangle NoPolarizer"]
-        speeds = ["200mV"]
+# The summary figures are saved as they are drawn, so their saving is part of the render stage
+with profiling.stage("render"):
+    if config.dataSetType == "waveformsAndFrequency":
+        if config.plotConstant == "waveforms":
+            labels = ["Sine", "Square", "Burst", "Triangle"]
+            labelsNoPol = ["Sine NoPolarizer", "Square NoPolarizer", "Burst NoPolarizer", "Triangle NoPolarizer"]
+            speeds = ["200mV"]
 
-        for i, speed in enumerate(speeds):
-            f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-            f.set_size_inches(10, 15)
+            for i, speed in enumerate(speeds):
+                f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+                f.set_size_inches(10, 15)
 
-            offEvents = waveforms.waveform_off_events_to_list(i)
-            onEvents = waveforms.waveform_on_events_to_list(i)
-            bothEvents = waveforms.waveform_both_events_to_list(i)
+                offEvents = waveforms.waveform_off_events_to_list(i)
+                onEvents = waveforms.waveform_on_events_to_list(i)
+                bothEvents = waveforms.waveform_both_events_to_list(i)
 
-            # FIXME: crashes if no unpol data in folder (too bad!)
-            offEventsNoPol = waveformsNoPolLines.waveform_off_events_to_list(i)
-            onEventsNoPol = waveformsNoPolLines.waveform_on_events_to_list(i)
-            bothEventsNoPol = waveformsNoPolLines.waveform_both_events_to_list(i)
+                # FIXME: crashes if no unpol data in folder (too bad!)
+                offEventsNoPol = waveformsNoPolLines.waveform_off_events_to_list(i)
+                onEventsNoPol = waveformsNoPolLines.waveform_on_events_to_list(i)
+                bothEventsNoPol = waveformsNoPolLines.waveform_both_events_to_list(i)
 
-            plotting_helper.showAllGuas(offEvents, labels, 0, f"Off Events {speed}", axes, config)
-            plotting_helper.showAllGuas(onEvents, labels, 1, f"On Events {speed}", axes, config)
-            plotting_helper.showAllGuas(bothEvents, labels, 2, f"Combined Events {speed}", axes, config)
+                plotting_helper.showAllGuas(offEvents, labels, 0, f"Off Events {speed}", axes, config)
+                plotting_helper.showAllGuas(onEvents, labels, 1, f"On Events {speed}", axes, config)
+                plotting_helper.showAllGuas(bothEvents, labels, 2, f"Combined Events {speed}", axes, config)
 
-            plotting_helper.showAllGuas(offEventsNoPol, labelsNoPol, 0, f"Off Events {speed}", axes, config)
-            plotting_helper.showAllGuas(onEventsNoPol, labelsNoPol, 1, f"On Events {speed}", axes, config)
-            plotting_helper.showAllGuas(bothEventsNoPol, labelsNoPol, 2, f"Combined Events {speed}", axes, config)
+                plotting_helper.showAllGuas(offEventsNoPol, labelsNoPol, 0, f"Off Events {speed}", axes, config)
+                plotting_helper.showAllGuas(onEventsNoPol, labelsNoPol, 1, f"On Events {speed}", axes, config)
+                plotting_helper.showAllGuas(bothEventsNoPol, labelsNoPol, 2, f"Combined Events {speed}", axes, config)
 
-            if saveFigures:
-                plt.savefig(os.path.join("results", "EventChunkGraphs", f"showAllGuasWaveforms{speed}.png"))
-                plt.close()
-            else:
-                plt.show()
+                if saveFigures:
+                    plt.savefig(os.path.join("results", "EventChunkGraphs", f"showAllGuasWaveforms{speed}.png"))
+                    plt.close()
+                else:
+                    plt.show()
+
+                f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+                f.set_size_inches(10, 15)
+
+                plotting_helper.centerAllGuas(offEvents, 0, labels, "Off Events", axes, config)
+                plotting_helper.centerAllGuas(onEvents, 1, labels, "On Events", axes, config)
+                plotting_helper.centerAllGuas(bothEvents, 2, labels, "Both Events", axes, config)
+
+                plotting_helper.centerAllGuas(offEventsNoPol, 0, labelsNoPol, "Off Events", axes, config)
+                plotting_helper.centerAllGuas(onEventsNoPol, 1, labelsNoPol, "On Events", axes, config)
+                plotting_helper.centerAllGuas(bothEventsNoPol, 2, labelsNoPol, "Both Events", axes, config)
 
+                if saveFigures:
+                    plt.savefig(os.path.join("results", "EventChunkGraphs", "CenterGaus.png"))
+                    plt.close()
+                else:
+                    plt.show()
+        else:
+            labels = ["200mV", "300mV", "400mV", "500mV"]
+            labelsNoPol = ["200mV NoPolarizer", "300mV NoPolarizer", "400mV NoPolarizer", "500mV NoPolarizer"]
             f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
             f.set_size_inches(10, 15)
 
-            plotting_helper.centerAllGuas(offEvents, 0, labels, "Off Events", axes, config)
-            plotting_helper.centerAllGuas(onEvents, 1, labels, "On Events", axes, config)
-            plotting_helper.centerAllGuas(bothEvents, 2, labels, "Both Events", axes, config)
+            offEvents = waveforms.single_motion_to_list("sine", "off")
+            onEvents = waveforms.single_motion_to_list("sine", "on")
+            bothEvents = waveforms.single_motion_to_list("sine", "both")
+
+            offEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "off")
+            onEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "on")
+            bothEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "both")
+
+            plotting_helper.showAllGuas(offEvents, labels, 0, "Off Events " + "Sine", axes, config)
+            plotting_helper.showAllGuas(onEvents, labels, 1, "On Events " + "Sine", axes, config)
+            plotting_helper.showAllGuas(bothEvents, labels, 2, "Combined Events " + "Sine", axes, config)
 
-            plotting_helper.centerAllGuas(offEventsNoPol, 0, labelsNoPol, "Off Events", axes, config)
-            plotting_helper.centerAllGuas(onEventsNoPol, 1, labelsNoPol, "On Events", axes, config)
-            plotting_helper.centerAllGuas(bothEventsNoPol, 2, labelsNoPol, "Both Events", axes, config)
+            plotting_helper.showAllGuas(offEventsNoPol, labelsNoPol, 0, "Off Events " + "Sine", axes, config)
+            plotting_helper.showAllGuas(onEventsNoPol, labelsNoPol, 1, "On Events " + "Sine", axes, config)
+            plotting_helper.showAllGuas(bothEventsNoPol, labelsNoPol, 2, "Combined Events " + "Sine", axes, config)
 
             if saveFigures:
-                plt.savefig(os.path.join("results", "EventChunkGraphs", "CenterGaus.png"))
+                plt.savefig(os.path.join("results", "EventChunkGraphs", "showAllGuasFrequencySine.png"))
                 plt.close()
             else:
                 plt.show()
     else:
-        labels = ["200mV", "300mV", "400mV", "500mV"]
-        labelsNoPol = ["200mV NoPolarizer", "300mV NoPolarizer", "400mV NoPolarizer", "500mV NoPolarizer"]
         f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
         f.set_size_inches(10, 15)
 
-        offEvents = waveforms.single_motion_to_list("sine", "off")
-        onEvents = waveforms.single_motion_to_list("sine", "on")
-        bothEvents = waveforms.single_motion_to_list("sine", "both")
-
-        offEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "off")
-        onEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "on")
-        bothEventsNoPol = waveformsNoPolLines.single_motion_to_list("sine", "both")
-
-        plotting_helper.showAllGuas(offEvents, labels, 0, "Off Events " + "Sine", axes, config)
-        plotting_helper.showAllGuas(onEvents, labels, 1, "On Events " + "Sine", axes, config)
-        plotting_helper.showAllGuas(bothEvents, labels, 2, "Combined Events " + "Sine", axes, config)
-
-        plotting_helper.showAllGuas(offEventsNoPol, labelsNoPol, 0, "Off Events " + "Sine", axes, config)
-        plotting_helper.showAllGuas(onEventsNoPol, labelsNoPol, 1, "On Events " + "Sine", axes, config)
-        plotting_helper.showAllGuas(bothEventsNoPol, labelsNoPol, 2, "Combined Events " + "Sine", axes, config)
+        plotting_helper.showAllGuas(offGuas, offLabel, 0, "Off Events", axes, config)
+        plotting_helper.showAllGuas(onGuas, onLabel, 1, "On Events", axes, config)
+        plotting_helper.showAllGuas(bothGuas, bothLabel, 2, "Both Events", axes, config)
 
         if saveFigures:
-            plt.savefig(os.path.join("results", "EventChunkGraphs", "showAllGuasFrequencySine.png"))
+            plt.savefig(os.path.join("results", "EventChunkGraphs", "Gaus.png"))
             plt.close()
         else:
             plt.show()
-else:
-    f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-    f.set_size_inches(10, 15)
-
-    plotting_helper.showAllGuas(offGuas, offLabel, 0, "Off Events", axes, config)
-    plotting_helper.showAllGuas(onGuas, onLabel, 1, "On Events", axes, config)
-    plotting_helper.showAllGuas(bothGuas, bothLabel, 2, "Both Events", axes, config)
-
-    if saveFigures:
-        plt.savefig(os.path.join("results", "EventChunkGraphs", "Gaus.png"))
-        plt.close()
-    else:
-        plt.show()
-
-    f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-    f.set_size_inches(10, 15)
-
-    plotting_helper.centerAllGuas(offGuas, 0, offLabel, "Off Events", axes, config)
-    plotting_helper.centerAllGuas(onGuas, 1, onLabel, "On Events", axes, config)
-    plotting_helper.centerAllGuas(bothGuas, 2, bothLabel, "Both Events", axes, config)
-
-    if saveFigures:
-        plt.savefig(os.path.join("results", "EventChunkGraphs", "CenterGaus.png"))
-        plt.close()
-    else:
-        plt.show()
-
-if config.plotVariance:
-    if config.dataSetType == "waveformsAndFrequency":
-        if config.plotConstant == "waveforms":
-            labels = ["Sine", "Square", "Burst", "Triangle"]
-            speeds = ["200mV"]
-            for i, speed in enumerate(speeds):
-                figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-                figureVar.set_size_inches(10, 15)
-
-                offEventsPol: List[float] = waveformsPolVariance.waveform_off_to_list(i)
-                onEventsPol: List[float] = waveformsPolVariance.waveform_on_to_list(i)
-                bothEventsPol: List[float] = waveformsPolVariance.waveform_both_to_list(i)
-
-                offEventsNoPol: List[float] = waveformsNoPolVariance.waveform_off_to_list(i)
-                onEventsNoPol: List[float] = waveformsNoPolVariance.waveform_on_to_list(i)
-                bothEventsNoPol: List[float] = waveformsNoPolVariance.waveform_both_to_list(i)
-
-                using_log_values = "Log" if config.logValues else ""
-
-                axesVar = plot_bars(
-                    axesVar,
-                    [offEventsPol, onEventsPol, bothEventsPol, offEventsNoPol, onEventsNoPol, bothEventsNoPol],
-                    [labels],
-                    ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
-                    f" Polarized Variance {speed} {using_log_values}",
-                )
-
-                plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
-
-                if saveFigures:
-                    plt.savefig(os.path.join("results", "EventChunkGraphs", f"variance {speed}.png"))
-                    plt.close()
-                else:
-                    plt.show()
-    else:
-        figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-        figureVar.set_size_inches(10, 15)
 
-        using_log_values = "Log" if config.logValues else ""
-
-        axesVar = plot_bars(
-            axesVar,
-            [allOffVarPol, allOnVarPol, allBothVarPol, allOffVarNoPol, allOnVarNoPol, allBothVarNoPol],
-            [polLabels, noPolLabels],
-            ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
-            f" Polarized Variance {using_log_values}",
-        )
+        f, axes = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+        f.set_size_inches(10, 15)
 
-        plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
+        plotting_helper.centerAllGuas(offGuas, 0, offLabel, "Off Events", axes, config)
+        plotting_helper.centerAllGuas(onGuas, 1, onLabel, "On Events", axes, config)
+        plotting_helper.centerAllGuas(bothGuas, 2, bothLabel, "Both Events", axes, config)
 
         if saveFigures:
-            plt.savefig(os.path.join("results", "EventChunkGraphs", "variance.png"))
+            plt.savefig(os.path.join("results", "EventChunkGraphs", "CenterGaus.png"))
             plt.close()
         else:
             plt.show()
 
-if config.plotFWHM:
-    figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
-    figureVar.set_size_inches(10, 15)
+    if config.plotVariance:
+        if config.dataSetType == "waveformsAndFrequency":
+            if config.plotConstant == "waveforms":
+                labels = ["Sine", "Square", "Burst", "Triangle"]
+                speeds = ["200mV"]
+                for i, speed in enumerate(speeds):
+                    figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+                    figureVar.set_size_inches(10, 15)
+
+                    offEventsPol: List[float] = waveformsPolVariance.waveform_off_to_list(i)
+                    onEventsPol: List[float] = waveformsPolVariance.waveform_on_to_list(i)
+                    bothEventsPol: List[float] = waveformsPolVariance.waveform_both_to_list(i)
+
+                    offEventsNoPol: List[float] = waveformsNoPolVariance.waveform_off_to_list(i)
+                    onEventsNoPol: List[float] = waveformsNoPolVariance.waveform_on_to_list(i)
+                    bothEventsNoPol: List[float] = waveformsNoPolVariance.waveform_both_to_list(i)
+
+                    using_log_values = "Log" if config.logValues else ""
+
+                    axesVar = plot_bars(
+                        axesVar,
+                        [offEventsPol, onEventsPol, bothEventsPol, offEventsNoPol, onEventsNoPol, bothEventsNoPol],
+                        [labels],
+                        [
+                            "Off Events",
+                            "On Events",
+                            "Both Events",
+                            "Off Events Not",
+                            "On Events Not",
+                            "Both Events Not",
+                        ],
+                        f" Polarized Variance {speed} {using_log_values}",
+                    )
+
+                    plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
+
+                    if saveFigures:
+                        plt.savefig(os.path.join("results", "EventChunkGraphs", f"variance {speed}.png"))
+                        plt.close()
+                    else:
+                        plt.show()
+        else:
+            figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+            figureVar.set_size_inches(10, 15)
 
-    logOrStandardDeviation = ("FWHM" if config.FWHMMultiplier == 2.355 else "Standard Deviation") + (
-        " Log" if config.logValues else ""
-    )
+            using_log_values = "Log" if config.logValues else ""
 
-    if config.dataSetType == "waveformsAndFrequency":
-        if config.plotConstant == "waveforms":
-            speeds = ["200mV"]
-            for i, speed in enumerate(speeds):
-                labels = ["Sine", "Square", "Burst", "Triangle"]
-                offEventsPol: List[float] = waveformsFWHM.waveform_off_to_list(i)
-                onEventsPol: List[float] = waveformsFWHM.waveform_on_to_list(i)
-                bothEventsPol: List[float] = waveformsFWHM.waveform_both_to_list(i)
+            axesVar = plot_bars(
+                axesVar,
+                [allOffVarPol, allOnVarPol, allBothVarPol, allOffVarNoPol, allOnVarNoPol, allBothVarNoPol],
+                [polLabels, noPolLabels],
+                ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
+                f" Polarized Variance {using_log_values}",
+            )
 
-                offEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_off_to_list(i)
-                onEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_on_to_list(i)
-                bothEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_both_to_list(i)
+            plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
 
-                axesVar = plot_bars(
-                    axesVar,
-                    [offEventsPol, onEventsPol, bothEventsPol, offEventsNoPol, onEventsNoPol, bothEventsNoPol],
-                    [labels],
-                    ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
-                    f" Polarized {logOrStandardDeviation}",
-                )
+            if saveFigures:
+                plt.savefig(os.path.join("results", "EventChunkGraphs", "variance.png"))
+                plt.close()
+            else:
+                plt.show()
 
-                plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
+    if config.plotFWHM:
+        figureVar, axesVar = plt.subplots(nrows=3, ncols=2, sharex=False, sharey=False)
+        figureVar.set_size_inches(10, 15)
 
-                if saveFigures:
-                    plt.savefig(os.path.join("results", "EventChunkGraphs", f"{logOrStandardDeviation}{speed}.png"))
-                    plt.close()
-                else:
-                    plt.show()
-    else:
-        axesVar = plot_bars(
-            axesVar,
-            [allOffFWHMPol, allOnFWHMPol, allBothFWHMPol, allOffFWHMNoPol, allOnFWHMNoPol, allBothFWHMNoPol],
-            [polLabels, noPolLabels],
-            ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
-            f" Polarized {logOrStandardDeviation}",
+        logOrStandardDeviation = ("FWHM" if config.FWHMMultiplier == 2.355 else "Standard Deviation") + (
+            " Log" if config.logValues else ""
         )
 
-        plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
-
-        if saveFigures:
-            plt.savefig(os.path.join("results", "EventChunkGraphs", f"{logOrStandardDeviation}.png"))
-            plt.close()
+        if config.dataSetType == "waveformsAndFrequency":
+            if config.plotConstant == "waveforms":
+                speeds = ["200mV"]
+                for i, speed in enumerate(speeds):
+                    labels = ["Sine", "Square", "Burst", "Triangle"]
+                    offEventsPol: List[float] = waveformsFWHM.waveform_off_to_list(i)
+                    onEventsPol: List[float] = waveformsFWHM.waveform_on_to_list(i)
+                    bothEventsPol: List[float] = waveformsFWHM.waveform_both_to_list(i)
+
+                    offEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_off_to_list(i)
+                    onEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_on_to_list(i)
+                    bothEventsNoPol: List[float] = waveformsNoPolFWHM.waveform_both_to_list(i)
+
+                    axesVar = plot_bars(
+                        axesVar,
+                        [offEventsPol, onEventsPol, bothEventsPol, offEventsNoPol, onEventsNoPol, bothEventsNoPol],
+                        [labels],
+                        [
+                            "Off Events",
+                            "On Events",
+                            "Both Events",
+                            "Off Events Not",
+                            "On Events Not",
+                            "Both Events Not",
+                        ],
+                        f" Polarized {logOrStandardDeviation}",
+                    )
+
+                    plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
+
+                    if saveFigures:
+                        plt.savefig(os.path.join("results", "EventChunkGraphs", f"{logOrStandardDeviation}{speed}.png"))
+                        plt.close()
+                    else:
+                        plt.show()
         else:
-            plt.show()
+            axesVar = plot_bars(
+                axesVar,
+                [allOffFWHMPol, allOnFWHMPol, allBothFWHMPol, allOffFWHMNoPol, allOnFWHMNoPol, allBothFWHMNoPol],
+                [polLabels, noPolLabels],
+                ["Off Events", "On Events", "Both Events", "Off Events Not", "On Events Not", "Both Events Not"],
+                f" Polarized {logOrStandardDeviation}",
+            )
+
+            plt.subplots_adjust(left=0.125, bottom=0.1, right=0.91, top=0.9, wspace=0.3, hspace=0.4)
+
+            if saveFigures:
+                plt.savefig(os.path.join("results", "EventChunkGraphs", f"{logOrStandardDeviation}.png"))
+                plt.close()
+            else:
+                plt.show()
 
 if not saveFigures:
     input()
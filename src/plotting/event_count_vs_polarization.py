@@ -2,12 +2,12 @@ import matplotlib.pyplot as plt
 from matplotlib.ticker import FormatStrFormatter, AutoMinorLocator
 import argparse
 import os
-from plotting_utils import filename_regex
+from plotting_utils import chunked, filename_regex, profiling
 from natsort import natsorted
 import pandas as pd
 import tqdm
 
-from plotting_utils.plotting_helper import path_arg
+from plotting_utils.plotting_helper import int_arg_positive_nonzero, path_arg
 
 
 def get_args() -> argparse.Namespace:
@@ -16,6 +16,16 @@ def get_args() -> argparse.Namespace:
     parser.add_argument("csv_folder", help="Folder with CSV files to plot", type=path_arg)
     parser.add_argument("--debug_info", "-d", help="Display debug info insead of a progress bar", action="store")
     parser.add_argument("--save_directory", "-s", help="Save file to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--chunked",
+        "-c",
+        help="Count the events of every CSV in chunks on several processes, for recordings larger than memory",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--num_workers", "-w", help="With --chunked, number of processes", type=int_arg_positive_nonzero, default=1
+    )
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
@@ -63,12 +73,21 @@ def main(args: argparse.Namespace):
                     print(f"Could not parse polarization angle for file '{full_csv_path}', skipping...")
                 continue
 
-            df = pd.read_csv(full_csv_path, header=0, usecols=["Timestamp"])
+            if args.chunked:
+                with profiling.stage("load") as load:
+                    summary = chunked.summarize(full_csv_path, args.num_workers)
+                    load.add_items(summary.num_events)
 
-            # Length of the recording in microseconds
-            recording_length = df["Timestamp"].values[-1] - df["Timestamp"].values[0]
+                events_per_second = summary.events_per_second
+            else:
+                with profiling.stage("load") as load:
+                    df = pd.read_csv(full_csv_path, header=0, usecols=["Timestamp"])
+                    load.add_items(len(df))
 
-            events_per_second = len(df) / (recording_length / 1000000)
+                # Length of the recording in microseconds
+                recording_length = df["Timestamp"].values[-1] - df["Timestamp"].values[0]
+
+                events_per_second = len(df) / (recording_length / 1000000)
 
             plot_x.append(int(degrees))
             plot_y.append(events_per_second)
@@ -76,28 +95,32 @@ def main(args: argparse.Namespace):
         # Sort plot_x and plot_y based upon the order of plot_x
         plot_x, plot_y = [list(x) for x in zip(*sorted(zip(plot_x, plot_y), key=lambda pair: pair[0]))]
 
-        plt.plot(plot_x, plot_y, label=hz, marker="o", markersize=4)
+        with profiling.stage("render"):
+            plt.plot(plot_x, plot_y, label=hz, marker="o", markersize=4)
 
-    plt.ylabel("Events/Second")
-    plt.xlabel("Polarization Angle")
-    plt.grid(which="major", axis="both")
-    plt.grid(which="minor", axis="y", linestyle="dashed")
+    with profiling.stage("render"):
+        plt.ylabel("Events/Second")
+        plt.xlabel("Polarization Angle")
+        plt.grid(which="major", axis="both")
+        plt.grid(which="minor", axis="y", linestyle="dashed")
 
-    # Place the legend outside of the plot
-    plt.legend(loc="center left", bbox_to_anchor=(1, 0.5))
+        # Place the legend outside of the plot
+        plt.legend(loc="center left", bbox_to_anchor=(1, 0.5))
 
-    ax = plt.gca()
-    ax.yaxis.set_major_formatter(FormatStrFormatter("%d"))
-    ax.yaxis.set_minor_locator(AutoMinorLocator(2))
-    ax.set_ylim(bottom=0)
+        ax = plt.gca()
+        ax.yaxis.set_major_formatter(FormatStrFormatter("%d"))
+        ax.yaxis.set_minor_locator(AutoMinorLocator(2))
+        ax.set_ylim(bottom=0)
 
-    plt.tight_layout()
+        plt.tight_layout()
 
-    csv_folder_name = os.path.basename(os.path.dirname(args.csvfolder))
+    csv_folder_name = os.path.basename(os.path.dirname(args.csv_folder))
 
-    plt.savefig(os.path.join(args.save_directory, f"{csv_folder_name}-EventVsPolarization.png"))
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(args.save_directory, f"{csv_folder_name}-EventVsPolarization.png"))
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
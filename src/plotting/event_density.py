@@ -2,7 +2,7 @@ import csv
 from itertools import islice
 import matplotlib
 import matplotlib.pyplot as plt
-from plotting_utils import filename_regex
+from plotting_utils import filename_regex, profiling
 import argparse
 import os
 import math
@@ -30,6 +30,7 @@ def get_args() -> argparse.Namespace:
         type=int_arg_positive_nonzero,
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", default=".", type=path_arg)
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
@@ -43,7 +44,7 @@ def main(args: argparse.Namespace):
     change_timestamps = []  # The times when the pixel changed state
     time_between = []  # The times between the state changes
 
-    with open(args.aedat_csv_file) as csv_file:
+    with profiling.stage("load") as load, open(args.aedat_csv_file) as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=",")
 
         for row in islice(csv_reader, 1, None):  # Skip the header
@@ -64,23 +65,27 @@ def main(args: argparse.Namespace):
                 else:
                     redundancies += 1
 
+        load.add_items(csv_reader.line_num - 1)
+
     print(f"Redundancies: {redundancies}")
 
-    # Normalize timestamps & convert to mS
-    change_timestamps = [(x - change_timestamps[0]) / 1000 for x in change_timestamps]
+    with profiling.stage("compute"):
+        # Normalize timestamps & convert to mS
+        change_timestamps = [(x - change_timestamps[0]) / 1000 for x in change_timestamps]
 
-    # Get the time between timestamps
-    for i in range(len(change_timestamps) - 1):
-        time_between.append(change_timestamps[i + 1] - change_timestamps[i])
+        # Get the time between timestamps
+        for i in range(len(change_timestamps) - 1):
+            time_between.append(change_timestamps[i + 1] - change_timestamps[i])
 
-    # Add lines to plot
-    for stamp in change_timestamps:
-        plt.plot([stamp, stamp], [0, 1], "b")
+    with profiling.stage("render"):
+        # Add lines to plot
+        for stamp in change_timestamps:
+            plt.plot([stamp, stamp], [0, 1], "b")
 
-    plt.ylim(0, 1.2)
-    plt.yticks([])
-    plt.title("Temporal Resoltion")
-    plt.xlabel("Time(mS)")
+        plt.ylim(0, 1.2)
+        plt.yticks([])
+        plt.title("Temporal Resoltion")
+        plt.xlabel("Time(mS)")
 
     hz = filename_regex.parse_frequency(args.aedat_csv_file, "Hz_")
     voltage = filename_regex.parse_voltage(args.aedat_csv_file, "V_")
@@ -92,7 +97,8 @@ def main(args: argparse.Namespace):
     if hz == "" and degrees == "":
         print("WARNING: Could not infer polarizer angle or frequency from file name")
 
-    plt.savefig(os.path.join(args.save_directory, f"{hz}{voltage}{waveform_type}{degrees}_event_density.png"))
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(args.save_directory, f"{hz}{voltage}{waveform_type}{degrees}_event_density.png"))
 
     if len(time_between) != 0:
         print(f"Average time between: {round(sum(time_between) / len(time_between), 2)}mS")
@@ -100,4 +106,5 @@ def main(args: argparse.Namespace):
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
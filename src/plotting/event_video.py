@@ -0,0 +1,197 @@
+"""
+Event videos play back what the sensor saw.
+ON events are drawn in green and OFF events in red, fading out exponentially after they occur.
+
+The CSV is read in chunks and every frame is encoded as soon as it is complete, so memory use does not depend on the
+length of the recording. The region examined by spike_graph.py can be outlined with the same local area arguments.
+
+CSV Format: On/Off,X,Y,Timestamp
+"""
+
+import argparse
+import math
+import os
+import pathlib
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from plotting_utils import event_arrays, frame_accumulator, profiling
+from plotting_utils.event_arrays import SENSOR_HEIGHT, SENSOR_WIDTH
+from plotting_utils.plotting_helper import (
+    file_arg,
+    float_arg_positive_nonzero,
+    int_arg_not_negative,
+    int_arg_positive_nonzero,
+    path_arg,
+)
+
+FOURCC = {"mp4": "mp4v", "avi": "MJPG"}
+REGION_COLOR = (255, 255, 0)  # BGR cyan
+TEXT_COLOR = (255, 255, 255)
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        "aedat_csv_file", help="CSV containing AEDAT data to be played back (On/Off,X,Y,Timestamp)", type=file_arg
+    )
+    parser.add_argument(
+        "--fps", "-f", help="Frames per second of the video", type=float_arg_positive_nonzero, default=30
+    )
+    parser.add_argument(
+        "--playback_speed",
+        "-p",
+        help="Seconds of recording shown per second of video. Below 1 plays back in slow motion",
+        type=float_arg_positive_nonzero,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--decay",
+        help="Time for an event to fade to 37%% of its brightness, in microseconds of recording. "
+        "By default two frames",
+        type=float_arg_positive_nonzero,
+    )
+    parser.add_argument(
+        "--scale", "-s", help="Pixels of video per sensor pixel", type=int_arg_positive_nonzero, default=4
+    )
+    parser.add_argument(
+        "--format",
+        help="Video container, encoded as mp4v for mp4 and MJPG for avi",
+        choices=["mp4", "avi"],
+        default="mp4",
+    )
+    parser.add_argument(
+        "--time_limit",
+        "-t",
+        type=float_arg_positive_nonzero,
+        default=math.inf,
+        help="Length of the recording to play back (seconds)",
+    )
+    parser.add_argument(
+        "--skip_rows",
+        help="Number of events to skip at the start of the file",
+        type=int_arg_not_negative,
+        default=0,
+    )
+    parser.add_argument(
+        "--chunk_size",
+        "-c",
+        help="Maximum number of events held in memory at once",
+        type=int_arg_positive_nonzero,
+        default=1_000_000,
+    )
+    parser.add_argument("--save_directory", "-d", type=path_arg, default=".", help="Save file to directory")
+
+    local_area_args = parser.add_argument_group("Local area arguments (see spike_graph.py)")
+    local_area_args.add_argument(
+        "--pixel_x", "-x", help="X coordinate of the pixel to outline", type=int_arg_not_negative
+    )
+    local_area_args.add_argument(
+        "--pixel_y", "-y", help="Y coordinate of the pixel to outline", type=int_arg_not_negative
+    )
+    local_area_args.add_argument("--area_size", "-a", help="Size of area to outline", type=int_arg_positive_nonzero)
+    profiling.add_profile_args(parser)
+
+    args = parser.parse_args()
+
+    region_args = (args.pixel_x, args.pixel_y, args.area_size)
+    if any(arg is not None for arg in region_args) and any(arg is None for arg in region_args):
+        parser.error("pixel_x, pixel_y, and area_size must all be set when using Local area arguments")
+
+    return args
+
+
+def spike_graph_region(pixel_x: int, pixel_y: int, area_size: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Returns the (top left, bottom right) sensor pixels of the area spike_graph.get_activity_area examines.
+    spike_graph flips y (128 - y) like SpatialCsvData, while frame rows are sensor y"""
+    flipped_pixel_y = SENSOR_HEIGHT - pixel_y
+    top_left = (pixel_x - area_size + 1, flipped_pixel_y - area_size + 1)
+    bottom_right = (pixel_x + area_size - 1, flipped_pixel_y + area_size - 1)
+
+    return top_left, bottom_right
+
+
+def render_frame(
+    activity: np.ndarray,
+    scale: int,
+    elapsed_seconds: float,
+    region: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None,
+) -> np.ndarray:
+    """Draws (2, height, width) ON and OFF activity as a BGR image, green for ON and red for OFF"""
+    brightness = (255 * (1 - np.exp(-activity))).astype(np.uint8)
+
+    image = np.zeros((*activity.shape[1:], 3), dtype=np.uint8)
+    image[..., 1] = brightness[0]
+    image[..., 2] = brightness[1]
+    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+
+    if region is not None:
+        (left, top), (right, bottom) = region
+        top_left = (left * scale, top * scale)
+        bottom_right = ((right + 1) * scale - 1, (bottom + 1) * scale - 1)
+        cv2.rectangle(image, top_left, bottom_right, REGION_COLOR, 1)
+
+    cv2.putText(image, f"{elapsed_seconds:.3f}s", (4, 14), cv2.FONT_HERSHEY_SIMPLEX, 0.4, TEXT_COLOR, 1, cv2.LINE_AA)
+    return image
+
+
+def main(args: argparse.Namespace):
+    frame_us = max(int(round(1_000_000 * args.playback_speed / args.fps)), 1)
+    decay_us = args.decay or 2 * frame_us
+    time_limit_us = args.time_limit * 1_000_000
+
+    region = None
+    if args.area_size is not None:
+        region = spike_graph_region(args.pixel_x, args.pixel_y, args.area_size)
+
+    output_path = os.path.join(args.save_directory, f"{pathlib.Path(args.aedat_csv_file).stem}-events.{args.format}")
+    writer = cv2.VideoWriter(
+        output_path,
+        cv2.VideoWriter_fourcc(*FOURCC[args.format]),
+        args.fps,
+        (SENSOR_WIDTH * args.scale, SENSOR_HEIGHT * args.scale),
+    )
+    if not writer.isOpened():
+        raise ValueError(f"Could not open a video writer for '{output_path}'")
+
+    start = time.perf_counter()
+    chunks = profiling.iter_stage(
+        "load", event_arrays.iter_event_chunks(args.aedat_csv_file, args.chunk_size, args.skip_rows), len
+    )
+    frames = profiling.iter_stage("compute", frame_accumulator.iter_decayed_frames(chunks, frame_us, decay_us))
+    first_frame_start: Optional[int] = None
+    num_frames = 0
+
+    try:
+        for frame_start, activity in frames:
+            if first_frame_start is None:
+                first_frame_start = frame_start
+            elapsed_us = frame_start - first_frame_start
+            if elapsed_us > time_limit_us:
+                break
+
+            with profiling.stage("render", items=1, unit="frames"):
+                image = render_frame(activity, args.scale, elapsed_us / 1_000_000, region)
+            with profiling.stage("save", items=1, unit="frames"):
+                writer.write(image)
+            num_frames += 1
+    finally:
+        writer.release()
+
+    encode_seconds = max(time.perf_counter() - start, 1e-9)
+    recording_seconds = num_frames * frame_us / 1_000_000
+    video_seconds = num_frames / args.fps
+    print(
+        f"Wrote {num_frames} frames ({recording_seconds:.1f}s of recording, {video_seconds:.1f}s of video) "
+        f"to '{output_path}' in {encode_seconds:.1f}s: {recording_seconds / encode_seconds:.1f}x real time, "
+        f"{video_seconds / encode_seconds:.1f}x playback speed"
+    )
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
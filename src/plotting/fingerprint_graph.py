@@ -4,6 +4,7 @@ Y Axis: event counts in a time window
 X Axis: time
 
 CSV Format: on,off,both
+Parquet event stores written by csv_to_parquet.py are counted in reconstruction windows
 """
 
 import os
@@ -15,13 +16,15 @@ import matplotlib.pyplot as plt
 from matplotlib.ticker import ScalarFormatter
 import plotting_utils.get_plotting_data as get_plotting_data
 from plotting_utils.get_plotting_data import CsvData
-from plotting_utils import filename_regex
-from plotting_utils.plotting_helper import int_arg_positive_nonzero, float_arg_positive_nonzero, path_arg, file_arg
+from plotting_utils import filename_regex, profiling
+from plotting_utils.plotting_helper import int_arg_positive_nonzero, float_arg_positive_nonzero, path_arg
 
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("aedat_csv_file", help="CSV containing AEDAT data to be plotted", type=file_arg)
+    parser.add_argument(
+        "aedat_csv_file", help="Event count CSV to be plotted, or a Parquet event store", type=path_arg
+    )
     parser.add_argument(
         "reconstruction_window",
         help="Reconstruction window used to generate the csv file",
@@ -29,12 +32,23 @@ def get_args() -> argparse.Namespace:
     )
     parser.add_argument("--plot_xlim", "-x", help="Limit on the X-axis (seconds)", type=float_arg_positive_nonzero)
     parser.add_argument("--save_directory", "-d", help="Save file to directory", default=".", type=path_arg)
+    profiling.add_profile_args(parser)
 
     return parser.parse_args()
 
 
 def plot_event_count(
     event_counts: list, t: list, line_color: str, max_plot_entries_x: Optional[int], plot_title: str, save_dir: str
+):
+    with profiling.stage("render"):
+        render_event_count(event_counts, t, line_color, max_plot_entries_x, plot_title)
+
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(save_dir, f'{plot_title.replace(" ", "_")}.png'))
+
+
+def render_event_count(
+    event_counts: list, t: list, line_color: str, max_plot_entries_x: Optional[int], plot_title: str
 ):
     plt.clf()
 
@@ -69,13 +83,11 @@ def plot_event_count(
 
     plt.gcf().set_size_inches((20, 5))
 
-    plt.savefig(os.path.join(save_dir, f'{plot_title.replace(" ", "_")}.png'))
-
 
 def main(args: argparse.Namespace):
     matplotlib.use("Qt5Agg")
 
-    file_name = os.path.basename(args.aedat_csv_file)
+    file_name = os.path.basename(os.path.normpath(args.aedat_csv_file))
 
     hz = filename_regex.parse_frequency(file_name, "Hz ")
     voltage = filename_regex.parse_voltage(file_name, "V ")
@@ -89,9 +101,11 @@ def main(args: argparse.Namespace):
 
     max_csv_entries = (args.plot_xlim * 1000000) // args.reconstruction_window if args.plot_xlim is not None else -1
 
-    plot_data: CsvData = get_plotting_data.read_aedat_csv(
-        args.aedat_csv_file, args.reconstruction_window, max_csv_entries
-    )
+    with profiling.stage("load") as load:
+        plot_data: CsvData = get_plotting_data.read_event_counts(
+            args.aedat_csv_file, args.reconstruction_window, max_csv_entries
+        )
+        load.add_items(len(plot_data.time_windows), "windows")
 
     plot_event_count(
         plot_data.y_off,
@@ -121,4 +135,5 @@ def main(args: argparse.Namespace):
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -3,6 +3,7 @@ from matplotlib import pyplot as plt
 from typing import List
 from plotting_utils.plotting_helper import check_aedat_csv_format
 from plotting_utils.plotting_helper import file_arg, path_arg, int_arg_positive_nonzero
+from plotting_utils import profiling
 import matplotlib
 import statsmodels.api as sm
 import argparse
@@ -48,6 +49,7 @@ def get_args() -> argparse.Namespace:
         "--period", "-p", help="The period for the seasonal decomposition", type=int_arg_positive_nonzero, default=100
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", type=path_arg, default=".")
+    profiling.add_profile_args(parser)
 
     args = parser.parse_args()
     args.event_type = args.event_type.capitalize() + " Count"
@@ -65,7 +67,9 @@ def seasonal_decomp(
     plot_title=None,
     rows_to_skip=0,
 ) -> List[DataFrame]:
-    df = read_csv(csv_path, nrows=rows_to_plot + rows_to_skip + 1)
+    with profiling.stage("load") as load:
+        df = read_csv(csv_path, nrows=rows_to_plot + rows_to_skip + 1)
+        load.add_items(len(df), "rows")
 
     column_titles_found = list(df)
 
@@ -84,9 +88,10 @@ def seasonal_decomp(
             # The name of the dataframe will be used as the plot title
             events_to_plot.name = f"{plot_title} {column}"
 
-        decomposition_results.append(
-            sm.tsa.seasonal_decompose(events_to_plot[rows_to_skip:], period=seasonal_period, model=model)
-        )
+        with profiling.stage("compute"):
+            decomposition_results.append(
+                sm.tsa.seasonal_decompose(events_to_plot[rows_to_skip:], period=seasonal_period, model=model)
+            )
 
     return decomposition_results
 
@@ -100,21 +105,25 @@ def main(args: argparse.Namespace):
     decomposition = seasonal_decomp(
         args.aedat_csv_file, args.model, [args.event_type], args.num_rows, args.period, plot_title, args.skip_rows
     )[0]
-    decomposition.plot()
+    with profiling.stage("render"):
+        decomposition.plot()
+
+        fig = matplotlib.pyplot.gcf()
+        fig.set_size_inches(16, 10)
 
-    fig = matplotlib.pyplot.gcf()
-    fig.set_size_inches(16, 10)
+        plt.tight_layout(pad=1.10)
 
-    plt.tight_layout(pad=1.10)
-    plt.savefig(
-        os.path.join(
-            args.save_directory,
-            f"{plot_title}-{args.event_type.replace(' ', '-')}-{args.model}-{args.period}Period.png",
+    with profiling.stage("save"):
+        plt.savefig(
+            os.path.join(
+                args.save_directory,
+                f"{plot_title}-{args.event_type.replace(' ', '-')}-{args.model}-{args.period}Period.png",
+            )
         )
-    )
     plt.clf()
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
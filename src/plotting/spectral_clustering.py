@@ -1,15 +1,25 @@
 import argparse
 import os
+import sys
+from typing import Optional
 
 from sklearn.cluster import SpectralClustering
 import numpy as np
 import plotting_utils.get_plotting_data as get_plotting_data
 from plotting_utils.get_plotting_data import DataStorage
+from plotting_utils import chunked, profiling
+from plotting_utils.event_arrays import SENSOR_HEIGHT
 
 import matplotlib
 import matplotlib.pyplot as plt
 
-from plotting_utils.plotting_helper import int_arg_not_negative, path_arg, file_arg, float_arg_positive_nonzero
+from plotting_utils.plotting_helper import (
+    int_arg_not_negative,
+    int_arg_positive_nonzero,
+    path_arg,
+    file_arg,
+    float_arg_positive_nonzero,
+)
 
 
 def get_args() -> argparse.Namespace:
@@ -28,12 +38,31 @@ def get_args() -> argparse.Namespace:
         "--max_time", "-t", help="Max time in microseconds", default=None, type=float_arg_positive_nonzero
     )
     parser.add_argument("--save_directory", "-d", help="Save file to directory", default=".", type=path_arg)
+    parser.add_argument(
+        "--chunked",
+        help="Count the events of every pixel in chunks on several processes and cluster the active pixels instead of "
+        "every event, for recordings larger than memory",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--min_pixel_events",
+        help="With --chunked, number of events that makes a pixel active",
+        default=1,
+        type=int_arg_positive_nonzero,
+    )
+    parser.add_argument(
+        "--num_workers", "-w", help="With --chunked, number of processes", default=1, type=int_arg_positive_nonzero
+    )
+    profiling.add_profile_args(parser)
 
     args = parser.parse_args()
 
     if args.num_clusters < 2:
         parser.error("The minimum value for --num_clusters is 2")
 
+    if args.chunked and args.skip_rows:
+        parser.error("--skip_rows cannot be used with --chunked")
+
     if args.max_time:
         # Convert time to seconds
         args.max_time = args.max_time * (10**-6)
@@ -41,31 +70,57 @@ def get_args() -> argparse.Namespace:
     return args
 
 
+def active_pixels(csv_file: str, max_time: Optional[float], min_events: int, num_workers: int) -> np.ndarray:
+    """[[X,Y], [X,Y], ...] of every pixel with at least min_events events in the first max_time seconds, with Y
+    flipped like SpatialCsvData. The events are counted out of core, so the recording does not have to fit in memory"""
+    with profiling.stage("load") as load:
+        stop_time = None
+        start_time = chunked.first_timestamp(csv_file)
+        if max_time and start_time is not None:
+            stop_time = start_time + int(max_time * 1000000)
+
+        counts = chunked.pixel_counts(csv_file, stop_time=stop_time, num_workers=num_workers).sum(axis=0)
+        load.add_items(counts.sum())
+
+    y_positions, x_positions = np.nonzero(counts >= min_events)
+    return np.column_stack([x_positions, SENSOR_HEIGHT - y_positions])
+
+
 def main(args: argparse.Namespace):
     matplotlib.use("Qt5Agg")
 
-    data = get_plotting_data.SpatialCsvData.from_csv(
-        args.aedat_csv_file, DataStorage.NONE, args.max_time, args.skip_rows
-    )
+    if args.chunked:
+        plot_points = active_pixels(args.aedat_csv_file, args.max_time, args.min_pixel_events, args.num_workers)
+    else:
+        with profiling.stage("load") as load:
+            data = get_plotting_data.SpatialCsvData.from_csv(
+                args.aedat_csv_file, DataStorage.NONE, args.max_time or sys.maxsize, args.skip_rows
+            )
+            load.add_items(len(data.timestamps))
 
-    # Transform X and Y positions into the correct format for this plot -> [[X,Y], [X,Y], ...]
-    plot_points = np.asarray(list(zip(data.x_positions, data.y_positions)))
+        # Transform X and Y positions into the correct format for this plot -> [[X,Y], [X,Y], ...]
+        plot_points = np.asarray(list(zip(data.x_positions, data.y_positions)))
 
-    model = SpectralClustering(
-        n_clusters=args.num_clusters, assign_labels="cluster_qr", affinity="rbf", eigen_solver="lobpcg"
-    )
+    with profiling.stage("compute", items=len(plot_points), unit="points"):
+        model = SpectralClustering(
+            n_clusters=args.num_clusters, assign_labels="cluster_qr", affinity="rbf", eigen_solver="lobpcg"
+        )
+
+        labels = model.fit_predict(plot_points)
 
-    labels = model.fit_predict(plot_points)
-    plt.scatter(plot_points[:, 0], plot_points[:, 1], c=labels, s=10, cmap="viridis")
+    with profiling.stage("render"):
+        plt.scatter(plot_points[:, 0], plot_points[:, 1], c=labels, s=10, cmap="viridis")
 
     file_name = os.path.basename(os.path.normpath(args.aedat_csv_file))  # Get file at end of path
     file_name = os.path.splitext(file_name)[0]  # Strip off file extension
 
-    plt.savefig(
-        os.path.join(args.save_directory, f"SpectralClustering-{file_name}.png"), bbox_inches="tight", pad_inches=0
-    )
+    with profiling.stage("save"):
+        plt.savefig(
+            os.path.join(args.save_directory, f"SpectralClustering-{file_name}.png"), bbox_inches="tight", pad_inches=0
+        )
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
@@ -4,6 +4,7 @@ Y Axis: ON events correspond to +1 and OFF events correspond to -1
 X Axis: Time
 
 CSV Format: on/off,x,y,timestamp
+Parquet event stores written by csv_to_parquet.py are read too
 """
 import csv
 import math
@@ -16,13 +17,13 @@ from typing import List
 import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
+import numpy as np
 from plotting_utils.plotting_helper import check_aedat_csv_format
-from plotting_utils import filename_regex
+from plotting_utils import filename_regex, parquet_store, profiling
 
 from plotting_utils.plotting_helper import (
     float_arg_positive_nonzero,
     path_arg,
-    file_arg,
     int_arg_not_negative,
     int_arg_positive_nonzero,
 )
@@ -31,7 +32,9 @@ from plotting_utils.plotting_helper import (
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "aedat_csv_file", help="CSV containing AEDAT data to be plotted (ON/OFF,x,y,timestamp)", type=file_arg
+        "aedat_csv_file",
+        help="CSV containing AEDAT data to be plotted (ON/OFF,x,y,timestamp), or a Parquet event store",
+        type=path_arg,
     )
     parser.add_argument(
         "--time_limit",
@@ -56,6 +59,7 @@ def get_args() -> argparse.Namespace:
 
     global_area_args = parser.add_argument_group("Global area arguments")
     global_area_args.add_argument("--global_area", "-g", action="store_true")
+    profiling.add_profile_args(parser)
 
     args = parser.parse_args()
 
@@ -80,6 +84,10 @@ def get_args() -> argparse.Namespace:
 def get_activity_area(
     csv_file, pixel_x: int, pixel_y: int, area_size: int, max_points: int = sys.maxsize, time_limit: float = math.inf
 ):
+    if parquet_store.is_event_store(csv_file):
+        # Only reads the row groups of the area
+        return parquet_store.activity_area(csv_file, pixel_x, pixel_y, area_size, max_points, time_limit)
+
     points: List[List[int]] = []
     first_timestamp = 0
 
@@ -151,38 +159,18 @@ def auto_generate_title(file_name: str) -> str:
     return auto_title
 
 
-def main(args: argparse.Namespace):
-    matplotlib.use("Qt5Agg")
-
-    file_path = args.aedat_csv_file
+def plot_spikes(plot_points: List[List[int]], title: str):
+    """Plots [polarity, timestamp] points from get_activity_area on the current figure"""
+    spikes = np.asarray(plot_points, dtype=np.float64).reshape(-1, 2)
+    timestamps_seconds = spikes[:, 1] / 1000000  # Convert to seconds
+    on_spikes = spikes[:, 0] == 1
 
-    if args.global_area:
-        plot_points = get_activity_area(file_path, 999, 999, 9999, time_limit=args.time_limit)
-    else:
-        plot_points = get_activity_area(
-            file_path, args.pixel_x, args.pixel_y, args.area_size, time_limit=args.time_limit
-        )
-
-    # Add lines to plot
-    for point in plot_points:
-        timestamp_seconds = point[1] / 1000000  # Convert to seconds
-        color = "g" if point[0] == 1 else "r"
-
-        # Add to points at the same X value to make vertical lines
-        plt.plot([timestamp_seconds, timestamp_seconds], [0, point[0]], color)
+    # A vertical line from 0 to +1 for every ON event and from 0 to -1 for every OFF event, all drawn at once
+    plt.vlines(timestamps_seconds[on_spikes], 0, 1, colors="g")
+    plt.vlines(timestamps_seconds[~on_spikes], -1, 0, colors="r")
 
     plt.ylim(-1.1, 1.1)
-
-    # Get file name from path and remove extension
-    file_name = os.path.basename(file_path)
-    file_name = os.path.splitext(file_name)[0]
-
-    if args.title is None:
-        title = auto_generate_title(file_name)
-        plt.title(title)
-    else:
-        plt.title(args.title)
-
+    plt.title(title)
     plt.xlabel("Time (Seconds)")
 
     plt.gcf().set_size_inches((25, 5))
@@ -198,15 +186,39 @@ def main(args: argparse.Namespace):
 
     plt.axhline(0, color="black")
 
+
+def main(args: argparse.Namespace):
+    matplotlib.use("Qt5Agg")
+
+    file_path = args.aedat_csv_file
+
+    with profiling.stage("load") as load:
+        if args.global_area:
+            plot_points = get_activity_area(file_path, 999, 999, 9999, time_limit=args.time_limit)
+        else:
+            plot_points = get_activity_area(
+                file_path, args.pixel_x, args.pixel_y, args.area_size, time_limit=args.time_limit
+            )
+        load.add_items(len(plot_points), "spikes")
+
+    # Get file name from path and remove extension
+    file_name = os.path.basename(os.path.normpath(file_path))
+    file_name = os.path.splitext(file_name)[0]
+
+    with profiling.stage("render", items=len(plot_points), unit="spikes"):
+        plot_spikes(plot_points, auto_generate_title(file_name) if args.title is None else args.title)
+
     plot_file_name = ""
     if args.global_area:
         plot_file_name = f"spike_plot-{file_name}-global.png"
     else:
         plot_file_name = f"spike_Plot-{file_name}_X-{args.pixel_x}_Y-{args.pixel_y}_Area-{args.area_size}.png"
 
-    plt.savefig(os.path.join(args.save_directory, plot_file_name), bbox_inches="tight", pad_inches=0.1)
+    with profiling.stage("save"):
+        plt.savefig(os.path.join(args.save_directory, plot_file_name), bbox_inches="tight", pad_inches=0.1)
 
 
 if __name__ == "__main__":
     args = get_args()
-    main(args)
+    with profiling.profile_run(args):
+        main(args)
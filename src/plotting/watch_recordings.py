@@ -0,0 +1,274 @@
+"""
+Watches a data folder and analyzes every recording the AEDAT converter writes to it, once the file is complete.
+
+Both event CSVs (On/Off,X,Y,Timestamp) and event count CSVs (On Count,Off Count,Combined Count) are recognized by their
+header. The results of each recording are saved to the same sub-directories of the save directory as the recording has
+in the data folder. Progress is kept in a JSON file, so a restarted watcher only analyzes new or changed recordings.
+
+Analyses:
+    statistics   Event counts, duration, event rate and per-window count statistics as <name>-statistics.json
+    counts       Event counts per reconstruction window of event CSVs as <name>-counts-<window>us.csv, the format read
+                 by fingerprint_graph.py and event_chunk_graph_hist.py
+    fingerprint  Fingerprint graph of all events, like fingerprint_graph.py
+    spike        Spike graph of the whole sensor for the first --spike_time_limit seconds, like spike_graph.py -g
+
+Event CSVs are only counted once: statistics and fingerprint save the counts the same way the counts analysis does, and
+every analysis reads them from there while they are newer than the recording.
+"""
+
+import argparse
+import csv
+import functools
+import json
+import os
+import pathlib
+from typing import Callable, Dict
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from fingerprint_graph import plot_event_count
+from spike_graph import auto_generate_title, get_activity_area, plot_spikes
+from plotting_utils import chunked, profiling
+from plotting_utils.chunked import EVENT_COUNT_HEADER
+from plotting_utils.event_arrays import EVENT_CSV_HEADER
+from plotting_utils.file_watcher import DirectoryWatcher, JobResult
+from plotting_utils.get_plotting_data import read_aedat_csv
+from plotting_utils.plotting_helper import float_arg_positive_nonzero, int_arg_positive_nonzero, path_arg
+
+ANALYSES = ["statistics", "counts", "fingerprint", "spike"]
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Analyze recordings as they are written", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("data_folder", help="Folder the converted recordings are written to", type=path_arg)
+    parser.add_argument(
+        "--analyses", "-a", help="Analyses to run on every recording", choices=ANALYSES, nargs="+", default=ANALYSES
+    )
+    parser.add_argument("--save_directory", "-d", help="Save results to directory", type=path_arg, default=".")
+    parser.add_argument(
+        "--progress_file", "-p", help="JSON file the progress is kept in, by default in the save directory"
+    )
+    parser.add_argument("--pattern", help="Names of the files to analyze", default="*.csv")
+    parser.add_argument(
+        "--reconstruction_window",
+        "-r",
+        help="Reconstruction window of event CSVs in microseconds, and of event count CSVs as they were generated",
+        type=int_arg_positive_nonzero,
+        default=10000,
+    )
+    parser.add_argument(
+        "--spike_time_limit",
+        help="Seconds of every recording included in its spike graph",
+        type=float_arg_positive_nonzero,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--settle_seconds",
+        help="Seconds without modification after which a recording is considered complete",
+        type=float_arg_positive_nonzero,
+        default=5.0,
+    )
+    parser.add_argument(
+        "--poll_interval", help="Seconds between scans of the data folder", type=float_arg_positive_nonzero, default=2.0
+    )
+    parser.add_argument("--num_workers", "-w", help="Number of processes", type=int_arg_positive_nonzero, default=1)
+    parser.add_argument("--once", help="Analyze the complete recordings once and exit", action="store_true")
+    parser.add_argument("--retry_failed", help="Run analyses that failed before again", action="store_true")
+    profiling.add_profile_args(parser)
+
+    args = parser.parse_args()
+
+    if os.path.abspath(args.save_directory) == os.path.abspath(args.data_folder):
+        parser.error("--save_directory must not be the data folder, or the results would be analyzed too")
+
+    return args
+
+
+def csv_kind(csv_file: str) -> str:
+    """Returns "events" or "counts" depending on the header of csv_file"""
+    with open(csv_file, "r", newline="") as f:
+        header = next(csv.reader(f), None)
+
+    header = [entry.strip() for entry in header or []]
+    if header == EVENT_CSV_HEADER:
+        return "events"
+    if header == EVENT_COUNT_HEADER:
+        return "counts"
+
+    raise ValueError(f"'{csv_file}' is neither an event CSV nor an event count CSV. Found header: {header}")
+
+
+def output_directory(csv_file: str, data_folder: str, save_directory: str) -> str:
+    """The sub-directory of save_directory that csv_file is in in data_folder. Created if it does not exist"""
+    relative_directory = os.path.relpath(os.path.dirname(os.path.abspath(csv_file)), os.path.abspath(data_folder))
+    directory = os.path.normpath(os.path.join(save_directory, relative_directory))
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+def output_path(csv_file: str, data_folder: str, save_directory: str, suffix: str) -> str:
+    return os.path.join(output_directory(csv_file, data_folder, save_directory), pathlib.Path(csv_file).stem + suffix)
+
+
+def read_counts(counts_csv: str) -> np.ndarray:
+    return pd.read_csv(counts_csv, usecols=EVENT_COUNT_HEADER)[EVENT_COUNT_HEADER].to_numpy(dtype=np.int64)
+
+
+def recording_counts(csv_file: str, kind: str, data_folder: str, save_directory: str, window_us: int) -> np.ndarray:
+    """ON, OFF and all events per reconstruction window, shaped (windows, 3). The counts of an event CSV are saved to
+    <name>-counts-<window>us.csv and read from it as long as it is newer than the recording"""
+    if kind == "counts":
+        with profiling.stage("load"):
+            return read_counts(csv_file)
+
+    counts_path = output_path(csv_file, data_folder, save_directory, f"-counts-{window_us}us.csv")
+    with profiling.stage("load"):
+        if os.path.isfile(counts_path) and os.path.getmtime(counts_path) >= os.path.getmtime(csv_file):
+            return read_counts(counts_path)
+
+        counts = chunked.window_counts(csv_file, window_us)
+
+    # Other workers may read the counts at the same time, so they are written to a temporary file first
+    temp_path = f"{counts_path}.{os.getpid()}.tmp"
+    with profiling.stage("save"):
+        with open(temp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EVENT_COUNT_HEADER)
+            writer.writerows(counts.tolist())
+        os.replace(temp_path, counts_path)
+
+    return counts
+
+
+def save_statistics(csv_file: str, data_folder: str, save_directory: str, window_us: int):
+    kind = csv_kind(csv_file)
+    counts = recording_counts(csv_file, kind, data_folder, save_directory, window_us)
+
+    num_events = int(counts[:, 2].sum())
+    duration = len(counts) * window_us / 1000000
+    window_counts = counts[:, 2] if len(counts) else np.zeros(1)
+    statistics = {
+        "file": os.path.normpath(csv_file),
+        "kind": kind,
+        "events": num_events,
+        "on_events": int(counts[:, 0].sum()),
+        "off_events": int(counts[:, 1].sum()),
+        "duration_seconds": duration,
+        "events_per_second": num_events / duration if duration > 0 else None,
+        "window_us": window_us,
+        "windows": len(counts),
+        "mean_window_count": float(window_counts.mean()),
+        "std_window_count": float(window_counts.std()),
+        "max_window_count": int(window_counts.max()),
+    }
+
+    with profiling.stage("save"):
+        with open(output_path(csv_file, data_folder, save_directory, "-statistics.json"), "w") as f:
+            json.dump(statistics, f, indent=4)
+
+
+def save_counts(csv_file: str, data_folder: str, save_directory: str, window_us: int):
+    kind = csv_kind(csv_file)
+    if kind != "events":
+        return  # Already counted
+
+    recording_counts(csv_file, kind, data_folder, save_directory, window_us)
+
+
+def save_fingerprint(csv_file: str, data_folder: str, save_directory: str, window_us: int):
+    kind = csv_kind(csv_file)
+    if kind == "events":
+        counts = recording_counts(csv_file, kind, data_folder, save_directory, window_us)[:, 2].tolist()
+        times = (np.arange(len(counts)) * window_us / 1000000).tolist()
+    else:
+        with profiling.stage("load"):
+            data = read_aedat_csv(csv_file, window_us)
+        counts, times = data.y_all, data.time_windows
+
+    title = f"{pathlib.Path(csv_file).stem} All Events Fingerprint ({window_us}μs Reconstruction Window)"
+    plot_event_count(counts, times, "b", None, title, output_directory(csv_file, data_folder, save_directory))
+    plt.close("all")
+
+
+def save_spike_plot(csv_file: str, data_folder: str, save_directory: str, time_limit: float):
+    if csv_kind(csv_file) != "events":
+        return  # Event counts have no positions
+
+    with profiling.stage("load") as load:
+        plot_points = get_activity_area(csv_file, 999, 999, 9999, time_limit=time_limit)
+        load.add_items(len(plot_points), "spikes")
+
+    plt.figure()
+    with profiling.stage("render", items=len(plot_points), unit="spikes"):
+        plot_spikes(plot_points, auto_generate_title(pathlib.Path(csv_file).stem))
+
+    directory = output_directory(csv_file, data_folder, save_directory)
+    with profiling.stage("save"):
+        plt.savefig(
+            os.path.join(directory, f"spike_plot-{pathlib.Path(csv_file).stem}-global.png"),
+            bbox_inches="tight",
+            pad_inches=0.1,
+        )
+    plt.close("all")
+
+
+def make_analyses(args: argparse.Namespace) -> Dict[str, Callable[[str], None]]:
+    """The requested analyses as picklable functions of a CSV path"""
+    common = {"data_folder": args.data_folder, "save_directory": args.save_directory}
+    analyses = {
+        "statistics": functools.partial(save_statistics, window_us=args.reconstruction_window, **common),
+        "counts": functools.partial(save_counts, window_us=args.reconstruction_window, **common),
+        "fingerprint": functools.partial(save_fingerprint, window_us=args.reconstruction_window, **common),
+        "spike": functools.partial(save_spike_plot, time_limit=args.spike_time_limit, **common),
+    }
+
+    return {name: analyses[name] for name in args.analyses}
+
+
+def init_worker():
+    # Plots are only saved
+    matplotlib.use("Agg")
+
+
+def print_result(result: JobResult):
+    if result.error is None:
+        print(f"{result.analysis} of '{result.path}' done in {result.seconds:.1f}s")
+    else:
+        print(f"{result.analysis} of '{result.path}' failed: {result.error}")
+
+
+def main(args: argparse.Namespace):
+    init_worker()
+
+    progress_file = args.progress_file or os.path.join(args.save_directory, "watch_progress.json")
+    watcher = DirectoryWatcher(
+        args.data_folder,
+        make_analyses(args),
+        progress_file,
+        args.pattern,
+        args.settle_seconds,
+        args.num_workers,
+        args.retry_failed,
+        exclude=[args.save_directory],
+        initializer=init_worker,
+    )
+
+    if not args.once:
+        print(f"Watching '{args.data_folder}' for new recordings. Press Ctrl+C to stop")
+
+    try:
+        watcher.run(args.poll_interval, args.once, print_result)
+    except KeyboardInterrupt:
+        print(f"Stopped. Progress is saved in '{progress_file}'")
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with profiling.profile_run(args):
+        main(args)
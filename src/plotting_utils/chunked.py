@@ -0,0 +1,321 @@
+"""
+Out-of-core reductions of event CSVs (On/Off,X,Y,Timestamp) that are larger than memory.
+
+The file is split into byte ranges that start and end on line boundaries. Every range is parsed by a worker process on
+its own and reduced to a small partial result, such as a count, a histogram or a per-pixel image, and the partial
+results are combined in the main process in file order. At most 2 * num_workers ranges are in flight at once, so memory
+use depends on chunk_bytes and num_workers, not on the length of the recording.
+
+Custom reductions are written as a module level function of an EventArrays (so it can be sent to the workers) and a
+function that combines two partial results:
+
+    def count_on_events(events: EventArrays) -> int:
+        return int(events.polarities.sum())
+
+    num_on_events = reduce_chunks(csv_file, count_on_events, operator.add, 0, num_workers=4)
+"""
+
+import collections
+import concurrent.futures
+import functools
+import io
+import operator
+import os
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from plotting_utils.event_arrays import (
+    EVENT_CSV_HEADER,
+    SENSOR_HEIGHT,
+    SENSOR_WIDTH,
+    EventArrays,
+    check_header,
+    to_event_arrays,
+)
+
+T = TypeVar("T")
+
+EVENT_COUNT_HEADER = ["On Count", "Off Count", "Combined Count"]
+
+DEFAULT_CHUNK_BYTES = 64 * 2**20
+"""About 3 million events of a typical event CSV"""
+
+
+def byte_ranges(csv_file: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Splits the rows of a CSV (without the header) into (start, end) byte ranges of about chunk_bytes bytes that
+    start and end on line boundaries. Only the lines at the ends of the ranges are read"""
+    size = os.path.getsize(csv_file)
+    ranges = []
+
+    with open(csv_file, "rb") as f:
+        f.readline()  # Skip the header
+        start = f.tell()
+
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # Move to the end of the line the range would end in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+def read_range(csv_file: str, start: int, end: int) -> EventArrays:
+    """Reads the events in a byte range returned by byte_ranges"""
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    if not data.strip():
+        return EventArrays.empty()
+
+    chunk = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=EVENT_CSV_HEADER,
+        dtype={"X": np.int16, "Y": np.int16, "Timestamp": np.int64},
+    )
+    return to_event_arrays(chunk)
+
+
+def _map_range(csv_file: str, start: int, end: int, function: Callable[[EventArrays], T]) -> T:
+    return function(read_range(csv_file, start, end))
+
+
+def map_chunks(
+    csv_file: str,
+    function: Callable[[EventArrays], T],
+    num_workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Iterator[T]:
+    """Yields function applied to every chunk of events of an event CSV, in file order
+
+    Parameters
+    ----------
+    csv_file : str
+        CSV in the On/Off,X,Y,Timestamp format
+    function : Callable[[EventArrays], T]
+        Applied to every chunk. With more than one worker it must be picklable, such as a module level function or a
+        functools.partial of one, and should return a result much smaller than the chunk
+    num_workers : int, optional
+        Number of processes, by default 1, which reads the chunks in this process
+    chunk_bytes : int, optional
+        Approximate size of every chunk in the file, by default DEFAULT_CHUNK_BYTES
+
+    Raises
+    ------
+    ValueError
+        Raised when the CSV file is of an incorrect format, as defined by the header
+    """
+    check_header(csv_file)
+    ranges = byte_ranges(csv_file, chunk_bytes)
+
+    if num_workers == 1:
+        for start, end in ranges:
+            yield _map_range(csv_file, start, end, function)
+        return
+
+    pending: Deque["concurrent.futures.Future[T]"] = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(num_workers)
+    try:
+        for start, end in ranges:
+            pending.append(executor.submit(_map_range, csv_file, start, end, function))
+            if len(pending) >= 2 * num_workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def reduce_chunks(
+    csv_file: str,
+    function: Callable[[EventArrays], T],
+    combine: Callable[[T, T], T],
+    initial: T,
+    num_workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> T:
+    """Combines function applied to every chunk of an event CSV, in file order, starting from initial.
+    See map_chunks for the other arguments"""
+    return functools.reduce(combine, map_chunks(csv_file, function, num_workers, chunk_bytes), initial)
+
+
+class EventSummary(NamedTuple):
+    num_events: int
+    num_on_events: int
+    first_timestamp: Optional[int]
+    last_timestamp: Optional[int]
+
+    @property
+    def duration_us(self) -> int:
+        if self.first_timestamp is None or self.last_timestamp is None:
+            return 0
+        return self.last_timestamp - self.first_timestamp
+
+    @property
+    def events_per_second(self) -> float:
+        """Average event rate, or nan for recordings shorter than a microsecond"""
+        return self.num_events / (self.duration_us / 1_000_000) if self.duration_us > 0 else float("nan")
+
+    @staticmethod
+    def of(events: EventArrays) -> "EventSummary":
+        if len(events) == 0:
+            return EventSummary(0, 0, None, None)
+
+        return EventSummary(
+            len(events), int(events.polarities.sum()), int(events.timestamps.min()), int(events.timestamps.max())
+        )
+
+    def combine(self, other: "EventSummary") -> "EventSummary":
+        def extreme(function: Callable, a: Optional[int], b: Optional[int]) -> Optional[int]:
+            return b if a is None else a if b is None else function(a, b)
+
+        return EventSummary(
+            self.num_events + other.num_events,
+            self.num_on_events + other.num_on_events,
+            extreme(min, self.first_timestamp, other.first_timestamp),
+            extreme(max, self.last_timestamp, other.last_timestamp),
+        )
+
+
+def summarize(csv_file: str, num_workers: int = 1, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> EventSummary:
+    """Counts the events of an event CSV and finds its first and last timestamps"""
+    return reduce_chunks(
+        csv_file, EventSummary.of, EventSummary.combine, EventSummary(0, 0, None, None), num_workers, chunk_bytes
+    )
+
+
+def first_timestamp(csv_file: str) -> Optional[int]:
+    """Timestamp of the first event of an event CSV, or None if it has no events"""
+    first_rows = pd.read_csv(csv_file, usecols=["Timestamp"], nrows=1)
+    return int(first_rows["Timestamp"].iloc[0]) if len(first_rows) else None
+
+
+def _select_time(events: EventArrays, start_time: Optional[int], stop_time: Optional[int]) -> EventArrays:
+    if start_time is None and stop_time is None:
+        return events
+
+    mask = np.ones(len(events), dtype=bool)
+    if start_time is not None:
+        mask &= events.timestamps >= start_time
+    if stop_time is not None:
+        mask &= events.timestamps <= stop_time
+
+    return EventArrays(*(column[mask] for column in events))
+
+
+def chunk_pixel_counts(
+    events: EventArrays,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    start_time: Optional[int] = None,
+    stop_time: Optional[int] = None,
+) -> np.ndarray:
+    """ON and OFF events per pixel, shaped (2, height, width) with y in sensor coordinates"""
+    events = _select_time(events, start_time, stop_time).in_bounds(width, height)
+    pixels = events.y.astype(np.int64) * width + events.x
+    on = np.bincount(pixels[events.polarities], minlength=width * height)
+    off = np.bincount(pixels[~events.polarities], minlength=width * height)
+
+    return np.stack([on, off]).reshape(2, height, width)
+
+
+def pixel_counts(
+    csv_file: str,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    start_time: Optional[int] = None,
+    stop_time: Optional[int] = None,
+    num_workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> np.ndarray:
+    """ON and OFF events per pixel of an event CSV, shaped (2, height, width) with y in sensor coordinates.
+    Only events with timestamps from start_time to stop_time (inclusive) are counted, if given"""
+    function = functools.partial(
+        chunk_pixel_counts, width=width, height=height, start_time=start_time, stop_time=stop_time
+    )
+    initial = np.zeros((2, height, width), dtype=np.int64)
+
+    return reduce_chunks(csv_file, function, operator.add, initial, num_workers, chunk_bytes)
+
+
+def event_counts(events: EventArrays, window_us: int, start_time: Optional[int] = None) -> np.ndarray:
+    """Counts ON, OFF and all events in consecutive windows of window_us microseconds from start_time, by default the
+    first timestamp, shaped (windows, 3). Events before start_time are not counted"""
+    if len(events) == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+
+    if start_time is None:
+        start_time = int(events.timestamps[0])
+
+    window = (events.timestamps - start_time) // window_us
+    # Out of order events can come before start_time or after the last event
+    in_windows = window >= 0
+    window, polarities = window[in_windows], events.polarities[in_windows]
+    if len(window) == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+
+    num_windows = int(window.max()) + 1
+    on_counts = np.bincount(window[polarities], minlength=num_windows)
+    off_counts = np.bincount(window[~polarities], minlength=num_windows)
+
+    return np.stack([on_counts, off_counts, on_counts + off_counts], axis=1)
+
+
+def add_counts(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Adds per-window counts that may cover more windows than totals"""
+    if len(counts) > len(totals):
+        totals = np.pad(totals, ((0, len(counts) - len(totals)), (0, 0)))
+    totals[: len(counts)] += counts
+
+    return totals
+
+
+def window_counts(
+    csv_file: str,
+    window_us: int,
+    start_time: Optional[int] = None,
+    num_workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> np.ndarray:
+    """Counts ON, OFF and all events of an event CSV in consecutive windows of window_us microseconds from start_time,
+    by default the timestamp of the first row. Shaped (windows, 3), like the event count CSVs read by read_aedat_csv.
+    Events before start_time, such as out of order events before the first row, are not counted"""
+    if start_time is None:
+        start_time = first_timestamp(csv_file)
+        if start_time is None:
+            return np.zeros((0, 3), dtype=np.int64)
+
+    function = functools.partial(event_counts, window_us=window_us, start_time=start_time)
+    initial = np.zeros((0, 3), dtype=np.int64)
+
+    return reduce_chunks(csv_file, function, add_counts, initial, num_workers, chunk_bytes)
+
+
+def chunk_histogram(events: EventArrays, column: str, bins: np.ndarray) -> np.ndarray:
+    counts, _ = np.histogram(getattr(events, column), bins)
+    return counts
+
+
+def histogram(
+    csv_file: str,
+    column: str,
+    bins: np.ndarray,
+    num_workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> np.ndarray:
+    """Histogram of a column of an event CSV ("x", "y" or "timestamps") over fixed bin edges, like np.histogram.
+    The bin edges must be known up front, so they are the same for every chunk"""
+    if column not in EventArrays._fields:
+        raise ValueError(f"Unknown column '{column}'. Choose from {list(EventArrays._fields)}")
+
+    bins = np.asarray(bins)
+    function = functools.partial(chunk_histogram, column=column, bins=bins)
+    initial = np.zeros(len(bins) - 1, dtype=np.int64)
+
+    return reduce_chunks(csv_file, function, operator.add, initial, num_workers, chunk_bytes)
@@ -0,0 +1,113 @@
+"""Columnar numpy representation of raw event CSVs (On/Off,X,Y,Timestamp), read in bulk with pandas"""
+
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+EVENT_CSV_HEADER = ["On/Off", "X", "Y", "Timestamp"]
+
+SENSOR_WIDTH = 128
+SENSOR_HEIGHT = 128
+
+
+class EventArrays(NamedTuple):
+    """Events as parallel arrays. Unlike SpatialCsvData, y is kept in sensor coordinates (not flipped)"""
+
+    polarities: np.ndarray
+    """bool, True for ON events"""
+    x: np.ndarray
+    """int16"""
+    y: np.ndarray
+    """int16"""
+    timestamps: np.ndarray
+    """int64, microseconds"""
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "EventArrays":
+        return EventArrays(*(column[start:stop] for column in self))
+
+    def in_bounds(self, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT) -> "EventArrays":
+        """Returns only the events that lie inside a width x height sensor"""
+        mask = (self.x >= 0) & (self.x < width) & (self.y >= 0) & (self.y < height)
+        return EventArrays(*(column[mask] for column in self))
+
+    @staticmethod
+    def concatenate(*events: "EventArrays") -> "EventArrays":
+        return EventArrays(*(np.concatenate(columns) for columns in zip(*events)))
+
+    @staticmethod
+    def empty() -> "EventArrays":
+        return EventArrays(
+            np.empty(0, dtype=bool), np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int16), np.empty(0, np.int64)
+        )
+
+
+def to_event_arrays(chunk: pd.DataFrame) -> EventArrays:
+    """Converts a DataFrame with the columns of EVENT_CSV_HEADER"""
+    polarity = chunk["On/Off"]
+
+    # Polarity is stored as either True/False or 1/-1
+    if polarity.dtype == object:
+        polarities = (polarity.astype(str) == "True").to_numpy()
+    else:
+        polarities = (polarity > 0).to_numpy()
+
+    return EventArrays(
+        polarities,
+        chunk["X"].to_numpy(dtype=np.int16),
+        chunk["Y"].to_numpy(dtype=np.int16),
+        chunk["Timestamp"].to_numpy(dtype=np.int64),
+    )
+
+
+def check_header(csv_file: str):
+    """Raises a ValueError if the header of csv_file is not EVENT_CSV_HEADER"""
+    header = list(pd.read_csv(csv_file, nrows=0).columns)
+    if header != EVENT_CSV_HEADER:
+        raise ValueError(f"Found header: {header}\nExpected: {EVENT_CSV_HEADER}")
+
+
+def iter_event_chunks(csv_file: str, chunk_size: int = 1_000_000, skip_rows: int = 0) -> Iterator[EventArrays]:
+    """Reads an event CSV in chunks of at most chunk_size events, so recordings larger than memory can be processed
+
+    Parameters
+    ----------
+    csv_file : str
+        CSV in the On/Off,X,Y,Timestamp format
+    chunk_size : int, optional
+        Maximum number of events in each chunk, by default 1_000_000
+    skip_rows : int, optional
+        Number of events to skip from the start of the file, by default 0
+
+    Yields
+    ------
+    EventArrays
+        The next chunk of events
+
+    Raises
+    ------
+    ValueError
+        Raised when the CSV file is of an incorrect format, as defined by the header
+    """
+    check_header(csv_file)
+
+    reader = pd.read_csv(
+        csv_file,
+        usecols=EVENT_CSV_HEADER,
+        skiprows=range(1, skip_rows + 1),
+        chunksize=chunk_size,
+        dtype={"X": np.int16, "Y": np.int16, "Timestamp": np.int64},
+    )
+
+    with reader:
+        for chunk in reader:
+            yield to_event_arrays(chunk)
+
+
+def read_event_arrays(csv_file: str, skip_rows: int = 0) -> EventArrays:
+    """Reads a whole event CSV into an EventArrays. See iter_event_chunks"""
+    chunks = list(iter_event_chunks(csv_file, skip_rows=skip_rows))
+    return EventArrays.concatenate(*chunks) if chunks else EventArrays.empty()
@@ -0,0 +1,324 @@
+"""Online accumulation of polarity events into reconstruction window event counts"""
+
+import queue
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Event(NamedTuple):
+    polarity: bool
+    x: int
+    y: int
+    timestamp: int
+
+
+class Prediction(NamedTuple):
+    window_index: int
+    """Index of the newest reconstruction window included in the prediction"""
+    timestamp: int
+    """Timestamp (µs) at the end of the newest reconstruction window"""
+    result: object
+    """Whatever was returned by the predict function"""
+    latency: float
+    """Seconds between the newest window closing and the prediction being emitted"""
+
+
+def parse_event_line(line: str) -> Optional[Event]:
+    """Parses an 'On/Off,X,Y,Timestamp' line. Returns None for headers and malformed lines"""
+    fields = line.strip().split(",")
+    if len(fields) < 4:
+        return None
+
+    try:
+        return Event(fields[0] in ("1", "True"), int(fields[1]), int(fields[2]), int(fields[3]))
+    except ValueError:
+        return None
+
+
+def replay_file(csv_file: str, speed: float = 0.0) -> Iterator[str]:
+    """Yields the lines of a recorded CSV as if they were arriving from the sensor
+
+    Parameters
+    ----------
+    csv_file : str
+        CSV in the On/Off,X,Y,Timestamp format
+    speed : float, optional
+        Playback speed relative to the recording. 0 replays as fast as possible, by default 0.0
+    """
+    first_timestamp = None
+    start_time = time.perf_counter()
+
+    with open(csv_file, "r") as f:
+        for line in f:
+            if speed > 0:
+                event = parse_event_line(line)
+                if event is not None:
+                    if first_timestamp is None:
+                        first_timestamp = event.timestamp
+
+                    delay = (event.timestamp - first_timestamp) / 1000000 / speed - (time.perf_counter() - start_time)
+                    if delay > 0:
+                        time.sleep(delay)
+
+            yield line
+
+
+def tail_file(csv_file: str, poll_interval: float = 0.05, from_start: bool = False) -> Iterator[str]:
+    """Yields lines as they are appended to a file that is still being written"""
+    with open(csv_file, "r") as f:
+        if not from_start:
+            f.seek(0, 2)  # Seek to the end of the file
+
+        partial_line = ""
+        while True:
+            line = f.readline()
+            if not line:
+                time.sleep(poll_interval)
+                continue
+
+            # Hold on to partially written lines until the rest of the line arrives
+            partial_line += line
+            if partial_line.endswith("\n"):
+                yield partial_line
+                partial_line = ""
+
+
+def tcp_lines(host: str, port: int) -> Iterator[str]:
+    """Connects to a local TCP server and yields newline separated lines"""
+    with socket.create_connection((host, port)) as connection:
+        with connection.makefile("r") as stream:
+            yield from stream
+
+
+def udp_lines(host: str, port: int, buffer_size: int = 65536) -> Iterator[str]:
+    """Binds a UDP socket and yields the lines of every received datagram"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_socket:
+        udp_socket.bind((host, port))
+
+        while True:
+            datagram, _ = udp_socket.recvfrom(buffer_size)
+            yield from datagram.decode("utf-8").splitlines()
+
+
+class RingBuffer:
+    """Fixed size buffer holding the event counts of the most recent reconstruction windows"""
+
+    def __init__(self, capacity: int, num_columns: int = 3):
+        self._data = np.zeros((capacity, num_columns), dtype=np.int64)
+        self._next = 0
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def is_full(self) -> bool:
+        return self.size == self.capacity
+
+    def append(self, row: np.ndarray):
+        self._data[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self) -> np.ndarray:
+        """Returns a copy of the buffered rows, oldest first"""
+        if not self.is_full():
+            return self._data[: self.size].copy()
+
+        return np.concatenate((self._data[self._next:], self._data[: self._next]))
+
+
+class LatencyStats:
+    """Keeps recent latency samples (seconds) for named stages"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._max_samples = max_samples
+
+    def record(self, stage: str, seconds: float):
+        if stage not in self._samples:
+            self._samples[stage] = deque(maxlen=self._max_samples)
+
+        self._samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the mean, median, p95, and max latency in milliseconds for each stage"""
+        result = {}
+        for stage, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[stage] = {
+                "mean_ms": statistics.fmean(ordered) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+
+        return result
+
+
+class WindowCounter:
+    """Bins events into fixed length reconstruction windows of On, Off, and Combined counts"""
+
+    def __init__(self, reconstruction_window: int):
+        self.reconstruction_window = reconstruction_window
+        self._first_timestamp: Optional[int] = None
+        self._window_index = 0
+        self._counts = np.zeros(3, dtype=np.int64)
+
+    def add(self, event: Event) -> List[Tuple[int, np.ndarray]]:
+        """Adds an event and returns (window index, counts) for every window closed by it.
+        Windows without any events are returned with counts of zero"""
+        if self._first_timestamp is None:
+            self._first_timestamp = event.timestamp
+
+        event_window = (event.timestamp - self._first_timestamp) // self.reconstruction_window
+
+        closed = []
+        while event_window > self._window_index:
+            closed.append((self._window_index, self._counts))
+            self._counts = np.zeros(3, dtype=np.int64)
+            self._window_index += 1
+
+        self._counts[0 if event.polarity else 1] += 1
+        self._counts[2] += 1
+
+        return closed
+
+    def flush(self) -> List[Tuple[int, np.ndarray]]:
+        """Closes the current window"""
+        if self._first_timestamp is None:
+            return []
+
+        closed = [(self._window_index, self._counts)]
+        self._counts = np.zeros(3, dtype=np.int64)
+        self._window_index += 1
+
+        return closed
+
+    def window_end_timestamp(self, window_index: int) -> int:
+        return (self._first_timestamp or 0) + (window_index + 1) * self.reconstruction_window
+
+
+class StreamingClassifier:
+    """Emits a prediction from the most recent frame_count reconstruction windows every hop windows
+
+    Parameters
+    ----------
+    predict : Callable[[np.ndarray], object]
+        Called with an array of shape (1, frame_count, 3) holding On, Off, and Combined counts, oldest first
+    frame_count : int
+        Number of reconstruction windows the model expects
+    reconstruction_window : int
+        Length of each reconstruction window (µs)
+    hop : int, optional
+        Number of new windows between predictions, by default 1
+    """
+
+    def __init__(
+        self, predict: Callable[[np.ndarray], object], frame_count: int, reconstruction_window: int, hop: int = 1
+    ):
+        self.predict = predict
+        self.hop = hop
+        self.buffer = RingBuffer(frame_count)
+        self.counter = WindowCounter(reconstruction_window)
+        self.latency = LatencyStats()
+        self._windows_since_prediction = 0
+        self._dropped_predictions = 0
+        self._dropped_lock = threading.Lock()
+
+    @property
+    def dropped_predictions(self) -> int:
+        """Number of stale model inputs run replaced with a newer one without predicting on them"""
+        with self._dropped_lock:
+            return self._dropped_predictions
+
+    def _close_windows(self, closed: List[Tuple[int, np.ndarray]]) -> List[Tuple[int, np.ndarray, float]]:
+        """Adds closed windows to the ring buffer. Returns the model inputs that are due for a prediction"""
+        due = []
+        for window_index, counts in closed:
+            self.buffer.append(counts)
+            self._windows_since_prediction += 1
+
+            if self.buffer.is_full() and self._windows_since_prediction >= self.hop:
+                self._windows_since_prediction = 0
+                due.append((window_index, self.buffer.ordered()[np.newaxis], time.perf_counter()))
+
+        return due
+
+    def _run_prediction(self, window_index: int, model_input: np.ndarray, closed_time: float) -> Prediction:
+        predict_start = time.perf_counter()
+        result = self.predict(model_input)
+        end = time.perf_counter()
+
+        self.latency.record("predict", end - predict_start)
+        self.latency.record("total", end - closed_time)
+
+        return Prediction(window_index, self.counter.window_end_timestamp(window_index), result, end - closed_time)
+
+    def _ingest(self, lines: Iterable[str], flush: bool) -> Iterator[Tuple[int, np.ndarray, float]]:
+        for line in lines:
+            parse_start = time.perf_counter()
+            event = parse_event_line(line)
+            if event is None:
+                continue
+
+            accumulate_start = time.perf_counter()
+            due = self._close_windows(self.counter.add(event))
+            accumulate_end = time.perf_counter()
+
+            self.latency.record("parse", accumulate_start - parse_start)
+            self.latency.record("accumulate", accumulate_end - accumulate_start)
+
+            yield from due
+
+        if flush:
+            yield from self._close_windows(self.counter.flush())
+
+    def process(self, lines: Iterable[str], flush: bool = True) -> Iterator[Prediction]:
+        """Synchronously predicts on every due window. Latency grows if predict is slower than the stream"""
+        for window_index, model_input, closed_time in self._ingest(lines, flush):
+            yield self._run_prediction(window_index, model_input, closed_time)
+
+    def run(self, lines: Iterable[str], flush: bool = True) -> Iterator[Prediction]:
+        """Reads events on a background thread and predicts on the calling thread.
+        If predict falls behind, stale model inputs are dropped so that latency stays bounded
+        by roughly the duration of one prediction. An error while reading or parsing the events is raised here"""
+        pending: "queue.Queue[Optional[Tuple[int, np.ndarray, float]]]" = queue.Queue(maxsize=1)
+        reader_errors: List[BaseException] = []
+
+        def reader():
+            try:
+                for item in self._ingest(lines, flush):
+                    try:
+                        pending.put_nowait(item)
+                    except queue.Full:
+                        # Replace the stale input with the newest one
+                        try:
+                            pending.get_nowait()
+                            with self._dropped_lock:
+                                self._dropped_predictions += 1
+                        except queue.Empty:
+                            pass
+                        pending.put(item)
+            except BaseException as e:
+                reader_errors.append(e)
+            finally:
+                # Always end the stream, so the caller does not wait forever
+                pending.put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+
+        while True:
+            item = pending.get()
+            if item is None:
+                if reader_errors:
+                    raise reader_errors[0]
+                return
+
+            yield self._run_prediction(*item)
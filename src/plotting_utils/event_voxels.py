@@ -0,0 +1,336 @@
+"""
+Voxel grid encodings of event windows for spatio-temporal models.
+
+Each reconstruction window of events becomes a grid of event counts shaped (polarity, time bin, y, x), where polarity
+channel 0 holds ON events and channel 1 holds OFF events. Grids are built with a single np.bincount over flattened
+voxel indices and are stored sparsely, since most voxels of a window are empty.
+"""
+
+import math
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from plotting_utils.event_arrays import SENSOR_HEIGHT, SENSOR_WIDTH, EventArrays, iter_event_chunks
+
+NUM_POLARITIES = 2
+MAX_COUNT = np.iinfo(np.uint16).max
+
+
+def voxel_indices(
+    events: EventArrays,
+    start_time: int,
+    window_us: int,
+    num_time_bins: int,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the window index of every event and its flattened (polarity, time bin, y, x) index within the window.
+    Events must be inside the sensor and not before start_time"""
+    elapsed = events.timestamps - start_time
+    window_index = elapsed // window_us
+    time_bin = (elapsed % window_us) * num_time_bins // window_us
+    polarity_channel = (~events.polarities).astype(np.int64)
+
+    flat_index = ((polarity_channel * num_time_bins + time_bin) * height + events.y) * width + events.x
+
+    return window_index, flat_index
+
+
+def voxelize(
+    events: EventArrays,
+    start_time: int,
+    window_us: int,
+    num_time_bins: int,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    dtype: Any = np.float32,
+) -> np.ndarray:
+    """Encodes the events in [start_time, start_time + window_us) as a dense (2, num_time_bins, height, width) grid"""
+    events = events.in_bounds(width, height)
+    in_window = (events.timestamps >= start_time) & (events.timestamps < start_time + window_us)
+    events = EventArrays(*(column[in_window] for column in events))
+
+    _, flat_index = voxel_indices(events, start_time, window_us, num_time_bins, width, height)
+    num_voxels = NUM_POLARITIES * num_time_bins * height * width
+
+    counts = np.bincount(flat_index, minlength=num_voxels)
+    return counts.astype(dtype).reshape(NUM_POLARITIES, num_time_bins, height, width)
+
+
+class SparseVoxelWindows:
+    """Consecutive windows of voxel grids in compressed sparse row form.
+    The non-zero voxels of window i are indices[offsets[i]:offsets[i + 1]], with their event counts in counts"""
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        indices: np.ndarray,
+        counts: np.ndarray,
+        start_time: int,
+        window_us: int,
+        num_time_bins: int,
+        width: int = SENSOR_WIDTH,
+        height: int = SENSOR_HEIGHT,
+    ):
+        self.offsets = offsets
+        self.indices = indices
+        self.counts = counts
+        self.start_time = start_time
+        self.window_us = window_us
+        self.num_time_bins = num_time_bins
+        self.width = width
+        self.height = height
+
+    @property
+    def shape(self) -> Tuple[int, int, int, int]:
+        """Shape of one dense window"""
+        return (NUM_POLARITIES, self.num_time_bins, self.height, self.width)
+
+    @property
+    def num_voxels(self) -> int:
+        return NUM_POLARITIES * self.num_time_bins * self.height * self.width
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_events(
+        cls,
+        events: EventArrays,
+        window_us: int,
+        num_time_bins: int,
+        width: int = SENSOR_WIDTH,
+        height: int = SENSOR_HEIGHT,
+        start_time: Optional[int] = None,
+        num_windows: Optional[int] = None,
+    ) -> "SparseVoxelWindows":
+        """Encodes events into consecutive windows of window_us microseconds
+
+        Parameters
+        ----------
+        start_time : Optional[int], optional
+            Start of the first window, by default the first event's timestamp
+        num_windows : Optional[int], optional
+            Number of windows to encode, by default enough to cover every event.
+            Events after the last window are dropped
+        """
+        events = events.in_bounds(width, height)
+        if start_time is None:
+            start_time = int(events.timestamps[0]) if len(events) else 0
+        if num_windows is None:
+            num_windows = int((events.timestamps[-1] - start_time) // window_us + 1) if len(events) else 0
+
+        window_index, flat_index = voxel_indices(events, start_time, window_us, num_time_bins, width, height)
+        keep = (window_index >= 0) & (window_index < num_windows)
+
+        num_voxels = NUM_POLARITIES * num_time_bins * height * width
+        global_index, counts = np.unique(window_index[keep] * num_voxels + flat_index[keep], return_counts=True)
+
+        # global_index is sorted, so the voxels of each window are contiguous
+        offsets = np.searchsorted(global_index // num_voxels, np.arange(num_windows + 1))
+
+        return cls(
+            offsets.astype(np.int64),
+            (global_index % num_voxels).astype(np.int32),
+            np.minimum(counts, MAX_COUNT).astype(np.uint16),
+            start_time,
+            window_us,
+            num_time_bins,
+            width,
+            height,
+        )
+
+    @classmethod
+    def concatenate(cls, windows: Sequence["SparseVoxelWindows"]) -> "SparseVoxelWindows":
+        """Joins windows that follow each other in time and share the same window and grid settings"""
+        first = windows[0]
+        offsets = [first.offsets[:1]]
+        position = 0
+
+        for window in windows:
+            offsets.append(window.offsets[1:] + position)
+            position += window.offsets[-1]
+
+        return cls(
+            np.concatenate(offsets),
+            np.concatenate([window.indices for window in windows]),
+            np.concatenate([window.counts for window in windows]),
+            first.start_time,
+            first.window_us,
+            first.num_time_bins,
+            first.width,
+            first.height,
+        )
+
+    def dense(self, window: int, dtype: Any = np.float32) -> np.ndarray:
+        return self.dense_batch([window], dtype)[0]
+
+    def dense_batch(self, windows: Sequence[int], dtype: Any = np.float32) -> np.ndarray:
+        """Returns the given windows as a dense (len(windows), 2, num_time_bins, height, width) array"""
+        batch = np.zeros((len(windows), self.num_voxels), dtype=dtype)
+
+        for row, window in enumerate(windows):
+            start, stop = self.offsets[window], self.offsets[window + 1]
+            batch[row, self.indices[start:stop]] = self.counts[start:stop]
+
+        return batch.reshape(len(windows), *self.shape)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            offsets=self.offsets,
+            indices=self.indices,
+            counts=self.counts,
+            settings=np.array([self.start_time, self.window_us, self.num_time_bins, self.width, self.height]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SparseVoxelWindows":
+        with np.load(path) as data:
+            start_time, window_us, num_time_bins, width, height = (int(value) for value in data["settings"])
+            return cls(
+                data["offsets"], data["indices"], data["counts"], start_time, window_us, num_time_bins, width, height
+            )
+
+    @staticmethod
+    def count_windows(path: str) -> int:
+        """Returns the number of windows in a saved file without loading the voxels"""
+        with np.load(path) as data:
+            return len(data["offsets"]) - 1
+
+
+def iter_sparse_voxel_windows(
+    chunks: Iterable[EventArrays],
+    window_us: int,
+    num_time_bins: int,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    drop_last: bool = True,
+) -> Iterator[SparseVoxelWindows]:
+    """Encodes a stream of time-ordered event chunks. Every complete window is encoded as soon as its last event
+    has been read, and the events of the window still being filled are carried over to the next chunk
+
+    Parameters
+    ----------
+    drop_last : bool, optional
+        Drop the final, incomplete window, by default True
+    """
+    pending = EventArrays.empty()
+    start_time: Optional[int] = None
+
+    for chunk in chunks:
+        events = EventArrays.concatenate(pending, chunk.in_bounds(width, height))
+        if len(events) == 0:
+            continue
+        if start_time is None:
+            start_time = int(events.timestamps[0])
+
+        # Windows before the one containing the newest event can no longer receive events
+        num_complete = int((events.timestamps[-1] - start_time) // window_us)
+        split = int(np.searchsorted(events.timestamps, start_time + num_complete * window_us))
+
+        if num_complete > 0:
+            yield SparseVoxelWindows.from_events(
+                events.slice(0, split), window_us, num_time_bins, width, height, start_time, num_complete
+            )
+
+        pending = events.slice(split)
+        start_time += num_complete * window_us
+
+    if not drop_last and len(pending) > 0 and start_time is not None:
+        yield SparseVoxelWindows.from_events(pending, window_us, num_time_bins, width, height, start_time, 1)
+
+
+def encode_csv(
+    csv_file: str,
+    window_us: int,
+    num_time_bins: int,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    chunk_size: int = 1_000_000,
+    skip_rows: int = 0,
+) -> SparseVoxelWindows:
+    """Encodes every complete window of an event CSV, reading at most chunk_size events at a time"""
+    chunks = iter_event_chunks(csv_file, chunk_size, skip_rows)
+    windows = list(iter_sparse_voxel_windows(chunks, window_us, num_time_bins, width, height))
+
+    if not windows:
+        return SparseVoxelWindows.from_events(EventArrays.empty(), window_us, num_time_bins, width, height)
+
+    return SparseVoxelWindows.concatenate(windows)
+
+
+class VoxelWindowLoader:
+    """Serves batches of dense voxel grids from saved SparseVoxelWindows files, for training spatio-temporal models.
+
+    Only one file is held in memory at a time. When shuffling, the file order and the window order within each file
+    are shuffled every epoch, and batches may span several files.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        labels: Sequence[Any],
+        batch_size: int = 32,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+        dtype: Any = np.float32,
+    ):
+        """
+        Parameters
+        ----------
+        paths : Sequence[str]
+            Files written by SparseVoxelWindows.save
+        labels : Sequence[Any]
+            Label of every window in the matching file, such as a class id or a tuple of class ids
+        """
+        if len(paths) != len(labels):
+            raise ValueError(f"Got {len(paths)} files but {len(labels)} labels")
+
+        self.paths = list(paths)
+        self.labels = list(labels)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.dtype = dtype
+        self.rng = np.random.default_rng(seed)
+        self.window_counts = [SparseVoxelWindows.count_windows(path) for path in self.paths]
+
+    @property
+    def num_windows(self) -> int:
+        return sum(self.window_counts)
+
+    def __len__(self) -> int:
+        return math.ceil(self.num_windows / self.batch_size)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields (grids, labels) batches. Every window is served exactly once per iteration"""
+        file_order = self.rng.permutation(len(self.paths)) if self.shuffle else np.arange(len(self.paths))
+
+        pending_grids: List[np.ndarray] = []
+        pending_labels: List[Any] = []
+        pending_count = 0
+
+        for file_index in file_order:
+            if self.window_counts[file_index] == 0:
+                continue
+
+            windows = SparseVoxelWindows.load(self.paths[file_index])
+            window_order = self.rng.permutation(len(windows)) if self.shuffle else np.arange(len(windows))
+
+            for start in range(0, len(window_order), self.batch_size):
+                selected = window_order[start: start + self.batch_size]
+                pending_grids.append(windows.dense_batch(selected, self.dtype))
+                pending_labels.extend([self.labels[file_index]] * len(selected))
+                pending_count += len(selected)
+
+                if pending_count >= self.batch_size:
+                    grids = np.concatenate(pending_grids)
+                    yield grids[: self.batch_size], np.array(pending_labels[: self.batch_size])
+
+                    pending_grids = [grids[self.batch_size:]]
+                    pending_labels = pending_labels[self.batch_size:]
+                    pending_count -= self.batch_size
+
+        if pending_count > 0:
+            yield np.concatenate(pending_grids), np.array(pending_labels)
@@ -0,0 +1,279 @@
+"""
+Polls a directory for new or changed recordings and runs analyses on them once they are completely written.
+
+A file is stable once it has not been modified for settle_seconds and its size and modification time did not change
+since the previous poll, so files still being written by the converter are left alone. Every stable file is run
+through each analysis that has not finished for its current size and modification time, on a pool of processes. The
+progress is saved to a JSON file after every finished analysis, so a restarted watcher skips the work already done and
+a file that is written again is analyzed again.
+
+Polling works the same on every platform and on network drives, where file system notifications are unreliable.
+"""
+
+import concurrent.futures
+import fnmatch
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+Analysis = Callable[[str], object]
+"""Called with the path of a stable file. Its return value is ignored and an exception marks the analysis as failed"""
+
+
+class FileState(NamedTuple):
+    size: int
+    mtime_ns: int
+
+
+class JobResult(NamedTuple):
+    path: str
+    analysis: str
+    error: Optional[str]
+    """None if the analysis succeeded"""
+    seconds: float
+
+
+def scan_files(
+    directory: str, pattern: str = "*.csv", recursive: bool = True, exclude: Sequence[str] = ()
+) -> Dict[str, FileState]:
+    """Returns the state of every file in directory whose name matches pattern, except those in excluded directories"""
+    excluded = [os.path.abspath(path) for path in exclude]
+    states = {}
+
+    for root, directories, names in os.walk(directory):
+        directories[:] = [
+            name for name in sorted(directories) if os.path.abspath(os.path.join(root, name)) not in excluded
+        ]
+        if not recursive:
+            directories.clear()
+
+        for name in sorted(names):
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Removed since it was listed
+            states[path] = FileState(stat.st_size, stat.st_mtime_ns)
+
+    return states
+
+
+class ProgressStore:
+    """Finished and failed analyses of every file, saved as JSON:
+
+    {"<path>": {"size": ..., "mtime_ns": ..., "analyses": {"<analysis>": null or "<error>"}}}
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+
+        if path is not None and os.path.isfile(path):
+            with open(path, "r") as f:
+                self.files = json.load(f)
+
+    def results(self, path: str, state: FileState) -> Dict[str, Optional[str]]:
+        """Analyses recorded for the current state of a file. Results of an earlier version of the file are ignored"""
+        entry = self.files.get(path)
+        if entry is None or FileState(entry["size"], entry["mtime_ns"]) != state:
+            return {}
+
+        return entry["analyses"]
+
+    def pending(self, path: str, state: FileState, analyses: Iterable[str], retry_failed: bool = False) -> List[str]:
+        results = self.results(path, state)
+        return [
+            analysis
+            for analysis in analyses
+            if analysis not in results or (retry_failed and results[analysis] is not None)
+        ]
+
+    def record(self, path: str, state: FileState, analysis: str, error: Optional[str] = None):
+        results = self.results(path, state)
+        self.files[path] = {"size": state.size, "mtime_ns": state.mtime_ns, "analyses": {**results, analysis: error}}
+
+    def save(self):
+        """Writes the progress to a temporary file first, so it is never left half written"""
+        if self.path is None:
+            return
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.files, f, indent=4)
+        os.replace(temp_path, self.path)
+
+
+def run_analysis(analysis: Analysis, path: str) -> Tuple[Optional[str], float]:
+    """Returns (error message or None, seconds taken)"""
+    start = time.perf_counter()
+    try:
+        analysis(path)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+    return None, time.perf_counter() - start
+
+
+class DirectoryWatcher:
+    """Runs analyses on the stable files of a directory. Call poll repeatedly, or run to do so until interrupted
+
+    Parameters
+    ----------
+    directory : str
+        Directory to watch, including its sub-directories
+    analyses : Dict[str, Analysis]
+        Analyses by name, run in this order. With more than one worker they must be picklable, such as module level
+        functions or functools.partial of them
+    progress_path : Optional[str]
+        JSON file the progress is saved to and resumed from. None keeps it in memory only
+    pattern : str, optional
+        Names of the files to analyze, by default "*.csv"
+    settle_seconds : float, optional
+        Time without modification after which a file is considered completely written, by default 5.0
+    num_workers : int, optional
+        Number of processes, by default 1, which runs the analyses in this process during poll
+    retry_failed : bool, optional
+        Run analyses that failed before again, by default False
+    exclude : Sequence[str], optional
+        Directories not to watch, such as the one the analyses save their results to
+    initializer : Optional[Callable[[], object]], optional
+        Called at the start of every worker process
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        analyses: Dict[str, Analysis],
+        progress_path: Optional[str],
+        pattern: str = "*.csv",
+        settle_seconds: float = 5.0,
+        num_workers: int = 1,
+        retry_failed: bool = False,
+        exclude: Sequence[str] = (),
+        initializer: Optional[Callable[[], object]] = None,
+    ):
+        self.directory = directory
+        self.analyses = analyses
+        self.progress = ProgressStore(progress_path)
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.retry_failed = retry_failed
+        self.exclude = exclude
+        self.num_workers = num_workers
+        self.initializer = initializer
+
+        self._last_seen: Dict[str, FileState] = {}
+        self._running: Dict[Tuple[str, str], Tuple[FileState, "concurrent.futures.Future"]] = {}
+        self._executor = self._start_pool() if num_workers > 1 else None
+
+    def _start_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(self.num_workers, initializer=self.initializer)
+
+    def stable_files(self) -> Dict[str, FileState]:
+        """Scans the directory and returns the files that are completely written"""
+        states = scan_files(self.directory, self.pattern, exclude=self.exclude)
+        now_ns = time.time_ns()
+
+        stable = {
+            path: state
+            for path, state in states.items()
+            if now_ns - state.mtime_ns >= self.settle_seconds * 1e9 and self._last_seen.get(path, state) == state
+        }
+        self._last_seen = states
+
+        return stable
+
+    def poll(self) -> List[JobResult]:
+        """Starts the pending analyses of every stable file. Returns the analyses that finished since the last poll"""
+        finished = self._collect()
+
+        for path, state in self.stable_files().items():
+            for analysis in self.progress.pending(path, state, self.analyses, self.retry_failed):
+                if (path, analysis) in self._running:
+                    continue
+
+                if self._executor is None:
+                    error, seconds = run_analysis(self.analyses[analysis], path)
+                    finished.append(self._finish(path, state, analysis, error, seconds))
+                else:
+                    try:
+                        future = self._executor.submit(run_analysis, self.analyses[analysis], path)
+                    except concurrent.futures.process.BrokenProcessPool:
+                        # A worker died, which fails every analysis in the pool. They are recorded as crashed by
+                        # the next _collect, and the remaining analyses run on a new pool
+                        self._executor.shutdown()
+                        self._executor = self._start_pool()
+                        future = self._executor.submit(run_analysis, self.analyses[analysis], path)
+                    self._running[(path, analysis)] = (state, future)
+
+        return finished
+
+    def _finish(self, path: str, state: FileState, analysis: str, error: Optional[str], seconds: float) -> JobResult:
+        self.progress.record(path, state, analysis, error)
+        self.progress.save()
+
+        return JobResult(path, analysis, error, seconds)
+
+    def _collect(self, wait: bool = False, record_crashes: bool = True) -> List[JobResult]:
+        """Records the analyses that finished. Analyses whose worker died are recorded as failed with record_crashes,
+        and otherwise left unrecorded to run again after a restart"""
+        if wait:
+            concurrent.futures.wait([future for _, future in self._running.values()])
+
+        finished = []
+        for (path, analysis), (state, future) in list(self._running.items()):
+            if not future.done():
+                continue
+
+            del self._running[(path, analysis)]
+            try:
+                error, seconds = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                if not record_crashes:
+                    continue
+                error, seconds = "worker crashed", 0.0
+            except Exception as e:
+                error, seconds = f"{type(e).__name__}: {e}", 0.0
+            finished.append(self._finish(path, state, analysis, error, seconds))
+
+        return finished
+
+    @property
+    def num_running(self) -> int:
+        return len(self._running)
+
+    def run(
+        self,
+        poll_interval: float = 2.0,
+        once: bool = False,
+        on_result: Optional[Callable[[JobResult], object]] = None,
+    ):
+        """Polls every poll_interval seconds until interrupted, passing every finished analysis to on_result.
+        With once, only the files that are stable now are analyzed, and it returns when they are done"""
+        try:
+            while True:
+                results = self.poll()
+                if once:
+                    results += self._collect(wait=True)
+
+                if on_result is not None:
+                    for result in results:
+                        on_result(result)
+
+                if once:
+                    return
+                time.sleep(poll_interval)
+        finally:
+            self.close()
+
+    def close(self):
+        """Waits for the running analyses and records them. Analyses whose worker was killed, such as by Ctrl+C, are
+        run again after a restart"""
+        if self._executor is not None:
+            self._collect(wait=True, record_crashes=False)
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,244 @@
+"""
+Accumulation of events into image frames in memory, so image processing can run on events without exporting files.
+
+Events are split into frames either by fixed time windows or by a fixed number of events per frame, and every frame
+is built for all windows at once with a single np.bincount over linearized (frame, y, x) indices. Row y of a frame is
+sensor row y, as in EventArrays. iter_decayed_frames plays back a stream of event chunks as decaying activity frames.
+"""
+
+from enum import Enum
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from plotting_utils.event_arrays import SENSOR_HEIGHT, SENSOR_WIDTH, EventArrays
+from plotting_utils.get_plotting_data import SpatialCsvData
+
+
+class FrameType(Enum):
+    COUNT = "count"
+    """Number of events at each pixel"""
+    POLARITY = "polarity"
+    """ON events minus OFF events at each pixel"""
+    TIME_SURFACE = "time_surface"
+    """exp(-(frame end - latest event) / decay) at each pixel, 0 where there was no event"""
+
+
+def events_from_spatial_csv_data(data: SpatialCsvData, height: int = SENSOR_HEIGHT) -> EventArrays:
+    """Converts SpatialCsvData read with DataStorage.BOOL or BOOL_AND_COLOR to EventArrays,
+    undoing its flip of y. Its timestamps are relative to the first event"""
+    if len(data.polarities) != len(data.timestamps):
+        raise ValueError("SpatialCsvData must store polarities as bool")
+
+    return EventArrays(
+        np.asarray(data.polarities, dtype=bool),
+        np.asarray(data.x_positions, dtype=np.int16),
+        (height - np.asarray(data.y_positions)).astype(np.int16),
+        np.asarray(data.timestamps, dtype=np.int64),
+    )
+
+
+def time_window_bounds(timestamps: np.ndarray, window_us: int, start_time: Optional[int] = None) -> np.ndarray:
+    """Event index at which each window of window_us microseconds starts, followed by the end of the last window.
+    Windows start at start_time, by default the first timestamp, and cover every later event"""
+    if len(timestamps) == 0:
+        return np.zeros(1, dtype=np.int64)
+
+    if start_time is None:
+        start_time = int(timestamps[0])
+
+    num_windows = int((timestamps[-1] - start_time) // window_us) + 1
+    window_starts = start_time + np.arange(num_windows + 1, dtype=np.int64) * window_us
+
+    return np.searchsorted(timestamps, window_starts, side="left")
+
+
+def count_window_bounds(num_events: int, events_per_frame: int, drop_last: bool = True) -> np.ndarray:
+    """Event index at which each frame of events_per_frame events starts, followed by the end of the last frame
+
+    Parameters
+    ----------
+    drop_last : bool, optional
+        Drop the final frame if it has fewer events, by default True
+    """
+    stop = num_events - num_events % events_per_frame if drop_last else num_events
+    bounds = np.arange(0, stop, events_per_frame, dtype=np.int64)
+
+    return np.append(bounds, stop)
+
+
+def accumulate_frames(
+    events: EventArrays,
+    bounds: np.ndarray,
+    frame_type: FrameType = FrameType.COUNT,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    decay_us: Optional[float] = None,
+    frame_ends: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Builds a (frames, height, width) float32 frame from the events between each pair of consecutive bounds,
+    as returned by time_window_bounds or count_window_bounds. Events outside the sensor are ignored
+
+    Parameters
+    ----------
+    decay_us : Optional[float], optional
+        Decay constant of FrameType.TIME_SURFACE, by default the mean length of a frame
+    frame_ends : Optional[np.ndarray], optional
+        Time each frame ends, used by FrameType.TIME_SURFACE, by default the timestamp of its last event
+    """
+    num_frames = len(bounds) - 1
+    frame_size = width * height
+    if num_frames <= 0:
+        return np.zeros((0, height, width), dtype=np.float32)
+
+    events = events.slice(int(bounds[0]), int(bounds[-1]))
+    frame_index = np.repeat(np.arange(num_frames), np.diff(bounds))
+
+    if frame_type == FrameType.TIME_SURFACE and len(events) > 0:
+        if frame_ends is None:
+            # Timestamp of each frame's last event. Empty frames have no events, so any timestamp will do
+            last_events = np.clip(bounds[1:] - bounds[0] - 1, 0, len(events) - 1)
+            frame_ends = events.timestamps[last_events]
+        if decay_us is None:
+            decay_us = max(float(events.timestamps[-1] - events.timestamps[0]) / num_frames, 1.0)
+
+    inside = (events.x >= 0) & (events.x < width) & (events.y >= 0) & (events.y < height)
+    events = EventArrays(*(column[inside] for column in events))
+    frame_index = frame_index[inside]
+
+    flat_index = frame_index * frame_size + events.y.astype(np.int64) * width + events.x
+
+    if frame_type == FrameType.COUNT:
+        frames = np.bincount(flat_index, minlength=num_frames * frame_size)
+    elif frame_type == FrameType.POLARITY:
+        signs = np.where(events.polarities, 1.0, -1.0)
+        frames = np.bincount(flat_index, weights=signs, minlength=num_frames * frame_size)
+    else:
+        frames = np.zeros(num_frames * frame_size, dtype=np.float64)
+        if len(events) > 0:
+            # Events are in time order, so the first occurrence in the reversed events is the latest at each pixel
+            pixels, reversed_position = np.unique(flat_index[::-1], return_index=True)
+            latest = len(flat_index) - 1 - reversed_position
+
+            age = frame_ends[frame_index[latest]] - events.timestamps[latest]
+            frames[pixels] = np.exp(-age / decay_us)
+
+    return frames.astype(np.float32).reshape(num_frames, height, width)
+
+
+def frames_by_time(
+    events: EventArrays,
+    window_us: int,
+    frame_type: FrameType = FrameType.COUNT,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    decay_us: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Accumulates events into frames of window_us microseconds. Returns (frames, start time of every frame)"""
+    bounds = time_window_bounds(events.timestamps, window_us)
+    start_time = int(events.timestamps[0]) if len(events) else 0
+    frame_starts = start_time + np.arange(len(bounds) - 1, dtype=np.int64) * window_us
+
+    frames = accumulate_frames(events, bounds, frame_type, width, height, decay_us, frame_starts + window_us)
+    return frames, frame_starts
+
+
+def frames_by_count(
+    events: EventArrays,
+    events_per_frame: int,
+    frame_type: FrameType = FrameType.COUNT,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    decay_us: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Accumulates every events_per_frame events into a frame, dropping leftover events.
+    Returns (frames, timestamp of every frame's first event)"""
+    bounds = count_window_bounds(len(events), events_per_frame)
+
+    frames = accumulate_frames(events, bounds, frame_type, width, height, decay_us)
+    return frames, events.timestamps[bounds[:-1]]
+
+
+def _on_off_counts(
+    events: EventArrays, start_time: int, frame_us: int, num_frames: int, width: int, height: int
+) -> np.ndarray:
+    """Counts ON and OFF events separately in each of num_frames frames starting at start_time, shaped
+    (frames, 2, height * width). Events must be inside the sensor and inside the frames"""
+    frame_size = width * height
+    frame_index = (events.timestamps - start_time) // frame_us
+    channel = (~events.polarities).astype(np.int64)
+    flat_index = (frame_index * 2 + channel) * frame_size + events.y.astype(np.int64) * width + events.x
+
+    counts = np.bincount(flat_index, minlength=num_frames * 2 * frame_size)
+    return counts.reshape(num_frames, 2, frame_size)
+
+
+def iter_decayed_frames(
+    chunks: Iterable[EventArrays],
+    frame_us: int,
+    decay_us: float,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+    max_frames_per_batch: int = 256,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Plays back a stream of time-ordered event chunks as frames of frame_us microseconds, where every pixel's ON and
+    OFF activity decays by exp(-frame_us / decay_us) each frame before the frame's events are added.
+
+    Every frame is yielded once its last event has been read, including frames without events, so gaps in a recording
+    play back as the activity fading out. At most max_frames_per_batch frames are counted at once, so memory stays
+    bounded however long the recording or its gaps are.
+
+    Yields
+    ------
+    Tuple[int, np.ndarray]
+        (frame start time, (2, height, width) float32 activity of ON events then OFF events)
+    """
+    decay = np.float32(np.exp(-frame_us / decay_us))
+    activity = np.zeros((2, height * width), dtype=np.float32)
+
+    def play(events: EventArrays, first_frame_start: int, num_frames: int) -> Iterator[Tuple[int, np.ndarray]]:
+        nonlocal activity
+        for batch_start in range(0, num_frames, max_frames_per_batch):
+            batch_frames = min(max_frames_per_batch, num_frames - batch_start)
+            batch_time = first_frame_start + batch_start * frame_us
+            begin, end = np.searchsorted(events.timestamps, [batch_time, batch_time + batch_frames * frame_us])
+
+            counts = _on_off_counts(events.slice(begin, end), batch_time, frame_us, batch_frames, width, height)
+            for i in range(batch_frames):
+                activity = activity * decay + counts[i]
+                yield batch_time + i * frame_us, activity.reshape(2, height, width).copy()
+
+    pending = EventArrays.empty()
+    frame_start: Optional[int] = None
+
+    for chunk in chunks:
+        events = EventArrays.concatenate(pending, chunk.in_bounds(width, height))
+        if len(events) == 0:
+            continue
+        if frame_start is None:
+            frame_start = int(events.timestamps[0])
+
+        # Frames before the one containing the newest event can no longer receive events
+        num_complete = int((events.timestamps[-1] - frame_start) // frame_us)
+        split = int(np.searchsorted(events.timestamps, frame_start + num_complete * frame_us))
+
+        yield from play(events.slice(0, split), frame_start, num_complete)
+
+        pending = events.slice(split)
+        frame_start += num_complete * frame_us
+
+    if len(pending) > 0 and frame_start is not None:
+        yield from play(pending, frame_start, 1)
+
+
+def to_gray_image(frame: np.ndarray, frame_type: FrameType = FrameType.COUNT) -> np.ndarray:
+    """Scales a frame to a uint8 image for the image processing scripts. Counts are scaled so the busiest pixel is
+    white, polarity frames so no events is mid gray, and time surfaces so the newest events are white"""
+    if frame_type == FrameType.COUNT:
+        scaled = frame / max(float(frame.max()), 1.0)
+    elif frame_type == FrameType.POLARITY:
+        scaled = 0.5 + frame / (2 * max(float(np.abs(frame).max()), 1.0))
+    else:
+        scaled = frame
+
+    return np.round(scaled * 255).astype(np.uint8)
@@ -2,10 +2,14 @@ import csv
 import os
 import json
 import itertools
-from typing import Callable, List
+from typing import Callable, Iterable, List, Sequence
 import sys
 from enum import Enum
 
+import numpy as np
+
+from plotting_utils import parquet_store
+
 
 class EventChunkConfig:
     graphType: str
@@ -106,6 +110,8 @@ class SpatialCsvData:
         self.timestamps: List[int] = []
 
         self.__polarity_storage_callbacks: List[Callable[[bool], None]] = []
+        self.__polarity_as_bool = polarity_as_bool
+        self.__polarity_as_color = polarity_as_color
 
         if polarity_as_color:
             self.__polarity_storage_callbacks.append(self.__store_polarity_color)
@@ -192,6 +198,85 @@ class SpatialCsvData:
 
         return spatial_csv_data
 
+    @staticmethod
+    def from_parquet(
+        store_directory: str, data_storage: DataStorage, time_limit: int = sys.maxsize, skip_rows: int = 0
+    ):
+        """Creates a SpatialCsvData object from a Parquet event store written by parquet_store.write_event_store.
+        Only the partitions within time_limit are read
+
+        Parameters
+        ----------
+        store_directory : str
+            Directory of the event store
+        data_storage : DataStorage
+            How data should be stored in the created object
+        time_limit : int, optional
+            Length of data to be included in the created object (seconds), by default sys.maxsize
+        skip_rows : int, optional
+            Number of events to be skipped from the start of the recording, by default 0
+
+        Returns
+        -------
+        SpatialCsvData
+            SpatialCsvData containing the same data from_csv reads from the CSV the store was written from
+
+        Raises
+        ------
+        ValueError
+            Raised when store_directory is not an event store
+        ValueError
+            Raised when the event store contains no events
+        """
+        if time_limit != sys.maxsize:
+            time_limit = int(time_limit * 1000000)  # Convert to microseconds
+
+        polarity_as_bool = data_storage in [DataStorage.BOOL, DataStorage.BOOL_AND_COLOR]
+        polarity_as_color = data_storage in [DataStorage.COLOR, DataStorage.BOOL_AND_COLOR]
+
+        spatial_csv_data = SpatialCsvData(polarity_as_bool, polarity_as_color)
+
+        info = parquet_store.read_store_info(store_directory)
+
+        # Without skipped rows the first timestamp is known, so the partitions after the time limit are not read
+        stop_time = None
+        if time_limit != sys.maxsize and skip_rows == 0 and info.first_timestamp is not None:
+            stop_time = info.first_timestamp + time_limit
+
+        first_timestamp = None
+        for events in parquet_store.iter_events(store_directory, stop_time=stop_time):
+            # Skip N rows as specified by skip_rows
+            skipped = min(skip_rows, len(events))
+            events, skip_rows = events.slice(skipped), skip_rows - skipped
+            if len(events) == 0:
+                continue
+
+            if first_timestamp is None:
+                first_timestamp = int(events.timestamps[0])
+
+            timestamps = events.timestamps - first_timestamp
+            num_rows = int(np.searchsorted(timestamps, time_limit, side="right"))
+
+            spatial_csv_data.extend_rows(
+                events.polarities[:num_rows], events.x[:num_rows], 128 - events.y[:num_rows], timestamps[:num_rows]
+            )
+
+            if num_rows < len(events):
+                break
+
+        if first_timestamp is None:
+            raise ValueError(f"Event store '{store_directory}' seems to be empty")
+
+        return spatial_csv_data
+
+    @staticmethod
+    def from_path(path: str, data_storage: DataStorage, time_limit: int = sys.maxsize, skip_rows: int = 0):
+        """Reads an event CSV with from_csv, or a Parquet event store with from_parquet"""
+        if parquet_store.is_event_store(path):
+            return SpatialCsvData.from_parquet(path, data_storage, time_limit, skip_rows)
+
+        return SpatialCsvData.from_csv(path, data_storage, time_limit, skip_rows)
+
     def append_row(self, polarity: bool, x: int, y: int, timestamp: int):
         self.x_positions.append(x)
         self.y_positions.append(y)
@@ -200,14 +285,45 @@ class SpatialCsvData:
         for polarity_func in self.__polarity_storage_callbacks:
             polarity_func(polarity)
 
+    def extend_rows(self, polarities: Sequence[bool], x: Sequence[int], y: Sequence[int], timestamps: Sequence[int]):
+        """Appends many rows at once, such as the columns of an EventArrays"""
+        self.x_positions.extend(int(value) for value in x)
+        self.y_positions.extend(int(value) for value in y)
+        self.timestamps.extend(int(value) for value in timestamps)
 
-# TODO: indicate that this is for chunk CSVs
-def read_aedat_csv(csv_path: str, timeWindow: int, maxSize: int = -1) -> CsvData:
+        if self.__polarity_as_bool:
+            self.polarities.extend(bool(polarity) for polarity in polarities)
+        if self.__polarity_as_color:
+            self.polarities_color.extend("g" if polarity else "r" for polarity in polarities)
+
+
+def _counts_to_csv_data(file_name: str, rows: Iterable[Sequence], timeWindow: int, maxSize: int = -1) -> CsvData:
+    """Builds CsvData from rows of (on count, off count, combined count)"""
     x: List[float] = []
     y_on: List[int] = []
     y_off: List[int] = []
     y_all: List[int] = []
 
+    for i, row in enumerate(rows):
+        x.append((i - 1) * timeWindow * 0.000001)
+        # TODO: If timewindow is large this will not work
+        # also machineLearning Get data might need this fix for outliers
+        if int(row[2]) > 8000:  # If camera bugs out and registers too many events, use like data instead
+            y_on.append(sum(y_on) // len(y_on))
+            y_off.append(sum(y_off) // len(y_off))
+            y_all.append(sum(y_all) // len(y_all))
+        else:
+            y_on.append(int(row[0]))
+            y_off.append(int(row[1]))
+            y_all.append(int(row[2]))
+        if i == maxSize:
+            break
+
+    return CsvData(file_name, x, y_on, y_off, y_all)
+
+
+# TODO: indicate that this is for chunk CSVs
+def read_aedat_csv(csv_path: str, timeWindow: int, maxSize: int = -1) -> CsvData:
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file could not be found: {csv_path}")
 
@@ -226,22 +342,25 @@ def read_aedat_csv(csv_path: str, timeWindow: int, maxSize: int = -1) -> CsvData
                     "Header entries should indicate that the columns contain event counts"
                 )
 
-        for i, row in enumerate(reader):
-            x.append((i - 1) * timeWindow * 0.000001)
-            # TODO: If timewindow is large this will not work
-            # also machineLearning Get data might need this fix for outliers
-            if int(row[2]) > 8000:  # If camera bugs out and registers too many events, use like data instead
-                y_on.append(sum(y_on) // len(y_on))
-                y_off.append(sum(y_off) // len(y_off))
-                y_all.append(sum(y_all) // len(y_all))
-            else:
-                y_on.append(int(row[0]))
-                y_off.append(int(row[1]))
-                y_all.append(int(row[2]))
-            if i == maxSize:
-                break
+        return _counts_to_csv_data(csv_path, reader, timeWindow, maxSize)
+
+
+def read_parquet_counts(store_directory: str, timeWindow: int, maxSize: int = -1) -> CsvData:
+    """Counts the events of a Parquet event store in windows of timeWindow microseconds. Returns the same CsvData
+    read_aedat_csv reads from an event count CSV generated with that reconstruction window"""
+    if not os.path.isdir(store_directory):
+        raise FileNotFoundError(f"Event store could not be found: {store_directory}")
+
+    counts = parquet_store.window_counts(store_directory, timeWindow)
+    return _counts_to_csv_data(store_directory, counts.tolist(), timeWindow, maxSize)
+
+
+def read_event_counts(path: str, timeWindow: int, maxSize: int = -1) -> CsvData:
+    """Reads an event count CSV with read_aedat_csv, or counts the events of a Parquet event store"""
+    if parquet_store.is_event_store(path):
+        return read_parquet_counts(path, timeWindow, maxSize)
 
-    return CsvData(csv_path, x, y_on, y_off, y_all)
+    return read_aedat_csv(path, timeWindow, maxSize)
 
 
 def parseConfig(location: str = "plotting/config.json", data_folder=None) -> EventChunkConfig:
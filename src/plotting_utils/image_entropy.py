@@ -0,0 +1,102 @@
+"""Vectorized local entropy filter, built from integral images of every gray level or from sorted windows"""
+
+from typing import Tuple
+
+import numpy as np
+
+DEFAULT_HALF_WINDOW = 5
+
+# Above this many distinct values, sorting every window is faster than one integral image per value
+MAX_LEVELS_FOR_INTEGRAL_IMAGES = 128
+
+
+def _window_bounds(length: int, half_window: int) -> Tuple[np.ndarray, np.ndarray]:
+    positions = np.arange(length)
+    return np.maximum(positions - half_window, 0), np.minimum(positions + half_window, length)
+
+
+def box_sums(values: np.ndarray, half_window: int = DEFAULT_HALF_WINDOW) -> np.ndarray:
+    """Sums values over the window of rows [r - half_window, r + half_window) and columns
+    [c - half_window, c + half_window) of every pixel, clipped to the image"""
+    height, width = values.shape
+    integral = np.zeros((height + 1, width + 1), dtype=np.result_type(values.dtype, np.int64))
+    integral[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+
+    row_low, row_high = _window_bounds(height, half_window)
+    col_low, col_high = _window_bounds(width, half_window)
+
+    return (
+        integral[np.ix_(row_high, col_high)]
+        - integral[np.ix_(row_low, col_high)]
+        - integral[np.ix_(row_high, col_low)]
+        + integral[np.ix_(row_low, col_low)]
+    )
+
+
+def _count_log_count_by_level(labels: np.ndarray, num_levels: int, half_window: int, table: np.ndarray) -> np.ndarray:
+    """sum(c * log2(c)) over the window of every pixel, with one integral image per level"""
+    count_log_count = np.zeros(labels.shape, dtype=np.float64)
+    for level in range(num_levels):
+        count_log_count += table[box_sums((labels == level).astype(np.int64), half_window)]
+
+    return count_log_count
+
+
+def _count_log_count_by_sorting(
+    labels: np.ndarray, half_window: int, table: np.ndarray, block_rows: int = 64
+) -> np.ndarray:
+    """sum(c * log2(c)) over the window of every pixel, by sorting the labels of each window.
+    Pixels outside the image are padded with -1 and ignored. Rows are processed in blocks to bound memory use"""
+    height, width = labels.shape
+    window = 2 * half_window
+    padded = np.pad(labels, ((half_window, half_window), (half_window, half_window)), constant_values=-1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (window, window))
+
+    count_log_count = np.empty(labels.shape, dtype=np.float64)
+    for start in range(0, height, block_rows):
+        block = windows[start: min(start + block_rows, height), :width].reshape(-1, window * window)
+        block = np.sort(block, axis=1)
+
+        # A run of equal labels starts wherever a window's sorted labels change
+        run_starts = np.ones(block.shape, dtype=bool)
+        run_starts[:, 1:] = block[:, 1:] != block[:, :-1]
+        start_rows, start_cols = np.nonzero(run_starts)
+
+        # Runs end where the next run starts, or at the end of the window
+        run_ends = np.append(start_cols[1:], window * window)
+        run_ends[np.append(start_rows[1:] != start_rows[:-1], True)] = window * window
+        run_lengths = run_ends - start_cols
+        run_lengths[block[start_rows, start_cols] < 0] = 0
+
+        sums = np.bincount(start_rows, weights=table[run_lengths], minlength=len(block))
+        count_log_count[start: start + block_rows] = sums.reshape(-1, width)
+
+    return count_log_count
+
+
+def local_entropy(image: np.ndarray, half_window: int = DEFAULT_HALF_WINDOW) -> np.ndarray:
+    """Returns the Shannon entropy (bits) of the values in the window around every pixel (see box_sums).
+    Every distinct value is its own symbol, so no quantization takes place.
+
+    Uses H = log2(n) - sum(c * log2(c)) / n, where n is the size of the window and c is the number of times each
+    value occurs in it. Images with few distinct values use one integral image per value.
+    Images with many distinct values, such as color images converted to gray, sort the values of every window instead.
+    """
+    levels, labels = np.unique(image, return_inverse=True)
+    labels = labels.reshape(image.shape)
+
+    row_low, row_high = _window_bounds(image.shape[0], half_window)
+    col_low, col_high = _window_bounds(image.shape[1], half_window)
+    window_size = np.outer(row_high - row_low, col_high - col_low).astype(np.float64)
+
+    # Counts never exceed the window size, so c * log2(c) can be looked up instead of computed for every pixel
+    max_count = (2 * half_window) ** 2
+    possible_counts = np.arange(1, max_count + 1, dtype=np.float64)
+    table = np.concatenate([[0.0], possible_counts * np.log2(possible_counts)])
+
+    if len(levels) <= MAX_LEVELS_FOR_INTEGRAL_IMAGES:
+        count_log_count = _count_log_count_by_level(labels, len(levels), half_window, table)
+    else:
+        count_log_count = _count_log_count_by_sorting(labels, half_window, table)
+
+    return np.log2(window_size) - count_log_count / window_size
@@ -0,0 +1,149 @@
+"""
+Mean shift color segmentation that clusters every distinct color once instead of every pixel.
+
+With a flat kernel, the mean of the pixels within the bandwidth of a point equals the mean of the distinct colors
+within it weighted by how many pixels have each color. Clustering the weighted colors therefore gives the same
+clusters as sklearn.cluster.MeanShift(bin_seeding=True) on every pixel, while frames typically have far fewer
+distinct colors than pixels.
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from sklearn.cluster import estimate_bandwidth
+from sklearn.neighbors import NearestNeighbors
+
+
+def unique_colors(pixels: np.ndarray, quantization_step: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Collapses (n, channels) pixels to their distinct colors
+
+    Parameters
+    ----------
+    quantization_step : int, optional
+        Colors are first rounded down to multiples of this step and moved to the middle of their step, merging
+        similar colors, by default 1 (no quantization)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        (colors, number of pixels with each color, index of every pixel's color)
+    """
+    if quantization_step > 1:
+        pixels = pixels // quantization_step * quantization_step + (quantization_step - 1) / 2
+
+    colors, inverse, counts = np.unique(pixels, axis=0, return_inverse=True, return_counts=True)
+    return colors.astype(np.float64), counts, inverse.reshape(-1)
+
+
+def bin_seeds(points: np.ndarray, bandwidth: float, num_pixels: Optional[int] = None) -> np.ndarray:
+    """One seed per occupied grid cell of size bandwidth, like sklearn.cluster.get_bin_seeds with min_bin_freq=1
+
+    Like sklearn, the points themselves are the seeds when every pixel has its own grid cell. num_pixels is the
+    number of pixels the points stand for (the sum of their weights), by default len(points)
+    """
+    seeds = np.unique(np.round(points / bandwidth), axis=0)
+    if len(seeds) == (len(points) if num_pixels is None else num_pixels):
+        return points
+
+    return seeds.astype(np.float32) * bandwidth
+
+
+def weighted_mean_shift(
+    points: np.ndarray,
+    weights: np.ndarray,
+    bandwidth: float,
+    max_iter: int = 300,
+    n_jobs: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat kernel mean shift of weighted points, seeded with bin_seeds. All seeds are shifted together
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        (cluster centers, label of every point)
+
+    Raises
+    ------
+    ValueError
+        Raised when no point is within bandwidth of any seed
+    """
+    neighbors = NearestNeighbors(radius=bandwidth, n_jobs=n_jobs).fit(points)
+    stop_threshold = 1e-3 * bandwidth
+
+    means = bin_seeds(points, bandwidth, int(weights.sum())).astype(np.float64)
+    intensities = np.zeros(len(means))
+    active = np.arange(len(means))
+
+    for iteration in range(max_iter + 1):
+        # Row i holds the points within bandwidth of the i-th active mean
+        within = neighbors.radius_neighbors_graph(means[active], mode="connectivity")
+        weight_sums = within @ weights
+        intensities[active] = weight_sums
+
+        moving = weight_sums > 0
+        new_means = means[active].copy()
+        new_means[moving] = (within[moving] @ (points * weights[:, None])) / weight_sums[moving, None]
+
+        shift = np.linalg.norm(new_means - means[active], axis=1)
+        means[active] = new_means
+        active = active[moving & (shift >= stop_threshold)]
+
+        if len(active) == 0:
+            break
+
+    found = intensities > 0
+    if not found.any():
+        raise ValueError(f"No point was within bandwidth={bandwidth} of any seed")
+
+    # Keep the most intense of every group of centers within bandwidth of each other, in the same order as sklearn
+    centers, first = np.unique(means[found], axis=0, return_index=True)
+    center_intensities = intensities[found][first]
+    order = np.lexsort((*centers.T[::-1], center_intensities))[::-1]
+    sorted_centers = centers[order]
+
+    unique = np.ones(len(sorted_centers), dtype=bool)
+    center_neighbors = NearestNeighbors(radius=bandwidth, n_jobs=n_jobs).fit(sorted_centers)
+    for i, center in enumerate(sorted_centers):
+        if unique[i]:
+            unique[center_neighbors.radius_neighbors([center], return_distance=False)[0]] = False
+            unique[i] = True
+    cluster_centers = sorted_centers[unique]
+
+    _, labels = NearestNeighbors(n_neighbors=1, n_jobs=n_jobs).fit(cluster_centers).kneighbors(points)
+    return cluster_centers, labels.reshape(-1)
+
+
+def estimate_pixel_bandwidth(
+    pixels: np.ndarray, quantile: float = 0.1, n_samples: int = 100, seed: Optional[int] = 0
+) -> float:
+    """sklearn.cluster.estimate_bandwidth over a seeded sample of pixels, so repeated runs agree"""
+    return float(estimate_bandwidth(pixels, quantile=quantile, n_samples=n_samples, random_state=seed))
+
+
+def cached_bandwidth(cache_path: str, pixels: np.ndarray, seed: Optional[int] = 0) -> float:
+    """Returns the bandwidth stored in cache_path, or estimates it from pixels and stores it there,
+    so a batch of similar frames is segmented with the same bandwidth"""
+    if os.path.isfile(cache_path):
+        with open(cache_path, "r") as f:
+            return float(json.load(f)["bandwidth"])
+
+    bandwidth = estimate_pixel_bandwidth(pixels, seed=seed)
+
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"bandwidth": bandwidth}, f)
+    os.replace(temp_path, cache_path)
+
+    return bandwidth
+
+
+def mean_shift_labels(
+    pixels: np.ndarray, bandwidth: float, quantization_step: int = 1, n_jobs: Optional[int] = None
+) -> np.ndarray:
+    """Labels (n, channels) pixels by clustering their distinct colors, see weighted_mean_shift and unique_colors"""
+    colors, counts, inverse = unique_colors(pixels, quantization_step)
+    _, color_labels = weighted_mean_shift(colors, counts.astype(np.float64), bandwidth, n_jobs=n_jobs)
+
+    return color_labels[inverse]
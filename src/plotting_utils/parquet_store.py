@@ -0,0 +1,397 @@
+"""
+Event recordings stored as a partitioned Parquet dataset, which can be filtered without reading the whole recording.
+
+An event CSV (On/Off,X,Y,Timestamp) is converted into a directory of Parquet files, one directory per time partition of
+partition_us microseconds:
+
+    recording.parquet/
+        _event_store.json                 Partition length, first and last timestamp and number of events
+        time_bucket=0/part-0.parquet
+        time_bucket=1/part-0.parquet
+        ...
+
+Polarity is stored as a bool, x and y as int16 and the timestamp and position of every event in the recording as
+delta encoded int64. Within a partition the events are sorted by pixel (y, x) and then by time, and written in row
+groups of row_group_size events, so the row group statistics cover few rows of the sensor. Filters on time, a pixel
+box and polarity are pushed down to the reader: time ranges skip whole partitions and pixel boxes skip the row groups
+outside the box, so a query of a small area reads a fraction of the file. Events are returned partition by partition
+and in the order of the CSV within every partition, which is the order of the CSV for recordings sorted by time.
+
+Requires the optional dependency pyarrow.
+"""
+
+import functools
+import json
+import math
+import operator
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from plotting_utils.chunked import add_counts, event_counts
+from plotting_utils.event_arrays import SENSOR_HEIGHT, EventArrays, iter_event_chunks
+
+STORE_INFO_FILE = "_event_store.json"
+"""Starts with an underscore, so pyarrow does not read it as part of the dataset"""
+
+PARTITION_COLUMN = "time_bucket"
+EVENT_COLUMNS = ["polarity", "x", "y", "timestamp", "index"]
+"""index is the position of the event in the recording, so the events of a partition are read back in their order"""
+
+DEFAULT_PARTITION_US = 10_000_000
+DEFAULT_ROW_GROUP_SIZE = 65_536
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet event stores require pyarrow. Install it with 'pip install pyarrow'") from e
+
+    return pyarrow
+
+
+class StoreInfo(NamedTuple):
+    partition_us: int
+    first_timestamp: Optional[int]
+    last_timestamp: Optional[int]
+    num_events: int
+
+
+class PixelBox(NamedTuple):
+    """Pixels from x_min to x_max and y_min to y_max (inclusive), with y in sensor coordinates"""
+
+    x_min: int
+    x_max: int
+    y_min: int
+    y_max: int
+
+    @staticmethod
+    def around(pixel_x: int, pixel_y: int, area_size: int, height: int = SENSOR_HEIGHT) -> "PixelBox":
+        """The pixels get_activity_area of spike_graph.py includes, which flips y to height - y"""
+        center_y = height - pixel_y
+        return PixelBox(
+            pixel_x - area_size + 1, pixel_x + area_size - 1, center_y - area_size + 1, center_y + area_size - 1
+        )
+
+
+def read_store_info(directory: str) -> StoreInfo:
+    """Raises a ValueError if directory is not an event store"""
+    info_path = os.path.join(directory, STORE_INFO_FILE)
+    if not os.path.isfile(info_path):
+        raise ValueError(f"'{directory}' is not a Parquet event store, '{STORE_INFO_FILE}' is missing")
+
+    with open(info_path, "r") as f:
+        return StoreInfo(**json.load(f))
+
+
+def is_event_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, STORE_INFO_FILE))
+
+
+def _write_partition(
+    directory: str, bucket: int, part: int, events: EventArrays, indices: np.ndarray, row_group_size: int
+):
+    pa = _pyarrow()
+
+    order = np.lexsort((indices, events.x, events.y))
+    table = pa.table(
+        {
+            "polarity": pa.array(events.polarities[order], pa.bool_()),
+            "x": pa.array(events.x[order], pa.int16()),
+            "y": pa.array(events.y[order], pa.int16()),
+            "timestamp": pa.array(events.timestamps[order], pa.int64()),
+            "index": pa.array(indices[order], pa.int64()),
+        }
+    )
+
+    partition_directory = os.path.join(directory, f"{PARTITION_COLUMN}={bucket}")
+    os.makedirs(partition_directory, exist_ok=True)
+    pa.parquet.write_table(
+        table,
+        os.path.join(partition_directory, f"part-{part}.parquet"),
+        row_group_size=row_group_size,
+        compression="zstd",
+        # Few distinct coordinates, and timestamps and indices increase within a pixel
+        use_dictionary=["x", "y"],
+        column_encoding={"polarity": "PLAIN", "timestamp": "DELTA_BINARY_PACKED", "index": "DELTA_BINARY_PACKED"},
+    )
+
+
+def write_events(
+    chunks: Iterable[EventArrays],
+    directory: str,
+    partition_us: int = DEFAULT_PARTITION_US,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> StoreInfo:
+    """Writes chunks of events in time order to a new event store
+
+    Parameters
+    ----------
+    chunks : Iterable[EventArrays]
+        Events in time order, such as from iter_event_chunks. Events that arrive after their partition was written,
+        because the recording is not sorted, are written to another file of the partition
+    directory : str
+        Directory of the event store. Must not exist or be empty
+    partition_us : int, optional
+        Length of every time partition in microseconds, by default DEFAULT_PARTITION_US. Every partition is sorted in
+        memory before it is written
+    row_group_size : int, optional
+        Number of events in every row group, by default DEFAULT_ROW_GROUP_SIZE. Smaller row groups let pixel box
+        filters skip more of the file but compress less
+
+    Raises
+    ------
+    FileExistsError
+        Raised when directory is not empty
+    """
+    _pyarrow()
+    if os.path.isdir(directory) and os.listdir(directory):
+        raise FileExistsError(f"'{directory}' is not empty")
+    os.makedirs(directory, exist_ok=True)
+
+    pending: Dict[int, List[Tuple[EventArrays, np.ndarray]]] = {}
+    num_parts: Dict[int, int] = {}
+    num_events = 0
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+
+    def flush(buckets: List[int]):
+        for bucket in buckets:
+            part = num_parts.get(bucket, 0)
+            events, indices = zip(*pending.pop(bucket))
+            _write_partition(
+                directory, bucket, part, EventArrays.concatenate(*events), np.concatenate(indices), row_group_size
+            )
+            num_parts[bucket] = part + 1
+
+    for events in chunks:
+        if len(events) == 0:
+            continue
+
+        chunk_first, chunk_last = int(events.timestamps.min()), int(events.timestamps.max())
+        first_timestamp = chunk_first if first_timestamp is None else min(first_timestamp, chunk_first)
+        last_timestamp = chunk_last if last_timestamp is None else max(last_timestamp, chunk_last)
+
+        indices = np.arange(num_events, num_events + len(events), dtype=np.int64)
+        num_events += len(events)
+
+        buckets = events.timestamps // partition_us
+        for bucket in np.unique(buckets):
+            selected = buckets == bucket
+            pending.setdefault(int(bucket), []).append(
+                (EventArrays(*(column[selected] for column in events)), indices[selected])
+            )
+
+        # Partitions before the one the chunk ends in are complete
+        flush([bucket for bucket in sorted(pending) if bucket < buckets[-1]])
+
+    flush(sorted(pending))
+
+    info = StoreInfo(partition_us, first_timestamp, last_timestamp, num_events)
+    with open(os.path.join(directory, STORE_INFO_FILE), "w") as f:
+        json.dump(info._asdict(), f, indent=4)
+
+    return info
+
+
+def write_event_store(
+    csv_file: str,
+    directory: str,
+    partition_us: int = DEFAULT_PARTITION_US,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    chunk_size: int = 1_000_000,
+    skip_rows: int = 0,
+) -> StoreInfo:
+    """Converts an event CSV to an event store chunk by chunk, so it may be larger than memory. See write_events"""
+    return write_events(iter_event_chunks(csv_file, chunk_size, skip_rows), directory, partition_us, row_group_size)
+
+
+def _dataset(directory: str):
+    pa = _pyarrow()
+    partitioning = pa.dataset.partitioning(pa.schema([(PARTITION_COLUMN, pa.int64())]), flavor="hive")
+
+    return pa.dataset.dataset(directory, format="parquet", partitioning=partitioning)
+
+
+def event_filter(
+    partition_us: int,
+    start_time: Optional[int] = None,
+    stop_time: Optional[int] = None,
+    box: Optional[PixelBox] = None,
+    polarity: Optional[bool] = None,
+):
+    """A pyarrow filter expression of the events from start_time to stop_time (inclusive), inside box and of
+    polarity, or None to select every event"""
+    field = _pyarrow().dataset.field
+    conditions = []
+
+    if start_time is not None:
+        conditions += [field(PARTITION_COLUMN) >= start_time // partition_us, field("timestamp") >= start_time]
+    if stop_time is not None:
+        conditions += [field(PARTITION_COLUMN) <= stop_time // partition_us, field("timestamp") <= stop_time]
+    if box is not None:
+        conditions += [
+            field("x") >= box.x_min,
+            field("x") <= box.x_max,
+            field("y") >= box.y_min,
+            field("y") <= box.y_max,
+        ]
+    if polarity is not None:
+        conditions.append(field("polarity") == polarity)
+
+    return functools.reduce(operator.and_, conditions) if conditions else None
+
+
+def _partitions(dataset, expression) -> List[int]:
+    """Time buckets of the partitions that may contain events matching expression, in time order"""
+    get_partition_keys = _pyarrow().dataset.get_partition_keys
+    fragments = dataset.get_fragments(filter=expression) if expression is not None else dataset.get_fragments()
+
+    return sorted({get_partition_keys(fragment.partition_expression)[PARTITION_COLUMN] for fragment in fragments})
+
+
+def _to_event_arrays(table) -> EventArrays:
+    events = EventArrays(
+        table["polarity"].to_numpy(zero_copy_only=False).astype(bool),
+        table["x"].to_numpy().astype(np.int16),
+        table["y"].to_numpy().astype(np.int16),
+        table["timestamp"].to_numpy().astype(np.int64),
+    )
+    order = np.argsort(table["index"].to_numpy())
+
+    return EventArrays(*(column[order] for column in events))
+
+
+def iter_events(
+    directory: str,
+    start_time: Optional[int] = None,
+    stop_time: Optional[int] = None,
+    box: Optional[PixelBox] = None,
+    polarity: Optional[bool] = None,
+) -> Iterator[EventArrays]:
+    """Yields the events of an event store partition by partition, in time order, and in the order of the recording
+    within every partition. Only the partitions and row groups that may contain matching events are read
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the event store
+    start_time : Optional[int], optional
+        Timestamp (microseconds) of the first event to include, by default the start of the recording
+    stop_time : Optional[int], optional
+        Timestamp (microseconds) of the last event to include, by default the end of the recording
+    box : Optional[PixelBox], optional
+        Only include the events of these pixels, by default every pixel
+    polarity : Optional[bool], optional
+        Only include ON (True) or OFF (False) events, by default both
+
+    Raises
+    ------
+    ValueError
+        Raised when directory is not an event store
+    """
+    info = read_store_info(directory)
+    dataset = _dataset(directory)
+    expression = event_filter(info.partition_us, start_time, stop_time, box, polarity)
+    field = _pyarrow().dataset.field
+
+    for bucket in _partitions(dataset, expression):
+        partition = field(PARTITION_COLUMN) == bucket
+        table = dataset.to_table(
+            columns=EVENT_COLUMNS, filter=partition if expression is None else partition & expression
+        )
+        if table.num_rows > 0:
+            yield _to_event_arrays(table)
+
+
+def read_events(directory: str, **filters) -> EventArrays:
+    """Reads the matching events of an event store at once. See iter_events for the filters"""
+    chunks = list(iter_events(directory, **filters))
+    return EventArrays.concatenate(*chunks) if chunks else EventArrays.empty()
+
+
+def row_group_counts(directory: str, **filters) -> Tuple[int, int]:
+    """Returns (row groups that may contain matching events, all row groups), to see how much of the store a query
+    reads. See iter_events for the filters"""
+    info = read_store_info(directory)
+    dataset = _dataset(directory)
+    expression = event_filter(info.partition_us, **filters)
+
+    total = sum(fragment.num_row_groups for fragment in dataset.get_fragments())
+    if expression is None:
+        return total, total
+
+    matching = sum(
+        len(fragment.split_by_row_group(expression, dataset.schema))
+        for fragment in dataset.get_fragments(filter=expression)
+    )
+    return matching, total
+
+
+def window_counts(directory: str, window_us: int, start_time: Optional[int] = None) -> np.ndarray:
+    """Counts ON, OFF and all events of an event store in consecutive windows of window_us microseconds from
+    start_time, by default the first timestamp. Shaped (windows, 3), like chunked.window_counts"""
+    info = read_store_info(directory)
+    if start_time is None:
+        start_time = info.first_timestamp
+        if start_time is None:
+            return np.zeros((0, 3), dtype=np.int64)
+
+    counts = np.zeros((0, 3), dtype=np.int64)
+    for events in iter_events(directory, start_time=start_time):
+        counts = add_counts(counts, event_counts(events, window_us, start_time))
+
+    return counts
+
+
+def activity_area(
+    directory: str,
+    pixel_x: int,
+    pixel_y: int,
+    area_size: int,
+    max_points: int = sys.maxsize,
+    time_limit: float = math.inf,
+) -> List[List[int]]:
+    """[polarity (1 or -1), time since the first event] of the events around a pixel, like get_activity_area of
+    spike_graph.py, reading only the row groups of the area
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the event store
+    pixel_x : int
+        X coordinate of the center pixel
+    pixel_y : int
+        Y coordinate of the center pixel, flipped like in get_activity_area
+    area_size : int
+        Events less than area_size pixels away from the center pixel in x and y are included
+    max_points : int, optional
+        Maximum number of events, by default sys.maxsize
+    time_limit : float, optional
+        Seconds after the first event of the recording to include, by default math.inf
+
+    Raises
+    ------
+    ValueError
+        Raised when directory is not an event store or contains no events
+    """
+    info = read_store_info(directory)
+    if info.first_timestamp is None:
+        raise ValueError(f"Error: Event store '{directory}' contains no events")
+
+    stop_time = info.first_timestamp + math.floor(time_limit * 1000000) if time_limit != math.inf else None
+    points: List[List[int]] = []
+
+    for events in iter_events(directory, stop_time=stop_time, box=PixelBox.around(pixel_x, pixel_y, area_size)):
+        spikes = np.stack([np.where(events.polarities, 1, -1), events.timestamps - info.first_timestamp], axis=1)
+        points += spikes[: max_points - len(points)].tolist()
+
+        if len(points) >= max_points:
+            break
+
+    return points
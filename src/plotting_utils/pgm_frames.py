@@ -0,0 +1,372 @@
+"""
+Decoding of the ASCII PGM frames stored in the PGM_String column of AEDAT CSVs.
+
+Instead of writing one .pgm file per frame, frames can be decoded in bulk into a single uint8 .npy stack shaped
+(frames, height, width) that is read back memory-mapped, alongside a timestamp index of the frames. Any range of rows,
+and every n-th row of it, can be decoded without converting the rest of the CSV.
+"""
+
+import collections
+import concurrent.futures
+import io
+import os
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PGM_COLUMN = "PGM_String"
+TIMESTAMP_COLUMN = "Timestamp"
+
+
+def pgm_string_to_pgm(pgm_string: str) -> str:
+    """Converts a PGM_String entry, which uses '-' in place of newlines, to the contents of a .pgm file"""
+    return pgm_string.replace("-", "\n")
+
+
+def _split_pgm_string(pgm_string: str) -> Tuple[Tuple[int, int, int], str]:
+    """Splits a PGM_String entry into its (width, height, max value) header and its pixel values"""
+    tokens = pgm_string.replace("-", " ").split(maxsplit=4)
+    if len(tokens) < 4 or tokens[0] != "P2":
+        raise ValueError(f"Not an ASCII PGM image: '{pgm_string[:20]}...'")
+
+    return (int(tokens[1]), int(tokens[2]), int(tokens[3])), tokens[4] if len(tokens) > 4 else ""
+
+
+def _to_uint8(pixels: np.ndarray, max_value: int) -> np.ndarray:
+    if max_value != 255:
+        pixels = pixels * 255 // max_value
+
+    return pixels.astype(np.uint8)
+
+
+def decode_pgm_string(pgm_string: str) -> np.ndarray:
+    """Decodes a PGM_String entry (an ASCII P2 image) into a (height, width) uint8 array
+
+    Raises
+    ------
+    ValueError
+        Raised when the string is not a valid ASCII PGM image
+    """
+    (width, height, max_value), payload = _split_pgm_string(pgm_string)
+    pixels = np.fromstring(payload, dtype=np.int64, sep=" ")
+
+    if pixels.size != width * height:
+        raise ValueError(f"PGM image should have {width * height} pixels but has {pixels.size}")
+
+    return _to_uint8(pixels, max_value).reshape(height, width)
+
+
+def decode_pgm_strings(pgm_strings: Sequence[str]) -> np.ndarray:
+    """Decodes several PGM_String entries of the same size into a (frames, height, width) array.
+    The pixel values of all frames are parsed together in a single call
+
+    Raises
+    ------
+    ValueError
+        Raised when a string is not a valid ASCII PGM image or the images differ in size
+    """
+    if len(pgm_strings) == 0:
+        raise ValueError("No PGM images to decode")
+
+    headers, payloads = zip(*(_split_pgm_string(pgm_string) for pgm_string in pgm_strings))
+    width, height, max_value = headers[0]
+    pixels = np.fromstring(" ".join(payloads), dtype=np.int64, sep=" ")
+
+    if any(header != headers[0] for header in headers) or pixels.size != len(pgm_strings) * width * height:
+        # Decode frame by frame to report which frame is invalid
+        frames = [decode_pgm_string(pgm_string) for pgm_string in pgm_strings]
+        for i, frame in enumerate(frames):
+            if frame.shape != frames[0].shape:
+                raise ValueError(f"Frame {i} is {frame.shape} but earlier frames are {frames[0].shape}")
+        return np.stack(frames)
+
+    return _to_uint8(pixels, max_value).reshape(len(pgm_strings), height, width)
+
+
+def pgm_bytes(frame: np.ndarray) -> bytes:
+    """Encodes a (height, width) uint8 frame as a binary (P5) PGM file, which is about a quarter of the size of the
+    ASCII file and does not need parsing when read"""
+    height, width = frame.shape
+    return b"P5\n%d %d\n255\n" % (width, height) + np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+
+
+def _find_columns(csv_file: str) -> Dict[str, str]:
+    """Maps PGM_String and, if present, Timestamp to their names in the CSV, which may have surrounding whitespace"""
+    header = list(pd.read_csv(csv_file, nrows=0).columns)
+    columns = {name.strip(): name for name in header}
+
+    if PGM_COLUMN not in columns:
+        raise ValueError(f"File {csv_file} does not contain a {PGM_COLUMN} column")
+
+    return {column: columns[column] for column in (PGM_COLUMN, TIMESTAMP_COLUMN) if column in columns}
+
+
+def count_csv_rows(csv_file: str) -> int:
+    """Counts the data rows of a CSV by counting newlines, which is much faster than parsing it"""
+    num_lines = 0
+    last_block = b""
+
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            num_lines += block.count(b"\n")
+            last_block = block
+
+    if last_block and not last_block.endswith(b"\n"):
+        num_lines += 1
+
+    return max(num_lines - 1, 0)  # -1 for the header
+
+
+def num_selected_rows(num_rows: int, start: int = 0, stop: Optional[int] = None, step: int = 1) -> int:
+    """Number of rows of range(start, stop, step) in a CSV with num_rows data rows"""
+    return len(range(start, num_rows if stop is None else min(stop, num_rows), step))
+
+
+def line_offsets(csv_file: str) -> np.ndarray:
+    """Byte offset of the start of every line of a file, followed by the file size, found by scanning for newlines"""
+    offsets = [np.zeros(1, dtype=np.int64)]
+    size = 0
+
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+            offsets.append(newlines.astype(np.int64) + size + 1)
+            size += len(block)
+
+    offsets = np.concatenate(offsets)
+    return np.append(offsets[offsets < size], size)
+
+
+def _pgm_chunk(
+    columns: Dict[str, str], chunk: pd.DataFrame, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    if TIMESTAMP_COLUMN in columns:
+        timestamps = chunk[columns[TIMESTAMP_COLUMN]].to_numpy(dtype=np.int64)
+    else:
+        timestamps = rows
+
+    return rows, timestamps, chunk[columns[PGM_COLUMN]].tolist()
+
+
+def iter_pgm_strings(
+    csv_file: str, chunk_size: int = 64, start: int = 0, stop: Optional[int] = None, step: int = 1
+) -> Iterator[Tuple[np.ndarray, np.ndarray, List[str]]]:
+    """Yields (row indices, timestamps, PGM strings) for every step-th row from start to stop of the CSV,
+    chunk_size rows at a time. The row index is used as the timestamp if the CSV has no Timestamp column.
+
+    When only some rows are needed, the lines of the file are found by scanning for newlines and only the selected
+    lines are parsed, so skipped rows cost little more than reading them from disk."""
+    columns = _find_columns(csv_file)
+    read_csv_args = {"usecols": list(columns.values()), "dtype": {columns[PGM_COLUMN]: str}}
+
+    if start == 0 and step == 1:
+        reader = pd.read_csv(csv_file, nrows=stop, chunksize=chunk_size, **read_csv_args)
+        row = 0
+        with reader:
+            for chunk in reader:
+                yield _pgm_chunk(columns, chunk, np.arange(row, row + len(chunk), dtype=np.int64))
+                row += len(chunk)
+        return
+
+    # Line 0 is the header and line i + 1 holds row i
+    offsets = line_offsets(csv_file)
+    line_starts, line_ends = offsets[:-1], offsets[1:]
+    rows = np.arange(start, len(line_starts) - 1 if stop is None else min(stop, len(line_starts) - 1), step)
+    # Blank lines are counted as rows but contain no frame
+    rows = rows[line_ends[rows + 1] - line_starts[rows + 1] > 2]
+
+    with open(csv_file, "rb") as f:
+        header = f.read(int(line_ends[0]))
+        for chunk_start in range(0, len(rows), chunk_size):
+            chunk_rows = rows[chunk_start: chunk_start + chunk_size]
+            lines = [header]
+            for row in chunk_rows.tolist():
+                f.seek(int(line_starts[row + 1]))
+                lines.append(f.read(int(line_ends[row + 1] - line_starts[row + 1])))
+            if not lines[-1].endswith(b"\n"):
+                lines.append(b"\n")
+
+            yield _pgm_chunk(columns, pd.read_csv(io.BytesIO(b"".join(lines)), **read_csv_args), chunk_rows)
+
+
+def iter_decoded_frames(
+    csv_file: str,
+    start: int = 0,
+    stop: Optional[int] = None,
+    step: int = 1,
+    num_workers: int = 1,
+    chunk_size: int = 64,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yields (row indices, timestamps, (frames, height, width) uint8 frames) for every step-th row from start to stop
+    of the CSV, in order.
+
+    Parameters
+    ----------
+    num_workers : int, optional
+        Number of processes decoding frames in parallel, by default 1.
+        At most two chunks per worker are held in memory at once.
+    """
+    if num_workers == 1:
+        for rows, timestamps, pgm_strings in iter_pgm_strings(csv_file, chunk_size, start, stop, step):
+            yield rows, timestamps, decode_pgm_strings(pgm_strings)
+        return
+
+    pending: Deque[Tuple[np.ndarray, np.ndarray, "concurrent.futures.Future[np.ndarray]"]] = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(num_workers)
+    try:
+        for rows, timestamps, pgm_strings in iter_pgm_strings(csv_file, chunk_size, start, stop, step):
+            pending.append((rows, timestamps, executor.submit(decode_pgm_strings, pgm_strings)))
+            if len(pending) >= 2 * num_workers:
+                rows, timestamps, future = pending.popleft()
+                yield rows, timestamps, future.result()
+
+        while pending:
+            rows, timestamps, future = pending.popleft()
+            yield rows, timestamps, future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def timestamps_path(frames_path: str) -> str:
+    """Path of the timestamp index that belongs to a frame stack"""
+    return os.path.splitext(frames_path)[0] + "_timestamps.npy"
+
+
+def _truncate_npy(path: str, num_frames: int):
+    """Shrinks the first dimension of a .npy file in place, keeping the header the same length"""
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+
+        header_dict = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": fortran_order,
+            "shape": (num_frames, *shape[1:]),
+        }
+        header_start = len(np.lib.format.magic(*version)) + (2 if version == (1, 0) else 4)
+        header = repr(header_dict).ljust(data_offset - header_start - 1) + "\n"
+
+        f.seek(header_start)
+        f.write(header.encode("latin1"))
+        f.truncate(data_offset + num_frames * int(np.prod(shape[1:])) * dtype.itemsize)
+
+
+def write_frame_stack(
+    csv_file: str,
+    output_path: str,
+    start: int = 0,
+    stop: Optional[int] = None,
+    num_workers: int = 1,
+    chunk_size: int = 64,
+    step: int = 1,
+) -> int:
+    """Decodes the PGM frames of every step-th row from start to stop of a CSV into a single uint8
+    (frames, height, width) .npy file and saves their timestamps next to it (see timestamps_path).
+    The files only appear once they are complete.
+
+    Parameters
+    ----------
+    num_workers : int, optional
+        Number of processes decoding frames in parallel, by default 1.
+        At most two chunks per worker are held in memory at once.
+
+    Returns
+    -------
+    int
+        The number of frames written
+
+    Raises
+    ------
+    ValueError
+        Raised when the CSV has no PGM_String column, a frame cannot be decoded or frames differ in size
+    """
+    num_frames = num_selected_rows(count_csv_rows(csv_file), start, stop, step)
+
+    partial_path = output_path + ".partial.npy"
+    frames: Optional[np.ndarray] = None
+    timestamps = np.empty(num_frames, dtype=np.int64)
+    written = 0
+
+    def write(chunk_timestamps: np.ndarray, decoded: np.ndarray):
+        nonlocal frames, written
+        if frames is None:
+            frames = np.lib.format.open_memmap(
+                partial_path, mode="w+", dtype=np.uint8, shape=(num_frames, *decoded.shape[1:])
+            )
+        elif decoded.shape[1:] != frames.shape[1:]:
+            raise ValueError(f"Frame {written} is {decoded.shape[1:]} but earlier frames are {frames.shape[1:]}")
+
+        count = min(len(decoded), num_frames - written)
+        frames[written: written + count] = decoded[:count]
+        timestamps[written: written + count] = chunk_timestamps[:count]
+        written += count
+
+    try:
+        for _, chunk_timestamps, decoded in iter_decoded_frames(csv_file, start, stop, step, num_workers, chunk_size):
+            write(chunk_timestamps, decoded)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    if frames is None:
+        raise ValueError(f"File '{csv_file}' does not contain any frames")
+
+    frames.flush()
+    del frames
+
+    # Blank lines are counted as rows but contain no frame
+    if written < num_frames:
+        _truncate_npy(partial_path, written)
+
+    np.save(timestamps_path(output_path), timestamps[:written])
+    os.replace(partial_path, output_path)
+
+    return written
+
+
+class FrameStack:
+    """Random access to a frame stack written by write_frame_stack. Frames are read from disk only when accessed"""
+
+    def __init__(self, path: str):
+        self.frames: np.ndarray = np.load(path, mmap_mode="r")
+        self.timestamps: np.ndarray = np.load(timestamps_path(path))
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def frame_shape(self) -> Tuple[int, int]:
+        return self.frames.shape[1], self.frames.shape[2]
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return np.asarray(self.frames[index])
+
+    def index_at(self, timestamp: int) -> int:
+        """Returns the index of the last frame at or before timestamp"""
+        return max(int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1, 0)
+
+    def batch(self, indices: Sequence[int]) -> np.ndarray:
+        """Returns the frames at indices, in the given order. Reads happen in file order to avoid seeking back"""
+        indices = np.asarray(indices)
+        order = np.argsort(indices, kind="stable")
+
+        batch = np.empty((len(indices), *self.frame_shape), dtype=np.uint8)
+        batch[order] = self.frames[indices[order]]
+
+        return batch
+
+    def iter_batches(
+        self, batch_size: int = 32, shuffle: bool = False, seed: Optional[int] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields (frames, timestamps) batches covering every frame once"""
+        indices = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+
+        for start in range(0, len(indices), batch_size):
+            batch_indices = indices[start: start + batch_size]
+            yield self.batch(batch_indices), self.timestamps[batch_indices]
@@ -0,0 +1,321 @@
+"""
+Instrumentation shared by the scripts: named stage timers, throughput counters and optional memory peaks.
+
+Scripts wrap their load, compute, render and save steps in stage(), which does nothing unless the script was started
+with one of the profiling arguments (see add_profile_args). Then a breakdown of where the time went is printed when the
+script finishes, and optionally saved to a JSON file together with cProfile statistics:
+
+    if __name__ == "__main__":
+        args = get_args()
+        with profiling.profile_run(args):
+            main(args)
+
+Time spent in a stage nested inside another is only counted for the inner stage, so the stages add up to the total.
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+STAGE_ORDER = ["load", "compute", "render", "save"]
+"""Stages used by the scripts, reported in this order before any other stage"""
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of this process in MiB, or None if it cannot be determined"""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+
+        memory_info = psutil.Process().memory_info()
+        return getattr(memory_info, "peak_wset", memory_info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class StageStats:
+    """Totals of every run of a stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.items = 0
+        self.unit = "events"
+        self.peak_traced_mb: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "calls": self.calls,
+            "items": self.items,
+            "unit": self.unit,
+            "items_per_second": self.items / self.seconds if self.items and self.seconds > 0 else None,
+            "peak_traced_mb": self.peak_traced_mb,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+class OpenStage:
+    """A running stage. Items processed by the stage are counted with add_items, for the throughput"""
+
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+        self.start = time.perf_counter()
+        self.nested_seconds = 0.0
+        self.peak_traced = 0
+
+    def add_items(self, items: int, unit: Optional[str] = None):
+        self.stats.items += int(items)
+        if unit is not None:
+            self.stats.unit = unit
+
+
+class _DisabledStage(OpenStage):
+    def __init__(self):
+        super().__init__(StageStats(""))
+
+    def add_items(self, items: int, unit: Optional[str] = None):
+        pass
+
+
+class Profiler:
+    """Records the time, throughput and memory of named stages. A disabled profiler records nothing
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        Record stages, by default True
+    track_memory : bool, optional
+        Record the peak memory allocated through Python (tracemalloc) in every stage, by default False.
+        This slows down code that allocates many Python objects
+    """
+
+    def __init__(self, enabled: bool = True, track_memory: bool = False):
+        self.enabled = enabled
+        self.track_memory = track_memory and enabled
+        self.stages: Dict[str, StageStats] = {}
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self._open: List[OpenStage] = []
+        self._started_tracemalloc = self.track_memory and not tracemalloc.is_tracing()
+
+        if self._started_tracemalloc:
+            tracemalloc.start()
+
+    def close(self):
+        """Stops tracking memory if this profiler started it"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str, items: int = 0, unit: Optional[str] = None) -> Iterator[OpenStage]:
+        """Times the code inside the with block as the stage name, which processes items items"""
+        if not self.enabled:
+            yield _DISABLED_STAGE
+            return
+
+        if self.track_memory:
+            if self._open:
+                self._open[-1].peak_traced = max(self._open[-1].peak_traced, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        stats = self.stages.setdefault(name, StageStats(name))
+        open_stage = OpenStage(stats)
+        open_stage.add_items(items, unit)
+        self._open.append(open_stage)
+
+        try:
+            yield open_stage
+        finally:
+            self._open.pop()
+            elapsed = time.perf_counter() - open_stage.start
+            stats.seconds += elapsed - open_stage.nested_seconds
+            stats.calls += 1
+            stats.peak_rss_mb = peak_rss_mb()
+            if self._open:
+                self._open[-1].nested_seconds += elapsed
+
+            if self.track_memory:
+                peak = max(open_stage.peak_traced, tracemalloc.get_traced_memory()[1])
+                stats.peak_traced_mb = max(stats.peak_traced_mb or 0.0, peak / 2**20)
+                if self._open:
+                    self._open[-1].peak_traced = max(self._open[-1].peak_traced, peak)
+                tracemalloc.reset_peak()
+
+    def total_seconds(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def ordered_stages(self) -> List[StageStats]:
+        def order(stats: StageStats) -> int:
+            return STAGE_ORDER.index(stats.name) if stats.name in STAGE_ORDER else len(STAGE_ORDER)
+
+        return sorted(self.stages.values(), key=order)
+
+    def to_dict(self) -> Dict:
+        return {
+            "command": sys.argv,
+            "total_seconds": self.total_seconds(),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": [stats.to_dict() for stats in self.ordered_stages()],
+        }
+
+    def report(self) -> str:
+        """A table of the time, share of the total, throughput and memory of every stage"""
+        total = self.total_seconds()
+        lines = [f"{'Stage':<16}{'Time (s)':>10}{'Share':>8}{'Calls':>7}  {'Throughput':<24}{'Traced':>11}{'RSS':>11}"]
+
+        def memory(value: Optional[float]) -> str:
+            return f"{value:.1f} MiB" if value is not None else "-"
+
+        for stats in self.ordered_stages():
+            info = stats.to_dict()
+            throughput = f"{info['items_per_second']:,.0f} {stats.unit}/s" if info["items_per_second"] else ""
+            lines.append(
+                f"{stats.name:<16}{stats.seconds:>10.3f}{stats.seconds / total:>8.1%}{stats.calls:>7}  "
+                f"{throughput:<24}{memory(stats.peak_traced_mb):>11}{memory(stats.peak_rss_mb):>11}"
+            )
+
+        unstaged = total - sum(stats.seconds for stats in self.stages.values())
+        lines.append(f"{'(other)':<16}{unstaged:>10.3f}{unstaged / total:>8.1%}")
+        lines.append(f"{'total':<16}{total:>10.3f}{'':>8}{'':>7}  {'':<24}{'':>11}{memory(peak_rss_mb()):>11}")
+
+        return "\n".join(lines)
+
+    def save_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+
+_DISABLED_STAGE = _DisabledStage()
+_active_profiler = Profiler(enabled=False)
+
+
+def active_profiler() -> Profiler:
+    return _active_profiler
+
+
+def stage(name: str, items: int = 0, unit: Optional[str] = None):
+    """Times a stage with the profiler of the running script. See Profiler.stage"""
+    return _active_profiler.stage(name, items, unit)
+
+
+def iter_stage(
+    name: str, iterable: Iterable[T], count: Optional[Callable[[T], int]] = None, unit: Optional[str] = None
+) -> Iterator[T]:
+    """Yields the items of iterable, timing the production of every item as the stage name of the profiler of the
+    running script. count returns the number of items processed to produce an item, for the throughput"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as open_stage:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            if count is not None:
+                open_stage.add_items(count(item), unit)
+
+        yield item
+
+
+def add_profile_args(parser: argparse.ArgumentParser):
+    profile_args = parser.add_argument_group("Profiling arguments")
+    profile_args.add_argument(
+        "--profile", action="store_true", help="Print how long each stage (load, compute, render, save) took"
+    )
+    profile_args.add_argument(
+        "--profile_memory",
+        action="store_true",
+        help="Also record the peak memory allocated by Python in each stage. Slows the script down",
+    )
+    profile_args.add_argument("--profile_json", help="Also save the stage breakdown to this JSON file")
+    profile_args.add_argument(
+        "--profile_cprofile", help="Also save cProfile statistics to this file, to view with python -m pstats"
+    )
+
+
+def _profiling_requested(args: argparse.Namespace) -> bool:
+    return bool(
+        getattr(args, "profile", False)
+        or getattr(args, "profile_memory", False)
+        or getattr(args, "profile_json", None)
+        or getattr(args, "profile_cprofile", None)
+    )
+
+
+class ProfileRun:
+    """Profiles a whole run of a script as requested by the arguments of add_profile_args"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.profiler = Profiler(_profiling_requested(args), getattr(args, "profile_memory", False))
+        self.cprofile = cProfile.Profile() if getattr(args, "profile_cprofile", None) else None
+        self._previous: Optional[Profiler] = None
+
+    def start(self) -> Profiler:
+        global _active_profiler
+        self._previous, _active_profiler = _active_profiler, self.profiler
+        self.profiler.start = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+        return self.profiler
+
+    def finish(self):
+        global _active_profiler
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.profiler.end = time.perf_counter()
+        self.profiler.close()
+        if self._previous is not None:
+            _active_profiler, self._previous = self._previous, None
+
+        if not self.profiler.enabled:
+            return
+
+        print(self.profiler.report())
+        if getattr(self.args, "profile_json", None):
+            self.profiler.save_json(self.args.profile_json)
+            print(f"Saved stage timings to '{self.args.profile_json}'")
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(self.args.profile_cprofile)
+            print(f"Saved cProfile statistics to '{self.args.profile_cprofile}'")
+
+
+@contextlib.contextmanager
+def profile_run(args: argparse.Namespace) -> Iterator[Profiler]:
+    """Profiles the code inside the with block as requested by the arguments of add_profile_args, and prints the
+    breakdown at the end, even if the script fails"""
+    run = ProfileRun(args)
+    profiler = run.start()
+    try:
+        yield profiler
+    finally:
+        run.finish()
+
+
+def profile_script(args: argparse.Namespace) -> Profiler:
+    """Like profile_run, for scripts that run at module level instead of in a main function.
+    The breakdown is printed when the interpreter exits"""
+    run = ProfileRun(args)
+    atexit.register(run.finish)
+    return run.start()
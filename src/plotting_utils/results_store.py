@@ -0,0 +1,189 @@
+"""Append-only SQLite store of machine learning runs and their per-epoch metrics"""
+
+import datetime
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_STORE_PATH = os.path.join("results", "MachineLearning", "results.sqlite")
+
+FILTER_OPERATORS = ["<=", ">=", "!=", "=", "<", ">"]
+
+
+class RunRecord(NamedTuple):
+    run_id: str
+    config_hash: str
+    config: Dict
+    created: str
+    result_path: Optional[str]
+    final_metrics: Dict
+    timing: Dict
+
+
+def config_hash(config: Dict) -> str:
+    """Returns a stable hash of a run configuration. Key order does not affect the hash"""
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def files_fingerprint(folder: str, pattern: str = "**/*.csv") -> List[List]:
+    """[path relative to folder, size, modification time in ns] of every file matching pattern, sorted by path.
+    Part of a run configuration, so runs on changed data do not match runs on the earlier data"""
+    fingerprint = []
+    for path in sorted(glob.glob(os.path.join(folder, pattern), recursive=True)):
+        stat = os.stat(path)
+        fingerprint.append([os.path.relpath(path, folder).replace(os.sep, "/"), stat.st_size, stat.st_mtime_ns])
+
+    return fingerprint
+
+
+def parse_filter(filter_str: str) -> Tuple[str, str, object]:
+    """Parses a filter such as 'frame_count=1000' or 'learning_rate<0.01' into (key, operator, value)"""
+    for operator in FILTER_OPERATORS:
+        if operator in filter_str:
+            key, value_str = filter_str.split(operator, 1)
+            try:
+                value: object = json.loads(value_str)
+            except json.JSONDecodeError:
+                value = value_str
+
+            return key.strip(), operator, value
+
+    raise ValueError(f"Filter '{filter_str}' must contain one of {FILTER_OPERATORS}")
+
+
+class ResultsStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                config_hash TEXT NOT NULL,
+                config TEXT NOT NULL,
+                created TEXT NOT NULL,
+                result_path TEXT,
+                final_metrics TEXT NOT NULL,
+                timing TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_config_hash ON runs (config_hash);
+            CREATE TABLE IF NOT EXISTS epoch_metrics (
+                run_id TEXT NOT NULL REFERENCES runs (run_id),
+                epoch INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (run_id, metric, epoch)
+            );
+            """
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def add_run(
+        self,
+        run_id: str,
+        config: Dict,
+        epoch_metrics: Dict[str, Sequence[float]],
+        final_metrics: Optional[Dict] = None,
+        timing: Optional[Dict] = None,
+        result_path: Optional[str] = None,
+    ) -> RunRecord:
+        """Adds a run and its per-epoch metrics. Raises sqlite3.IntegrityError if run_id already exists"""
+        record = RunRecord(
+            run_id,
+            config_hash(config),
+            config,
+            datetime.datetime.now().isoformat(timespec="seconds"),
+            result_path,
+            final_metrics or {},
+            timing or {},
+        )
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.run_id,
+                    record.config_hash,
+                    json.dumps(config, default=str),
+                    record.created,
+                    result_path,
+                    json.dumps(record.final_metrics),
+                    json.dumps(record.timing),
+                ),
+            )
+            self.connection.executemany(
+                "INSERT INTO epoch_metrics VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, epoch + 1, metric, float(value))
+                    for metric, values in epoch_metrics.items()
+                    for epoch, value in enumerate(values)
+                ],
+            )
+
+        return record
+
+    @staticmethod
+    def _to_record(row: Tuple) -> RunRecord:
+        return RunRecord(row[0], row[1], json.loads(row[2]), row[3], row[4], json.loads(row[5]), json.loads(row[6]))
+
+    def find_by_config_hash(self, hash_str: str) -> Optional[RunRecord]:
+        row = self.connection.execute(
+            "SELECT * FROM runs WHERE config_hash = ? ORDER BY created DESC, rowid DESC LIMIT 1", (hash_str,)
+        ).fetchone()
+
+        return self._to_record(row) if row else None
+
+    def query_runs(self, filters: Sequence[str] = (), run_ids: Sequence[str] = ()) -> List[RunRecord]:
+        """Returns runs whose config matches every filter (see parse_filter), optionally limited to run_ids"""
+        query = "SELECT * FROM runs"
+        clauses = []
+        parameters: List[object] = []
+
+        for filter_str in filters:
+            key, operator, value = parse_filter(filter_str)
+            clauses.append(f"json_extract(config, ?) {operator} ?")
+            parameters.extend([f"$.{key}", value])
+
+        if run_ids:
+            clauses.append(f"run_id IN ({', '.join('?' for _ in run_ids)})")
+            parameters.extend(run_ids)
+
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+
+        # created has a resolution of seconds, so runs added in the same second are ordered by insertion
+        rows = self.connection.execute(query + " ORDER BY created, rowid", parameters).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def epoch_metrics(self, run_ids: Sequence[str], metrics: Sequence[str] = ()) -> Dict[str, Dict[str, List[float]]]:
+        """Returns {run_id: {metric: per-epoch values}}, reading only the requested runs and metrics"""
+        if not run_ids:
+            return {}
+
+        query = f"SELECT run_id, metric, value FROM epoch_metrics WHERE run_id IN ({', '.join('?' for _ in run_ids)})"
+        parameters = list(run_ids)
+
+        if metrics:
+            query += f" AND metric IN ({', '.join('?' for _ in metrics)})"
+            parameters.extend(metrics)
+
+        result: Dict[str, Dict[str, List[float]]] = {}
+        for run_id, metric, value in self.connection.execute(query + " ORDER BY run_id, metric, epoch", parameters):
+            result.setdefault(run_id, {}).setdefault(metric, []).append(value)
+
+        return result
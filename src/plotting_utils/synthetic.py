@@ -0,0 +1,156 @@
+"""
+Deterministic synthetic DVS recordings for benchmarks and tests.
+
+A spot of events moves horizontally across the sensor following a sine, square, burst or triangle motion pattern.
+Events arrive at random at a constant average rate, are scattered around the spot, and are ON while the spot moves right
+and OFF while it moves left. Where the spot is still, such as on the plateaus of a square wave, polarity is random like
+sensor noise.
+
+Events are generated in fixed-size blocks, each from its own seed derived from the recording's seed, so a recording is
+identical however it is chunked and recordings of 1e8 events can be written without holding them in memory.
+"""
+
+import csv
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+from plotting_utils.chunked import EVENT_COUNT_HEADER, add_counts, event_counts
+from plotting_utils.event_arrays import EVENT_CSV_HEADER, SENSOR_HEIGHT, SENSOR_WIDTH, EventArrays
+
+WAVEFORMS = ("sine", "square", "burst", "triangle")
+
+BLOCK_SIZE = 1 << 20
+"""Number of events generated from each derived seed"""
+BURST_CYCLES = 5
+"""Sine cycles in the active half of every burst period"""
+
+
+def motion_pattern(waveform: str, phase: np.ndarray) -> np.ndarray:
+    """Position of the spot between -1 and 1 at phase (in periods) of a waveform
+
+    Raises
+    ------
+    ValueError
+        Raised when waveform is not one of WAVEFORMS
+    """
+    radians = 2 * np.pi * phase
+    if waveform == "sine":
+        return np.sin(radians)
+    if waveform == "square":
+        return signal.square(radians)
+    if waveform == "triangle":
+        return signal.sawtooth(radians + np.pi / 2, width=0.5)
+    if waveform == "burst":
+        return np.where(np.mod(phase, 1) < 0.5, np.sin(2 * BURST_CYCLES * radians), 0.0)
+
+    raise ValueError(f"Unknown waveform '{waveform}'. Choose from {list(WAVEFORMS)}")
+
+
+def _event_block(
+    block: int,
+    num_events: int,
+    event_rate: float,
+    waveform: str,
+    frequency: float,
+    seed: int,
+    width: int,
+    height: int,
+) -> EventArrays:
+    rng = np.random.default_rng([seed, block])
+
+    # Arrival times of a Poisson process with a known number of events in an interval are uniformly distributed
+    block_start = block * BLOCK_SIZE * 1e6 / event_rate
+    block_duration = num_events * 1e6 / event_rate
+    timestamps = np.floor(block_start + np.sort(rng.random(num_events)) * block_duration).astype(np.int64)
+
+    phase = timestamps * (frequency / 1e6)
+    position = motion_pattern(waveform, phase)
+    velocity = motion_pattern(waveform, phase + 1e-3) - motion_pattern(waveform, phase - 1e-3)
+
+    amplitude = 0.35 * width
+    x = width / 2 + amplitude * position + rng.normal(0, 2.0, num_events)
+    y = height / 2 + rng.normal(0, 4.0, num_events)
+    polarities = np.where(velocity != 0, velocity > 0, rng.random(num_events) < 0.5)
+
+    return EventArrays(
+        polarities,
+        np.clip(np.round(x), 0, width - 1).astype(np.int16),
+        np.clip(np.round(y), 0, height - 1).astype(np.int16),
+        timestamps,
+    )
+
+
+def iter_synthetic_events(
+    num_events: int,
+    event_rate: float = 1e6,
+    waveform: str = "sine",
+    frequency: float = 10.0,
+    seed: int = 0,
+    width: int = SENSOR_WIDTH,
+    height: int = SENSOR_HEIGHT,
+) -> Iterator[EventArrays]:
+    """Yields the events of a synthetic recording in time order, at most BLOCK_SIZE at a time
+
+    Parameters
+    ----------
+    num_events : int
+        Number of events in the recording. The recording lasts num_events / event_rate seconds
+    event_rate : float, optional
+        Events per second, by default 1e6
+    waveform : str, optional
+        Motion pattern of the spot, one of WAVEFORMS, by default "sine"
+    frequency : float, optional
+        Periods of the motion pattern per second, by default 10.0
+    seed : int, optional
+        Seed of the recording, by default 0
+    """
+    motion_pattern(waveform, np.zeros(1))  # Check the waveform before generating anything
+
+    for block, block_start in enumerate(range(0, num_events, BLOCK_SIZE)):
+        block_events = min(BLOCK_SIZE, num_events - block_start)
+        yield _event_block(block, block_events, event_rate, waveform, frequency, seed, width, height)
+
+
+def synthetic_events(num_events: int, **kwargs) -> EventArrays:
+    """Returns a whole synthetic recording. Takes the same arguments as iter_synthetic_events"""
+    return EventArrays.concatenate(EventArrays.empty(), *iter_synthetic_events(num_events, **kwargs))
+
+
+def write_event_csv(csv_file: str, num_events: int, start_timestamp: int = 0, **kwargs) -> str:
+    """Writes a synthetic recording as an On/Off,X,Y,Timestamp CSV with 1/-1 polarities, one block at a time.
+    Takes the same arguments as iter_synthetic_events. Returns csv_file"""
+    with open(csv_file, "w", newline="") as f:
+        f.write(",".join(EVENT_CSV_HEADER) + "\n")
+
+        for events in iter_synthetic_events(num_events, **kwargs):
+            block = pd.DataFrame(
+                {
+                    "On/Off": np.where(events.polarities, 1, -1),
+                    "X": events.x,
+                    "Y": events.y,
+                    "Timestamp": events.timestamps + start_timestamp,
+                }
+            )
+            block.to_csv(f, header=False, index=False)
+
+    return csv_file
+
+
+def write_event_count_csv(csv_file: str, num_events: int, window_us: int = 10_000, **kwargs) -> str:
+    """Writes the event counts of a synthetic recording per window of window_us microseconds as an
+    On Count,Off Count,Combined Count CSV. Takes the same arguments as iter_synthetic_events. Returns csv_file"""
+    totals = np.zeros((0, 3), dtype=np.int64)
+
+    for events in iter_synthetic_events(num_events, **kwargs):
+        # Windows are counted from time 0 so that blocks line up
+        totals = add_counts(totals, event_counts(events, window_us, start_time=0))
+
+    with open(csv_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EVENT_COUNT_HEADER)
+        writer.writerows(totals.tolist())
+
+    return csv_file
@@ -0,0 +1,137 @@
+"""Vectorized statistical and spectral features of event count windows"""
+
+from typing import List
+
+import numpy as np
+
+CHANNEL_NAMES = ["on", "off", "all"]
+FWHM_MULTIPLIER = 2.355
+
+
+def _channel_statistics(windows: np.ndarray) -> List[np.ndarray]:
+    mean = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    centered = windows - mean[:, np.newaxis, :]
+
+    # Guard against constant windows, which have a standard deviation of 0
+    safe_std = np.where(std == 0, 1, std)
+    skew = (centered**3).mean(axis=1) / safe_std**3
+    kurtosis = (centered**4).mean(axis=1) / safe_std**4 - 3
+
+    percentiles = np.percentile(windows, [10, 50, 90], axis=1)
+
+    return [
+        mean,
+        std**2,
+        FWHM_MULTIPLIER * std,
+        skew,
+        kurtosis,
+        windows.min(axis=1),
+        windows.max(axis=1),
+        percentiles[0],
+        percentiles[1],
+        percentiles[2],
+    ]
+
+
+def _band_powers(windows: np.ndarray, num_bands: int) -> List[np.ndarray]:
+    centered = windows - windows.mean(axis=1, keepdims=True)
+    power = np.abs(np.fft.rfft(centered, axis=1)) ** 2
+    power = power[:, 1:, :]  # The DC component is always 0 after centering
+    if power.shape[1] == 0:
+        # A single frame has no frequencies besides the DC component
+        no_power = np.zeros((windows.shape[0], windows.shape[2]))
+        return [no_power.copy() for _ in range(num_bands + 1)]
+
+    total_power = power.sum(axis=1)
+    total_power[total_power == 0] = 1
+
+    bands = [band.sum(axis=1) / total_power for band in np.array_split(power, num_bands, axis=1)]
+
+    # Index of the strongest frequency bin, relative to the number of bins
+    dominant_frequency = (power.argmax(axis=1) + 1) / power.shape[1]
+
+    return bands + [dominant_frequency]
+
+
+def _autocorrelation_peaks(windows: np.ndarray, min_lag: int) -> List[np.ndarray]:
+    num_frames = windows.shape[1]
+    centered = windows - windows.mean(axis=1, keepdims=True)
+
+    # Autocorrelation through the FFT. Zero padding avoids circular wrap-around
+    spectrum = np.fft.rfft(centered, n=2 * num_frames, axis=1)
+    autocorrelation = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :num_frames, :]
+
+    zero_lag = autocorrelation[:, :1, :].copy()
+    zero_lag[zero_lag == 0] = 1
+    autocorrelation = autocorrelation / zero_lag
+
+    search = autocorrelation[:, min_lag: num_frames // 2, :]
+    if search.shape[1] == 0:
+        # Too few frames to search for a peak at min_lag or more
+        no_peak = np.zeros((windows.shape[0], windows.shape[2]))
+        return [no_peak, no_peak.copy()]
+
+    peak_lag = search.argmax(axis=1) + min_lag
+    peak_value = search.max(axis=1)
+
+    return [peak_lag / num_frames, peak_value]
+
+
+def _row_correlation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a - a.mean(axis=1, keepdims=True)
+    b = b - b.mean(axis=1, keepdims=True)
+    denominator = np.sqrt((a**2).sum(axis=1) * (b**2).sum(axis=1))
+    denominator[denominator == 0] = 1
+
+    return (a * b).sum(axis=1) / denominator
+
+
+def extract_features(windows: np.ndarray, num_bands: int = 8, min_lag: int = 2) -> np.ndarray:
+    """Computes features for every window in bulk
+
+    Parameters
+    ----------
+    windows : np.ndarray
+        Event counts of shape (num_windows, num_frames, 3) with On, Off, and Combined counts in the last axis
+    num_bands : int, optional
+        Number of equal width FFT bands to report the relative power of, by default 8
+    min_lag : int, optional
+        Smallest lag considered when searching for the autocorrelation peak, by default 2
+
+    Returns
+    -------
+    np.ndarray
+        Features of shape (num_windows, num_features). Column names are given by feature_names
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    if windows.ndim != 3 or windows.shape[2] != 3:
+        raise ValueError(f"Expected windows of shape (num_windows, num_frames, 3). Got {windows.shape}")
+
+    on_sum = windows[:, :, 0].sum(axis=1)
+    off_sum = windows[:, :, 1].sum(axis=1)
+    all_sum = windows[:, :, 2].sum(axis=1)
+
+    ratios = [
+        on_sum / np.maximum(off_sum, 1),
+        on_sum / np.maximum(all_sum, 1),
+        _row_correlation(windows[:, :, 0], windows[:, :, 1]),
+    ]
+
+    per_channel = (
+        _channel_statistics(windows) + _band_powers(windows, num_bands) + _autocorrelation_peaks(windows, min_lag)
+    )
+
+    # Every per-channel feature has shape (num_windows, 3)
+    return np.column_stack([np.column_stack(per_channel)] + ratios).astype(np.float32)
+
+
+def feature_names(num_bands: int = 8) -> List[str]:
+    per_channel = (
+        ["mean", "variance", "fwhm", "skew", "kurtosis", "min", "max", "p10", "median", "p90"]
+        + [f"band_power_{i}" for i in range(num_bands)]
+        + ["dominant_frequency", "autocorrelation_peak_lag", "autocorrelation_peak"]
+    )
+
+    names = [f"{feature}_{channel}" for feature in per_channel for channel in CHANNEL_NAMES]
+    return names + ["on_off_ratio", "on_fraction", "on_off_correlation"]
@@ -0,0 +1,97 @@
+import operator
+
+import numpy as np
+import pytest
+
+from plotting_utils import chunked, event_arrays, synthetic
+
+
+@pytest.fixture(scope="module")
+def event_csv(tmp_path_factory) -> str:
+    csv_file = str(tmp_path_factory.mktemp("chunked") / "events.csv")
+    return synthetic.write_event_csv(csv_file, 20_000, event_rate=1e5, start_timestamp=1000)
+
+
+def count_on_events(events: event_arrays.EventArrays) -> int:
+    return int(events.polarities.sum())
+
+
+def test_byte_ranges_cover_every_row(event_csv):
+    ranges = chunked.byte_ranges(event_csv, chunk_bytes=10_000)
+
+    assert len(ranges) > 10
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+    with open(event_csv, "rb") as f:
+        data = f.read()
+    assert ranges[0][0] == data.index(b"\n") + 1 and ranges[-1][1] == len(data)
+    # Every range ends on a line boundary
+    assert all(data[end - 1: end] == b"\n" for _, end in ranges)
+
+    events = event_arrays.read_event_arrays(event_csv)
+    chunks = [chunked.read_range(event_csv, start, end) for start, end in ranges]
+    np.testing.assert_array_equal(event_arrays.EventArrays.concatenate(*chunks).timestamps, events.timestamps)
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_reductions_match_in_memory(event_csv, num_workers):
+    events = event_arrays.read_event_arrays(event_csv)
+    kwargs = dict(num_workers=num_workers, chunk_bytes=20_000)
+
+    assert chunked.reduce_chunks(event_csv, count_on_events, operator.add, 0, **kwargs) == events.polarities.sum()
+
+    summary = chunked.summarize(event_csv, **kwargs)
+    assert summary.num_events == 20_000 and summary.num_on_events == events.polarities.sum()
+    assert summary.first_timestamp == events.timestamps[0] and summary.last_timestamp == events.timestamps[-1]
+
+    counts = chunked.window_counts(event_csv, 1000, **kwargs)
+    np.testing.assert_array_equal(counts, synthetic.event_counts(events, 1000))
+
+    pixels = chunked.pixel_counts(event_csv, **kwargs)
+    assert pixels.sum() == 20_000
+    assert pixels[0, events.y[0], events.x[0]] + pixels[1, events.y[0], events.x[0]] >= 1
+    assert pixels[0].sum() == events.polarities.sum()
+
+    bins = np.arange(0, 129, 8)
+    np.testing.assert_array_equal(chunked.histogram(event_csv, "x", bins, **kwargs), np.histogram(events.x, bins)[0])
+
+
+def test_pixel_counts_time_range():
+    csv_file = "tests/test_data/OnOff-X-Y-Timestamp.csv"
+    events = event_arrays.read_event_arrays(csv_file)
+    start = int(events.timestamps[0])
+
+    pixels = chunked.pixel_counts(csv_file, start_time=start + 6, stop_time=start + 10, chunk_bytes=20)
+
+    assert pixels.sum() == 5
+    # The event at 45,12 happens twice, once within the range
+    assert pixels[:, 128 - 12, 45].sum() == 1
+
+
+def test_true_false_polarities():
+    csv_file = "tests/test_data/OnOff-X-Y-Timestamp-TrueFalse.csv"
+    summary = chunked.summarize(csv_file, chunk_bytes=30)
+
+    assert summary.num_events == 10 and summary.num_on_events == 6
+    assert summary.events_per_second == pytest.approx(10 / 19e-6)
+
+
+def test_empty_csv():
+    csv_file = "tests/test_data/OnOff-X-Y-Timestamp-NODATA.csv"
+
+    assert chunked.summarize(csv_file) == chunked.EventSummary(0, 0, None, None)
+    assert chunked.window_counts(csv_file, 1000).shape == (0, 3)
+
+
+def test_window_counts_out_of_order(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("On/Off,X,Y,Timestamp\n1,1,1,100\n1,1,1,90\n-1,1,1,250\n1,1,1,120\n")
+
+    # The event before the first row is not in any window. The last window is that of the latest event, not the last row
+    np.testing.assert_array_equal(chunked.window_counts(str(csv_file), 100), [[2, 0, 2], [0, 1, 1]])
+    assert chunked.window_counts(str(csv_file), 100, start_time=300).shape == (0, 3)
+
+
+def test_histogram_unknown_column(event_csv):
+    with pytest.raises(ValueError, match="polarity"):
+        chunked.histogram(event_csv, "polarity", np.arange(3))
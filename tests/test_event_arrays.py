@@ -0,0 +1,44 @@
+import re
+
+import numpy as np
+import pytest
+
+from plotting_utils import event_arrays
+from plotting_utils.event_arrays import EventArrays
+
+
+@pytest.mark.parametrize(
+    "csv_file", ["tests/test_data/OnOff-X-Y-Timestamp.csv", "tests/test_data/OnOff-X-Y-Timestamp-TrueFalse.csv"]
+)
+def test_read_event_arrays(csv_file):
+    events = event_arrays.read_event_arrays(csv_file)
+
+    assert events.polarities.tolist() == [True, False, False, True, True, True, True, True, False, False]
+    assert events.x.tolist() == [82, 17, 86, 69, 78, 94, 45, 45, 91, 86]
+    # Unlike SpatialCsvData, y is not flipped
+    assert events.y.tolist() == [128 - y for y in [78, 71, 37, 104, 75, 30, 12, 12, 32, 84]]
+    assert (events.timestamps - events.timestamps[0]).tolist() == [0, 4, 6, 8, 9, 9, 10, 11, 17, 19]
+
+
+def test_iter_event_chunks():
+    chunks = list(event_arrays.iter_event_chunks("tests/test_data/OnOff-X-Y-Timestamp.csv", chunk_size=4, skip_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4]
+    assert EventArrays.concatenate(*chunks).x.tolist() == [86, 69, 78, 94, 45, 45, 91, 86]
+
+
+def test_empty_csv():
+    assert len(event_arrays.read_event_arrays("tests/test_data/OnOff-X-Y-Timestamp-NODATA.csv")) == 0
+
+
+def test_incorrect_format():
+    with pytest.raises(ValueError, match=re.escape("Found header: ['On/Off', 'X', 'Y']")):
+        event_arrays.read_event_arrays("tests/test_data/OnOff-X-Y.csv")
+
+
+def test_in_bounds():
+    x = np.array([0, 128, 5], np.int16)
+    y = np.array([0, 5, -1], np.int16)
+    events = EventArrays(np.ones(3, bool), x, y, np.arange(3))
+
+    assert events.in_bounds().x.tolist() == [0]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from plotting_utils import event_stream
+from plotting_utils.event_stream import StreamingClassifier, RingBuffer
+
+
+def test_parse_event_line():
+    assert event_stream.parse_event_line("1,82,50,478504058\n") == (True, 82, 50, 478504058)
+    assert event_stream.parse_event_line("False,17,57,478504062") == (False, 17, 57, 478504062)
+    assert event_stream.parse_event_line("On/Off,X,Y,Timestamp") is None
+    assert event_stream.parse_event_line("1,82") is None
+
+
+def test_ring_buffer_order():
+    ring_buffer = RingBuffer(3, 1)
+
+    for i in range(5):
+        ring_buffer.append(np.array([i]))
+
+    assert ring_buffer.is_full()
+    assert ring_buffer.ordered().flatten().tolist() == [2, 3, 4]
+
+
+def test_streaming_classifier_replay():
+    model_inputs = []
+
+    def predict(model_input: np.ndarray) -> int:
+        model_inputs.append(model_input)
+        return len(model_inputs)
+
+    classifier = StreamingClassifier(predict, frame_count=2, reconstruction_window=5, hop=1)
+    predictions = list(classifier.process(event_stream.replay_file("tests/test_data/OnOff-X-Y-Timestamp.csv")))
+
+    assert [p.window_index for p in predictions] == [1, 2, 3]
+    assert [p.result for p in predictions] == [1, 2, 3]
+    assert model_inputs[0].tolist() == [[[1, 1, 2], [3, 1, 4]]]
+    assert model_inputs[1].tolist() == [[[3, 1, 4], [2, 0, 2]]]
+    assert model_inputs[2].tolist() == [[[2, 0, 2], [0, 2, 2]]]
+    assert set(classifier.latency.summary()) == {"parse", "accumulate", "predict", "total"}
+
+
+def test_streaming_classifier_hop():
+    classifier = StreamingClassifier(lambda x: None, frame_count=1, reconstruction_window=5, hop=2)
+    predictions = list(classifier.run(event_stream.replay_file("tests/test_data/OnOff-X-Y-Timestamp.csv")))
+
+    assert [p.window_index for p in predictions][-1] == 3
+    assert len(predictions) + classifier.dropped_predictions == 2
+
+
+def test_streaming_classifier_run_raises_reader_errors():
+    def lines():
+        yield from event_stream.replay_file("tests/test_data/OnOff-X-Y-Timestamp.csv")
+        raise ConnectionResetError("stream closed")
+
+    classifier = StreamingClassifier(lambda x: None, frame_count=1, reconstruction_window=5)
+
+    with pytest.raises(ConnectionResetError):
+        list(classifier.run(lines()))
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from plotting_utils import event_voxels
+from plotting_utils.event_arrays import EventArrays
+from plotting_utils.event_voxels import SparseVoxelWindows, VoxelWindowLoader
+
+WIDTH = 8
+HEIGHT = 6
+
+
+def random_events(num_events: int, seed: int = 0) -> EventArrays:
+    rng = np.random.default_rng(seed)
+    return EventArrays(
+        rng.random(num_events) < 0.5,
+        rng.integers(0, WIDTH, num_events).astype(np.int16),
+        rng.integers(0, HEIGHT, num_events).astype(np.int16),
+        np.sort(rng.integers(1000, 2000, num_events)),
+    )
+
+
+def naive_voxelize(events, start_time, window_us, num_time_bins):
+    grid = np.zeros((2, num_time_bins, HEIGHT, WIDTH))
+    for polarity, x, y, timestamp in zip(*events):
+        if start_time <= timestamp < start_time + window_us:
+            time_bin = (timestamp - start_time) * num_time_bins // window_us
+            grid[0 if polarity else 1, time_bin, y, x] += 1
+
+    return grid
+
+
+def test_voxelize_matches_naive():
+    events = random_events(500)
+
+    grid = event_voxels.voxelize(events, 1200, 300, 4, WIDTH, HEIGHT)
+
+    assert grid.shape == (2, 4, HEIGHT, WIDTH)
+    np.testing.assert_array_equal(grid, naive_voxelize(events, 1200, 300, 4))
+
+
+def test_sparse_windows_match_dense():
+    events = random_events(500)
+
+    windows = SparseVoxelWindows.from_events(events, 100, 3, WIDTH, HEIGHT, start_time=1000)
+
+    assert len(windows) == 10
+    assert windows.counts.sum() == len(events)
+    for i in range(len(windows)):
+        np.testing.assert_array_equal(windows.dense(i), naive_voxelize(events, 1000 + i * 100, 100, 3))
+
+
+def test_save_and_load(tmp_path):
+    windows = SparseVoxelWindows.from_events(random_events(200), 100, 3, WIDTH, HEIGHT)
+    path = str(tmp_path / "windows.npz")
+
+    windows.save(path)
+    loaded = SparseVoxelWindows.load(path)
+
+    assert SparseVoxelWindows.count_windows(path) == len(windows)
+    assert loaded.shape == windows.shape and loaded.start_time == windows.start_time
+    np.testing.assert_array_equal(loaded.dense_batch(range(len(loaded))), windows.dense_batch(range(len(windows))))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000])
+def test_streaming_matches_whole(chunk_size):
+    events = random_events(500)
+    chunks = [events.slice(start, start + chunk_size) for start in range(0, len(events), chunk_size)]
+
+    streamed = SparseVoxelWindows.concatenate(
+        list(event_voxels.iter_sparse_voxel_windows(chunks, 100, 3, WIDTH, HEIGHT, drop_last=False))
+    )
+    whole = SparseVoxelWindows.from_events(events, 100, 3, WIDTH, HEIGHT)
+
+    np.testing.assert_array_equal(streamed.offsets, whole.offsets)
+    np.testing.assert_array_equal(streamed.indices, whole.indices)
+    np.testing.assert_array_equal(streamed.counts, whole.counts)
+
+
+def test_encode_csv_drops_incomplete_window():
+    windows = event_voxels.encode_csv("tests/test_data/OnOff-X-Y-Timestamp.csv", 5, 1, chunk_size=3)
+
+    # Timestamps 0 to 19: windows [0, 5), [5, 10) and [10, 15) are complete
+    assert len(windows) == 3
+    assert windows.counts.sum() == 8
+
+
+def test_loader_serves_every_window_once(tmp_path):
+    paths = []
+    for seed in range(3):
+        path = str(tmp_path / f"{seed}.npz")
+        SparseVoxelWindows.from_events(random_events(300, seed), 100, 2, WIDTH, HEIGHT).save(path)
+        paths.append(path)
+
+    loader = VoxelWindowLoader(paths, [0, 1, 2], batch_size=4, seed=0)
+    batches = list(loader)
+
+    assert len(batches) == len(loader)
+    assert all(len(grids) == 4 for grids, _ in batches[:-1])
+    assert sum(len(grids) for grids, _ in batches) == loader.num_windows
+
+    labels = np.concatenate([batch_labels for _, batch_labels in batches])
+    assert sorted(labels.tolist()) == sorted(sum(([i] * n for i, n in enumerate(loader.window_counts)), []))
+    assert sum(grids.sum() for grids, _ in batches) == 900
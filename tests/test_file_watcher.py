@@ -0,0 +1,138 @@
+import json
+import os
+import time
+
+import pytest
+
+from plotting_utils import file_watcher
+from plotting_utils.file_watcher import DirectoryWatcher, FileState
+
+
+def write_file(path, text: str, age_seconds: float = 60.0):
+    """Writes a file last modified age_seconds ago"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+    modified = time.time() - age_seconds
+    os.utime(path, (modified, modified))
+
+
+class Recorder:
+    def __init__(self, fail_on: str = ""):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def __call__(self, path: str):
+        self.calls.append(os.path.basename(path))
+        if self.fail_on and path.endswith(self.fail_on):
+            raise ValueError("not an event CSV")
+
+
+def crash_on_b(path: str):
+    """Kills the worker process analyzing b.csv"""
+    if path.endswith("b.csv"):
+        os._exit(1)
+
+
+def test_scan_files(tmp_path):
+    write_file(tmp_path / "a.csv", "1")
+    write_file(tmp_path / "nested" / "b.csv", "22")
+    write_file(tmp_path / "notes.txt", "")
+    write_file(tmp_path / "results" / "c.csv", "")
+
+    states = file_watcher.scan_files(str(tmp_path), exclude=[str(tmp_path / "results")])
+
+    assert [os.path.relpath(path, tmp_path) for path in states] == ["a.csv", os.path.join("nested", "b.csv")]
+    assert states[str(tmp_path / "nested" / "b.csv")].size == 2
+
+
+def test_watcher_waits_for_files_to_settle(tmp_path):
+    recorder = Recorder()
+    watcher = DirectoryWatcher(str(tmp_path), {"record": recorder}, None, settle_seconds=30)
+
+    write_file(tmp_path / "old.csv", "1")
+    write_file(tmp_path / "writing.csv", "1", age_seconds=0)
+    watcher.poll()
+    assert recorder.calls == ["old.csv"]
+
+    # A file that is still growing is not stable, even once it is old enough
+    write_file(tmp_path / "writing.csv", "12")
+    watcher.settle_seconds = 0
+    watcher.poll()
+    assert recorder.calls == ["old.csv"]
+
+    watcher.poll()
+    assert recorder.calls == ["old.csv", "writing.csv"]
+
+
+def test_watcher_resumes_from_progress(tmp_path):
+    data = tmp_path / "data"
+    progress_path = str(tmp_path / "progress.json")
+    write_file(data / "a.csv", "1")
+    write_file(data / "b.csv", "2")
+
+    first, second = Recorder(), Recorder(fail_on="b.csv")
+    watcher = DirectoryWatcher(str(data), {"first": first, "second": second}, progress_path, settle_seconds=0)
+    results = watcher.poll()
+
+    assert [(os.path.basename(r.path), r.analysis, r.error) for r in results] == [
+        ("a.csv", "first", None),
+        ("a.csv", "second", None),
+        ("b.csv", "first", None),
+        ("b.csv", "second", "ValueError: not an event CSV"),
+    ]
+    assert json.load(open(progress_path))[str(data / "b.csv")]["analyses"]["second"] == "ValueError: not an event CSV"
+
+    # A restarted watcher only analyzes what changed
+    write_file(data / "b.csv", "changed")
+    first, second = Recorder(), Recorder()
+    restarted = DirectoryWatcher(str(data), {"first": first, "second": second}, progress_path, settle_seconds=0)
+    restarted.poll()
+    assert first.calls == ["b.csv"] and second.calls == ["b.csv"]
+
+    restarted.poll()
+    assert first.calls == ["b.csv"]
+
+
+def test_retry_failed(tmp_path):
+    write_file(tmp_path / "a.csv", "1")
+    progress = file_watcher.ProgressStore(None)
+    progress.record(str(tmp_path / "a.csv"), FileState(1, 0), "first", "ValueError")
+
+    assert progress.pending(str(tmp_path / "a.csv"), FileState(1, 0), ["first"]) == []
+    assert progress.pending(str(tmp_path / "a.csv"), FileState(1, 0), ["first"], retry_failed=True) == ["first"]
+    assert progress.pending(str(tmp_path / "a.csv"), FileState(2, 0), ["first"]) == ["first"]
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_run_once(tmp_path, num_workers):
+    write_file(tmp_path / "a.csv", "1")
+    write_file(tmp_path / "b.csv", "22")
+
+    results = []
+    watcher = DirectoryWatcher(
+        str(tmp_path), {"size": os.path.getsize}, None, settle_seconds=0, num_workers=num_workers
+    )
+    watcher.run(once=True, on_result=results.append)
+
+    names_and_errors = sorted((os.path.basename(result.path), result.error) for result in results)
+    assert names_and_errors == [("a.csv", None), ("b.csv", None)]
+    assert watcher.num_running == 0
+
+
+def test_worker_crash(tmp_path):
+    write_file(tmp_path / "a.csv", "1")
+    write_file(tmp_path / "b.csv", "22")
+
+    watcher = DirectoryWatcher(str(tmp_path), {"crash": crash_on_b}, None, settle_seconds=0, num_workers=2)
+    watcher.poll()
+    results = watcher._collect(wait=True)
+    assert ("b.csv", "worker crashed") in [(os.path.basename(result.path), result.error) for result in results]
+
+    # The crashed pool is replaced, so new files are still analyzed
+    write_file(tmp_path / "c.csv", "333")
+    watcher.poll()
+    results = watcher._collect(wait=True)
+    watcher.close()
+    assert [(os.path.basename(result.path), result.error) for result in results] == [("c.csv", None)]
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from plotting_utils import frame_accumulator
+from plotting_utils.event_arrays import EventArrays
+from plotting_utils.frame_accumulator import FrameType
+from plotting_utils.get_plotting_data import SpatialCsvData
+
+WIDTH = 8
+HEIGHT = 6
+
+
+def random_events(num_events: int, seed: int = 0) -> EventArrays:
+    rng = np.random.default_rng(seed)
+    return EventArrays(
+        rng.random(num_events) < 0.5,
+        rng.integers(0, WIDTH, num_events).astype(np.int16),
+        rng.integers(0, HEIGHT, num_events).astype(np.int16),
+        np.sort(rng.integers(1000, 2000, num_events)),
+    )
+
+
+def naive_frames(events, bounds, signed=False):
+    frames = np.zeros((len(bounds) - 1, HEIGHT, WIDTH))
+    for frame in range(len(bounds) - 1):
+        for i in range(bounds[frame], bounds[frame + 1]):
+            frames[frame, events.y[i], events.x[i]] += (1 if events.polarities[i] else -1) if signed else 1
+
+    return frames
+
+
+def test_time_window_bounds():
+    bounds = frame_accumulator.time_window_bounds(np.array([10, 12, 19, 20, 45]), 10)
+
+    np.testing.assert_array_equal(bounds, [0, 3, 4, 4, 5])
+
+
+def test_count_window_bounds():
+    np.testing.assert_array_equal(frame_accumulator.count_window_bounds(10, 4), [0, 4, 8])
+    np.testing.assert_array_equal(frame_accumulator.count_window_bounds(10, 4, drop_last=False), [0, 4, 8, 10])
+
+
+@pytest.mark.parametrize("frame_type, signed", [(FrameType.COUNT, False), (FrameType.POLARITY, True)])
+def test_frames_by_time_match_naive(frame_type, signed):
+    events = random_events(500)
+
+    frames, starts = frame_accumulator.frames_by_time(events, 300, frame_type, WIDTH, HEIGHT)
+
+    bounds = frame_accumulator.time_window_bounds(events.timestamps, 300)
+    assert frames.shape == (len(bounds) - 1, HEIGHT, WIDTH)
+    np.testing.assert_array_equal(starts, events.timestamps[0] + 300 * np.arange(len(frames)))
+    np.testing.assert_array_equal(frames, naive_frames(events, bounds, signed))
+
+
+def test_frames_by_count():
+    events = random_events(500)
+
+    frames, starts = frame_accumulator.frames_by_count(events, 64, FrameType.COUNT, WIDTH, HEIGHT)
+
+    assert len(frames) == 7
+    np.testing.assert_array_equal(frames.sum(axis=(1, 2)), 64)
+    np.testing.assert_array_equal(starts, events.timestamps[::64][:7])
+
+
+def test_time_surface():
+    events = EventArrays(
+        np.array([True, True, False]),
+        np.array([1, 1, 2], dtype=np.int16),
+        np.array([0, 0, 3], dtype=np.int16),
+        np.array([0, 50, 80]),
+    )
+
+    frames, _ = frame_accumulator.frames_by_time(events, 100, FrameType.TIME_SURFACE, WIDTH, HEIGHT, decay_us=10)
+
+    expected = np.zeros((1, HEIGHT, WIDTH))
+    expected[0, 0, 1] = np.exp(-(100 - 50) / 10)
+    expected[0, 3, 2] = np.exp(-(100 - 80) / 10)
+    np.testing.assert_allclose(frames, expected, rtol=1e-6)
+
+
+def test_events_outside_sensor_are_ignored():
+    events = EventArrays(np.array([True, True]), np.array([1, WIDTH]), np.array([1, 1]), np.array([0, 1]))
+
+    frames, _ = frame_accumulator.frames_by_count(events, 2, FrameType.COUNT, WIDTH, HEIGHT)
+
+    assert frames.sum() == 1
+
+
+def test_events_from_spatial_csv_data():
+    data = SpatialCsvData(polarity_as_bool=True, polarity_as_color=False)
+    data.append_row(True, 3, 128 - 5, 0)
+    data.append_row(False, 4, 128 - 0, 10)
+
+    events = frame_accumulator.events_from_spatial_csv_data(data)
+
+    np.testing.assert_array_equal(events.y, [5, 0])
+    np.testing.assert_array_equal(events.polarities, [True, False])
+
+
+def test_to_gray_image():
+    frame = np.array([[-2.0, 0.0, 2.0]])
+
+    np.testing.assert_array_equal(frame_accumulator.to_gray_image(frame, FrameType.POLARITY), [[0, 128, 255]])
+    np.testing.assert_array_equal(frame_accumulator.to_gray_image(np.abs(frame)), [[255, 0, 255]])
+
+
+def test_iter_decayed_frames_matches_one_chunk():
+    events = random_events(500)
+    chunks = [events.slice(start, start + 37) for start in range(0, len(events), 37)]
+
+    streamed = list(frame_accumulator.iter_decayed_frames(chunks, 100, 200.0, WIDTH, HEIGHT, max_frames_per_batch=3))
+    whole = list(frame_accumulator.iter_decayed_frames([events], 100, 200.0, WIDTH, HEIGHT))
+
+    assert [start for start, _ in streamed] == [start for start, _ in whole]
+    for (_, streamed_frame), (_, whole_frame) in zip(streamed, whole):
+        np.testing.assert_allclose(streamed_frame, whole_frame, rtol=1e-6)
+
+
+def test_iter_decayed_frames():
+    events = EventArrays(
+        np.array([True, False, True]),
+        np.array([1, 2, 1], dtype=np.int16),
+        np.array([0, 0, 0], dtype=np.int16),
+        np.array([0, 5, 35]),
+    )
+
+    frames = list(frame_accumulator.iter_decayed_frames([events], 10, 10.0, WIDTH, HEIGHT))
+
+    assert [start for start, _ in frames] == [0, 10, 20, 30]
+    decay = np.exp(-1.0)
+    np.testing.assert_allclose([frame[0, 0, 1] for _, frame in frames], [1, decay, decay**2, decay**3 + 1], rtol=1e-6)
+    np.testing.assert_allclose([frame[1, 0, 2] for _, frame in frames], [1, decay, decay**2, decay**3], rtol=1e-6)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from plotting_utils import image_entropy
+
+
+def naive_local_entropy(image, half_window=5):
+    result = np.zeros(image.shape)
+    for row in range(image.shape[0]):
+        for col in range(image.shape[1]):
+            region = image[
+                max(0, row - half_window): min(image.shape[0], row + half_window),
+                max(0, col - half_window): min(image.shape[1], col + half_window),
+            ].flatten()
+            _, counts = np.unique(region, return_counts=True)
+            probabilities = counts / region.size
+            result[row, col] = np.sum(probabilities * np.log2(1 / probabilities))
+
+    return result
+
+
+def test_box_sums():
+    values = np.arange(20).reshape(4, 5)
+
+    sums = image_entropy.box_sums(values, 1)
+
+    assert sums[0, 0] == values[0, 0]
+    assert sums[2, 3] == values[1:3, 2:4].sum()
+    assert sums[3, 4] == values[2:4, 3:5].sum()
+
+
+@pytest.mark.parametrize("shape, levels", [((17, 23), 4), ((30, 12), 256), ((3, 3), 2)])
+def test_local_entropy_matches_naive(shape, levels):
+    image = np.random.default_rng(0).integers(0, levels, size=shape) * 0.37
+
+    np.testing.assert_allclose(image_entropy.local_entropy(image, 5), naive_local_entropy(image, 5), atol=1e-9)
+
+
+def test_constant_image_has_no_entropy():
+    np.testing.assert_allclose(image_entropy.local_entropy(np.full((8, 8), 3.0)), 0, atol=1e-12)
+
+
+def test_local_entropy_many_levels():
+    rng = np.random.default_rng(2)
+    image = rng.random((23, 17))  # every pixel is its own level, so windows are sorted
+
+    assert np.allclose(image_entropy.local_entropy(image), naive_local_entropy(image))
+
+
+def test_local_entropy_sorting_matches_integral_images():
+    rng = np.random.default_rng(3)
+    image = rng.integers(0, image_entropy.MAX_LEVELS_FOR_INTEGRAL_IMAGES + 1, (40, 30))
+
+    assert len(np.unique(image)) > image_entropy.MAX_LEVELS_FOR_INTEGRAL_IMAGES
+    assert np.allclose(image_entropy.local_entropy(image), naive_local_entropy(image))
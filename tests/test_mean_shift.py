@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.cluster import MeanShift
+
+from plotting_utils import mean_shift
+
+
+@pytest.fixture
+def pixels():
+    rng = np.random.default_rng(0)
+    image = np.zeros((40, 40, 3), dtype=np.uint8)
+    image[10:30, 10:] = [200, 40, 40]
+    image[:15, :15] = [30, 180, 90]
+    image += rng.integers(0, 25, image.shape).astype(np.uint8)
+
+    return image.reshape(-1, 3)
+
+
+def test_unique_colors(pixels):
+    colors, counts, inverse = mean_shift.unique_colors(pixels)
+
+    assert counts.sum() == len(pixels)
+    np.testing.assert_array_equal(colors[inverse], pixels)
+
+
+def test_unique_colors_quantized():
+    pixels = np.array([[0, 0, 0], [3, 2, 1], [4, 0, 0], [7, 7, 7]])
+
+    colors, counts, inverse = mean_shift.unique_colors(pixels, quantization_step=4)
+
+    np.testing.assert_array_equal(colors, [[1.5, 1.5, 1.5], [5.5, 1.5, 1.5], [5.5, 5.5, 5.5]])
+    np.testing.assert_array_equal(counts, [2, 1, 1])
+    np.testing.assert_array_equal(inverse, [0, 0, 1, 2])
+
+
+def test_mean_shift_matches_sklearn(pixels):
+    bandwidth = mean_shift.estimate_pixel_bandwidth(pixels)
+    expected = MeanShift(bandwidth=bandwidth, bin_seeding=True).fit(pixels)
+
+    labels = mean_shift.mean_shift_labels(pixels, bandwidth)
+    colors, counts, _ = mean_shift.unique_colors(pixels)
+    centers, _ = mean_shift.weighted_mean_shift(colors, counts.astype(np.float64), bandwidth)
+
+    np.testing.assert_array_equal(labels, expected.labels_)
+    np.testing.assert_allclose(centers, expected.cluster_centers_)
+
+
+def test_bin_seeds_counts_pixels_not_colors():
+    # Every color has its own grid cell, but sklearn sees 4 pixels in 2 cells and seeds with the cells
+    colors = np.array([[10.0, 10.0, 10.0], [52.0, 52.0, 52.0]])
+    pixels = np.repeat(colors, 2, axis=0)
+    expected = MeanShift(bandwidth=20, bin_seeding=True).fit(pixels)
+
+    np.testing.assert_array_equal(mean_shift.bin_seeds(colors, 20), colors)
+    np.testing.assert_allclose(mean_shift.bin_seeds(colors, 20, num_pixels=4), [[0, 0, 0], [60, 60, 60]])
+    centers, _ = mean_shift.weighted_mean_shift(colors, np.array([2.0, 2.0]), 20)
+    np.testing.assert_allclose(centers, expected.cluster_centers_)
+
+
+def test_estimate_pixel_bandwidth_is_repeatable(pixels):
+    assert mean_shift.estimate_pixel_bandwidth(pixels) == mean_shift.estimate_pixel_bandwidth(pixels)
+
+
+def test_cached_bandwidth(tmp_path, pixels):
+    cache_path = str(tmp_path / "bandwidth.json")
+
+    bandwidth = mean_shift.cached_bandwidth(cache_path, pixels)
+
+    assert bandwidth == mean_shift.estimate_pixel_bandwidth(pixels)
+    assert mean_shift.cached_bandwidth(cache_path, pixels[:10]) == bandwidth
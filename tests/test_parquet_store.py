@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from plotting_utils import chunked, event_arrays, get_plotting_data, synthetic
+from plotting_utils.get_plotting_data import DataStorage
+
+pytest.importorskip("pyarrow")
+
+from plotting_utils import parquet_store  # noqa: E402
+from plotting_utils.parquet_store import PixelBox  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("parquet_store")
+    csv_file = synthetic.write_event_csv(str(directory / "events.csv"), 20_000, event_rate=1e5, start_timestamp=1000)
+    store = str(directory / "events.parquet")
+    parquet_store.write_event_store(csv_file, store, partition_us=50_000, row_group_size=500, chunk_size=3000)
+
+    return csv_file, store
+
+
+def test_round_trip(recording):
+    csv_file, store = recording
+    events = event_arrays.read_event_arrays(csv_file)
+
+    info = parquet_store.read_store_info(store)
+    assert info.num_events == 20_000 and info.first_timestamp == events.timestamps[0]
+
+    for expected, actual in zip(events, parquet_store.read_events(store)):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_filters_are_pushed_down(recording):
+    csv_file, store = recording
+    events = event_arrays.read_event_arrays(csv_file)
+    box = PixelBox(60, 64, 60, 70)
+    start_time, stop_time = 50_000, 90_000
+
+    selected = parquet_store.read_events(store, start_time=start_time, stop_time=stop_time, box=box, polarity=False)
+
+    mask = (
+        (events.timestamps >= start_time)
+        & (events.timestamps <= stop_time)
+        & (events.x >= 60)
+        & (events.x <= 64)
+        & (events.y >= 60)
+        & (events.y <= 70)
+        & ~events.polarities
+    )
+    assert 0 < len(selected) < mask.size
+    np.testing.assert_array_equal(selected.timestamps, events.timestamps[mask])
+
+    # Time ranges skip partitions and pixel boxes skip the row groups of other rows of the sensor
+    matching, total = parquet_store.row_group_counts(store, start_time=start_time, stop_time=stop_time)
+    assert matching < total / 2
+    matching, total = parquet_store.row_group_counts(store, box=PixelBox(0, 127, 0, 40))
+    assert matching < total / 2
+
+
+def test_unsorted_recording(tmp_path):
+    events = synthetic.synthetic_events(5000, event_rate=1e5)
+    # An event of the first partition arrives in the third chunk, after the first partition was written
+    order = np.arange(len(events))
+    order[[10, 2500]] = order[[2500, 10]]
+    shuffled = event_arrays.EventArrays(*(column[order] for column in events))
+    chunks = [shuffled.slice(start, start + 1000) for start in range(0, len(shuffled), 1000)]
+
+    info = parquet_store.write_events(chunks, str(tmp_path / "store"), partition_us=10_000)
+
+    assert (tmp_path / "store" / "time_bucket=0" / "part-1.parquet").is_file()
+    assert info.first_timestamp == events.timestamps[0] and info.last_timestamp == events.timestamps[-1]
+    # Events are read partition by partition, in the order of the recording within a partition
+    expected = shuffled.timestamps[np.argsort(shuffled.timestamps // 10_000, kind="stable")]
+    np.testing.assert_array_equal(parquet_store.read_events(str(tmp_path / "store")).timestamps, expected)
+    with pytest.raises(FileExistsError):
+        parquet_store.write_events(chunks, str(tmp_path / "store"))
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"time_limit": 0.05}, {"time_limit": 0.05, "skip_rows": 1234}])
+def test_spatial_data_from_parquet(recording, kwargs):
+    csv_file, store = recording
+
+    expected = get_plotting_data.SpatialCsvData.from_csv(csv_file, DataStorage.BOOL_AND_COLOR, **kwargs)
+    actual = get_plotting_data.SpatialCsvData.from_path(store, DataStorage.BOOL_AND_COLOR, **kwargs)
+
+    assert actual.timestamps == expected.timestamps
+    assert actual.x_positions == expected.x_positions and actual.y_positions == expected.y_positions
+    assert actual.polarities == expected.polarities and actual.polarities_color == expected.polarities_color
+
+
+def test_event_counts_from_parquet(recording, tmp_path):
+    csv_file, store = recording
+    counts = chunked.window_counts(csv_file, 1000)
+    np.testing.assert_array_equal(parquet_store.window_counts(store, 1000), counts)
+
+    count_csv = str(tmp_path / "counts.csv")
+    with open(count_csv, "w") as f:
+        f.write(",".join(chunked.EVENT_COUNT_HEADER) + "\n")
+        f.writelines(",".join(map(str, row)) + "\n" for row in counts.tolist())
+
+    expected = get_plotting_data.read_event_counts(count_csv, 1000)
+    actual = get_plotting_data.read_event_counts(store, 1000)
+    assert vars(actual) == {**vars(expected), "file_name": store}
+
+
+def test_activity_area_matches_pixel_box(recording):
+    csv_file, store = recording
+    events = event_arrays.read_event_arrays(csv_file)
+
+    points = parquet_store.activity_area(store, 64, 64, 3, time_limit=0.1)
+
+    box = PixelBox.around(64, 64, 3)
+    mask = (
+        (events.x >= box.x_min)
+        & (events.x <= box.x_max)
+        & (events.y >= box.y_min)
+        & (events.y <= box.y_max)
+        & (events.timestamps - events.timestamps[0] <= 100_000)
+    )
+    assert points == np.stack(
+        [np.where(events.polarities[mask], 1, -1), events.timestamps[mask] - events.timestamps[0]], axis=1
+    ).tolist()
+    assert parquet_store.activity_area(store, 64, 64, 3, max_points=5) == points[:5]
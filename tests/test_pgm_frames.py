@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from plotting_utils import pgm_frames
+from plotting_utils.pgm_frames import FrameStack
+
+
+def make_pgm_string(frame: np.ndarray, max_value: int = 255) -> str:
+    height, width = frame.shape
+    rows = "-".join(" ".join(str(value) for value in row) for row in frame)
+    return f"P2-{width} {height}-{max_value}-{rows}-"
+
+
+@pytest.fixture
+def frames():
+    return np.random.default_rng(0).integers(0, 256, size=(10, 4, 6), dtype=np.uint8)
+
+
+def write_csv(path, frames, with_timestamps=True, trailing_blank_lines=0):
+    with open(path, "w") as f:
+        f.write("Timestamp, PGM_String\n" if with_timestamps else "PGM_String\n")
+        for i, frame in enumerate(frames):
+            pgm_string = make_pgm_string(frame)
+            f.write(f"{1000 + i * 10},{pgm_string}\n" if with_timestamps else f"{pgm_string}\n")
+        f.write("\n" * trailing_blank_lines)
+
+    return str(path)
+
+
+def test_decode_pgm_string(frames):
+    np.testing.assert_array_equal(pgm_frames.decode_pgm_string(make_pgm_string(frames[0])), frames[0])
+
+
+def test_decode_pgm_string_rescales():
+    frame = np.array([[0, 512, 1023]])
+
+    decoded = pgm_frames.decode_pgm_string(make_pgm_string(frame, max_value=1023))
+
+    assert decoded.dtype == np.uint8
+    assert decoded.tolist() == [[0, 127, 255]]
+
+
+@pytest.mark.parametrize("pgm_string", ["P5-2 1-255-00", "P2-2 2-255-1 2 3-"])
+def test_decode_invalid_pgm_string(pgm_string):
+    with pytest.raises(ValueError):
+        pgm_frames.decode_pgm_string(pgm_string)
+
+
+def test_decode_pgm_strings(frames):
+    pgm_strings = [make_pgm_string(frame) for frame in frames]
+
+    np.testing.assert_array_equal(pgm_frames.decode_pgm_strings(pgm_strings), frames)
+
+
+def test_decode_pgm_strings_different_sizes(frames):
+    pgm_strings = [make_pgm_string(frames[0]), make_pgm_string(frames[1, :2])]
+
+    with pytest.raises(ValueError, match="Frame 1"):
+        pgm_frames.decode_pgm_strings(pgm_strings)
+
+
+def test_pgm_bytes(frames):
+    header, width_height, max_value, pixels = pgm_frames.pgm_bytes(frames[0]).split(b"\n", 3)
+
+    assert (header, width_height, max_value) == (b"P5", b"6 4", b"255")
+    np.testing.assert_array_equal(np.frombuffer(pixels, dtype=np.uint8).reshape(4, 6), frames[0])
+
+
+@pytest.mark.parametrize("start, stop, step", [(0, None, 1), (0, 4, 1), (2, None, 3), (1, 8, 2), (20, None, 2)])
+def test_iter_pgm_strings_range(tmp_path, frames, start, stop, step):
+    csv_file = write_csv(tmp_path / "frames.csv", frames, trailing_blank_lines=2)
+
+    chunks = list(pgm_frames.iter_pgm_strings(csv_file, chunk_size=2, start=start, stop=stop, step=step))
+    expected_rows = list(range(start, len(frames) if stop is None else stop, step))
+
+    assert [row for rows, _, _ in chunks for row in rows.tolist()] == expected_rows
+    assert [t for _, timestamps, _ in chunks for t in timestamps.tolist()] == [1000 + i * 10 for i in expected_rows]
+    decoded = [pgm_frames.decode_pgm_string(pgm_string) for _, _, pgm_strings in chunks for pgm_string in pgm_strings]
+    np.testing.assert_array_equal(np.reshape(decoded, (-1, 4, 6)), frames[expected_rows])
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_write_frame_stack(tmp_path, frames, num_workers):
+    csv_file = write_csv(tmp_path / "frames.csv", frames)
+    output = str(tmp_path / "frames.npy")
+
+    assert pgm_frames.write_frame_stack(csv_file, output, num_workers=num_workers, chunk_size=3) == len(frames)
+
+    stack = FrameStack(output)
+    assert len(stack) == len(frames) and stack.frame_shape == (4, 6)
+    np.testing.assert_array_equal(stack.frames, frames)
+    assert stack.timestamps.tolist() == [1000 + i * 10 for i in range(len(frames))]
+
+
+def test_write_frame_stack_range_without_timestamps(tmp_path, frames):
+    csv_file = write_csv(tmp_path / "frames.csv", frames, with_timestamps=False, trailing_blank_lines=3)
+    output = str(tmp_path / "frames.npy")
+
+    assert pgm_frames.write_frame_stack(csv_file, output, start=7) == 3
+
+    stack = FrameStack(output)
+    np.testing.assert_array_equal(stack.frames, frames[7:])
+    assert stack.timestamps.tolist() == [7, 8, 9]
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_write_frame_stack_step(tmp_path, frames, num_workers):
+    csv_file = write_csv(tmp_path / "frames.csv", frames, with_timestamps=False)
+    output = str(tmp_path / "frames.npy")
+
+    assert pgm_frames.write_frame_stack(csv_file, output, start=1, num_workers=num_workers, step=4) == 3
+
+    stack = FrameStack(output)
+    np.testing.assert_array_equal(stack.frames, frames[1::4])
+    assert stack.timestamps.tolist() == [1, 5, 9]
+
+
+def test_write_frame_stack_missing_column(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("On/Off,X,Y,Timestamp\n1,2,3,4\n")
+
+    with pytest.raises(ValueError, match="PGM_String"):
+        pgm_frames.write_frame_stack(str(csv_file), str(tmp_path / "frames.npy"))
+
+    assert not (tmp_path / "frames.npy").exists()
+
+
+def test_frame_stack_random_access(tmp_path, frames):
+    output = str(tmp_path / "frames.npy")
+    pgm_frames.write_frame_stack(write_csv(tmp_path / "frames.csv", frames), output)
+    stack = FrameStack(output)
+
+    np.testing.assert_array_equal(stack.batch([5, 1, 8]), frames[[5, 1, 8]])
+    assert stack.index_at(1035) == 3
+    assert stack.index_at(0) == 0
+
+    batches = list(stack.iter_batches(batch_size=4, shuffle=True, seed=0))
+    assert [len(batch) for batch, _ in batches] == [4, 4, 2]
+    assert sorted(np.concatenate([timestamps for _, timestamps in batches]).tolist()) == stack.timestamps.tolist()
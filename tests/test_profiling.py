@@ -0,0 +1,128 @@
+import argparse
+import json
+import pstats
+import time
+
+import numpy as np
+import pytest
+
+from plotting_utils import profiling
+from plotting_utils.profiling import Profiler
+
+
+def profile_args(**kwargs) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    profiling.add_profile_args(parser)
+    args = parser.parse_args([])
+    for key, value in kwargs.items():
+        setattr(args, key, value)
+
+    return args
+
+
+def test_nested_stages_are_exclusive():
+    profiler = Profiler()
+
+    with profiler.stage("render"):
+        time.sleep(0.02)
+        with profiler.stage("save"):
+            time.sleep(0.05)
+    with profiler.stage("save"):
+        time.sleep(0.01)
+
+    render, save = profiler.stages["render"], profiler.stages["save"]
+    assert 0.02 <= render.seconds < 0.05
+    assert save.seconds >= 0.06 and save.calls == 2
+    assert render.seconds + save.seconds <= profiler.total_seconds()
+
+
+def test_stage_throughput():
+    profiler = Profiler()
+
+    with profiler.stage("load", items=1000) as load:
+        time.sleep(0.01)
+        load.add_items(500, "rows")
+
+    stats = profiler.stages["load"].to_dict()
+    assert stats["items"] == 1500 and stats["unit"] == "rows"
+    assert 0 < stats["items_per_second"] <= 1500 / 0.01
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+
+    with profiler.stage("load", items=10) as load:
+        load.add_items(5)
+
+    assert profiler.stages == {}
+
+
+def test_memory_tracking():
+    profiler = Profiler(track_memory=True)
+
+    with profiler.stage("compute"):
+        with profiler.stage("load"):
+            data = np.ones(4 * 2**20, dtype=np.uint8)
+        del data
+        small = np.ones(2**20, dtype=np.uint8)
+    del small
+    profiler.close()
+
+    assert profiler.stages["load"].peak_traced_mb == pytest.approx(4, abs=0.5)
+    assert profiler.stages["compute"].peak_traced_mb >= 4
+
+    report = profiler.report()
+    assert "load" in report and "MiB" in report
+
+
+def test_report_orders_stages():
+    profiler = Profiler()
+    for name in ["save", "other", "load"]:
+        with profiler.stage(name):
+            pass
+
+    lines = profiler.report().splitlines()
+    assert [line.split()[0] for line in lines[1:4]] == ["load", "save", "other"]
+    assert lines[-1].startswith("total")
+
+
+def test_profile_run(tmp_path, capsys):
+    json_path = str(tmp_path / "timings.json")
+    cprofile_path = str(tmp_path / "run.prof")
+
+    with profiling.profile_run(profile_args(profile_json=json_path, profile_cprofile=cprofile_path)):
+        with profiling.stage("load", items=10):
+            sum(range(1000))
+
+    # The stages of a finished run are no longer recorded
+    assert not profiling.active_profiler().enabled
+
+    record = json.load(open(json_path))
+    assert [stage["name"] for stage in record["stages"]] == ["load"]
+    assert record["stages"][0]["items"] == 10
+    assert pstats.Stats(cprofile_path).total_calls > 0
+    assert "load" in capsys.readouterr().out
+
+
+def test_profile_run_without_profiling(capsys):
+    with profiling.profile_run(profile_args()) as profiler:
+        with profiling.stage("load"):
+            pass
+
+    assert not profiler.enabled and profiler.stages == {}
+    assert capsys.readouterr().out == ""
+
+
+def test_iter_stage():
+    def chunks():
+        for size in [3, 4]:
+            time.sleep(0.01)
+            yield list(range(size))
+
+    with profiling.profile_run(profile_args(profile=True)) as profiler:
+        sizes = [len(chunk) for chunk in profiling.iter_stage("load", chunks(), len, "rows")]
+
+    assert sizes == [3, 4]
+    load = profiler.stages["load"]
+    assert load.calls == 3 and load.items == 7 and load.unit == "rows"
+    assert load.seconds >= 0.02
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from plotting_utils import results_store
+from plotting_utils.results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultsStore(str(tmp_path / "results.sqlite")) as store:
+        store.add_run(
+            "run-a", {"frame_count": 1000, "learning_rate": 0.001}, {"loss": [3.0, 2.0], "val_loss": [3.5, 2.5]}
+        )
+        store.add_run("run-b", {"frame_count": 500, "learning_rate": 0.01}, {"loss": [4.0, 3.0, 1.0]})
+        yield store
+
+
+def test_config_hash_ignores_key_order():
+    assert results_store.config_hash({"a": 1, "b": 2}) == results_store.config_hash({"b": 2, "a": 1})
+    assert results_store.config_hash({"a": 1}) != results_store.config_hash({"a": 2})
+
+
+def test_files_fingerprint(tmp_path):
+    (tmp_path / "sine").mkdir()
+    (tmp_path / "sine" / "10hz.csv").write_text("1,2,3\n")
+    (tmp_path / "notes.txt").write_text("")
+
+    fingerprint = results_store.files_fingerprint(str(tmp_path))
+    assert [entry[:2] for entry in fingerprint] == [["sine/10hz.csv", 6]]
+
+    (tmp_path / "sine" / "10hz.csv").write_text("1,2,3\n4,5,6\n")
+    assert results_store.files_fingerprint(str(tmp_path)) != fingerprint
+
+
+def test_parse_filter():
+    assert results_store.parse_filter("frame_count=1000") == ("frame_count", "=", 1000)
+    assert results_store.parse_filter("learning_rate<=0.01") == ("learning_rate", "<=", 0.01)
+    assert results_store.parse_filter("model=gru") == ("model", "=", "gru")
+
+    with pytest.raises(ValueError):
+        results_store.parse_filter("frame_count")
+
+
+def test_query_runs(store):
+    assert [run.run_id for run in store.query_runs()] == ["run-a", "run-b"]
+    assert [run.run_id for run in store.query_runs(["frame_count=1000"])] == ["run-a"]
+    assert [run.run_id for run in store.query_runs(["learning_rate>0.001"])] == ["run-b"]
+    assert [run.run_id for run in store.query_runs(run_ids=["run-b"])] == ["run-b"]
+
+
+def test_epoch_metrics(store):
+    assert store.epoch_metrics(["run-a", "run-b"], ["loss"]) == {
+        "run-a": {"loss": [3.0, 2.0]},
+        "run-b": {"loss": [4.0, 3.0, 1.0]},
+    }
+
+
+def test_find_by_config_hash(store):
+    found = store.find_by_config_hash(results_store.config_hash({"learning_rate": 0.001, "frame_count": 1000}))
+
+    assert found is not None and found.run_id == "run-a"
+    assert store.find_by_config_hash(results_store.config_hash({})) is None
+
+
+def test_runs_in_the_same_second_keep_their_order(store):
+    # Inserted within the same second as the fixture runs, so only the insertion order tells them apart
+    store.add_run("run-0", {"learning_rate": 0.001, "frame_count": 1000}, {})
+
+    assert [run.run_id for run in store.query_runs()] == ["run-a", "run-b", "run-0"]
+    found = store.find_by_config_hash(results_store.config_hash({"learning_rate": 0.001, "frame_count": 1000}))
+    assert found is not None and found.run_id == "run-0"
+
+
+def test_duplicate_run_id(store):
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_run("run-a", {}, {})
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from plotting_utils import event_arrays, synthetic
+from plotting_utils.get_plotting_data import DataStorage, SpatialCsvData, read_aedat_csv
+
+
+@pytest.mark.parametrize("waveform", synthetic.WAVEFORMS)
+def test_motion_pattern_range(waveform):
+    position = synthetic.motion_pattern(waveform, np.linspace(0, 3, 1001))
+
+    assert position.min() >= -1 and position.max() <= 1
+    assert position.max() - position.min() > 1
+
+
+def test_motion_pattern_unknown_waveform():
+    with pytest.raises(ValueError, match="sawtooth"):
+        synthetic.motion_pattern("sawtooth", np.zeros(1))
+
+
+def test_synthetic_events_deterministic(monkeypatch):
+    monkeypatch.setattr(synthetic, "BLOCK_SIZE", 1000)
+    events = synthetic.synthetic_events(2500, event_rate=1e5, seed=3)
+    same = synthetic.synthetic_events(2500, event_rate=1e5, seed=3)
+    other = synthetic.synthetic_events(2500, event_rate=1e5, seed=4)
+
+    assert len(events) == 2500
+    for column, same_column in zip(events, same):
+        np.testing.assert_array_equal(column, same_column)
+    assert not np.array_equal(events.x, other.x)
+
+    assert np.all(np.diff(events.timestamps) >= 0)
+    assert events.timestamps[-1] < 2500 / 1e5 * 1e6
+    assert events.x.min() >= 0 and events.x.max() < event_arrays.SENSOR_WIDTH
+
+
+def test_synthetic_events_polarity_follows_motion():
+    events = synthetic.synthetic_events(20_000, event_rate=1e5, waveform="sine", frequency=10)
+    phase = np.mod(events.timestamps * 10 / 1e6, 1)
+
+    # A sine moves right in the first and last quarter of every period
+    moving_right = (phase < 0.24) | (phase > 0.76)
+    moving_left = (phase > 0.26) & (phase < 0.74)
+    assert events.polarities[moving_right].all()
+    assert not events.polarities[moving_left].any()
+
+
+def test_write_event_csv(tmp_path):
+    csv_file = synthetic.write_event_csv(str(tmp_path / "sine.csv"), 1000, event_rate=1e4, start_timestamp=500)
+    events = synthetic.synthetic_events(1000, event_rate=1e4)
+
+    read = event_arrays.read_event_arrays(csv_file)
+    np.testing.assert_array_equal(read.polarities, events.polarities)
+    np.testing.assert_array_equal(read.x, events.x)
+    np.testing.assert_array_equal(read.timestamps, events.timestamps + 500)
+
+    spatial = SpatialCsvData.from_csv(csv_file, DataStorage.BOOL)
+    assert len(spatial.timestamps) == 1000
+
+
+def test_write_event_count_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic, "BLOCK_SIZE", 700)
+    csv_file = synthetic.write_event_count_csv(str(tmp_path / "counts.csv"), 5000, window_us=1000, event_rate=1e5)
+
+    events = synthetic.synthetic_events(5000, event_rate=1e5)
+    expected = synthetic.event_counts(events, 1000, start_time=0)
+
+    counts = read_aedat_csv(csv_file, 1000)
+    assert counts.y_on == expected[:, 0].tolist()
+    assert counts.y_off == expected[:, 1].tolist()
+    assert sum(counts.y_all) == 5000
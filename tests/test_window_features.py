@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from plotting_utils import window_features
+
+
+def make_windows(num_frames: int = 200, period: int = 20) -> np.ndarray:
+    t = np.arange(num_frames)
+    on = 100 + 50 * np.sin(2 * np.pi * t / period)
+    off = np.full(num_frames, 50.0)
+    return np.stack([on, off, on + off], axis=-1)[np.newaxis]
+
+
+def test_feature_shape_matches_names():
+    features = window_features.extract_features(np.concatenate([make_windows(), make_windows(period=10)]))
+
+    assert features.shape == (2, len(window_features.feature_names()))
+    assert features.dtype == np.float32
+
+
+def test_statistics():
+    features = window_features.extract_features(make_windows())
+    named = dict(zip(window_features.feature_names(), features[0]))
+
+    assert named["mean_on"] == pytest.approx(100, abs=1e-3)
+    assert named["variance_off"] == 0
+    assert named["fwhm_on"] == pytest.approx(2.355 * 50 / np.sqrt(2), rel=1e-3)
+    assert named["on_off_ratio"] == pytest.approx(2, rel=1e-3)
+
+
+def test_periodicity():
+    features = window_features.extract_features(make_windows(num_frames=200, period=20))
+    named = dict(zip(window_features.feature_names(), features[0]))
+
+    # A period of 20 frames puts all of the power in FFT bin 10 of 100, which falls in the first of 8 bands
+    assert named["band_power_0_on"] == pytest.approx(1, abs=1e-3)
+    assert named["dominant_frequency_on"] == pytest.approx(10 / 100)
+    assert named["autocorrelation_peak_lag_on"] == pytest.approx(20 / 200)
+
+
+def test_short_windows():
+    # Too short to search for an autocorrelation peak at the default min_lag of 2
+    features = window_features.extract_features(make_windows(num_frames=4, period=2))
+    named = dict(zip(window_features.feature_names(), features[0]))
+
+    assert np.isfinite(features).all()
+    assert named["autocorrelation_peak_lag_on"] == 0 and named["autocorrelation_peak_on"] == 0
+    assert np.isfinite(window_features.extract_features(make_windows(num_frames=1))).all()
+
+
+def test_incorrect_shape():
+    with pytest.raises(ValueError, match="Expected windows of shape"):
+        window_features.extract_features(np.zeros((2, 10)))